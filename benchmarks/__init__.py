@@ -0,0 +1 @@
+"""Benchmarki wydajności ścieżek krytycznych PromptGlue."""
@@ -0,0 +1,100 @@
+"""Kalibracja estymatora tokenów względem tiktoken (cl100k_base).
+
+Dopasowuje wagi modelu liniowego z `prompt_assistant.core.token_estimator`
+metodą najmniejszych kwadratów na korpusie (domyślnie stdlib Pythona + repo)
+i wypisuje wagi oraz percentyle błędu względnego.
+
+Przykład:
+    python -m benchmarks.calibrate_estimator --limit 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sysconfig
+
+from prompt_assistant.core.token_estimator import _WEIGHTS, byte_class_features
+from prompt_assistant.utils import count_tokens
+
+_CORPUS_EXTENSIONS = (".py", ".txt", ".json", ".html", ".rst", ".md", ".xml", ".cfg", ".toml", ".c", ".h", ".js", ".css")
+_FEATURE_NAMES = ("letters", "digits", "spaces", "newlines", "punct", "non_ascii", "indents")
+_MIN_TOKENS = 50
+
+
+def _collect_paths(roots: list[str]) -> list[str]:
+    paths: list[str] = []
+    for root_dir in roots:
+        for root, dirs, files in os.walk(root_dir):
+            dirs[:] = [name for name in dirs if name not in (".git", "site-packages", "__pycache__")]
+            paths.extend(os.path.join(root, name) for name in files if name.endswith(_CORPUS_EXTENSIONS))
+    return sorted(paths)
+
+
+def _solve_least_squares(rows: list[tuple[int, ...]], targets: list[int]) -> list[float]:
+    """Minimalizuje sumę kwadratów błędów względnych (wiersze ważone 1/target)."""
+    size = len(rows[0])
+    scaled = [[value / target for value in row] for row, target in zip(rows, targets)]
+    matrix = [[sum(row[i] * row[j] for row in scaled) for j in range(size)] for i in range(size)]
+    vector = [sum(row[i] for row in scaled) for i in range(size)]
+    augmented = [matrix[i] + [vector[i]] for i in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda r: abs(augmented[r][column]))
+        augmented[column], augmented[pivot] = augmented[pivot], augmented[column]
+        for row_index in range(size):
+            if row_index != column:
+                factor = augmented[row_index][column] / augmented[column][column]
+                augmented[row_index] = [a - factor * b for a, b in zip(augmented[row_index], augmented[column])]
+    return [augmented[i][size] / augmented[i][i] for i in range(size)]
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Kalibracja estymatora tokenów")
+    parser.add_argument("roots", nargs="*", help="Katalogi korpusu (domyślnie stdlib i bieżące repo)")
+    parser.add_argument("--limit", type=int, default=6000, help="Maksymalna liczba plików korpusu")
+    parser.add_argument("--seed", type=int, default=1, help="Ziarno losowania próbki korpusu")
+    args = parser.parse_args()
+
+    roots = args.roots or [sysconfig.get_paths()["stdlib"], os.getcwd()]
+    paths = _collect_paths(roots)
+    random.Random(args.seed).shuffle(paths)
+
+    rows: list[tuple[int, ...]] = []
+    targets: list[int] = []
+    for path in paths[: args.limit]:
+        try:
+            with open(path, encoding="utf-8") as file_handle:
+                text = file_handle.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+        if not text:
+            continue
+        rows.append(byte_class_features(text.encode("utf-8")))
+        targets.append(count_tokens(text))
+
+    fitted = _solve_least_squares(
+        [row for row, target in zip(rows, targets) if target > _MIN_TOKENS],
+        [target for target in targets if target > _MIN_TOKENS],
+    )
+    for name, current, weight in zip(_FEATURE_NAMES, _WEIGHTS, fitted):
+        print(f"{name:<10} obecna={current:8.4f} dopasowana={weight:8.4f}")
+
+    for label, weights in (("obecne", _WEIGHTS), ("dopasowane", fitted)):
+        errors = [
+            abs(sum(c * w for c, w in zip(row, weights)) - target) / target
+            for row, target in zip(rows, targets)
+            if target > _MIN_TOKENS
+        ]
+        print(
+            f"{label:<10} plików={len(errors)} p50={_percentile(errors, 0.5):.3f} "
+            f"p90={_percentile(errors, 0.9):.3f} p99={_percentile(errors, 0.99):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Benchmark ścieżek krytycznych warstwy core z wynikami w JSON.
+
+Przykład:
+    python -m benchmarks.core_bench --sizes 1000,10000 --output bench.json
+    python -m benchmarks.core_bench --sizes 1000 --compare bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from prompt_assistant.config import TREE_COLLAPSE_FILES, TREE_MAX_TOKENS
+from prompt_assistant.core import (
+    ChangeJournal,
+    ContentIndex,
+    EntrySourceType,
+    FileListRecord,
+    OutputFormat,
+    Session,
+    add_entry,
+    build_output,
+    count_prompt_tokens,
+    count_session_tokens,
+    create_entry,
+    estimate_session_tokens,
+    exclude_entries,
+    include_entries,
+    matches_filters,
+    remove_entries,
+    SpecCache,
+    TreeBudget,
+    render_directory_tree,
+    scan_directory,
+)
+from prompt_assistant.core.token_estimator import estimate_tokens_from_size
+from prompt_assistant.utils import count_tokens, is_binary, render_tree_structure
+
+from .synthetic_repo import SyntheticRepoConfig, write_repo
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+BULK_SELECTION = 1_000
+CONTENT_QUERY = "return self"
+REGRESSION_THRESHOLD = 1.10
+# Długi prompt (~100k tokenów) do pomiaru przeliczenia tokenów po edycji jednego znaku.
+PROMPT_BENCH_CHARS = 400_000
+
+
+def _measure(func: Callable[[], object], repeat: int, setup: Callable[[], None] | None = None) -> dict:
+    timings: list[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "runs": repeat,
+    }
+
+
+def _scan_directory(
+    dir_path: str,
+    custom_patterns: list[str],
+    spec_cache: SpecCache | None = None,
+) -> list[tuple[str, str]]:
+    # Domyślnie świeży cache: mierzymy zimny import z kompilacją wzorców.
+    imported = scan_directory(dir_path, exclude_patterns=custom_patterns, spec_cache=spec_cache or SpecCache())
+    return [(imported_file.rel, imported_file.content) for imported_file in imported.files]
+
+
+def _build_session(sources: list[tuple[str, str]], output_format: OutputFormat) -> Session:
+    session = Session(prompt_text="Przeanalizuj poniższe pliki.", output_format=output_format)
+    tree = render_tree_structure([rel for rel, _content in sources])
+    add_entry(session, create_entry("repo/.tree", EntrySourceType.DIRECTORY_TREE, tree))
+    for rel, content in sources:
+        add_entry(
+            session,
+            create_entry(rel, EntrySourceType.DIRECTORY_FILE, content, size=len(content.encode("utf-8"))),
+        )
+    return session
+
+
+def _build_content_index(session: Session) -> ContentIndex:
+    index = ContentIndex()
+    for entry in session.entries:
+        index.entry_added(entry)
+    index.search(CONTENT_QUERY)  # indeksowanie jest leniwe: pierwsze zapytanie buduje indeks
+    return index
+
+
+def bench_size(file_count: int, *, repeat: int, config: SyntheticRepoConfig) -> dict:
+    """Mierzy wszystkie ścieżki dla repo o *file_count* plikach."""
+    config.file_count = file_count
+    results: dict[str, dict] = {}
+
+    with tempfile.TemporaryDirectory(prefix="promptglue-bench-") as root_dir:
+        written = write_repo(root_dir, config)
+        full_paths = [os.path.join(root_dir, *item.rel.split("/")) for item in written]
+
+        results["scan_directory"] = _measure(lambda: _scan_directory(root_dir, ["*.toml"]), repeat)
+        results["scan_directory"]["items"] = len(written)
+
+        warm_cache = SpecCache()
+        _scan_directory(root_dir, ["*.toml"], warm_cache)
+        results["scan_directory_cached_specs"] = _measure(
+            lambda: _scan_directory(root_dir, ["*.toml"], warm_cache), repeat
+        )
+        results["scan_directory_cached_specs"]["items"] = len(written)
+
+        results["is_binary"] = _measure(lambda: [is_binary(path) for path in full_paths], repeat)
+        results["is_binary"]["items"] = len(full_paths)
+
+        sources = _scan_directory(root_dir, [])
+
+    rel_paths = [rel for rel, _content in sources]
+    contents = [content for _rel, content in sources]
+
+    results["count_tokens"] = _measure(lambda: [count_tokens(content) for content in contents], repeat)
+    results["count_tokens"]["items"] = len(contents)
+    results["count_tokens"]["bytes"] = sum(len(content.encode("utf-8")) for content in contents)
+
+    prompt = "\n\n".join(contents)[:PROMPT_BENCH_CHARS]
+    count_prompt_tokens(prompt)
+    edited_prompt: list[str] = []
+    edits = itertools.count()
+
+    def _edit_prompt() -> None:
+        middle = len(prompt) // 2
+        edited_prompt[:] = [f"{prompt[:middle]}{next(edits)}{prompt[middle:]}"]
+
+    results["prompt_edit"] = _measure(lambda: count_prompt_tokens(edited_prompt[0]), repeat, setup=_edit_prompt)
+    results["prompt_edit"]["chars"] = len(prompt)
+
+    for output_format in OutputFormat:
+        session = _build_session(sources, output_format)
+        count_session_tokens(session)  # rozgrzewka cache tokenów: mierzymy sam rendering
+        key = f"build_output_{output_format.value}"
+        results[key] = _measure(lambda session=session: build_output(session), repeat)
+        results[key]["items"] = len(session.entries)
+
+    results["render_tree_structure"] = _measure(lambda: render_tree_structure(rel_paths), repeat)
+    results["render_tree_structure"]["items"] = len(rel_paths)
+    # Drzewo z limitami domyślnymi GUI/CLI; tokeny plików jak przy imporcie: estymata z rozmiaru.
+    tree_files = [(rel, estimate_tokens_from_size(len(content))) for rel, content in sources]
+    tree_budget = TreeBudget(collapse_over=TREE_COLLAPSE_FILES, max_tokens=TREE_MAX_TOKENS)
+    results["render_tree_budgeted"] = _measure(lambda: render_directory_tree(tree_files, tree_budget), repeat)
+    results["render_tree_budgeted"]["items"] = len(rel_paths)
+
+    records = [
+        FileListRecord(display_name=f"repo/{rel}", extension=os.path.splitext(rel)[1].lower(), status="active")
+        for rel in rel_paths
+    ]
+    results["matches_filters"] = _measure(
+        lambda: [
+            matches_filters(record, name_query="session", extension_query="py", status_filter="active")
+            for record in records
+        ],
+        repeat,
+    )
+    results["matches_filters"]["items"] = len(records)
+
+    session = _build_session(sources, OutputFormat.XML)
+    count_session_tokens(session)
+    results["session_totals"] = _measure(
+        lambda: (count_session_tokens(session), estimate_session_tokens(session)), repeat
+    )
+    results["session_totals"]["items"] = len(session.entries)
+
+    results["content_index_build"] = _measure(lambda: _build_content_index(session), repeat)
+    results["content_index_build"]["items"] = len(session.entries)
+    index = _build_content_index(session)
+    results["content_search"] = _measure(lambda: index.search(CONTENT_QUERY), repeat)
+    results["content_search"]["items"] = len(session.entries)
+    results["content_search"]["candidates"] = index.last_candidates
+
+    selection = [entry.entry_id for entry in session.entries[1 : BULK_SELECTION + 1]]
+    results["bulk_exclude"] = _measure(lambda: exclude_entries(session, selection), repeat)
+    results["bulk_include"] = _measure(lambda: include_entries(session, selection), repeat)
+
+    removal_session: list[Session] = []
+
+    def _fresh_session() -> None:
+        removal_session[:] = [_build_session(sources, OutputFormat.XML)]
+
+    results["bulk_remove"] = _measure(
+        lambda: remove_entries(
+            removal_session[0],
+            [entry.entry_id for entry in removal_session[0].entries[1 : BULK_SELECTION + 1]],
+        ),
+        repeat,
+        setup=_fresh_session,
+    )
+
+    journals: list[ChangeJournal] = []
+
+    def _removed_session() -> None:
+        session = _build_session(sources, OutputFormat.XML)
+        journals[:] = [ChangeJournal.for_session(session)]
+        journals[0].remove([entry.entry_id for entry in session.entries[1 : BULK_SELECTION + 1]])
+
+    results["bulk_remove_undo"] = _measure(lambda: journals[0].undo(), repeat, setup=_removed_session)
+    for key in ("bulk_exclude", "bulk_include", "bulk_remove", "bulk_remove_undo"):
+        results[key]["items"] = len(selection)
+        results[key]["session_entries"] = len(session.entries)
+
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def run_benchmarks(sizes: list[int], *, repeat: int = 3, seed: int = 1234) -> dict:
+    """Uruchamia benchmark dla wszystkich rozmiarów i zwraca raport gotowy do JSON."""
+    config = SyntheticRepoConfig(seed=seed)
+    report: dict = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "git_revision": _git_revision(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(size, repeat=repeat, config=config)
+    return report
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    """Porównuje dwa raporty; zwraca linie tabeli, regresje oznacza `!`."""
+    lines: list[str] = []
+    for size, benches in current["results"].items():
+        old_benches = baseline.get("results", {}).get(size, {})
+        for name, stats in benches.items():
+            old = old_benches.get(name)
+            if not old or not old.get("median_s"):
+                continue
+            ratio = stats["median_s"] / old["median_s"]
+            marker = "!" if ratio > threshold else " "
+            lines.append(
+                f"{marker} {size:>7} {name:<24} {old['median_s'] * 1000:10.2f} ms -> "
+                f"{stats['median_s'] * 1000:10.2f} ms  x{ratio:.2f}"
+            )
+    return lines
+
+
+def _parse_sizes(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ścieżek krytycznych PromptGlue")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Liczby plików oddzielone przecinkami",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba powtórzeń pomiaru")
+    parser.add_argument("--seed", type=int, default=1234, help="Ziarno generatora repo")
+    parser.add_argument("--output", default="", help="Plik JSON z wynikami (domyślnie stdout)")
+    parser.add_argument("--compare", default="", help="Raport JSON do porównania")
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Kod wyjścia 1, gdy mediana wzrośnie ponad próg",
+    )
+    args = parser.parse_args()
+
+    report = run_benchmarks(_parse_sizes(args.sizes), repeat=args.repeat, seed=args.seed)
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file_handle:
+            file_handle.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file_handle:
+            baseline = json.load(file_handle)
+        lines = compare_reports(baseline, report)
+        print("\n".join(lines), file=sys.stderr)
+        if args.fail_on_regression and any(line.startswith("!") for line in lines):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
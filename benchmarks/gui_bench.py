@@ -0,0 +1,235 @@
+"""Benchmark responsywności kontrolerów GUI (offscreen) z percentylami w JSON.
+
+Dla każdego rozmiaru syntetycznego repo dołącza katalog do okna
+`PromptAssistantWindow` bez wyświetlania go (`QT_QPA_PLATFORM=offscreen`),
+a potem mierzy opóźnienie pojedynczego naciśnięcia klawisza w filtrach i
+prompcie, czas akcji masowych, budowania listy plików i odświeżania etykiety
+tokenów. Pomiary interakcji są robione w stanie ustalonym: dokładne liczby
+tokenów są już policzone, a wątki w tle nie mają pracy.
+
+Przykład:
+    python -m benchmarks.gui_bench --sizes 1000,10000,50000 --output gui_bench.json
+    python -m benchmarks.gui_bench --sizes 1000 --compare gui_bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable
+from unittest.mock import patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QFileDialog, QMessageBox  # noqa: E402
+
+from prompt_assistant.core import count_session_tokens  # noqa: E402
+from prompt_assistant.gui import controllers  # noqa: E402
+from prompt_assistant.gui.controllers import PromptAssistantWindow, connect_signals, setup_ui  # noqa: E402
+
+from .core_bench import _git_revision, compare_reports  # noqa: E402
+from .synthetic_repo import SyntheticRepoConfig, write_repo  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 50_000)
+BULK_SELECTION = 1_000
+NAME_QUERY = "session"
+EXTENSION_QUERY = "py"
+PROMPT_KEYSTROKES = "Przejrzyj kod"
+PERCENTILES = (50, 90, 99)
+
+# Referencja trzymana przez cały przebieg: QApplication musi żyć dłużej niż okna.
+_app: QApplication | None = None
+
+
+def _percentile(ordered: list[float], percent: int) -> float:
+    """Percentyl metodą najbliższej rangi z posortowanych próbek."""
+    rank = max(1, -(-percent * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def latency_stats(samples: list[float]) -> dict:
+    """Zwraca percentyle (ms) próbek w sekundach; `median_s` pozwala użyć `compare_reports`."""
+    ordered = sorted(samples)
+    stats = {f"p{percent}_ms": _percentile(ordered, percent) * 1000 for percent in PERCENTILES}
+    stats["max_ms"] = ordered[-1] * 1000
+    stats["median_s"] = _percentile(ordered, 50)
+    stats["samples"] = len(ordered)
+    return stats
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _type_and_erase(set_text: Callable[[str], None], text: str) -> list[float]:
+    """Wpisuje *text* znak po znaku, a potem kasuje; zwraca czas obsługi każdego klawisza."""
+    samples = [_timed(lambda i=i: set_text(text[:i])) for i in range(1, len(text) + 1)]
+    samples.extend(_timed(lambda i=i: set_text(text[:i])) for i in range(len(text) - 1, -1, -1))
+    return samples
+
+
+def _settle_token_counts(window: PromptAssistantWindow) -> None:
+    """Liczy dokładne tokeny synchronicznie i opróżnia kolejkę wątków w tle."""
+    if window.token_scheduler is not None:
+        window.token_scheduler.cancel_all()
+    count_session_tokens(window.session)
+    controllers._poll_exact_token_counts(window)
+
+
+def _select_items(window: PromptAssistantWindow, count: int) -> None:
+    window.files_list.clearSelection()
+    for row in range(min(count, window.files_list.count())):
+        window.files_list.item(row).setSelected(True)
+
+
+def _populate_list(window: PromptAssistantWindow) -> None:
+    window.files_list.clear()
+    for file_obj in window.attached_files:
+        controllers._create_file_item(window, file_obj)
+    for directory in window.attached_dirs:
+        for file_obj in directory["files"]:
+            controllers._create_file_item(window, file_obj, is_dir_file=True)
+
+
+def bench_size(file_count: int, *, repeat: int, config: SyntheticRepoConfig) -> dict:
+    """Mierzy handlery GUI dla repo o *file_count* plikach."""
+    config.file_count = file_count
+    results: dict[str, dict] = {}
+    selection = max(1, min(BULK_SELECTION, file_count // 10))
+
+    with tempfile.TemporaryDirectory(prefix="promptglue-gui-bench-") as root_dir:
+        write_repo(root_dir, config)
+
+        attach_samples: list[float] = []
+        window: PromptAssistantWindow | None = None
+        for _ in range(repeat):
+            if window is not None:
+                controllers.shutdown_background_tasks(window)
+                window.deleteLater()
+            window = PromptAssistantWindow()
+            setup_ui(window)
+            connect_signals(window)
+            with (
+                patch.object(QFileDialog, "getExistingDirectory", return_value=root_dir),
+                patch.object(QMessageBox, "information"),
+                patch.object(QMessageBox, "warning"),
+                # Budżet tokenów przerwałby import największych repo.
+                patch.object(controllers, "MAX_IMPORT_TOKENS", sys.maxsize),
+            ):
+                attach_samples.append(_timed(lambda: controllers.attach_directory(window)))
+        results["attach_directory"] = latency_stats(attach_samples)
+        results["attach_directory"]["items"] = window.files_list.count()
+
+    _settle_token_counts(window)
+    results["populate_list"] = latency_stats([_timed(lambda: _populate_list(window)) for _ in range(repeat)])
+    results["populate_list"]["items"] = window.files_list.count()
+
+    results["update_token_label"] = latency_stats(
+        [_timed(lambda: controllers._update_token_label(window)) for _ in range(repeat * 5)]
+    )
+
+    name_samples: list[float] = []
+    extension_samples: list[float] = []
+    prompt_samples: list[float] = []
+    for _ in range(repeat):
+        name_samples += _type_and_erase(window.name_filter_edit.setText, NAME_QUERY)
+        extension_samples += _type_and_erase(window.ext_filter_edit.setText, EXTENSION_QUERY)
+        prompt_samples += _type_and_erase(window.text_edit.setPlainText, PROMPT_KEYSTROKES)
+    results["keystroke_name_filter"] = latency_stats(name_samples)
+    results["keystroke_extension_filter"] = latency_stats(extension_samples)
+    results["keystroke_prompt"] = latency_stats(prompt_samples)
+
+    exclude_samples: list[float] = []
+    include_samples: list[float] = []
+    remove_samples: list[float] = []
+    for _ in range(repeat):
+        _select_items(window, selection)
+        exclude_samples.append(_timed(lambda: controllers.bulk_exclude_selected(window)))
+        include_samples.append(_timed(lambda: controllers.bulk_include_selected(window)))
+    for _ in range(repeat):
+        _select_items(window, selection)
+        remove_samples.append(_timed(lambda: controllers.bulk_remove_selected(window)))
+    for key, samples in (
+        ("bulk_exclude", exclude_samples),
+        ("bulk_include", include_samples),
+        ("bulk_remove", remove_samples),
+    ):
+        results[key] = latency_stats(samples)
+        results[key]["items"] = selection
+
+    controllers.shutdown_background_tasks(window)
+    window.deleteLater()
+    QApplication.processEvents()
+    return results
+
+
+def run_gui_benchmarks(sizes: list[int], *, repeat: int = 3, seed: int = 1234) -> dict:
+    """Uruchamia benchmark GUI dla wszystkich rozmiarów i zwraca raport gotowy do JSON."""
+    global _app
+    _app = QApplication.instance() or QApplication([])
+    config = SyntheticRepoConfig(seed=seed)
+    report: dict = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "qt_platform": os.environ.get("QT_QPA_PLATFORM", ""),
+            "git_revision": _git_revision(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(size, repeat=repeat, config=config)
+    return report
+
+
+def _parse_sizes(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark responsywności GUI PromptGlue (offscreen)")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Liczby plików oddzielone przecinkami",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba powtórzeń pomiaru")
+    parser.add_argument("--seed", type=int, default=1234, help="Ziarno generatora repo")
+    parser.add_argument("--output", default="", help="Plik JSON z wynikami (domyślnie stdout)")
+    parser.add_argument("--compare", default="", help="Raport JSON do porównania (mediany)")
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Kod wyjścia 1, gdy mediana wzrośnie ponad próg",
+    )
+    args = parser.parse_args()
+
+    report = run_gui_benchmarks(_parse_sizes(args.sizes), repeat=args.repeat, seed=args.seed)
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file_handle:
+            file_handle.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file_handle:
+            baseline = json.load(file_handle)
+        lines = compare_reports(baseline, report)
+        print("\n".join(lines), file=sys.stderr)
+        if args.fail_on_regression and any(line.startswith("!") for line in lines):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Budżet czasu importu punktów wejścia (zimny start CLI i GUI).
+
+Każdy pomiar to świeży interpreter z `-X importtime`; raportowany jest
+skumulowany czas importu modułu (minimum z powtórzeń) oraz ciężkie zależności,
+które nie powinny być ładowane przy starcie.
+
+Przykład:
+    python -m benchmarks.import_time --repeat 5 --check
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Budżety w milisekundach z zapasem na wolniejsze maszyny CI; sprawdzane tylko przez `--check`
+# (czas ścienny zależy od maszyny, więc testy jednostkowe sprawdzają wyłącznie zakazane moduły).
+IMPORT_BUDGETS_MS = {
+    "prompt_assistant.cli": 60.0,
+    "prompt_assistant.gui.main_window": 250.0,
+}
+# Moduły core eksportowane leniwie (`prompt_assistant.core._LAZY_EXPORTS`) też nie powinny ładować się przy starcie CLI.
+CLI_LAZY_CORE_MODULES = (
+    "prompt_assistant.core.archive_import",
+    "prompt_assistant.core.compaction",
+    "prompt_assistant.core.content_index",
+    "prompt_assistant.core.git_revision",
+    "prompt_assistant.core.memory_report",
+    "prompt_assistant.core.outline",
+    "prompt_assistant.core.path_stream",
+)
+# Moduły ładowane leniwie (przy pierwszym użyciu) – ich obecność po imporcie to regresja.
+FORBIDDEN_MODULES = {
+    "prompt_assistant.cli": ("PyQt5", "tiktoken", "pathspec", *CLI_LAZY_CORE_MODULES),
+    "prompt_assistant.gui.main_window": ("tiktoken", "pathspec"),
+}
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """Importuje *module* w nowym interpreterze; zwraca (czas w ms, załadowane zakazane moduły)."""
+    forbidden = FORBIDDEN_MODULES.get(module, ())
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {forbidden!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    for line in completed.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    loaded = [name for name in completed.stdout.strip().split(",") if name]
+    return cumulative_us / 1000, loaded
+
+
+def run_import_budget(modules: list[str], repeat: int) -> dict:
+    """Mierzy czasy importu i zwraca raport z informacją o przekroczeniu budżetu."""
+    report: dict = {}
+    for module in modules:
+        timings: list[float] = []
+        loaded: list[str] = []
+        for _ in range(repeat):
+            elapsed_ms, loaded = measure_import(module)
+            timings.append(elapsed_ms)
+        budget = IMPORT_BUDGETS_MS.get(module)
+        best = min(timings)
+        report[module] = {
+            "min_ms": round(best, 2),
+            "budget_ms": budget,
+            "heavy_modules": loaded,
+            "ok": not loaded and (budget is None or best <= budget),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Budżet czasu importu PromptGlue")
+    parser.add_argument("modules", nargs="*", help="Moduły do zmierzenia (domyślnie punkty wejścia)")
+    parser.add_argument("--repeat", type=int, default=5, help="Liczba powtórzeń (raportowane minimum)")
+    parser.add_argument("--check", action="store_true", help="Kod wyjścia 1 przy przekroczeniu budżetu")
+    args = parser.parse_args()
+
+    report = run_import_budget(args.modules or list(IMPORT_BUDGETS_MS), max(1, args.repeat))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.check and not all(item["ok"] for item in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
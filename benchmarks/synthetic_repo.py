@@ -0,0 +1,146 @@
+"""Deterministyczny generator syntetycznych repozytoriów dla benchmarków."""
+from __future__ import annotations
+
+import os
+import random
+from dataclasses import dataclass, field
+
+_TEXT_EXTENSIONS: tuple[tuple[str, int], ...] = (
+    (".py", 40),
+    (".md", 15),
+    (".txt", 10),
+    (".json", 10),
+    (".js", 15),
+    (".toml", 5),
+    (".yaml", 5),
+)
+_BINARY_EXTENSIONS: tuple[str, ...] = (".png", ".bin", ".so")
+_IGNORED_DIR = "build"
+_IGNORED_EXTENSION = ".log"
+_GITIGNORE_CONTENT = f"# wygenerowane\n*{_IGNORED_EXTENSION}\n{_IGNORED_DIR}/\n"
+_WORDS: tuple[str, ...] = (
+    "session", "entry", "render", "token", "prompt", "output", "import", "filter",
+    "value", "result", "config", "return", "self", "path", "content", "count",
+    "def", "class", "for", "in", "if", "else", "None", "True", "False", "list",
+    "dict", "łączenie", "plik", "katalog", "wynik", "=", "(", ")", ":", ",", "+",
+)
+
+
+@dataclass(slots=True)
+class SyntheticRepoConfig:
+    """Parametry generatora; ten sam zestaw parametrów daje identyczne repo."""
+
+    file_count: int = 1_000
+    seed: int = 1234
+    max_depth: int = 4
+    dir_fanout: int = 6
+    size_median: int = 1_200
+    size_sigma: float = 1.0
+    max_file_size: int = 128 * 1024
+    gitignore_density: float = 0.1
+    ignored_ratio: float = 0.05
+    binary_ratio: float = 0.03
+    extensions: tuple[tuple[str, int], ...] = field(default=_TEXT_EXTENSIONS)
+
+
+@dataclass(slots=True)
+class SyntheticFile:
+    """Pojedynczy plik syntetycznego repo."""
+
+    rel: str
+    data: bytes
+    is_binary: bool = False
+    is_gitignore: bool = False
+
+
+def _pick_dir(rng: random.Random, config: SyntheticRepoConfig) -> str:
+    depth = rng.randint(0, config.max_depth)
+    return "/".join(f"d{rng.randrange(config.dir_fanout)}" for _ in range(depth))
+
+
+def _pick_extension(rng: random.Random, config: SyntheticRepoConfig) -> str:
+    names = [ext for ext, _weight in config.extensions]
+    weights = [weight for _ext, weight in config.extensions]
+    return rng.choices(names, weights=weights, k=1)[0]
+
+
+def _pick_size(rng: random.Random, config: SyntheticRepoConfig) -> int:
+    size = int(rng.lognormvariate(0.0, config.size_sigma) * config.size_median)
+    return max(1, min(size, config.max_file_size))
+
+
+def _text_content(rng: random.Random, size: int) -> bytes:
+    lines: list[str] = []
+    produced = 0
+    while produced < size:
+        indent = "    " * rng.randint(0, 3)
+        words = " ".join(rng.choices(_WORDS, k=rng.randint(2, 12)))
+        line = f"{indent}{words}"
+        lines.append(line)
+        produced += len(line) + 1
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _binary_content(rng: random.Random, size: int) -> bytes:
+    # Nagłówek z bajtami spoza UTF-8 gwarantuje wykrycie przez `is_binary`.
+    return b"\x89PNG\r\n\x1a\n\xff\xfe" + rng.randbytes(max(0, size - 10))
+
+
+def generate_files(config: SyntheticRepoConfig) -> list[SyntheticFile]:
+    """Zwraca deterministyczną listę plików (wraz z `.gitignore`) dla *config*."""
+    rng = random.Random(config.seed)
+    files: list[SyntheticFile] = []
+    dirs_with_gitignore: set[str] = set()
+
+    for index in range(config.file_count):
+        directory = _pick_dir(rng, config)
+        if directory not in dirs_with_gitignore and rng.random() < config.gitignore_density:
+            dirs_with_gitignore.add(directory)
+            rel = f"{directory}/.gitignore" if directory else ".gitignore"
+            files.append(SyntheticFile(rel=rel, data=_GITIGNORE_CONTENT.encode("utf-8"), is_gitignore=True))
+
+        size = _pick_size(rng, config)
+        roll = rng.random()
+        if roll < config.binary_ratio:
+            extension = rng.choice(_BINARY_EXTENSIONS)
+            data = _binary_content(rng, size)
+            is_binary_file = True
+        else:
+            extension = _pick_extension(rng, config)
+            data = _text_content(rng, size)
+            is_binary_file = False
+            if roll < config.binary_ratio + config.ignored_ratio:
+                if rng.random() < 0.5:
+                    extension = _IGNORED_EXTENSION
+                else:
+                    directory = f"{directory}/{_IGNORED_DIR}" if directory else _IGNORED_DIR
+
+        name = f"{rng.choice(_WORDS[:16])}_{index}{extension}"
+        rel = f"{directory}/{name}" if directory else name
+        files.append(SyntheticFile(rel=rel, data=data, is_binary=is_binary_file))
+
+    return files
+
+
+def generate_text_sources(config: SyntheticRepoConfig) -> list[tuple[str, str]]:
+    """Zwraca pary (ścieżka, treść) plików tekstowych bez zapisu na dysk."""
+    return [
+        (item.rel, item.data.decode("utf-8"))
+        for item in generate_files(config)
+        if not item.is_binary and not item.is_gitignore
+    ]
+
+
+def write_repo(root_dir: str, config: SyntheticRepoConfig) -> list[SyntheticFile]:
+    """Zapisuje syntetyczne repo w *root_dir* i zwraca listę utworzonych plików."""
+    files = generate_files(config)
+    created_dirs: set[str] = set()
+    for item in files:
+        full = os.path.join(root_dir, *item.rel.split("/"))
+        parent = os.path.dirname(full)
+        if parent not in created_dirs:
+            os.makedirs(parent, exist_ok=True)
+            created_dirs.add(parent)
+        with open(full, "wb") as file_handle:
+            file_handle.write(item.data)
+    return files
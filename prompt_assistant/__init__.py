@@ -1,4 +1,13 @@
 """Public interface for the Prompt Assistant package."""
-from .gui import PromptAssistant  # noqa: F401
+from __future__ import annotations
 
-__all__ = ["PromptAssistant"]
\ No newline at end of file
+__all__ = ["PromptAssistant"]
+
+
+def __getattr__(name: str):
+    # PyQt5 is imported only when the GUI class is requested, so the CLI and core stay light.
+    if name == "PromptAssistant":
+        from .gui import PromptAssistant
+
+        return PromptAssistant
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,9 +2,52 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
+import sys
+from contextlib import nullcontext
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, ContextManager, Iterator, TextIO
 
-from prompt_assistant.core import EntrySourceType, OutputFormat, Session, add_entry, build_output, create_entry
+from prompt_assistant.config import (
+    DAEMON_SOCKET_ENV,
+    MAX_DIR_SIZE,
+    MAX_FILE_SIZE,
+    MAX_IMPORT_TOKENS,
+    TREE_COLLAPSE_FILES,
+    TREE_MAX_DEPTH,
+    TREE_MAX_TOKENS,
+)
+
+from prompt_assistant.core import (
+    NULL_PROFILER,
+    Entry,
+    EntrySourceType,
+    FileContentCache,
+    FileEnumeration,
+    ImportBudget,
+    OutputFormat,
+    Profiler,
+    Session,
+    TreeBudget,
+    add_directory_import,
+    add_entry,
+    build_output,
+    count_entry_tokens,
+    count_session_tokens,
+    create_entry,
+    parse_exclude_patterns,
+    scan_directory,
+    spans_to_chrome_trace,
+    spans_to_json,
+    write_output,
+)
+
+if TYPE_CHECKING:
+    from prompt_assistant.core.git_revision import BlobCache
+
+# Import archiwów i rewizji, kompaktowanie, zarys, listy plików i raporty są importowane
+# w gałęziach, które ich używają, żeby nie wydłużać zimnego startu.
 
 
 def render_from_sources(
@@ -29,9 +72,26 @@ def _parse_output_format(value: str) -> OutputFormat:
     return OutputFormat.XML
 
 
-def main() -> None:
+def _write_profile(path: str, profile_format: str, spans) -> None:
+    payload = spans_to_chrome_trace(spans) if profile_format == "chrome" else {"spans": spans_to_json(spans)}
+    Path(path).write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Zwraca parser argumentów CLI (wspólny dla trybu lokalnego i daemona)."""
     parser = argparse.ArgumentParser(description="PromptGlue CLI (minimal hook)")
-    parser.add_argument("files", nargs="*", help="Ścieżki plików do dołączenia")
+    parser.add_argument("files", nargs="*", help="Ścieżki plików, katalogów lub archiwów zip/tar do dołączenia")
+    parser.add_argument(
+        "--files-from",
+        default="",
+        metavar="FILE",
+        help="Dołącz pliki z listy w pliku ('-': stdin), np. z git ls-files; czytane równolegle, output strumieniowo",
+    )
+    parser.add_argument(
+        "--null",
+        action="store_true",
+        help="Z --files-from: ścieżki rozdzielone znakiem NUL (git ls-files -z, fd -0) zamiast końców linii",
+    )
     parser.add_argument("--prompt", default="", help="Treść promptu")
     parser.add_argument(
         "--format",
@@ -40,27 +100,355 @@ def main() -> None:
         help="Profil outputu",
     )
     parser.add_argument("--output", default="", help="Plik wyjściowy (opcjonalnie)")
+    parser.add_argument("--exclude", default="", help="Wzorce wykluczeń dla katalogów, np. '*.md, build/'")
+    parser.add_argument("--no-gitignore", action="store_true", help="Nie stosuj .gitignore przy katalogach")
+    parser.add_argument(
+        "--git-index",
+        action="store_true",
+        help="Listę plików katalogu bierz z .git/index (tylko pliki śledzone)",
+    )
+    parser.add_argument(
+        "--untracked",
+        action="store_true",
+        help="Z --git-index: dołącz też pliki nieśledzone i nieignorowane",
+    )
+    parser.add_argument(
+        "--revision",
+        default="",
+        metavar="REV",
+        help="Katalogi importuj z rewizji git (gałąź, tag, SHA) zamiast kopii roboczej, np. origin/main",
+    )
+    parser.add_argument(
+        "--max-file-size",
+        type=int,
+        default=MAX_FILE_SIZE,
+        help="Pomijaj pliki katalogów większe niż podana liczba bajtów",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=MAX_IMPORT_TOKENS,
+        help="Przerwij import katalogu po przekroczeniu prognozowanej liczby tokenów",
+    )
+    parser.add_argument(
+        "--tree-depth",
+        type=int,
+        default=TREE_MAX_DEPTH or 0,
+        help="Rozwijaj drzewo katalogu w <directories> do podanej głębokości (0: bez limitu)",
+    )
+    parser.add_argument(
+        "--tree-collapse",
+        type=int,
+        default=TREE_COLLAPSE_FILES or 0,
+        help="Zwijaj w drzewie podkatalogi z większą liczbą plików do linii podsumowania (0: bez zwijania)",
+    )
+    parser.add_argument(
+        "--tree-max-tokens",
+        type=int,
+        default=TREE_MAX_TOKENS or 0,
+        help="Limit tokenów drzewa katalogu; płytsze drzewo, gdy pełne się nie mieści (0: bez limitu)",
+    )
+    parser.add_argument(
+        "--stats",
+        default="",
+        choices=["", "json"],
+        help="Wypisz rozkład tokenów wg katalogu, podkatalogu i rozszerzenia (stdout przy --output, inaczej stderr)",
+    )
+    parser.add_argument(
+        "--memory-report",
+        default="",
+        choices=["", "text", "json"],
+        help="Wypisz pamięć sesji wg kategorii, katalogu i największych wpisów (stdout przy --output, inaczej stderr)",
+    )
+    parser.add_argument(
+        "--trace-alloc",
+        action="store_true",
+        help="Mierz szczyty alokacji faz importu i renderowania (tracemalloc, wolniej); trafiają do raportu i profilu",
+    )
+    parser.add_argument(
+        "--outline",
+        action="store_true",
+        help="Pliki Pythona jako zarys: importy, sygnatury klas i funkcji, pierwsze linie docstringów (raport na stderr)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Usuń komentarze, docstringi i puste linie z plików (raport oszczędności na stderr)",
+    )
+    parser.add_argument("--profile", default="", help="Zapisz czasy faz do pliku (JSON)")
+    parser.add_argument(
+        "--profile-format",
+        default="json",
+        choices=["json", "chrome"],
+        help="Format profilu: spany JSON albo Chrome trace-event",
+    )
+    parser.add_argument(
+        "--daemon",
+        default=os.environ.get(DAEMON_SOCKET_ENV, ""),
+        metavar="SOCKET",
+        help=f"Renderuj przez daemon na gnieździe Unix (domyślnie ${DAEMON_SOCKET_ENV}); bez daemona lokalnie",
+    )
+    parser.add_argument(
+        "--serve",
+        default="",
+        metavar="SOCKET",
+        help="Uruchom daemon renderowania na gnieździe Unix (ciepły encoder i cache plików)",
+    )
+    return parser
 
-    args = parser.parse_args()
 
-    sources: list[tuple[str, str]] = []
+def run(
+    args: argparse.Namespace,
+    *,
+    stdout: TextIO | None = None,
+    stderr: TextIO | None = None,
+    cwd: str | None = None,
+    content_cache: FileContentCache | None = None,
+    blob_cache: BlobCache | None = None,
+    stdin: BinaryIO | None = None,
+) -> int:
+    """Renderuje output dla sparsowanych argumentów; zwraca kod wyjścia.
+
+    Ścieżki względne są rozwiązywane względem *cwd* (domyślnie bieżącego
+    katalogu), więc ten sam kod obsługuje wywołania lokalne i żądania daemona.
+    Z *content_cache* niezmienione pliki i ich liczby tokenów są brane z pamięci,
+    z *blob_cache* to samo dla blobów importowanych z `--revision`. Lista
+    `--files-from -` jest czytana z *stdin* (domyślnie `sys.stdin.buffer`).
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    cwd = cwd or os.getcwd()
+    if args.files_from and (args.stats or args.memory_report):
+        raise SystemExit("--stats i --memory-report nie działają z --files-from (pliki z listy nie trafiają do sesji)")
+    profiler = Profiler(trace_allocations=args.trace_alloc) if args.profile or args.trace_alloc else NULL_PROFILER
+
+    session = Session(prompt_text=args.prompt, output_format=_parse_output_format(args.format))
+    exclude_patterns = parse_exclude_patterns(args.exclude)
+    enumeration = FileEnumeration.WALK
+    if args.git_index:
+        enumeration = FileEnumeration.GIT_INDEX_UNTRACKED if args.untracked else FileEnumeration.GIT_INDEX
+    budget = ImportBudget(
+        max_file_bytes=args.max_file_size,
+        max_total_bytes=MAX_DIR_SIZE,
+        max_tokens=args.max_tokens,
+    )
+    tree_budget = TreeBudget(
+        max_depth=args.tree_depth or None,
+        collapse_over=args.tree_collapse or None,
+        max_tokens=args.tree_max_tokens or None,
+    )
+    # (pełna ścieżka albo SHA bloba, wpis) plików, których liczby tokenów warto zapamiętać w cache.
+    cached_files: list[tuple[str, Entry]] = []
+    cached_blobs: list[tuple[str, Entry]] = []
+    if args.files:
+        from prompt_assistant.core import is_archive_path
     for path_str in args.files:
-        path = Path(path_str)
-        if not path.is_file():
-            raise SystemExit(f"Nie znaleziono pliku: {path}")
-        try:
-            content = path.read_text(encoding="utf-8")
-        except OSError as exc:
-            raise SystemExit(f"Błąd odczytu {path}: {exc}") from exc
-        sources.append((str(path), content))
+        full_path = os.path.normpath(os.path.join(cwd, path_str))
+        is_dir = os.path.isdir(full_path)
+        if is_dir or is_archive_path(full_path):
+            if is_dir and args.revision:
+                from prompt_assistant.core import GitRevisionError, scan_git_revision
+
+                try:
+                    imported = scan_git_revision(
+                        full_path,
+                        args.revision,
+                        exclude_patterns=exclude_patterns,
+                        profiler=profiler,
+                        budget=budget,
+                        blob_cache=blob_cache,
+                    )
+                except GitRevisionError as exc:
+                    raise SystemExit(f"Błąd odczytu {path_str}: {exc}") from exc
+            elif is_dir:
+                imported = scan_directory(
+                    full_path,
+                    use_gitignore=not args.no_gitignore,
+                    exclude_patterns=exclude_patterns,
+                    profiler=profiler,
+                    budget=budget,
+                    enumeration=enumeration,
+                    content_cache=content_cache,
+                )
+            else:
+                from prompt_assistant.core import ArchiveError, scan_archive
+
+                try:
+                    imported = scan_archive(
+                        full_path,
+                        use_gitignore=not args.no_gitignore,
+                        exclude_patterns=exclude_patterns,
+                        profiler=profiler,
+                        budget=budget,
+                    )
+                except ArchiveError as exc:
+                    raise SystemExit(f"Błąd odczytu {path_str}: {exc}") from exc
+            for skipped in imported.skipped_size:
+                print(f"Pominięto (limit rozmiaru): {path_str}/{skipped}", file=stderr)
+            if imported.budget_stop:
+                print(f"Import {path_str} przerwany: {imported.budget_stop}", file=stderr)
+            _tree_entry, file_entries = add_directory_import(session, imported, tree_budget=tree_budget)
+            if blob_cache is not None and imported.enumeration == FileEnumeration.GIT_REVISION:
+                cached_blobs.extend((item.blob_sha, entry) for item, entry in zip(imported.files, file_entries))
+            elif content_cache is not None and is_dir:
+                cached_files.extend(
+                    (os.path.join(imported.root_path, item.rel), entry)
+                    for item, entry in zip(imported.files, file_entries)
+                )
+            continue
+        if not os.path.isfile(full_path):
+            raise SystemExit(f"Nie znaleziono pliku: {path_str}")
+        with profiler.accumulate("read") as read_span:
+            token_count = None
+            try:
+                if content_cache is not None:
+                    cached = content_cache.read(full_path)
+                    if cached.binary:
+                        raise SystemExit(f"Błąd odczytu {path_str}: plik binarny")
+                    content, token_count = cached.content, cached.token_count
+                else:
+                    content = Path(full_path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as exc:
+                raise SystemExit(f"Błąd odczytu {path_str}: {exc}") from exc
+            read_span.add(files=1, bytes=len(content.encode("utf-8")))
+        entry = create_entry(path=path_str, source_type=EntrySourceType.FILE, content=content)
+        entry.token_count_cache = token_count
+        add_entry(session, entry)
+        if content_cache is not None:
+            cached_files.append((full_path, entry))
+
+    rendered_session = session
+    if args.outline or args.compact:
+        from prompt_assistant.core import compact_session, format_compaction_report, outline_session
+    if args.outline:
+        with profiler.span("outline"):
+            rendered_session, report = outline_session(rendered_session)
+        for line in format_compaction_report(report, title="Zarys"):
+            print(line, file=stderr)
+    if args.compact:
+        with profiler.span("compact"):
+            rendered_session, report = compact_session(rendered_session)
+        for line in format_compaction_report(report):
+            print(line, file=stderr)
 
-    rendered = render_from_sources(args.prompt, sources, _parse_output_format(args.format))
+    if args.files_from:
+        # Pliki z listy idą prosto z okna `load_files` do strumienia wyjścia, z pominięciem sesji.
+        listed = _listed_entries(args, cwd=cwd, stdin=stdin, stderr=stderr, content_cache=content_cache)
+        if args.output:
+            with open(Path(cwd, args.output), "w", encoding="utf-8") as output_handle:
+                write_output(output_handle, rendered_session, listed, profiler=profiler)
+        else:
+            write_output(stdout, rendered_session, listed, profiler=profiler)
+            stdout.write("\n")
+    else:
+        rendered = build_output(rendered_session, profiler=profiler).rendered_output
 
-    if args.output:
-        Path(args.output).write_text(rendered, encoding="utf-8")
+        with profiler.span("write"):
+            if args.output:
+                Path(cwd, args.output).write_text(rendered, encoding="utf-8")
+            else:
+                print(rendered, file=stdout)
+
+    if args.stats == "json":
+        from prompt_assistant.core import TokenRollup
+
+        count_session_tokens(rendered_session)
+        stats = TokenRollup.for_session(rendered_session).to_json()
+        print(json.dumps(stats, indent=2, ensure_ascii=False), file=stdout if args.output else stderr)
+
+    if args.memory_report:
+        from prompt_assistant.core import build_memory_report, format_memory_report
+
+        report = build_memory_report(session, spans=profiler.spans)
+        report_stream = stdout if args.output else stderr
+        if args.memory_report == "json":
+            print(json.dumps(report.to_json(), indent=2, ensure_ascii=False), file=report_stream)
+        else:
+            print("\n".join(format_memory_report(report)), file=report_stream)
+
+    if args.profile:
+        _write_profile(str(Path(cwd, args.profile)), args.profile_format, profiler.spans)
+
+    if content_cache is not None:
+        for full_path, entry in cached_files:
+            if entry.token_count_cache is None:
+                count_entry_tokens(entry)
+            content_cache.remember_tokens(full_path, entry.content, entry.token_count_cache)
+    if blob_cache is not None:
+        for blob_sha, entry in cached_blobs:
+            if entry.token_count_cache is None:
+                count_entry_tokens(entry)
+            blob_cache.remember_tokens(blob_sha, entry.content, entry.token_count_cache)
+    return 0
+
+
+def _open_file_list(args: argparse.Namespace, cwd: str, stdin: BinaryIO | None) -> ContextManager[BinaryIO]:
+    if args.files_from == "-":
+        return nullcontext(stdin or sys.stdin.buffer)
+    try:
+        return open(Path(cwd, args.files_from), "rb")
+    except OSError as exc:
+        raise SystemExit(f"Błąd odczytu listy plików {args.files_from}: {exc}") from exc
+
+
+def _listed_entries(
+    args: argparse.Namespace,
+    *,
+    cwd: str,
+    stdin: BinaryIO | None,
+    stderr: TextIO,
+    content_cache: FileContentCache | None,
+) -> Iterator[Entry]:
+    """Wpisy plików z `--files-from` w kolejności listy; pominięte pliki są zgłaszane na stderr."""
+    from prompt_assistant.core import LoadStatus, compacted_content, iter_path_list, load_files, outlined_content
+
+    skipped_binary = 0
+    with _open_file_list(args, cwd, stdin) as list_stream:
+        paths = iter_path_list(list_stream, null=args.null)
+        for loaded in load_files(paths, cwd=cwd, max_file_bytes=args.max_file_size, content_cache=content_cache):
+            if loaded.status == LoadStatus.BINARY:
+                skipped_binary += 1
+                continue
+            if loaded.status == LoadStatus.TOO_LARGE:
+                print(f"Pominięto (limit rozmiaru): {loaded.path} ({loaded.size} B)", file=stderr)
+                continue
+            if loaded.status == LoadStatus.ERROR:
+                print(f"Pominięto (błąd odczytu): {loaded.path}: {loaded.error}", file=stderr)
+                continue
+            content = outlined_content(loaded.content, loaded.path) if args.outline else loaded.content
+            if args.compact:
+                content = compacted_content(content, loaded.path)
+            entry = create_entry(path=loaded.path, source_type=EntrySourceType.FILE, content=content, size=loaded.size)
+            yield entry
+    if skipped_binary:
+        print(f"Pominięto pliki binarne z listy: {skipped_binary}", file=stderr)
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.serve:
+        from prompt_assistant.daemon import serve
+
+        serve(args.serve)
         return
+    # Daemon nie widzi stdin klienta, więc `--files-from -` jest zawsze renderowane lokalnie.
+    if args.daemon and args.files_from != "-":
+        from prompt_assistant.daemon import DaemonUnavailable, request_render
 
-    print(rendered)
+        try:
+            response = request_render(args.daemon, sys.argv[1:], os.getcwd())
+        except DaemonUnavailable as exc:
+            print(f"Daemon niedostępny ({exc}); renderowanie lokalne.", file=sys.stderr)
+        else:
+            sys.stdout.write(response.stdout)
+            sys.stderr.write(response.stderr)
+            if response.exit_code:
+                sys.exit(response.exit_code)
+            return
+    exit_code = run(args)
+    if exit_code:
+        sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,26 @@
 """Central place for configuration constants used throughout the project."""
+import os
+
+# Directory import budgets, enforced while scanning (files over a cap are skipped,
+# the scan stops once the total size or projected token count is exhausted).
 MAX_DIR_SIZE = 1_000_000_000  # 1 GB
+MAX_FILE_SIZE = 10_000_000  # 10 MB
+MAX_IMPORT_TOKENS = 5_000_000
+# Directory tree block limits: expanded depth, file count above which a subdirectory is
+# collapsed into a summary line, and the token cap of the whole tree (None disables a limit).
+TREE_MAX_DEPTH = None
+TREE_COLLAPSE_FILES = 500
+TREE_MAX_TOKENS = 8_000
 WARNING_TOKEN_LIMIT = 100_000
 CRITICAL_TOKEN_LIMIT = 120_000
-MAX_TOKEN_LIMIT = 128_000
\ No newline at end of file
+MAX_TOKEN_LIMIT = 128_000
+# Environment variable with the render daemon socket path (default for the CLI --daemon option).
+DAEMON_SOCKET_ENV = "PROMPTGLUE_DAEMON"
+# Render daemon client timeouts in seconds: connecting to the socket and waiting for the response;
+# when either expires the CLI renders locally.
+DAEMON_CONNECT_TIMEOUT = 2.0
+DAEMON_RESPONSE_TIMEOUT = 120.0
+# Per-phase timing of directory imports, shown in the import report.
+PROFILE_IMPORTS = os.environ.get("PROMPTGLUE_PROFILE", "") not in ("", "0")
+# tracemalloc peaks of directory import phases (slower imports), shown in the import report and memory report.
+TRACE_IMPORT_ALLOCATIONS = os.environ.get("PROMPTGLUE_TRACE_ALLOC", "") not in ("", "0")
@@ -1,30 +1,223 @@
 """Publiczny interfejs warstwy core."""
-from .models import BuildResult, Entry, EntrySourceType, OutputFormat, Session
-from .bulk_ops import exclude_entries, include_entries, remove_entries
+from .models import BuildResult, Entry, EntrySourceType, OutputFormat, Session, SessionObserver
+from .path_trie import PathTrie, SubtreeStats, entry_tree_path
+from .profiling import NULL_PROFILER, Profiler, Span, spans_to_chrome_trace, spans_to_json
+from .bulk_ops import (
+    exclude_entries,
+    exclude_subtree,
+    include_entries,
+    include_subtree,
+    remove_entries,
+    remove_subtree,
+)
 from .list_tools import FileListRecord, build_import_report, matches_filters
-from .renderer import build_output
-from .session_ops import add_entry, clear_session, create_entry, get_entry, remove_entry, set_entry_inclusion
-from .token_service import count_entry_tokens, count_session_tokens
+from .content_cache import CachedFile, FileContentCache
+from .entry_store import EntryStore, mask_and, mask_not, mask_or, session_store
+from .git_index import GitIndexEntry, GitIndexError, find_git_dir, read_git_index
+from .importer import (
+    DirectoryImport,
+    FileEnumeration,
+    ImportBudget,
+    ImportedFile,
+    TreeBudget,
+    add_directory_import,
+    describe_enumeration,
+    parse_exclude_patterns,
+    render_directory_tree,
+    scan_directory,
+)
+from .render_tokens import RenderedTokenCount, count_rendered_tokens
+from .renderer import build_output, write_output
+from .session_ops import (
+    add_entry,
+    clear_session,
+    create_entry,
+    get_entry,
+    notify_entry_changed,
+    remove_entry,
+    set_entry_inclusion,
+    update_entry_content,
+)
+from .spec_cache import SpecCache
+from .token_estimator import (
+    SessionTokenEstimate,
+    TokenEstimate,
+    estimate_entry_tokens,
+    estimate_session_tokens,
+    estimate_tokens,
+    estimate_tokens_from_size,
+)
+from .token_service import count_entry_tokens, count_prompt_tokens, count_session_tokens, refresh_entry_token_cache
+
+# Moduły spoza ścieżki zimnego startu CLI są importowane przy pierwszym dostępie do ich nazw.
+_LAZY_EXPORTS = {
+    "ArchiveError": "archive_import",
+    "is_archive_path": "archive_import",
+    "scan_archive": "archive_import",
+    "ChangeJournal": "change_journal",
+    "JournalAction": "change_journal",
+    "JournalRecord": "change_journal",
+    "CompactionLanguage": "compaction",
+    "CompactionReport": "compaction",
+    "FileCompaction": "compaction",
+    "compact_session": "compaction",
+    "compact_text": "compaction",
+    "compacted_content": "compaction",
+    "detect_language": "compaction",
+    "format_compaction_report": "compaction",
+    "ContentIndex": "content_index",
+    "BlobCache": "git_revision",
+    "CachedBlob": "git_revision",
+    "GitCatFile": "git_revision",
+    "GitRevisionError": "git_revision",
+    "scan_git_revision": "git_revision",
+    "AllocationPhase": "memory_report",
+    "MemoryCategory": "memory_report",
+    "MemoryReport": "memory_report",
+    "MemoryRow": "memory_report",
+    "build_memory_report": "memory_report",
+    "format_bytes": "memory_report",
+    "format_memory_report": "memory_report",
+    "outline_python": "outline",
+    "outline_session": "outline",
+    "outlined_content": "outline",
+    "LoadStatus": "path_stream",
+    "LoadedFile": "path_stream",
+    "iter_path_list": "path_stream",
+    "load_files": "path_stream",
+    "TextWindowReader": "text_window",
+    "open_text_windows": "text_window",
+    "RollupKind": "token_rollup",
+    "RollupRow": "token_rollup",
+    "TokenRollup": "token_rollup",
+    "TokenCountScheduler": "token_scheduler",
+    "TokenPriority": "token_scheduler",
+    "schedule_session_tokens": "token_scheduler",
+}
 
 __all__ = [
+    "AllocationPhase",
+    "ArchiveError",
+    "BlobCache",
     "BuildResult",
+    "CachedBlob",
+    "CachedFile",
+    "ChangeJournal",
+    "CompactionLanguage",
+    "CompactionReport",
+    "ContentIndex",
+    "DirectoryImport",
     "Entry",
     "EntrySourceType",
+    "EntryStore",
+    "FileCompaction",
+    "FileContentCache",
+    "FileEnumeration",
     "FileListRecord",
+    "GitCatFile",
+    "GitIndexEntry",
+    "GitIndexError",
+    "GitRevisionError",
+    "ImportBudget",
+    "ImportedFile",
+    "JournalAction",
+    "JournalRecord",
+    "LoadStatus",
+    "LoadedFile",
+    "MemoryCategory",
+    "MemoryReport",
+    "MemoryRow",
+    "NULL_PROFILER",
     "OutputFormat",
+    "PathTrie",
+    "Profiler",
+    "RenderedTokenCount",
+    "RollupKind",
+    "RollupRow",
     "Session",
+    "SessionObserver",
+    "SessionTokenEstimate",
+    "Span",
+    "SpecCache",
+    "SubtreeStats",
+    "TextWindowReader",
+    "TokenCountScheduler",
+    "TokenEstimate",
+    "TokenPriority",
+    "TokenRollup",
+    "TreeBudget",
+    "add_directory_import",
     "add_entry",
     "build_import_report",
+    "build_memory_report",
     "build_output",
     "clear_session",
+    "compact_session",
+    "compact_text",
+    "compacted_content",
     "count_entry_tokens",
+    "count_prompt_tokens",
+    "count_rendered_tokens",
     "count_session_tokens",
     "create_entry",
+    "describe_enumeration",
+    "detect_language",
+    "estimate_entry_tokens",
+    "estimate_session_tokens",
+    "estimate_tokens",
+    "estimate_tokens_from_size",
+    "entry_tree_path",
     "exclude_entries",
+    "exclude_subtree",
+    "find_git_dir",
+    "format_bytes",
+    "format_compaction_report",
+    "format_memory_report",
     "get_entry",
     "include_entries",
+    "include_subtree",
+    "is_archive_path",
+    "iter_path_list",
+    "load_files",
+    "mask_and",
+    "mask_not",
+    "mask_or",
     "matches_filters",
+    "notify_entry_changed",
+    "open_text_windows",
+    "outline_python",
+    "outline_session",
+    "outlined_content",
+    "parse_exclude_patterns",
+    "read_git_index",
+    "refresh_entry_token_cache",
     "remove_entry",
     "remove_entries",
+    "remove_subtree",
+    "render_directory_tree",
+    "scan_archive",
+    "scan_directory",
+    "scan_git_revision",
+    "schedule_session_tokens",
+    "session_store",
     "set_entry_inclusion",
+    "spans_to_chrome_trace",
+    "spans_to_json",
+    "update_entry_content",
+    "write_output",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
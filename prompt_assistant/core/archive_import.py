@@ -0,0 +1,253 @@
+"""Import archiwów zip/tar bez rozpakowywania: członkowie czytani strumieniowo, prosto do pamięci."""
+from __future__ import annotations
+
+import os
+import posixpath
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+from prompt_assistant.utils import gitignore_lines_to_patterns
+
+from .importer import (
+    DirectoryImport,
+    FileEnumeration,
+    ImportBudget,
+    ImportedFile,
+    _budget_stop_reason,
+    _decode_text,
+)
+from .profiling import NULL_PROFILER, Profiler
+from .spec_cache import PathMatcher, SpecCache, DEFAULT_SPEC_CACHE
+from .token_estimator import estimate_tokens_from_size
+
+if TYPE_CHECKING:
+    import zipfile
+
+# tarfile i zipfile są importowane leniwie, żeby nie wydłużać zimnego startu CLI.
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# (ścieżka względna, rozmiar z nagłówka, odczyt treści) w kolejności archiwum.
+_Member = tuple[str, int, Callable[[], bytes]]
+
+
+class ArchiveError(ValueError):
+    """Plik nie jest obsługiwanym archiwum zip/tar albo jest uszkodzony."""
+
+
+def is_archive_path(path: str) -> bool:
+    """True dla istniejącego pliku z rozszerzeniem obsługiwanego archiwum."""
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def scan_archive(
+    archive_path: str,
+    *,
+    use_gitignore: bool = True,
+    exclude_patterns: Iterable[str] = (),
+    profiler: Profiler | None = None,
+    budget: ImportBudget | None = None,
+    spec_cache: SpecCache | None = None,
+) -> DirectoryImport:
+    """Importuje pliki tekstowe archiwum jak katalog z dysku (`scan_directory`), bez zapisu na dysk.
+
+    Obowiązują te same reguły: `.gitignore` z archiwum, wzorce wykluczeń,
+    pomijanie binarek i katalogów `.git`, limit na plik z *budget* sprawdzany na
+    rozmiarach z nagłówków przed odczytem, a limit całkowity po odczycie i tylko
+    dla plików tekstowych. Wspólny katalog najwyższego poziomu
+    (np. `projekt-1.2/`) staje się nazwą importu. Zip jest czytany przez
+    centralny katalog, tar dwoma przebiegami strumieniowymi: nagłówki
+    i `.gitignore`, potem treść wybranych plików (przerywany po wyczerpaniu limitu).
+    Nieczytelne archiwum zgłasza `ArchiveError`.
+    """
+    import tarfile
+    import zipfile
+
+    prof = profiler or NULL_PROFILER
+    budget = budget or ImportBudget()
+    first_span = len(prof.spans)
+    archive_path = os.path.normpath(archive_path)
+    result = DirectoryImport(
+        root_path=archive_path,
+        name=_archive_stem(archive_path),
+        enumeration=FileEnumeration.ARCHIVE,
+    )
+    try:
+        with _open_members(archive_path) as (listing, members):
+            with prof.span("archive_list") as list_span:
+                rel_paths, gitignores = listing()
+                list_span.add(files=len(rel_paths))
+            root = _common_root(rel_paths)
+            if root:
+                result.name = root
+
+            with prof.span("gitignore_spec"):
+                git_matcher = _gitignore_matcher(gitignores, root) if use_gitignore else None
+            custom_matcher = (spec_cache or DEFAULT_SPEC_CACHE).custom_matcher(exclude_patterns)
+
+            with prof.span("scan") as scan_span:
+                scan_span.add(files=len(rel_paths))
+                for rel, size, read in members():
+                    rel = rel[len(root) + 1 :] if root else rel
+                    _import_member(result, rel, size, read, git_matcher, custom_matcher, budget, prof)
+                    if result.budget_stop:
+                        break
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as exc:
+        raise ArchiveError(f"{os.path.basename(archive_path)}: {exc}") from exc
+
+    result.spans = list(prof.spans[first_span:])
+    return result
+
+
+def _import_member(
+    result: DirectoryImport,
+    rel: str,
+    size: int,
+    read: Callable[[], bytes],
+    git_matcher: PathMatcher | None,
+    custom_matcher: PathMatcher | None,
+    budget: ImportBudget,
+    prof: Profiler,
+) -> None:
+    with prof.accumulate("gitignore_match"):
+        ignored = git_matcher is not None and git_matcher.match(rel)
+    if ignored:
+        result.skipped_git += 1
+        return
+    with prof.accumulate("custom_match"):
+        ignored = custom_matcher is not None and custom_matcher.match(rel)
+    if ignored:
+        result.skipped_custom += 1
+        return
+    if budget.max_file_bytes is not None and size > budget.max_file_bytes:
+        result.skipped_size.append(f"{rel} ({size} B)")
+        return
+
+    # Binarność wychodzi dopiero z treści, więc limit całkowity jest sprawdzany po odczycie
+    # (członek ma najwyżej `max_file_bytes`); binarki nie zużywają budżetu.
+    with prof.accumulate("read") as read_span:
+        try:
+            data = read()
+        except Exception as exc:
+            result.read_errors.append(f"{rel}: {exc}")
+            return
+        try:
+            content = _decode_text(data)
+        except UnicodeDecodeError as exc:
+            result.read_errors.append(f"{rel}: {exc}")
+            return
+        if content is None:
+            result.skipped_binary += 1
+            return
+        content_size = len(content.encode("utf-8"))
+        read_span.add(files=1, bytes=content_size)
+    stop = _budget_stop_reason(result, budget, content_size)
+    if stop is not None:
+        result.budget_stop = stop
+        return
+    result.total_bytes += content_size
+    result.projected_tokens += estimate_tokens_from_size(content_size)
+    result.files.append(
+        ImportedFile(rel=rel, content=content, size=content_size, extension=os.path.splitext(rel)[1].lower())
+    )
+
+
+def _member_rel(name: str) -> str | None:
+    """Znormalizowana ścieżka członka; None dla ścieżek spoza archiwum i zawartości katalogów `.git`."""
+    rel = posixpath.normpath(name.replace("\\", "/").lstrip("/"))
+    if rel == "." or rel == ".." or rel.startswith("../"):
+        return None
+    if ".git" in rel.split("/")[:-1]:
+        return None
+    return rel
+
+
+def _common_root(rel_paths: list[str]) -> str:
+    """Katalog najwyższego poziomu wspólny dla wszystkich plików ("" gdy go nie ma)."""
+    root = ""
+    for rel in rel_paths:
+        head, separator, _rest = rel.partition("/")
+        if not separator or (root and head != root):
+            return ""
+        root = head
+    return root
+
+
+def _gitignore_matcher(gitignores: list[tuple[str, str]], root: str) -> PathMatcher | None:
+    patterns: list[str] = []
+    for rel, text in gitignores:
+        rel = rel[len(root) + 1 :] if root else rel
+        patterns.extend(gitignore_lines_to_patterns(text.splitlines(), posixpath.dirname(rel) or "."))
+    return PathMatcher(patterns) if patterns else None
+
+
+def _archive_stem(path: str) -> str:
+    name = os.path.basename(path)
+    lowered = name.lower()
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if lowered.endswith(suffix):
+            return name[: -len(suffix)] or name
+    return name
+
+
+@contextmanager
+def _open_members(path: str):
+    """Zwraca parę funkcji: lista plików z treścią `.gitignore` oraz iterator członków do odczytu."""
+    import tarfile
+    import zipfile
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            yield _zip_listing(archive), lambda: _zip_members(archive)
+        return
+    try:
+        is_tar = tarfile.is_tarfile(path)
+    except (OSError, tarfile.TarError, EOFError):
+        is_tar = False
+    if not is_tar:
+        raise ArchiveError(f"{os.path.basename(path)}: nieobsługiwany format archiwum")
+    yield _tar_listing(path), lambda: _tar_members(path)
+
+
+def _zip_members(archive: zipfile.ZipFile) -> Iterator[_Member]:
+    for info in archive.infolist():
+        rel = None if info.is_dir() else _member_rel(info.filename)
+        if rel is not None:
+            yield rel, info.file_size, lambda info=info: archive.read(info)
+
+
+def _zip_listing(archive: zipfile.ZipFile) -> Callable[[], tuple[list[str], list[tuple[str, str]]]]:
+    def listing() -> tuple[list[str], list[tuple[str, str]]]:
+        rel_paths: list[str] = []
+        gitignores: list[tuple[str, str]] = []
+        for rel, _size, read in _zip_members(archive):
+            rel_paths.append(rel)
+            if posixpath.basename(rel) == ".gitignore":
+                gitignores.append((rel, read().decode("utf-8", "replace")))
+        return rel_paths, gitignores
+
+    return listing
+
+
+def _tar_members(path: str) -> Iterator[_Member]:
+    import tarfile
+
+    # Tryb strumieniowy ("r|*"): jeden sekwencyjny przebieg bez przewijania skompresowanego strumienia.
+    with tarfile.open(path, "r|*") as archive:
+        for info in archive:
+            rel = _member_rel(info.name) if info.isreg() else None
+            if rel is not None:
+                yield rel, info.size, lambda info=info: archive.extractfile(info).read()
+
+
+def _tar_listing(path: str) -> Callable[[], tuple[list[str], list[tuple[str, str]]]]:
+    def listing() -> tuple[list[str], list[tuple[str, str]]]:
+        rel_paths: list[str] = []
+        gitignores: list[tuple[str, str]] = []
+        for rel, _size, read in _tar_members(path):
+            rel_paths.append(rel)
+            if posixpath.basename(rel) == ".gitignore":
+                gitignores.append((rel, read().decode("utf-8", "replace")))
+        return rel_paths, gitignores
+
+    return listing
@@ -1,7 +1,9 @@
 """Masowe operacje na wpisach sesji."""
 from __future__ import annotations
 
+from .entry_store import session_store
 from .models import Session
+from .path_trie import PathTrie
 from .session_ops import remove_entry, set_entry_inclusion
 
 
@@ -24,9 +26,35 @@ def exclude_entries(session: Session, entry_ids: list[str]) -> int:
 
 
 def remove_entries(session: Session, entry_ids: list[str]) -> int:
-    """Usuwa wskazane wpisy; zwraca liczbę usunięć."""
-    removed = 0
-    for entry_id in entry_ids:
-        if remove_entry(session, entry_id):
-            removed += 1
-    return removed
+    """Usuwa wskazane wpisy jednym przejściem po liście sesji; zwraca liczbę usunięć."""
+    store = session_store(session)
+    doomed = {entry_id for entry_id in entry_ids if store.get(entry_id) is not None}
+    if len(doomed) <= 1:
+        return sum(remove_entry(session, entry_id) for entry_id in doomed)
+
+    removed = [entry for entry in session.entries if entry.entry_id in doomed]
+    session.entries[:] = [entry for entry in session.entries if entry.entry_id not in doomed]
+    for entry in removed:
+        store.remove(entry.entry_id)
+        for observer in session.observers:
+            observer.entry_removed(entry)
+    return len(removed)
+
+
+def _subtree_ids(trie: PathTrie, prefix: str) -> list[str]:
+    return [entry.entry_id for entry in trie.entries_under(prefix)]
+
+
+def include_subtree(session: Session, trie: PathTrie, prefix: str) -> int:
+    """Włącza wszystkie pliki poddrzewa *prefix* (np. "repo/tests"); zwraca liczbę zmian."""
+    return include_entries(session, [entry.entry_id for entry in trie.entries_under(prefix) if not entry.read_error])
+
+
+def exclude_subtree(session: Session, trie: PathTrie, prefix: str) -> int:
+    """Wyłącza wszystkie pliki poddrzewa *prefix*; zwraca liczbę zmian."""
+    return exclude_entries(session, _subtree_ids(trie, prefix))
+
+
+def remove_subtree(session: Session, trie: PathTrie, prefix: str) -> int:
+    """Usuwa wszystkie pliki poddrzewa *prefix*; zwraca liczbę usunięć."""
+    return remove_entries(session, _subtree_ids(trie, prefix))
@@ -0,0 +1,195 @@
+"""Dziennik zmian operacji masowych: tanie cofanie i ponawianie include/exclude/remove."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from .bulk_ops import exclude_entries, include_entries, remove_entries
+from .entry_store import session_store
+from .models import Entry, Session
+
+# Domyślna liczba operacji, które można cofnąć; starsze wypadają z dziennika.
+MAX_JOURNAL_RECORDS = 100
+
+
+class JournalAction(StrEnum):
+    """Rodzaj operacji zapisanej w dzienniku."""
+
+    INCLUDE = "include"
+    EXCLUDE = "exclude"
+    REMOVE = "remove"
+
+
+@dataclass(slots=True)
+class JournalRecord:
+    """Jedna operacja masowa jako delta: ID faktycznie zmienionych wpisów albo usunięte wpisy."""
+
+    action: JournalAction
+    entry_ids: tuple[str, ...]
+    # Usunięte wpisy (referencje z treścią i cache tokenów, bez kopii) i ID wpisów, które je poprzedzały
+    # w `session.entries` (None: początek listy), żeby cofnięcie przywróciło kolejność.
+    removed: tuple[Entry, ...] = ()
+    anchors: tuple[str | None, ...] = ()
+    # Dane warstwy wywołującej (np. obiekty listy GUI), zwracane przy cofaniu i ponawianiu.
+    payload: Any = None
+
+
+class ChangeJournal:
+    """Stos operacji masowych sesji z cofaniem i ponawianiem.
+
+    Pamięć rośnie z rozmiarem zmian, a nie sesji: zmiana flag to lista ID,
+    usunięcie trzyma referencje do usuniętych wpisów, więc cofnięcie przywraca
+    je bez czytania plików i ponownej tokenizacji. Operacje wykonane poza
+    dziennikiem nie są cofane; cofanie pomija wpisy, których już nie ma
+    (albo które wróciły do sesji). Wyczyszczenie sesji czyści dziennik.
+    """
+
+    def __init__(self, session: Session, *, limit: int = MAX_JOURNAL_RECORDS) -> None:
+        self._session = session
+        self._limit = limit
+        self._undo: list[JournalRecord] = []
+        self._redo: list[JournalRecord] = []
+
+    @classmethod
+    def for_session(cls, session: Session, *, limit: int = MAX_JOURNAL_RECORDS) -> ChangeJournal:
+        """Tworzy dziennik sesji i rejestruje go jako obserwatora (czyszczenie sesji czyści historię)."""
+        journal = cls(session, limit=limit)
+        session.observers.append(journal)
+        return journal
+
+    # ------------------------------------------------------------ operations
+    def include(self, entry_ids: list[str], *, payload: Any = None) -> int:
+        """Włącza wpisy do outputu i zapisuje zmianę; zwraca liczbę zmienionych wpisów."""
+        return self._record(self._set_inclusion(JournalAction.INCLUDE, entry_ids, payload))
+
+    def exclude(self, entry_ids: list[str], *, payload: Any = None) -> int:
+        """Wyłącza wpisy z outputu i zapisuje zmianę; zwraca liczbę zmienionych wpisów."""
+        return self._record(self._set_inclusion(JournalAction.EXCLUDE, entry_ids, payload))
+
+    def remove(self, entry_ids: list[str], *, payload: Any = None) -> int:
+        """Usuwa wpisy z sesji i zapisuje je do cofnięcia; zwraca liczbę usunięć."""
+        return self._record(self._remove(entry_ids, payload))
+
+    def undo(self) -> JournalRecord | None:
+        """Cofa ostatnią operację; zwraca jej zapis albo None, gdy nie ma czego cofać."""
+        if not self._undo:
+            return None
+        record = self._undo.pop()
+        if record.action is JournalAction.REMOVE:
+            _restore_entries(self._session, record.removed, record.anchors)
+        elif record.action is JournalAction.INCLUDE:
+            exclude_entries(self._session, list(record.entry_ids))
+        else:
+            include_entries(self._session, list(record.entry_ids))
+        self._redo.append(record)
+        return record
+
+    def redo(self) -> JournalRecord | None:
+        """Ponawia ostatnio cofniętą operację; zwraca jej nowy zapis albo None."""
+        if not self._redo:
+            return None
+        record = self._redo.pop()
+        if record.action is JournalAction.REMOVE:
+            redone = self._remove(list(record.entry_ids), record.payload)
+        else:
+            redone = self._set_inclusion(record.action, list(record.entry_ids), record.payload)
+        self._push(redone)
+        return redone
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+
+    # ------------------------------------------------------------- observer
+    def entry_added(self, entry: Entry) -> None:
+        pass
+
+    def entry_removed(self, entry: Entry) -> None:
+        pass
+
+    def entry_changed(self, entry: Entry) -> None:
+        pass
+
+    def session_cleared(self) -> None:
+        self.clear()
+
+    # -------------------------------------------------------------- internal
+    def _record(self, record: JournalRecord) -> int:
+        if record.entry_ids:
+            self._push(record)
+            self._redo.clear()
+        return len(record.entry_ids)
+
+    def _push(self, record: JournalRecord) -> None:
+        self._undo.append(record)
+        if len(self._undo) > self._limit:
+            del self._undo[: len(self._undo) - self._limit]
+
+    def _set_inclusion(self, action: JournalAction, entry_ids: list[str], payload: Any) -> JournalRecord:
+        include = action is JournalAction.INCLUDE
+        store = session_store(self._session)
+        changed: list[str] = []
+        for entry_id in dict.fromkeys(entry_ids):
+            entry = store.get(entry_id)
+            if entry is not None and entry.include_in_output != include:
+                changed.append(entry_id)
+        (include_entries if include else exclude_entries)(self._session, changed)
+        return JournalRecord(action, tuple(changed), payload=payload)
+
+    def _remove(self, entry_ids: list[str], payload: Any) -> JournalRecord:
+        doomed = set(entry_ids)
+        removed: list[Entry] = []
+        anchors: list[str | None] = []
+        anchor: str | None = None
+        for entry in self._session.entries:
+            if entry.entry_id in doomed:
+                removed.append(entry)
+                anchors.append(anchor)
+            else:
+                anchor = entry.entry_id
+        remove_entries(self._session, [entry.entry_id for entry in removed])
+        return JournalRecord(
+            JournalAction.REMOVE,
+            tuple(entry.entry_id for entry in removed),
+            removed=tuple(removed),
+            anchors=tuple(anchors),
+            payload=payload,
+        )
+
+
+def _restore_entries(session: Session, removed: tuple[Entry, ...], anchors: tuple[str | None, ...]) -> None:
+    """Wstawia usunięte wpisy za ich dawnymi poprzednikami jednym przejściem i powiadamia obserwatorów.
+
+    Wpisy, których poprzednika już nie ma w sesji, trafiają na koniec listy.
+    """
+    store = session_store(session)
+    following: dict[str | None, list[Entry]] = {}
+    for entry, anchor in zip(removed, anchors):
+        if store.get(entry.entry_id) is None:
+            following.setdefault(anchor, []).append(entry)
+    if not following:
+        return
+    restored = [entry for group in following.values() for entry in group]
+
+    merged = following.pop(None, [])
+    for entry in session.entries:
+        merged.append(entry)
+        group = following.pop(entry.entry_id, None)
+        if group:
+            merged.extend(group)
+    for group in following.values():
+        merged.extend(group)
+    session.entries[:] = merged
+    for entry in restored:
+        store.add(entry)
+        for observer in session.observers:
+            observer.entry_added(entry)
@@ -0,0 +1,414 @@
+"""Kompaktowanie treści plików przed renderowaniem (mniej tokenów, ta sama semantyka kodu).
+
+Reguły zależą od języka: w Pythonie znikają komentarze, docstringi i puste
+linie (poza literałami napisów), w językach C-podobnych komentarze `//` i
+`/* */` (w tym banery licencyjne; w JS/TS poza literałami regex), w CSS
+tylko `/* */`, w plikach konfiguracyjnych linie `#` (poza shebangiem,
+skalarami blokowymi YAML, wieloliniowymi napisami TOML i heredoc),
+w znacznikach komentarze `<!-- -->`, a JSON jest minifikowany. Wyniki i ich
+liczby tokenów są zapamiętywane po skrócie treści.
+"""
+from __future__ import annotations
+
+import ast
+import dataclasses
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import tokenize
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Collection
+
+from prompt_assistant.utils import count_tokens
+
+from .models import EntrySourceType, Session
+from .session_ops import add_entry
+from .token_service import count_entry_tokens
+
+COMPACTION_CACHE_SIZE = 20_000
+
+
+class CompactionLanguage(StrEnum):
+    """Rodzina reguł kompaktowania wybierana po rozszerzeniu pliku."""
+
+    PYTHON = "python"
+    C_LIKE = "c_like"
+    CSS = "css"
+    HASH_COMMENTS = "hash_comments"
+    MARKUP = "markup"
+    JSON = "json"
+    TEXT = "text"
+
+
+_EXTENSIONS = {
+    CompactionLanguage.PYTHON: (".py", ".pyi", ".pyw"),
+    CompactionLanguage.C_LIKE: (
+        ".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".java", ".js", ".jsx", ".mjs", ".cjs",
+        ".ts", ".tsx", ".go", ".rs", ".cs", ".kt", ".kts", ".swift", ".scala", ".dart", ".proto",
+    ),
+    CompactionLanguage.CSS: (".css", ".scss", ".less"),
+    CompactionLanguage.HASH_COMMENTS: (
+        ".sh", ".bash", ".zsh", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".conf", ".rb", ".pl",
+        ".r", ".mk", ".dockerfile", ".gitignore",
+    ),
+    CompactionLanguage.MARKUP: (".html", ".htm", ".xml", ".svg", ".xhtml", ".vue"),
+    CompactionLanguage.JSON: (".json",),
+}
+_LANGUAGE_BY_EXTENSION = {ext: language for language, exts in _EXTENSIONS.items() for ext in exts}
+_LANGUAGE_BY_NAME = {
+    "makefile": CompactionLanguage.HASH_COMMENTS,
+    "dockerfile": CompactionLanguage.HASH_COMMENTS,
+    ".gitignore": CompactionLanguage.HASH_COMMENTS,
+}
+
+# Napisy są dopasowywane przed komentarzami, więc `//` lub `/*` wewnątrz napisu zostają.
+_C_LIKE_PATTERN = re.compile(
+    r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)|(//[^\n]*|/\*.*?\*/)""",
+    re.DOTALL,
+)
+# JS/TS: literał regex (po operatorze, nawiasie, początku linii, `return` lub `typeof`) też jest
+# przenoszony bez zmian, więc `/\/\//g` nie jest brany za komentarz `//`.
+_JS_PATTERN = re.compile(
+    r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`"""
+    r"""|(?:^|[(,=:\[!&|?{};]|\breturn|\btypeof)\s*/(?![*/])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*)"""
+    r"""|(//[^\n]*|/\*.*?\*/)""",
+    re.DOTALL | re.MULTILINE,
+)
+# Rust: apostrof to także lifetime (`'a`), więc literały znakowe nie są rozpoznawane.
+_RUST_PATTERN = re.compile(r"""("(?:\\.|[^"\\])*")|(//[^\n]*|/\*.*?\*/)""", re.DOTALL)
+# CSS nie ma komentarzy `//` (`url(http://...)`); SCSS i LESS mają, ale nie w napisach ani w `url(...)`.
+_CSS_PATTERN = re.compile(r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|(/\*.*?\*/)""", re.DOTALL)
+_SCSS_PATTERN = re.compile(
+    r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|\burl\([^)]*\))|(//[^\n]*|/\*.*?\*/)""",
+    re.DOTALL | re.IGNORECASE,
+)
+_MARKUP_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+# Początek heredoc (`<<EOF`, `<<-'EOF'`, `<<~EOS`); `<<<` to here-string, bez treści w kolejnych liniach.
+_HEREDOC = re.compile(r"""(?<!<)<<(?!<)[-~]?\s*(['"]?)([A-Za-z_][A-Za-z0-9_]*)\1""")
+# TOML: ogranicznik wieloliniowego napisu (`"""` lub `'''`).
+_TOML_MULTILINE_QUOTE = re.compile(r"\"\"\"|'''")
+# YAML: `klucz: |`, `- >-`, `klucz: |2 # opis`; treść to kolejne linie wcięte głębiej niż linia otwierająca.
+_YAML_BLOCK_SCALAR = re.compile(r"(?:^|\s)[|>][-+0-9]*\s*(?:#.*)?$")
+
+
+def detect_language(path: str) -> CompactionLanguage:
+    """Zwraca rodzinę reguł dla ścieżki pliku (domyślnie zwykły tekst)."""
+    name = path.rsplit("/", 1)[-1].lower()
+    if name in _LANGUAGE_BY_NAME:
+        return _LANGUAGE_BY_NAME[name]
+    return _LANGUAGE_BY_EXTENSION.get(os.path.splitext(name)[1], CompactionLanguage.TEXT)
+
+
+def _collapse_blank_lines(lines: list[str], verbatim: Collection[int] = ()) -> str:
+    """Usuwa białe znaki na końcach linii i skraca serie pustych linii do jednej.
+
+    Linie o indeksach z *verbatim* (np. treść heredoc) zostają bez zmian.
+    """
+    result: list[str] = []
+    for index, line in enumerate(lines):
+        if index in verbatim:
+            result.append(line)
+            continue
+        line = line.rstrip()
+        if not line and (not result or not result[-1]):
+            continue
+        result.append(line)
+    while result and not result[-1]:
+        result.pop()
+    return "\n".join(result)
+
+
+def _compact_python(text: str) -> str:
+    try:
+        tree = ast.parse(text)
+        tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+    except (SyntaxError, ValueError, tokenize.TokenError):
+        return _collapse_blank_lines(text.split("\n"))
+
+    lines = text.split("\n")
+    comment_cols: dict[int, int] = {}
+    in_string: set[int] = set()  # linie wewnątrz wieloliniowych napisów (bez linii otwierającej)
+    string_starts: set[int] = set()
+    fstring_start = getattr(tokenize, "FSTRING_START", None)
+    fstring_end = getattr(tokenize, "FSTRING_END", None)
+    open_fstrings: list[int] = []
+    for token in tokens:
+        if token.type == tokenize.COMMENT:
+            comment_cols[token.start[0]] = token.start[1]
+        elif token.type == fstring_start:
+            open_fstrings.append(token.start[0])
+        elif token.type in (tokenize.STRING, fstring_end):
+            start_row = open_fstrings.pop() if token.type == fstring_end and open_fstrings else token.start[0]
+            if token.end[0] > start_row:
+                string_starts.add(start_row)
+                in_string.update(range(start_row + 1, token.end[0] + 1))
+
+    # Docstring usuwamy tylko gdy zajmuje całe linie; jedyną instrukcję ciała zastępuje `...`.
+    removed: dict[int, str | None] = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) or not node.body:
+            continue
+        first = node.body[0]
+        if not (
+            isinstance(first, ast.Expr)
+            and isinstance(first.value, ast.Constant)
+            and isinstance(first.value.value, str)
+        ):
+            continue
+        start, end = first.lineno, first.end_lineno or first.lineno
+        if lines[start - 1][: first.col_offset].strip():
+            continue
+        tail = lines[end - 1][first.end_col_offset or 0 :].strip()
+        if tail and not tail.startswith("#"):
+            continue
+        replacement = " " * first.col_offset + "..." if len(node.body) == 1 and not isinstance(node, ast.Module) else None
+        removed[start] = replacement
+        for row in range(start + 1, end + 1):
+            removed[row] = None
+
+    result: list[str] = []
+    for row, line in enumerate(lines, start=1):
+        if row in removed:
+            if removed[row] is not None:
+                result.append(removed[row])
+            continue
+        if row in comment_cols:
+            line = line[: comment_cols[row]]
+        if row in in_string:
+            result.append(line)
+            continue
+        if row not in string_starts:
+            line = line.rstrip()
+            if not line:
+                continue
+        result.append(line)
+    return "\n".join(result)
+
+
+def _compact_c_like(text: str, pattern: re.Pattern[str]) -> str:
+    def _replace(match: re.Match[str]) -> str:
+        if match.group(1) is not None:
+            return match.group(1)
+        return " " if match.group(2).startswith("/*") else ""
+
+    return _collapse_blank_lines(pattern.sub(_replace, text).split("\n"))
+
+
+def _compact_hash_comments(text: str, *, yaml: bool = False, toml: bool = False) -> str:
+    # Fałszywie rozpoznany heredoc, skalar blokowy lub napis TOML najwyżej zostawia komentarze, nie zmienia treści.
+    kept: list[str] = []
+    verbatim: set[int] = set()
+    heredocs: list[str] = []
+    scalar_indent: int | None = None
+    toml_quote: str | None = None
+    for index, line in enumerate(text.split("\n")):
+        stripped = line.strip()
+        if toml_quote is not None:
+            verbatim.add(len(kept))
+            kept.append(line)
+            toml_quote = _toml_quote_after(line, toml_quote)
+            continue
+        if heredocs:
+            if stripped == heredocs[0]:
+                heredocs.pop(0)
+            verbatim.add(len(kept))
+            kept.append(line)
+            continue
+        if scalar_indent is not None:
+            if not stripped or len(line) - len(line.lstrip()) > scalar_indent:
+                verbatim.add(len(kept))
+                kept.append(line)
+                continue
+            scalar_indent = None
+        if stripped.startswith("#") and not (index == 0 and line.startswith("#!")):
+            continue
+        if toml:
+            toml_quote = _toml_quote_after(line, None)
+            if toml_quote is not None:
+                # Białe znaki przed końcem linii otwierającej należą do napisu.
+                verbatim.add(len(kept))
+        kept.append(line)
+        heredocs = [match.group(2) for match in _HEREDOC.finditer(line)]
+        if yaml and _YAML_BLOCK_SCALAR.search(line):
+            scalar_indent = len(line) - len(line.lstrip())
+    return _collapse_blank_lines(kept, verbatim)
+
+
+def _toml_quote_after(line: str, quote: str | None) -> str | None:
+    """Zwraca ogranicznik wieloliniowego napisu TOML otwartego po końcu *line* (None gdy zamknięty)."""
+    for match in _TOML_MULTILINE_QUOTE.finditer(line):
+        if quote is None:
+            quote = match.group()
+        elif match.group() == quote:
+            quote = None
+    return quote
+
+
+def _compact_json(text: str) -> str:
+    try:
+        return json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
+    except ValueError:
+        return _collapse_blank_lines(text.split("\n"))
+
+
+def _rule_variant(language: CompactionLanguage, path: str) -> str:
+    """Wariant reguł języka zależny od rozszerzenia (wybór wzorca i część klucza cache)."""
+    lower = path.lower()
+    if language == CompactionLanguage.C_LIKE and lower.endswith(".rs"):
+        return "rs"
+    if language == CompactionLanguage.C_LIKE and lower.endswith((".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx")):
+        return "js"
+    if language == CompactionLanguage.CSS and lower.endswith(".css"):
+        return "css"
+    if language == CompactionLanguage.HASH_COMMENTS and lower.endswith((".yaml", ".yml")):
+        return "yaml"
+    if language == CompactionLanguage.HASH_COMMENTS and lower.endswith(".toml"):
+        return "toml"
+    return ""
+
+
+def compact_text(text: str, language: CompactionLanguage, *, path: str = "") -> str:
+    """Zwraca skompaktowaną treść wg reguł *language* (bez cache)."""
+    if language == CompactionLanguage.PYTHON:
+        return _compact_python(text)
+    variant = _rule_variant(language, path)
+    if language == CompactionLanguage.C_LIKE:
+        patterns = {"rs": _RUST_PATTERN, "js": _JS_PATTERN}
+        return _compact_c_like(text, patterns.get(variant, _C_LIKE_PATTERN))
+    if language == CompactionLanguage.CSS:
+        return _compact_c_like(text, _CSS_PATTERN if variant == "css" else _SCSS_PATTERN)
+    if language == CompactionLanguage.HASH_COMMENTS:
+        return _compact_hash_comments(text, yaml=variant == "yaml", toml=variant == "toml")
+    if language == CompactionLanguage.MARKUP:
+        return _collapse_blank_lines(_MARKUP_COMMENT.sub("", text).split("\n"))
+    if language == CompactionLanguage.JSON:
+        return _compact_json(text)
+    return _collapse_blank_lines(text.split("\n"))
+
+
+@dataclass(slots=True)
+class _CompactedText:
+    text: str
+    tokens: int | None = None
+
+
+_cache: OrderedDict[tuple[str, bytes], _CompactedText] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached_compaction(text: str, path: str) -> tuple[CompactionLanguage, _CompactedText]:
+    language = detect_language(path)
+    variant = f"{language}:{_rule_variant(language, path)}"
+    key = (variant, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return language, cached
+    cached = _CompactedText(compact_text(text, language, path=path))
+    with _cache_lock:
+        _cache[key] = cached
+        while len(_cache) > COMPACTION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return language, cached
+
+
+def compacted_content(text: str, path: str) -> str:
+    """Zwraca skompaktowaną treść pliku *path* (z cache po skrócie treści)."""
+    return _cached_compaction(text, path)[1].text
+
+
+@dataclass(slots=True)
+class FileCompaction:
+    """Oszczędność tokenów jednego pliku."""
+
+    path: str
+    language: CompactionLanguage
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+@dataclass(slots=True)
+class CompactionReport:
+    """Podsumowanie kompaktowania sesji."""
+
+    files: list[FileCompaction] = field(default_factory=list)
+
+    @property
+    def tokens_before(self) -> int:
+        return sum(item.tokens_before for item in self.files)
+
+    @property
+    def tokens_after(self) -> int:
+        return sum(item.tokens_after for item in self.files)
+
+    @property
+    def saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.saved / self.tokens_before if self.tokens_before else 0.0
+
+
+def compact_session(session: Session) -> tuple[Session, CompactionReport]:
+    """Zwraca kopię sesji ze skompaktowanymi plikami i raport oszczędności tokenów.
+
+    Wpisy drzew katalogów, wykluczone i z błędem odczytu są przenoszone bez zmian.
+    Oryginalna sesja (i cache tokenów jej wpisów) nie jest modyfikowana.
+    """
+    compacted = Session(prompt_text=session.prompt_text, output_format=session.output_format)
+    report = CompactionReport()
+    for entry in session.entries:
+        if (
+            entry.source_type == EntrySourceType.DIRECTORY_TREE
+            or not entry.include_in_output
+            or entry.read_error is not None
+        ):
+            add_entry(compacted, entry)
+            continue
+        language, result = _cached_compaction(entry.content, entry.path)
+        if result.tokens is None:
+            result.tokens = count_tokens(result.text) if result.text else 0
+        add_entry(
+            compacted,
+            dataclasses.replace(
+                entry,
+                content=result.text,
+                size=len(result.text.encode("utf-8")),
+                token_count_cache=result.tokens,
+                token_estimate_cache=None,
+                render_token_cache=None,
+            ),
+        )
+        report.files.append(
+            FileCompaction(
+                path=f"{entry.root}/{entry.path}" if entry.root else entry.path,
+                language=language,
+                tokens_before=count_entry_tokens(entry),
+                tokens_after=result.tokens,
+            )
+        )
+    return compacted, report
+
+
+def format_compaction_report(report: CompactionReport, limit: int = 10, *, title: str = "Kompaktowanie") -> list[str]:
+    """Zwraca linie raportu: suma oszczędności i pliki z największym zyskiem (*title* np. dla zarysu)."""
+    lines = [
+        f"{title}: {report.tokens_before} → {report.tokens_after} tokenów "
+        f"(-{report.saved}, {report.saved_ratio:.1%})"
+    ]
+    for item in sorted(report.files, key=lambda item: item.saved, reverse=True)[:limit]:
+        if item.saved <= 0:
+            break
+        lines.append(f"  {item.path}: -{item.saved} ({item.tokens_before} → {item.tokens_after})")
+    return lines
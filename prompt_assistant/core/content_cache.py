@@ -0,0 +1,84 @@
+"""Cache treści plików i ich liczby tokenów unieważniany po mtime i rozmiarze."""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from prompt_assistant.utils import is_binary
+
+DEFAULT_MAX_CACHED_BYTES = 256 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class CachedFile:
+    """Odczytany plik: treść (None dla binarnych) i liczba tokenów, gdy już policzona."""
+
+    mtime_ns: int
+    size: int
+    binary: bool
+    content: str | None = None
+    token_count: int | None = None
+
+
+class FileContentCache:
+    """LRU treści plików kluczowane pełną ścieżką i ważne, dopóki `stat` zwraca ten sam mtime i rozmiar.
+
+    Przeznaczony dla długo działających procesów (daemon renderowania), w których
+    kolejne żądania czytają te same pliki. Błędy odczytu nie są zapamiętywane.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_CACHED_BYTES) -> None:
+        self._max_bytes = max_bytes
+        self._files: OrderedDict[str, CachedFile] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, path: str, stat: os.stat_result | None = None) -> CachedFile:
+        """Zwraca plik z cache albo czyta go z dysku; wyjątki `OSError`/`UnicodeDecodeError` przechodzą dalej."""
+        stat = stat or os.stat(path)
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                self._files.move_to_end(path)
+                self.hits += 1
+                return cached
+
+        if is_binary(path):
+            loaded = CachedFile(stat.st_mtime_ns, stat.st_size, binary=True)
+        else:
+            with open(path, encoding="utf-8") as file_handle:
+                loaded = CachedFile(stat.st_mtime_ns, stat.st_size, binary=False, content=file_handle.read())
+        with self._lock:
+            self.misses += 1
+            previous = self._files.pop(path, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._files[path] = loaded
+            self._bytes += loaded.size
+            while self._bytes > self._max_bytes and len(self._files) > 1:
+                _path, evicted = self._files.popitem(last=False)
+                self._bytes -= evicted.size
+        return loaded
+
+    def remember_tokens(self, path: str, content: str, token_count: int) -> None:
+        """Zapisuje liczbę tokenów, jeśli w cache wciąż jest ta sama treść pliku."""
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached.content is content:
+                cached.token_count = token_count
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._bytes = 0
@@ -0,0 +1,214 @@
+"""Indeks pełnotekstowy treści wpisów sesji: wyszukiwanie podciągów i wyrażeń regularnych."""
+from __future__ import annotations
+
+import re
+from array import array
+from re import _constants as sre_constants
+from re import _parser as sre_parser
+
+from .models import Entry, Session
+
+# Przebieg zapytania pasujący do słów z łącznie więcej wierszami niż ten ułamek indeksu
+# (np. fragment "e") nie zawęża kandydatów; taniej sprawdzić treść bezpośrednio.
+MAX_CANDIDATE_SHARE = 0.5
+# Przebudowa, gdy nieaktualnych wierszy jest więcej niż aktualnych (i więcej niż ten próg).
+MIN_STALE_ROWS_FOR_REBUILD = 1024
+
+# Słowo: ciąg liter i cyfr ASCII, "_" oraz znaków spoza ASCII. Ta sama definicja na
+# bajtach UTF-8 pozwala wyciągać słowa przez `bytes.translate` + `split` (w C).
+_WORD = re.compile("[0-9A-Za-z_\x80-\U0010ffff]+")
+_NON_WORD_TO_SPACE = bytes(
+    byte if byte >= 0x80 or chr(byte).isalnum() or byte == ord("_") else ord(" ") for byte in range(256)
+)
+
+
+def _content_words(content: str) -> set[str]:
+    raw_words = set(content.encode("utf-8", "surrogatepass").translate(_NON_WORD_TO_SPACE).split())
+    return {word.decode("utf-8", "surrogatepass") for word in raw_words}
+
+
+class ContentIndex:
+    """Odwrócony indeks słów treści wpisów, aktualizowany przez powiadomienia sesji.
+
+    Zapytanie dzieli się na przebiegi znaków słownych: środkowe muszą być całymi
+    słowami treści, pierwszy końcem słowa, ostatni jego początkiem, a jedyny
+    dowolnym fragmentem słowa. Pasujące słowa znajduje skan słownika trzymanego
+    w jednym napisie, kandydatów daje przecięcie list wpisów tych słów, a wynik
+    potwierdza właściwe wyszukiwanie w treści kandydatów.
+
+    Nowe i zmienione wpisy są indeksowane leniwie, przy najbliższym zapytaniu.
+    Wiersze usuniętych wpisów zostają w listach do przebudowy; odsiewa je
+    potwierdzenie wyniku.
+    """
+
+    def __init__(self) -> None:
+        self._entries: list[Entry | None] = []
+        self._contents: list[str | None] = []
+        self._row_of: dict[str, int] = {}
+        self._postings: dict[str, array] = {}
+        self._pending: dict[str, Entry] = {}
+        self._vocabulary = "\n"
+        self._vocabulary_stale = False
+        self._stale_rows = 0
+        # Liczba wpisów sprawdzonych w treści przy ostatnim zapytaniu (diagnostyka, benchmarki).
+        self.last_candidates = 0
+
+    @classmethod
+    def for_session(cls, session: Session) -> ContentIndex:
+        """Tworzy indeks bieżących wpisów i rejestruje go jako obserwatora sesji."""
+        index = cls()
+        for entry in session.entries:
+            index.entry_added(entry)
+        session.observers.append(index)
+        return index
+
+    # ------------------------------------------------------------- observer
+    def entry_added(self, entry: Entry) -> None:
+        self._pending[entry.entry_id] = entry
+
+    def entry_removed(self, entry: Entry) -> None:
+        self._pending.pop(entry.entry_id, None)
+        row = self._row_of.pop(entry.entry_id, None)
+        if row is not None:
+            self._entries[row] = None
+            self._contents[row] = None
+            self._stale_rows += 1
+
+    def entry_changed(self, entry: Entry) -> None:
+        # Zmiana flag albo cache tokenów nie wymaga ponownego indeksowania.
+        row = self._row_of.get(entry.entry_id)
+        if row is not None and self._contents[row] is entry.content:
+            return
+        self.entry_removed(entry)
+        self.entry_added(entry)
+
+    def session_cleared(self) -> None:
+        self._entries.clear()
+        self._contents.clear()
+        self._row_of.clear()
+        self._postings.clear()
+        self._pending.clear()
+        self._vocabulary = "\n"
+        self._vocabulary_stale = False
+        self._stale_rows = 0
+
+    # ---------------------------------------------------------------- query
+    def search(self, query: str, *, regex: bool = False, ignore_case: bool = False) -> list[Entry]:
+        """Zwraca wpisy, których treść zawiera *query* (podciąg albo regex), w kolejności indeksowania.
+
+        Nieprawidłowe wyrażenie zgłasza `re.error`.
+        """
+        if not query:
+            return []
+        pattern = re.compile(query if regex else re.escape(query), re.IGNORECASE if ignore_case else 0)
+        self._index_pending()
+
+        rows: set[int] | None = None
+        literals = _required_literals(pattern) if regex else [query]
+        for literal in sorted(literals, key=len, reverse=True):
+            literal_rows = self._literal_rows(literal, bool(pattern.flags & re.IGNORECASE))
+            if literal_rows is None:
+                continue
+            rows = literal_rows if rows is None else rows & literal_rows
+            if not rows:
+                break
+
+        candidates = range(len(self._entries)) if rows is None else sorted(rows)
+        self.last_candidates = len(candidates)
+        matches: list[Entry] = []
+        for row in candidates:
+            entry = self._entries[row]
+            if entry is not None and pattern.search(entry.content):
+                matches.append(entry)
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._row_of) + len(self._pending)
+
+    # -------------------------------------------------------------- internal
+    def _index_pending(self) -> None:
+        if self._stale_rows > MIN_STALE_ROWS_FOR_REBUILD and self._stale_rows > len(self._row_of):
+            self._rebuild()
+        if not self._pending:
+            return
+        postings = self._postings
+        for entry in self._pending.values():
+            row = len(self._entries)
+            self._entries.append(entry)
+            self._contents.append(entry.content)
+            self._row_of[entry.entry_id] = row
+            for word in _content_words(entry.content):
+                rows = postings.get(word)
+                if rows is None:
+                    rows = postings[word] = array("I")
+                    self._vocabulary_stale = True
+                rows.append(row)
+        self._pending.clear()
+
+    def _rebuild(self) -> None:
+        live = {entry.entry_id: entry for entry in self._entries if entry is not None}
+        live.update(self._pending)
+        self.session_cleared()
+        self._pending = live
+
+    def _literal_rows(self, literal: str, ignore_case: bool) -> set[int] | None:
+        """Wiersze, które mogą zawierać *literal*; None, gdy nie da się ich zawęzić."""
+        if self._vocabulary_stale:
+            self._vocabulary = "\n" + "\n".join(self._postings) + "\n"
+            self._vocabulary_stale = False
+
+        limit = len(self._entries) * MAX_CANDIDATE_SHARE
+        result: set[int] | None = None
+        runs = sorted(_WORD.finditer(literal), key=lambda match: len(match.group()), reverse=True)
+        for run in runs:
+            needle = re.escape(run.group())
+            if run.start() > 0:
+                needle = "\n" + needle
+            if run.end() < len(literal):
+                needle += "\n"
+            run_rows = self._matching_rows(re.compile(needle, re.IGNORECASE if ignore_case else 0), limit)
+            if run_rows is None:
+                continue
+            result = run_rows if result is None else result & run_rows
+            if not result:
+                break
+        return result
+
+    def _matching_rows(self, needle: re.Pattern, limit: float) -> set[int] | None:
+        """Wiersze słów słownika pasujących do *needle* ("\\n" to granica słowa); None powyżej *limit*."""
+        vocabulary = self._vocabulary
+        postings: list[array] = []
+        total = 0
+        for match in needle.finditer(vocabulary):
+            start = vocabulary.rfind("\n", 0, match.start() + 1) + 1
+            end = vocabulary.find("\n", match.end() - 1)
+            rows = self._postings[vocabulary[start:end]]
+            total += len(rows)
+            if total > limit:
+                return None
+            postings.append(rows)
+        return set().union(*postings)
+
+
+def _required_literals(pattern: re.Pattern) -> list[str]:
+    """Fragmenty dosłowne, które zawiera każde dopasowanie wzorca (z sekwencji najwyższego poziomu)."""
+    literals: list[str] = []
+    current: list[str] = []
+
+    def flush() -> None:
+        if current:
+            literals.append("".join(current))
+            current.clear()
+
+    def walk(items) -> None:
+        for op, argument in items:
+            if op is sre_constants.LITERAL:
+                current.append(chr(argument))
+            elif op is sre_constants.SUBPATTERN and not argument[1] and not argument[2]:
+                walk(argument[3])
+            else:
+                flush()
+
+    walk(sre_parser.parse(pattern.pattern, pattern.flags))
+    flush()
+    return literals
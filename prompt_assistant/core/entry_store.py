@@ -0,0 +1,292 @@
+"""Kolumnowy indeks metadanych wpisów sesji (flagi w `bytearray`, liczby w `array`).
+
+Każdy wpis dostaje całkowity numer wiersza; flagi i liczniki tokenów leżą w
+kolumnach, więc sumy, liczniki i maski filtrów są liczone operacjami na całych
+kolumnach (`bytes.count`, `itertools.compress`, bitowe AND na `int`), zamiast
+pętli Pythona po obiektach `Entry`. Sumy tokenów i liczniki aktywnych wpisów
+są dodatkowo aktualizowane przy każdej zmianie wiersza, więc ich odczyt to O(1).
+"""
+from __future__ import annotations
+
+from array import array
+from itertools import compress
+from operator import attrgetter, is_
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .models import Entry, Session
+
+# Odwraca maskę 0/1 w jednym przebiegu `bytes.translate`.
+_INVERT = bytes([1, 0]) + bytes(254)
+UNKNOWN_TOKENS = -1
+
+
+def mask_and(*masks: bytes | bytearray) -> bytes:
+    """Iloczyn masek 0/1 tej samej długości."""
+    value = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        value &= int.from_bytes(mask, "little")
+    return value.to_bytes(len(masks[0]), "little")
+
+
+def mask_or(*masks: bytes | bytearray) -> bytes:
+    """Suma masek 0/1 tej samej długości."""
+    value = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        value |= int.from_bytes(mask, "little")
+    return value.to_bytes(len(masks[0]), "little")
+
+
+def mask_not(mask: bytes | bytearray) -> bytes:
+    """Negacja maski 0/1."""
+    return bytes(mask).translate(_INVERT)
+
+
+class EntryStore:
+    """Metadane wpisów sesji w kolumnach indeksowanych numerem wiersza.
+
+    Kolumny: `alive`, `included`, `readable`, `exact` (bajty 0/1) oraz
+    `tokens` i `sizes` (`array("q")`). `tokens` trzyma dokładną liczbę, gdy
+    `exact` = 1, w przeciwnym razie estymatę albo `UNKNOWN_TOKENS`. Wiersze
+    usuniętych wpisów są ponownie używane; numer wiersza jest stały, dopóki
+    wpis jest w sesji.
+    """
+
+    __slots__ = (
+        "_rows",
+        "_entries",
+        "_free",
+        "_listed",
+        "_totals",
+        "alive",
+        "included",
+        "readable",
+        "exact",
+        "tokens",
+        "sizes",
+    )
+
+    def __init__(self) -> None:
+        self._rows: dict[str, int] = {}
+        self._entries: list[Entry | None] = []
+        self._free: list[int] = []
+        # Lista wpisów sesji z ostatniego `sync`; None po zmianie wierszy.
+        self._listed: list[Entry] | None = None
+        # [dokładne tokeny, estymowane tokeny, aktywne wpisy, oczekujące wpisy]
+        self._totals = [0, 0, 0, 0]
+        self.alive = bytearray()
+        self.included = bytearray()
+        self.readable = bytearray()
+        self.exact = bytearray()
+        self.tokens = array("q")
+        self.sizes = array("q")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------ mutations
+    def add(self, entry: Entry) -> int:
+        """Dodaje wpis (albo odświeża istniejący) i zwraca jego numer wiersza."""
+        row = self._rows.get(entry.entry_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self._entries)
+                self._entries.append(None)
+                self.alive.append(0)
+                self.included.append(0)
+                self.readable.append(0)
+                self.exact.append(0)
+                self.tokens.append(UNKNOWN_TOKENS)
+                self.sizes.append(0)
+            self._rows[entry.entry_id] = row
+        self._listed = None
+        before = self._contribution(row)
+        self._entries[row] = entry
+        self.alive[row] = 1
+        self._load(row, entry)
+        self._retally(row, before)
+        return row
+
+    def update(self, entry: Entry) -> None:
+        """Przepisuje flagi, rozmiar i cache tokenów wpisu do kolumn."""
+        row = self._rows.get(entry.entry_id)
+        if row is not None:
+            before = self._contribution(row)
+            self._load(row, entry)
+            self._retally(row, before)
+
+    def remove(self, entry_id: str) -> Entry | None:
+        """Zwalnia wiersz wpisu; zwraca usunięty wpis albo None."""
+        row = self._rows.pop(entry_id, None)
+        if row is None:
+            return None
+        self._listed = None
+        entry = self._entries[row]
+        before = self._contribution(row)
+        self._entries[row] = None
+        self.alive[row] = 0
+        self.included[row] = 0
+        self.readable[row] = 0
+        self.exact[row] = 0
+        self.tokens[row] = UNKNOWN_TOKENS
+        self.sizes[row] = 0
+        self._retally(row, before)
+        self._free.append(row)
+        return entry
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def rebuild(self, entries: Iterable[Entry]) -> None:
+        """Odtwarza kolumny od zera (np. po zmianie listy wpisów z pominięciem `session_ops`)."""
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+
+    def sync(self, entries: list[Entry]) -> int:
+        """Uzgadnia kolumny z listą wpisów sesji zmienianą z pominięciem `session_ops`.
+
+        Kolumny są odbudowywane, gdy lista zawiera inne obiekty niż wiersze
+        (np. `session.entries[i] = inny`). Wiersze, których flagi lub cache
+        dokładnych tokenów różnią się od kolumn (np. `entry.include_in_output =
+        False` albo podmieniona treść z `token_count_cache = None`), są
+        przepisywane. Zwraca liczbę odświeżonych wierszy.
+        """
+        listed = self._listed
+        if listed is None or len(listed) != len(entries) or not all(map(is_, listed, entries)):
+            rows = list(map(self._rows.get, map(attrgetter("entry_id"), entries)))
+            if (
+                len(rows) != len(self._rows)
+                or None in rows
+                or not all(map(is_, map(self._entries.__getitem__, rows), entries))
+            ):
+                self.rebuild(entries)
+                self._listed = list(entries)
+                return len(entries)
+            self._listed = list(entries)
+        dirty: list[Entry] = []
+        for entry, included, readable, exact, tokens in zip(
+            self._entries, self.included, self.readable, self.exact, self.tokens
+        ):
+            if entry is None:
+                continue
+            counted = entry.token_count_cache
+            if (
+                entry.include_in_output != included
+                or (entry.read_error is None) != readable
+                or (counted != tokens if exact else counted is not None)
+            ):
+                dirty.append(entry)
+        for entry in dirty:
+            self.update(entry)
+        return len(dirty)
+
+    def set_tokens(self, row: int, tokens: int, *, exact: bool) -> None:
+        before = self._contribution(row)
+        self._set_tokens(row, tokens, exact)
+        self._retally(row, before)
+
+    # -------------------------------------------------------------- queries
+    def row_of(self, entry_id: str) -> int | None:
+        return self._rows.get(entry_id)
+
+    def get(self, entry_id: str) -> Entry | None:
+        """Zwraca wpis po ID w O(1)."""
+        row = self._rows.get(entry_id)
+        return None if row is None else self._entries[row]
+
+    def entry_at(self, row: int) -> Entry:
+        entry = self._entries[row]
+        if entry is None:
+            raise KeyError(row)
+        return entry
+
+    def active_mask(self) -> bytes:
+        """Wpisy trafiające do outputu: obecne, włączone i bez błędu odczytu."""
+        return mask_and(self.alive, self.included, self.readable)
+
+    def excluded_mask(self) -> bytes:
+        """Wpisy obecne, ale pomijane w outpucie (wyłączone lub z błędem odczytu)."""
+        return mask_and(self.alive, mask_not(self.active_mask()))
+
+    def error_mask(self) -> bytes:
+        return mask_and(self.alive, mask_not(self.readable))
+
+    def pending_rows(self) -> list[int]:
+        """Aktywne wiersze bez dokładnej liczby tokenów.
+
+        Liczby policzone poza sesją (np. przez wątki w tle) trafiają do
+        kolumn przy tym wywołaniu, więc kosztuje ono O(liczba oczekujących).
+        """
+        pending: list[int] = []
+        if not self._totals[3]:
+            return pending
+        for row in self.rows(mask_and(self.active_mask(), mask_not(self.exact))):
+            cached = self._entries[row].token_count_cache
+            if cached is not None:
+                self.set_tokens(row, cached, exact=True)
+            else:
+                pending.append(row)
+        return pending
+
+    def active_tokens(self) -> tuple[int, int]:
+        """Zwraca (suma dokładnych, suma estymat) tokenów aktywnych wpisów."""
+        return self._totals[0], self._totals[1]
+
+    def counts(self) -> tuple[int, int]:
+        """Zwraca (liczba wpisów w outpucie, liczba pominiętych)."""
+        included = self._totals[2]
+        return included, len(self._rows) - included
+
+    @staticmethod
+    def rows(mask: bytes | bytearray) -> list[int]:
+        """Zwraca numery wierszy zaznaczonych w masce (wyszukiwanie w C, koszt O(zaznaczone))."""
+        rows: list[int] = []
+        row = mask.find(1)
+        while row != -1:
+            rows.append(row)
+            row = mask.find(1, row + 1)
+        return rows
+
+    def select(self, mask: bytes | bytearray) -> list[Entry]:
+        """Zwraca wpisy wierszy zaznaczonych w masce (w kolejności wierszy)."""
+        return list(compress(self._entries, mask))
+
+    # ------------------------------------------------------------- internal
+    def _load(self, row: int, entry: Entry) -> None:
+        self.included[row] = 1 if entry.include_in_output else 0
+        self.readable[row] = 1 if entry.read_error is None else 0
+        self.sizes[row] = entry.size
+        if entry.token_count_cache is not None:
+            self._set_tokens(row, entry.token_count_cache, True)
+        elif entry.token_estimate_cache is not None:
+            self._set_tokens(row, entry.token_estimate_cache, False)
+        else:
+            self._set_tokens(row, UNKNOWN_TOKENS, False)
+
+    def _set_tokens(self, row: int, tokens: int, exact: bool) -> None:
+        self.tokens[row] = tokens
+        self.exact[row] = 1 if exact else 0
+
+    def _contribution(self, row: int) -> tuple[int, int, int, int]:
+        if not (self.alive[row] and self.included[row] and self.readable[row]):
+            return 0, 0, 0, 0
+        tokens = self.tokens[row]
+        if self.exact[row]:
+            return tokens, 0, 1, 0
+        return 0, max(tokens, 0), 1, 1
+
+    def _retally(self, row: int, before: tuple[int, int, int, int]) -> None:
+        totals = self._totals
+        for index, (old, new) in enumerate(zip(before, self._contribution(row))):
+            totals[index] += new - old
+
+
+def session_store(session: Session) -> EntryStore:
+    """Zwraca kolumny sesji, odbudowując je, gdy lista wpisów zmieniła się poza `session_ops`."""
+    store = session.store
+    if len(store) != len(session.entries):
+        store.rebuild(session.entries)
+    return store
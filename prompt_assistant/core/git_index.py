@@ -0,0 +1,133 @@
+"""Odczyt listy śledzonych plików bezpośrednio z `.git/index` (wersje 2–4)."""
+from __future__ import annotations
+
+import os
+import struct
+from dataclasses import dataclass
+
+_HEADER = struct.Struct(">4sLL")
+# ctime(s, ns), mtime(s, ns), dev, ino, mode, uid, gid, size, sha1, flags
+_ENTRY = struct.Struct(">10L20sH")
+_EXTENDED_FLAG = 0x4000
+_SKIP_WORKTREE_FLAG = 0x4000
+_STAGE_MASK = 0x3000
+_GITLINK_MODE = 0o160000
+_MODE_TYPE_MASK = 0o170000
+
+
+class GitIndexError(ValueError):
+    """Plik indeksu jest uszkodzony albo w nieobsługiwanej wersji."""
+
+
+@dataclass(slots=True)
+class GitIndexEntry:
+    """Śledzony plik z danymi stat zapisanymi w indeksie."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    mode: int
+
+
+def find_git_dir(path: str) -> tuple[str, str] | None:
+    """Szuka repozytorium w *path* lub wyżej; zwraca (katalog roboczy, katalog .git)."""
+    current = os.path.abspath(path)
+    while True:
+        candidate = os.path.join(current, ".git")
+        if os.path.isdir(candidate):
+            return current, candidate
+        if os.path.isfile(candidate):
+            # Worktree/submoduł: plik `.git` z wpisem "gitdir: <ścieżka>".
+            try:
+                with open(candidate, encoding="utf-8") as file_handle:
+                    line = file_handle.readline().strip()
+            except OSError:
+                return None
+            if line.startswith("gitdir:"):
+                git_dir = line[len("gitdir:") :].strip()
+                return current, os.path.normpath(os.path.join(current, git_dir))
+            return None
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """Dekoduje liczbę w kodowaniu offsetów gita (używaną przez indeks v4)."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def parse_git_index(data: bytes) -> list[GitIndexEntry]:
+    """Parsuje zawartość pliku indeksu; pomija submoduły, konflikty i wpisy skip-worktree."""
+    if len(data) < _HEADER.size:
+        raise GitIndexError("Plik indeksu jest za krótki")
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b"DIRC":
+        raise GitIndexError("Brak sygnatury DIRC")
+    if version not in (2, 3, 4):
+        raise GitIndexError(f"Nieobsługiwana wersja indeksu: {version}")
+    try:
+        return _parse_entries(data, version, count)
+    except (struct.error, IndexError, ValueError) as exc:
+        # Ucięty lub uszkodzony plik: wywołujący wraca wtedy do przejścia katalogu.
+        raise GitIndexError(f"Uszkodzony wpis indeksu: {exc}") from exc
+
+
+def _parse_entries(data: bytes, version: int, count: int) -> list[GitIndexEntry]:
+    entries: list[GitIndexEntry] = []
+    offset = _HEADER.size
+    previous = b""
+    for _ in range(count):
+        start = offset
+        fields = _ENTRY.unpack_from(data, offset)
+        offset += _ENTRY.size
+        flags = fields[11]
+        extended = 0
+        if flags & _EXTENDED_FLAG and version >= 3:
+            (extended,) = struct.unpack_from(">H", data, offset)
+            offset += 2
+
+        if version == 4:
+            strip, offset = _read_varint(data, offset)
+            end = data.index(b"\0", offset)
+            name = previous[: len(previous) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b"\0", offset)
+            name = data[offset:end]
+            # Wpis (z NUL-em) jest dopełniony do wielokrotności 8 bajtów.
+            offset = start + ((end - start + 8) & ~7)
+        previous = name
+
+        mode = fields[6]
+        if flags & _STAGE_MASK or extended & _SKIP_WORKTREE_FLAG:
+            continue
+        if mode & _MODE_TYPE_MASK == _GITLINK_MODE:
+            continue
+        entries.append(
+            GitIndexEntry(
+                path=name.decode("utf-8", "surrogateescape"),
+                size=fields[9],
+                mtime_ns=fields[2] * 1_000_000_000 + fields[3],
+                mode=mode,
+            )
+        )
+    return entries
+
+
+def read_git_index(git_dir: str) -> list[GitIndexEntry]:
+    """Czyta `<git_dir>/index`; brak pliku (świeże repo) oznacza pustą listę."""
+    try:
+        with open(os.path.join(git_dir, "index"), "rb") as file_handle:
+            data = file_handle.read()
+    except FileNotFoundError:
+        return []
+    return parse_git_index(data)
@@ -0,0 +1,374 @@
+"""Import katalogu z rewizji git: `git ls-tree` i treść blobów z jednego procesu `git cat-file --batch`."""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from .git_index import find_git_dir
+from .importer import (
+    DirectoryImport,
+    FileEnumeration,
+    ImportBudget,
+    ImportedFile,
+    _budget_stop_reason,
+    _decode_text,
+)
+from .profiling import NULL_PROFILER, Profiler
+from .spec_cache import DEFAULT_SPEC_CACHE, SpecCache
+from .token_estimator import estimate_tokens_from_size
+
+if TYPE_CHECKING:
+    import subprocess
+
+# subprocess jest importowany leniwie, żeby nie wydłużać zimnego startu CLI.
+
+DEFAULT_MAX_CACHED_BLOB_BYTES = 256 * 1024 * 1024
+# Tyle blobów jest zamawianych naraz; po wyczerpaniu limitu importu przepada najwyżej jedna paczka.
+FETCH_BATCH = 256
+_SYMLINK_MODE = b"120000"
+
+
+class GitRevisionError(ValueError):
+    """Katalog nie jest w repozytorium, rewizja nie istnieje albo polecenie git się nie powiodło."""
+
+
+@dataclass(slots=True)
+class CachedBlob:
+    """Odczytany blob: treść (None dla binarnych) i liczba tokenów, gdy już policzona."""
+
+    size: int
+    binary: bool
+    content: str | None = None
+    token_count: int | None = None
+
+
+class BlobCache:
+    """LRU treści blobów kluczowane SHA; blob o danym SHA nigdy się nie zmienia, więc wpisy nie wymagają unieważniania.
+
+    Pliki niezmienione między rewizjami (ten sam blob) nie są ponownie czytane ani tokenizowane.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_CACHED_BLOB_BYTES) -> None:
+        self._max_bytes = max_bytes
+        self._blobs: OrderedDict[str, CachedBlob] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha: str) -> CachedBlob | None:
+        with self._lock:
+            cached = self._blobs.get(sha)
+            if cached is None:
+                self.misses += 1
+                return None
+            self._blobs.move_to_end(sha)
+            self.hits += 1
+            return cached
+
+    def put(self, sha: str, blob: CachedBlob) -> None:
+        with self._lock:
+            previous = self._blobs.pop(sha, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._blobs[sha] = blob
+            self._bytes += blob.size
+            while self._bytes > self._max_bytes and len(self._blobs) > 1:
+                _sha, evicted = self._blobs.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def remember_tokens(self, sha: str, content: str, token_count: int) -> None:
+        """Zapisuje liczbę tokenów, jeśli w cache wciąż jest ta sama treść bloba."""
+        with self._lock:
+            cached = self._blobs.get(sha)
+            if cached is not None and cached.content is content:
+                cached.token_count = token_count
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blobs.clear()
+            self._bytes = 0
+
+
+class GitCatFile:
+    """Długo działający `git cat-file --batch` dla jednego repozytorium.
+
+    Zamówienia są zapisywane przez osobny wątek, a odpowiedzi czytane
+    równolegle, więc pełne bufory potoków nie blokują żadnej ze stron.
+    Proces startuje przy pierwszym odczycie; po błędzie jest zamykany
+    i uruchamiany ponownie przy następnym.
+    """
+
+    def __init__(self, work_tree: str) -> None:
+        self.work_tree = work_tree
+        self._process: subprocess.Popen | None = None
+        self._lock = threading.Lock()
+
+    def read_blobs(self, shas: list[str]) -> Iterator[tuple[str, bytes]]:
+        """Zwraca (SHA, treść) w kolejności *shas*; brakujący obiekt zgłasza `GitRevisionError`."""
+        with self._lock:
+            process = self._ensure_process()
+            writer = threading.Thread(target=_write_requests, args=(process.stdin, shas), daemon=True)
+            writer.start()
+            completed = False
+            try:
+                for sha in shas:
+                    header = process.stdout.readline()
+                    parts = header.split()
+                    if len(parts) != 3:
+                        raise GitRevisionError(f"git cat-file: {header.decode(errors='replace').strip() or 'brak odpowiedzi'}")
+                    size = int(parts[2])
+                    data = process.stdout.read(size)
+                    process.stdout.read(1)  # LF kończący treść obiektu
+                    yield sha, data
+                completed = True
+            finally:
+                writer.join()
+                if not completed:
+                    # Nieodczytane odpowiedzi zostałyby przypisane kolejnym zamówieniom.
+                    self._close_process()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_process()
+
+    def __enter__(self) -> GitCatFile:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _ensure_process(self) -> subprocess.Popen:
+        import subprocess
+
+        if self._process is None or self._process.poll() is not None:
+            try:
+                self._process = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    cwd=self.work_tree,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            except OSError as exc:
+                raise GitRevisionError(f"Nie można uruchomić git: {exc}") from exc
+        return self._process
+
+    def _close_process(self) -> None:
+        import subprocess
+
+        process, self._process = self._process, None
+        if process is None:
+            return
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _write_requests(stdin, shas: list[str]) -> None:
+    try:
+        stdin.write("".join(f"{sha}\n" for sha in shas).encode("ascii"))
+        stdin.flush()
+    except (OSError, ValueError):
+        # Proces zakończył się albo potok został zamknięty po błędzie odczytu.
+        pass
+
+
+def scan_git_revision(
+    dir_path: str,
+    revision: str,
+    *,
+    exclude_patterns: Iterable[str] = (),
+    profiler: Profiler | None = None,
+    budget: ImportBudget | None = None,
+    spec_cache: SpecCache | None = None,
+    blob_cache: BlobCache | None = None,
+    cat_file: GitCatFile | None = None,
+) -> DirectoryImport:
+    """Importuje katalog *dir_path* w stanie z rewizji *revision* (gałąź, tag, SHA) bez checkoutu.
+
+    Lista plików i rozmiary pochodzą z `git ls-tree`, treść z procesu
+    `git cat-file --batch` (*cat_file* albo tymczasowego). Jak w trybie indeksu
+    git śledzone pliki nie są filtrowane przez `.gitignore`; obowiązują wzorce
+    wykluczeń, pomijanie binarek i limity z *budget* sprawdzane na rozmiarach
+    blobów (do limitu całkowitego liczą się tylko bloby tekstowe). Bloby z *blob_cache* (kluczowane SHA) nie są
+    ponownie czytane, a ich liczby tokenów trafiają do `ImportedFile.token_count`.
+    Podmoduły i dowiązania symboliczne są pomijane.
+    """
+    prof = profiler or NULL_PROFILER
+    budget = budget or ImportBudget()
+    first_span = len(prof.spans)
+    dir_path = os.path.normpath(dir_path)
+    located = find_git_dir(dir_path)
+    if located is None:
+        raise GitRevisionError(f"{dir_path}: katalog nie należy do repozytorium git")
+    work_tree, _git_dir = located
+    prefix = os.path.relpath(dir_path, work_tree).replace(os.sep, "/")
+    prefix = "" if prefix == "." else prefix + "/"
+
+    result = DirectoryImport(
+        root_path=dir_path,
+        name=f"{os.path.basename(dir_path)}@{revision}",
+        enumeration=FileEnumeration.GIT_REVISION,
+    )
+    with prof.span("git_ls_tree") as list_span:
+        result.revision = _resolve_revision(work_tree, revision)
+        blobs = _list_blobs(work_tree, result.revision, prefix)
+        list_span.add(files=len(blobs))
+    result.tracked_count = len(blobs)
+    custom_matcher = (spec_cache or DEFAULT_SPEC_CACHE).custom_matcher(exclude_patterns)
+
+    own_cat_file = cat_file is None
+    cat_file = cat_file or GitCatFile(work_tree)
+    try:
+        with prof.span("scan") as scan_span:
+            scan_span.add(files=len(blobs))
+            selected: list[tuple[str, str, int]] = []
+            for rel, sha, size in blobs:
+                with prof.accumulate("custom_match"):
+                    ignored = custom_matcher is not None and custom_matcher.match(rel)
+                if ignored:
+                    result.skipped_custom += 1
+                elif budget.max_file_bytes is not None and size > budget.max_file_bytes:
+                    result.skipped_size.append(f"{rel} ({size} B)")
+                else:
+                    selected.append((rel, sha, size))
+
+            for start in range(0, len(selected), FETCH_BATCH):
+                batch = selected[start : start + FETCH_BATCH]
+                with prof.accumulate("read") as read_span:
+                    loaded = _load_blobs(cat_file, batch, blob_cache, result, read_span)
+                for rel, sha, size in batch:
+                    blob = loaded.get(sha)
+                    # Binarki i bloby z błędem odczytu nie zużywają limitu całkowitego.
+                    if blob is not None and not blob.binary:
+                        stop = _budget_stop_reason(result, budget, size)
+                        if stop is not None:
+                            result.budget_stop = stop
+                            break
+                    _add_blob(result, rel, sha, blob)
+                if result.budget_stop:
+                    break
+    finally:
+        if own_cat_file:
+            cat_file.close()
+
+    result.spans = list(prof.spans[first_span:])
+    return result
+
+
+def _load_blobs(
+    cat_file: GitCatFile,
+    batch: list[tuple[str, str, int]],
+    blob_cache: BlobCache | None,
+    result: DirectoryImport,
+    read_span,
+) -> dict[str, CachedBlob | None]:
+    """Zwraca bloby paczki z cache albo z `git cat-file`; None oznacza błąd odczytu (dopisany do raportu)."""
+    loaded: dict[str, CachedBlob | None] = {}
+    missing: list[str] = []
+    for rel, sha, _size in batch:
+        if sha in loaded:
+            continue
+        cached = blob_cache.get(sha) if blob_cache is not None else None
+        if cached is not None:
+            loaded[sha] = cached
+        else:
+            loaded[sha] = None
+            missing.append(sha)
+    if not missing:
+        return loaded
+
+    for sha, data in cat_file.read_blobs(missing):
+        try:
+            content = _decode_text(data)
+        except UnicodeDecodeError as exc:
+            result.read_errors.extend(f"{rel}: {exc}" for rel, blob_sha, _size in batch if blob_sha == sha)
+            continue
+        blob = CachedBlob(size=len(data), binary=content is None, content=content)
+        loaded[sha] = blob
+        read_span.add(files=1, bytes=len(data))
+        if blob_cache is not None:
+            blob_cache.put(sha, blob)
+    return loaded
+
+
+def _add_blob(result: DirectoryImport, rel: str, sha: str, blob: CachedBlob | None) -> None:
+    if blob is None:
+        return
+    if blob.binary:
+        result.skipped_binary += 1
+        return
+    size = len(blob.content.encode("utf-8"))
+    result.total_bytes += size
+    result.projected_tokens += estimate_tokens_from_size(size)
+    result.files.append(
+        ImportedFile(
+            rel=rel,
+            content=blob.content,
+            size=size,
+            extension=os.path.splitext(rel)[1].lower(),
+            token_count=blob.token_count,
+            blob_sha=sha,
+        )
+    )
+
+
+def _git(work_tree: str, *args: str) -> bytes:
+    import subprocess
+
+    try:
+        completed = subprocess.run(["git", *args], cwd=work_tree, capture_output=True, check=False)
+    except OSError as exc:
+        raise GitRevisionError(f"Nie można uruchomić git: {exc}") from exc
+    if completed.returncode != 0:
+        message = completed.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise GitRevisionError(f"git {args[0]}: {message[-1] if message else completed.returncode}")
+    return completed.stdout
+
+
+def _resolve_revision(work_tree: str, revision: str) -> str:
+    """SHA commita rewizji (albo drzewa, np. dla `HEAD:src`); nazwy zaczynające się od '-' są odrzucane."""
+    if not revision or revision.startswith("-"):
+        raise GitRevisionError(f"Nieprawidłowa rewizja: {revision!r}")
+    for peel in ("commit", "tree"):
+        try:
+            return _git(work_tree, "rev-parse", "--verify", "--quiet", f"{revision}^{{{peel}}}").decode().strip()
+        except GitRevisionError:
+            continue
+    raise GitRevisionError(f"Nieznana rewizja: {revision}")
+
+
+def _list_blobs(work_tree: str, tree: str, prefix: str) -> list[tuple[str, str, int]]:
+    """Zwraca (ścieżka względem *prefix*, SHA, rozmiar) plików drzewa *tree* pod *prefix*."""
+    args = ["ls-tree", "-r", "-l", "-z", "--full-tree", tree]
+    if prefix:
+        args += ["--", prefix]
+    blobs: list[tuple[str, str, int]] = []
+    for record in _git(work_tree, *args).split(b"\0"):
+        if not record:
+            continue
+        meta, _tab, path = record.partition(b"\t")
+        mode, object_type, sha, size = meta.split()
+        if object_type != b"blob" or mode == _SYMLINK_MODE:
+            continue
+        rel = path.decode("utf-8", "surrogateescape")[len(prefix) :]
+        blobs.append((rel, sha.decode(), int(size)))
+    return blobs
@@ -0,0 +1,410 @@
+"""Import katalogu do sesji: skan, filtry ignorowania i odczyt plików."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Iterable
+
+from prompt_assistant.utils import is_binary, render_tree_structure
+
+from .content_cache import FileContentCache
+from .git_index import find_git_dir, read_git_index
+from .models import Entry, EntrySourceType, Session
+from .profiling import NULL_PROFILER, Profiler, Span
+from .session_ops import add_entry, create_entry
+from .spec_cache import DEFAULT_SPEC_CACHE, PathMatcher, SpecCache
+from .token_estimator import estimate_tokens_from_size
+
+
+# Błąd UTF-8 w tylu pierwszych bajtach oznacza plik binarny (tyle dekoduje pierwszy odczyt
+# w `utils.is_binary`); dalszy błąd to błąd odczytu, jak przy imporcie z dysku.
+BINARY_PROBE_BYTES = 8192
+
+
+class FileEnumeration(StrEnum):
+    """Sposób ustalenia listy plików katalogu."""
+
+    WALK = "walk"
+    GIT_INDEX = "git_index"
+    GIT_INDEX_UNTRACKED = "git_index_untracked"
+    ARCHIVE = "archive"
+    GIT_REVISION = "git_revision"
+
+
+@dataclass(slots=True, frozen=True)
+class ImportBudget:
+    """Limity importu sprawdzane w trakcie skanu; `None` wyłącza dany limit."""
+
+    max_file_bytes: int | None = None
+    max_total_bytes: int | None = None
+    max_tokens: int | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class TreeBudget:
+    """Limity bloku drzewa katalogu: głębokość, zwijanie dużych podkatalogów, tokeny; `None` wyłącza limit."""
+
+    max_depth: int | None = None
+    collapse_over: int | None = None
+    max_tokens: int | None = None
+
+
+@dataclass(slots=True)
+class ImportedFile:
+    """Plik tekstowy odczytany podczas importu katalogu."""
+
+    rel: str
+    content: str
+    size: int
+    extension: str
+    # Liczba tokenów znana z `FileContentCache` (None = do policzenia).
+    token_count: int | None = None
+    # SHA bloba przy imporcie rewizji git (klucz `BlobCache`).
+    blob_sha: str | None = None
+
+
+@dataclass(slots=True)
+class DirectoryImport:
+    """Wynik skanu katalogu wraz z przyczynami pominięć."""
+
+    root_path: str
+    name: str
+    files: list[ImportedFile] = field(default_factory=list)
+    skipped_git: int = 0
+    skipped_custom: int = 0
+    skipped_binary: int = 0
+    read_errors: list[str] = field(default_factory=list)
+    skipped_size: list[str] = field(default_factory=list)
+    budget_stop: str | None = None
+    total_bytes: int = 0
+    projected_tokens: int = 0
+    enumeration: FileEnumeration = FileEnumeration.WALK
+    tracked_count: int = 0
+    untracked_count: int = 0
+    revision: str | None = None
+    spans: list[Span] = field(default_factory=list)
+
+
+def parse_exclude_patterns(text: str) -> list[str]:
+    """Zamienia listę wzorców oddzielonych przecinkami na listę wzorców gitwildmatch."""
+    return [pattern.strip() for pattern in text.split(",") if pattern.strip()]
+
+
+def scan_directory(
+    dir_path: str,
+    *,
+    use_gitignore: bool = True,
+    exclude_patterns: Iterable[str] = (),
+    profiler: Profiler | None = None,
+    budget: ImportBudget | None = None,
+    spec_cache: SpecCache | None = None,
+    enumeration: FileEnumeration = FileEnumeration.WALK,
+    content_cache: FileContentCache | None = None,
+) -> DirectoryImport:
+    """Skanuje katalog i odczytuje pliki tekstowe z pominięciem ignorowanych i binarnych.
+
+    Limity z *budget* są sprawdzane na podstawie rozmiaru z `stat` przed odczytem:
+    zbyt duże pliki trafiają do `skipped_size`, a wyczerpanie limitu całkowitego
+    (bajty lub prognozowane tokeny) przerywa skan i ustawia `budget_stop`.
+    Do limitu całkowitego liczą się tylko pliki tekstowe, binarki są pomijane wcześniej.
+    Skompilowane wzorce i wyniki dopasowań są brane z *spec_cache*
+    (domyślnie współdzielonego), więc ponowny import tego samego katalogu ich nie przelicza.
+    Tryby `GIT_INDEX*` biorą listę plików i rozmiary z `.git/index` zamiast
+    przechodzić całe drzewo; poza repozytorium skan wraca do trybu `WALK`.
+    Z *content_cache* niezmienione pliki (ten sam mtime i rozmiar) nie są
+    ponownie czytane ani sprawdzane pod kątem binarności.
+    """
+    prof = profiler or NULL_PROFILER
+    budget = budget or ImportBudget()
+    first_span = len(prof.spans)
+    dir_path = os.path.normpath(dir_path)
+    result = DirectoryImport(root_path=dir_path, name=os.path.basename(dir_path))
+
+    cache = spec_cache or DEFAULT_SPEC_CACHE
+    git_matcher = None
+    paths: list[tuple[str, str, int | None]] | None = None
+    if enumeration in (FileEnumeration.GIT_INDEX, FileEnumeration.GIT_INDEX_UNTRACKED):
+        with prof.span("git_index") as index_span:
+            paths = _git_index_paths(
+                dir_path,
+                result,
+                include_untracked=enumeration == FileEnumeration.GIT_INDEX_UNTRACKED,
+                use_gitignore=use_gitignore,
+                cache=cache,
+            )
+            index_span.add(files=len(paths or ()))
+
+    if paths is None:
+        with prof.span("walk") as walk_span:
+            paths, gitignore_paths = _walk_paths(dir_path)
+            walk_span.add(files=len(paths))
+        with prof.span("gitignore_spec"):
+            git_matcher = cache.gitignore_matcher(dir_path, gitignore_paths) if use_gitignore else None
+
+    custom_matcher = cache.custom_matcher(exclude_patterns)
+
+    with prof.span("scan") as scan_span:
+        scan_span.add(files=len(paths))
+        for full, rel, known_size in paths:
+            with prof.accumulate("gitignore_match"):
+                ignored = git_matcher is not None and git_matcher.match(rel)
+            if ignored:
+                result.skipped_git += 1
+                continue
+            with prof.accumulate("custom_match"):
+                ignored = custom_matcher is not None and custom_matcher.match(rel)
+            if ignored:
+                result.skipped_custom += 1
+                continue
+
+            stat = None
+            try:
+                if content_cache is not None:
+                    stat = os.stat(full)
+                    disk_size = stat.st_size
+                else:
+                    disk_size = os.path.getsize(full) if known_size is None else known_size
+            except OSError as exc:
+                result.read_errors.append(f"{rel}: {exc}")
+                continue
+            if budget.max_file_bytes is not None and disk_size > budget.max_file_bytes:
+                result.skipped_size.append(f"{rel} ({disk_size} B)")
+                continue
+
+            # Binarki są odrzucane przed limitem całkowitym, więc nie zużywają budżetu.
+            token_count = None
+            if content_cache is not None:
+                with prof.accumulate("read") as read_span:
+                    try:
+                        cached = content_cache.read(full, stat)
+                    except Exception as exc:
+                        result.read_errors.append(f"{rel}: {exc}")
+                        continue
+                    if cached.binary:
+                        result.skipped_binary += 1
+                        continue
+                    content, token_count = cached.content, cached.token_count
+                    size = len(content.encode("utf-8"))
+                    read_span.add(files=1, bytes=size)
+                stop = _budget_stop_reason(result, budget, size)
+                if stop is not None:
+                    result.budget_stop = stop
+                    break
+            else:
+                with prof.accumulate("binary_check"):
+                    try:
+                        binary = is_binary(full)
+                    except OSError as exc:
+                        result.read_errors.append(f"{rel}: {exc}")
+                        continue
+                if binary:
+                    result.skipped_binary += 1
+                    continue
+                stop = _budget_stop_reason(result, budget, disk_size)
+                if stop is not None:
+                    result.budget_stop = stop
+                    break
+
+                with prof.accumulate("read") as read_span:
+                    try:
+                        with open(full, encoding="utf-8") as file_handle:
+                            content = file_handle.read()
+                    except Exception as exc:
+                        result.read_errors.append(f"{rel}: {exc}")
+                        continue
+                    size = len(content.encode("utf-8"))
+                    read_span.add(files=1, bytes=size)
+            result.total_bytes += size
+            result.projected_tokens += estimate_tokens_from_size(size)
+            result.files.append(
+                ImportedFile(
+                    rel=rel,
+                    content=content,
+                    size=size,
+                    extension=os.path.splitext(rel)[1].lower(),
+                    token_count=token_count,
+                )
+            )
+
+    result.spans = list(prof.spans[first_span:])
+    return result
+
+
+def describe_enumeration(result: DirectoryImport) -> str | None:
+    """Zwraca opis źródła listy plików do raportu importu (None dla zwykłego skanu)."""
+    if result.enumeration == FileEnumeration.GIT_INDEX:
+        return f"indeks git ({result.tracked_count} śledzonych)"
+    if result.enumeration == FileEnumeration.GIT_INDEX_UNTRACKED:
+        return f"indeks git ({result.tracked_count} śledzonych, {result.untracked_count} nieśledzonych)"
+    if result.enumeration == FileEnumeration.ARCHIVE:
+        return f"archiwum {os.path.basename(result.root_path)}"
+    if result.enumeration == FileEnumeration.GIT_REVISION:
+        return f"rewizja git {result.revision[:12]}"
+    return None
+
+
+def _walk_paths(dir_path: str) -> tuple[list[tuple[str, str, int | None]], list[str]]:
+    """Przechodzi drzewo katalogu; zwraca (pełna ścieżka, ścieżka względna, None) i ścieżki `.gitignore`."""
+    base = len(dir_path) + 1
+    paths: list[tuple[str, str, int | None]] = []
+    gitignore_paths: list[str] = []
+    for root, dirs, files in os.walk(dir_path):
+        if ".git" in dirs:
+            dirs.remove(".git")
+        for filename in files:
+            full = os.path.join(root, filename)
+            paths.append((full, full[base:].replace(os.sep, "/"), None))
+            if filename == ".gitignore":
+                gitignore_paths.append(full)
+    return paths, gitignore_paths
+
+
+def _git_index_paths(
+    dir_path: str,
+    result: DirectoryImport,
+    *,
+    include_untracked: bool,
+    use_gitignore: bool,
+    cache: SpecCache,
+) -> list[tuple[str, str, int | None]] | None:
+    """Zwraca pliki śledzone pod *dir_path* (z rozmiarem z indeksu) i opcjonalnie nieśledzone, nieignorowane.
+
+    Zwraca None, gdy katalog nie należy do repozytorium albo indeksu nie da się odczytać.
+    """
+    located = find_git_dir(dir_path)
+    if located is None:
+        return None
+    work_tree, git_dir = located
+    try:
+        index_entries = read_git_index(git_dir)
+    except (OSError, ValueError):
+        return None
+
+    prefix = os.path.relpath(dir_path, work_tree).replace(os.sep, "/")
+    prefix = "" if prefix == "." else prefix + "/"
+    paths: list[tuple[str, str, int | None]] = []
+    gitignore_paths: list[str] = []
+    for index_entry in index_entries:
+        if not index_entry.path.startswith(prefix):
+            continue
+        rel = index_entry.path[len(prefix) :]
+        full = os.path.join(dir_path, *rel.split("/"))
+        paths.append((full, rel, index_entry.size))
+        if rel == ".gitignore" or rel.endswith("/.gitignore"):
+            gitignore_paths.append(full)
+    result.enumeration = FileEnumeration.GIT_INDEX
+    result.tracked_count = len(paths)
+
+    if include_untracked:
+        matcher = cache.gitignore_matcher(dir_path, gitignore_paths) if use_gitignore else None
+        tracked = {rel for _full, rel, _size in paths}
+        untracked = _untracked_paths(dir_path, tracked, matcher, result)
+        paths.extend(untracked)
+        result.enumeration = FileEnumeration.GIT_INDEX_UNTRACKED
+        result.untracked_count = len(untracked)
+    return paths
+
+
+def _untracked_paths(
+    dir_path: str,
+    tracked: set[str],
+    matcher: PathMatcher | None,
+    result: DirectoryImport,
+) -> list[tuple[str, str, int | None]]:
+    """Przechodzi drzewo z przycinaniem ignorowanych katalogów (jak `git status`); zwraca pliki spoza indeksu."""
+    base = len(dir_path) + 1
+    untracked: list[tuple[str, str, int | None]] = []
+    for root, dirs, files in os.walk(dir_path):
+        rel_root = root[base:].replace(os.sep, "/")
+        rel_prefix = f"{rel_root}/" if rel_root else ""
+        dirs[:] = [
+            name
+            for name in dirs
+            if name != ".git" and not (matcher is not None and matcher.match(f"{rel_prefix}{name}/"))
+        ]
+        for filename in files:
+            rel = f"{rel_prefix}{filename}"
+            if rel in tracked:
+                continue
+            if matcher is not None and matcher.match(rel):
+                result.skipped_git += 1
+                continue
+            untracked.append((os.path.join(root, filename), rel, None))
+    return untracked
+
+
+def _decode_text(data: bytes) -> str | None:
+    """Treść tekstowa pliku spoza dysku (archiwum, blob gita) albo None dla binarki."""
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        if exc.start < BINARY_PROBE_BYTES:
+            return None
+        raise
+    # Jak `open()` w trybie tekstowym przy imporcie z dysku: uniwersalne końce linii.
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _budget_stop_reason(result: DirectoryImport, budget: ImportBudget, size: int) -> str | None:
+    """Zwraca opis przekroczonego limitu całkowitego, jeśli plik o rozmiarze *size* by go przekroczył."""
+    total_bytes = result.total_bytes + size
+    if budget.max_total_bytes is not None and total_bytes > budget.max_total_bytes:
+        return f"limit rozmiaru {budget.max_total_bytes} B po {len(result.files)} plikach"
+    projected = result.projected_tokens + estimate_tokens_from_size(size)
+    if budget.max_tokens is not None and projected > budget.max_tokens:
+        return f"limit ~{budget.max_tokens} tokenów po {len(result.files)} plikach"
+    return None
+
+
+def render_directory_tree(files: Iterable[tuple[str, int]], budget: TreeBudget | None = None) -> str:
+    """Renderuje drzewo z par (ścieżka względna, tokeny pliku) w granicach *budget*.
+
+    Zwinięte podkatalogi dostają linię z liczbą plików i sumą ich tokenów. Wołający
+    podają estymatę z rozmiaru (`estimate_tokens_from_size`), żeby treść drzewa nie
+    zależała od tego, które pliki zdążyły już zostać policzone dokładnie.
+    """
+    budget = budget or TreeBudget()
+    file_tokens = dict(files)
+    return render_tree_structure(
+        list(file_tokens),
+        max_depth=budget.max_depth,
+        collapse_over=budget.collapse_over,
+        max_tokens=budget.max_tokens,
+        file_tokens=file_tokens,
+    )
+
+
+def add_directory_import(
+    session: Session,
+    result: DirectoryImport,
+    *,
+    tree_budget: TreeBudget | None = None,
+) -> tuple[Entry, list[Entry]]:
+    """Dodaje do sesji tree-entry katalogu (w granicach *tree_budget*) i wpisy jego plików."""
+    tree = render_directory_tree(
+        ((imported.rel, estimate_tokens_from_size(imported.size)) for imported in result.files),
+        tree_budget,
+    )
+    tree_entry = create_entry(
+        f"{result.name}/.tree",
+        EntrySourceType.DIRECTORY_TREE,
+        tree,
+        size=len(tree.encode("utf-8")),
+        root=result.name,
+    )
+    add_entry(session, tree_entry)
+
+    file_entries: list[Entry] = []
+    for imported in result.files:
+        entry = create_entry(
+            imported.rel,
+            EntrySourceType.DIRECTORY_FILE,
+            imported.content,
+            size=imported.size,
+            root=result.name,
+        )
+        entry.token_count_cache = imported.token_count
+        add_entry(session, entry)
+        file_entries.append(entry)
+    return tree_entry, file_entries
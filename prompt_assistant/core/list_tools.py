@@ -3,6 +3,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from .profiling import Span, format_spans
+
 
 @dataclass(slots=True)
 class FileListRecord:
@@ -47,15 +49,34 @@ def build_import_report(
     skipped_custom: int,
     skipped_binary: int,
     read_errors: list[str],
+    spans: list[Span] | None = None,
+    skipped_size: list[str] | None = None,
+    budget_stop: str | None = None,
+    source: str | None = None,
 ) -> str:
     """Buduje czytelny raport po imporcie katalogu."""
+    skipped_size = skipped_size or []
     lines = [
         f"Dodano: {added_count}",
         f"Pominięto .gitignore: {skipped_git}",
         f"Pominięto custom: {skipped_custom}",
         f"Pominięto binarne: {skipped_binary}",
+        f"Pominięto za duże: {len(skipped_size)}",
         f"Błędy odczytu: {len(read_errors)}",
     ]
+    if source:
+        lines.append(f"Źródło listy plików: {source}")
+
+    if budget_stop:
+        lines.append("")
+        lines.append(f"Import przerwany: {budget_stop}")
+
+    if skipped_size:
+        lines.append("")
+        lines.append("Pliki powyżej limitu rozmiaru:")
+        lines.extend(skipped_size[:10])
+        if len(skipped_size) > 10:
+            lines.append(f"... (+{len(skipped_size) - 10} kolejnych)")
 
     if read_errors:
         lines.append("")
@@ -64,4 +85,9 @@ def build_import_report(
         if len(read_errors) > 10:
             lines.append(f"... (+{len(read_errors) - 10} kolejnych)")
 
+    if spans:
+        lines.append("")
+        lines.append("Profil importu:")
+        lines.extend(format_spans(spans))
+
     return "\n".join(lines)
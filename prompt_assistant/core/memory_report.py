@@ -0,0 +1,220 @@
+"""Raport pamięci sesji: bajty wg kategorii, katalogu i największych wpisów."""
+from __future__ import annotations
+
+import heapq
+import re
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum, StrEnum
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Iterable, Mapping
+
+from .models import EntrySourceType, Session
+from .profiling import Span
+from .token_rollup import RollupKind, _group_keys
+
+DEFAULT_TOP_ENTRIES = 20
+# Obiekty współdzielone przez cały proces (klasy, moduły, funkcje, składowe enumów) nie należą do sesji.
+_SHARED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, Enum)
+_LEAF_TYPES = (str, bytes, bytearray, int, float, complex, bool, type(None), range, memoryview)
+_CONTAINER_TYPES = (list, tuple, set, frozenset, deque)
+
+
+class MemoryCategory(StrEnum):
+    """Stałe kategorie raportu; obserwatorzy sesji i obiekty z `extra` dostają własne klucze."""
+
+    PROMPT = "prompt"
+    CONTENT = "content"
+    TREE = "tree"
+    ENTRIES = "entries"
+    ENTRY_STORE = "entry_store"
+
+
+@dataclass(slots=True)
+class MemoryRow:
+    """Bajty jednej grupy raportu i liczba wpisów (obiektów) w niej."""
+
+    key: str
+    bytes: int
+    count: int = 0
+
+
+@dataclass(slots=True)
+class AllocationPhase:
+    """Szczyt i przyrost pamięci fazy zmierzone przez tracemalloc (`Profiler(trace_allocations=True)`)."""
+
+    name: str
+    peak_bytes: int
+    retained_bytes: int
+
+
+@dataclass(slots=True)
+class MemoryReport:
+    """Pamięć sesji: kategorie, dołączone katalogi, podkatalogi, największe wpisy i szczyty faz."""
+
+    total_bytes: int
+    categories: list[MemoryRow]
+    roots: list[MemoryRow]
+    directories: list[MemoryRow]
+    top_entries: list[MemoryRow]
+    allocations: list[AllocationPhase] = field(default_factory=list)
+
+    def to_json(self) -> dict:
+        """Zwraca raport jako słownik gotowy do `json.dumps`."""
+
+        def _rows(rows: list[MemoryRow]) -> list[dict]:
+            return [{"key": row.key, "bytes": row.bytes, "count": row.count} for row in rows]
+
+        return {
+            "total_bytes": self.total_bytes,
+            "categories": _rows(self.categories),
+            "roots": _rows(self.roots),
+            "directories": _rows(self.directories),
+            "top_entries": [{"path": row.key, "bytes": row.bytes} for row in self.top_entries],
+            "allocations": [
+                {"phase": phase.name, "peak_bytes": phase.peak_bytes, "retained_bytes": phase.retained_bytes}
+                for phase in self.allocations
+            ],
+        }
+
+
+def build_memory_report(
+    session: Session,
+    *,
+    top: int = DEFAULT_TOP_ENTRIES,
+    extra: Mapping[str, object] | None = None,
+    spans: Iterable[Span] = (),
+) -> MemoryReport:
+    """Mierzy pamięć zajmowaną przez sesję (`sys.getsizeof` po grafie obiektów).
+
+    Każdy obiekt jest liczony raz, w pierwszej kategorii, w której wystąpi:
+    prompt, treść wpisów (drzewa katalogów osobno), pozostałe pola wpisów,
+    `EntryStore`, kolejni obserwatorzy sesji (klucz z nazwy klasy, np.
+    `content_index`), a na końcu obiekty z *extra* (np. modele GUI). Treść
+    wspólna dla kilku wpisów trafia więc do pierwszego z nich, a indeksy
+    pokazują tylko pamięć ponad wpisy, na które wskazują. Szczyty alokacji
+    są brane ze spanów z licznikami tracemalloc. Koszt: jeden przebieg po
+    wszystkich obiektach sesji.
+    """
+    seen = {id(session), id(session.entries), id(session.observers)}
+    categories: dict[str, MemoryRow] = {}
+
+    def _add(key: str, size: int, count: int = 1) -> None:
+        row = categories.get(key)
+        if row is None:
+            row = categories[key] = MemoryRow(key, 0)
+        row.bytes += size
+        row.count += count
+
+    _add(MemoryCategory.PROMPT, _deep_size(session.prompt_text, seen))
+
+    groups: dict[tuple[RollupKind, str], MemoryRow] = {}
+    entry_rows: list[MemoryRow] = []
+    for entry in session.entries:
+        content_bytes = _deep_size(entry.content, seen)
+        overhead = _deep_size(entry, seen)
+        is_tree = entry.source_type == EntrySourceType.DIRECTORY_TREE
+        _add(MemoryCategory.TREE if is_tree else MemoryCategory.CONTENT, content_bytes)
+        _add(MemoryCategory.ENTRIES, overhead)
+        size = content_bytes + overhead
+        entry_rows.append(MemoryRow(f"{entry.root}/{entry.path}" if entry.root else entry.path, size, 1))
+        for key in _group_keys(entry):
+            if key[0] == RollupKind.EXTENSION:
+                continue
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = MemoryRow(key[1], 0)
+            group.bytes += size
+            group.count += 0 if is_tree else 1
+
+    _add(MemoryCategory.ENTRY_STORE, _deep_size(session.store, seen))
+    for observer in session.observers:
+        _add(_category_name(type(observer).__name__), _deep_size(observer, seen))
+    for key, value in (extra or {}).items():
+        _add(key, _deep_size(value, seen))
+
+    return MemoryReport(
+        total_bytes=sum(row.bytes for row in categories.values()),
+        categories=_sorted_rows(categories.values()),
+        roots=_sorted_rows(row for (kind, _key), row in groups.items() if kind == RollupKind.ROOT),
+        directories=_sorted_rows(row for (kind, _key), row in groups.items() if kind == RollupKind.DIRECTORY),
+        top_entries=heapq.nlargest(top, entry_rows, key=lambda row: row.bytes),
+        allocations=[
+            AllocationPhase(span.name, span.counters["alloc_peak_bytes"], span.counters["alloc_retained_bytes"])
+            for span in spans
+            if "alloc_peak_bytes" in span.counters
+        ],
+    )
+
+
+def format_bytes(size: int) -> str:
+    """Rozmiar w czytelnej jednostce ("512 B", "3.4 KB", "1.2 GB")."""
+    value = float(size)
+    for unit in ("B", "KB", "MB"):
+        if abs(value) < 1024:
+            return f"{size} B" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def format_memory_report(report: MemoryReport, limit: int = 10) -> list[str]:
+    """Zwraca linie raportu: kategorie, katalogi, największe wpisy i szczyty alokacji faz."""
+    lines = [f"Pamięć sesji: {format_bytes(report.total_bytes)}"]
+    sections = (
+        ("Kategorie", report.categories),
+        ("Katalogi", report.roots),
+        ("Podkatalogi", report.directories),
+        ("Największe wpisy", report.top_entries),
+    )
+    for title, rows in sections:
+        if not rows:
+            continue
+        lines.append(f"{title}:")
+        lines.extend(f"  {row.key}: {format_bytes(row.bytes)}" for row in rows[:limit])
+    if report.allocations:
+        lines.append("Szczyty alokacji (tracemalloc):")
+        lines.extend(
+            f"  {phase.name}: szczyt {format_bytes(phase.peak_bytes)}, zostało {format_bytes(phase.retained_bytes)}"
+            for phase in report.allocations
+        )
+    return lines
+
+
+def _deep_size(root: object, seen: set[int]) -> int:
+    """Suma `sys.getsizeof` obiektów osiągalnych z *root*, pomijając te z *seen* (uzupełnia *seen*)."""
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, _LEAF_TYPES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+            continue
+        if isinstance(obj, _CONTAINER_TYPES):
+            stack.extend(obj)
+            continue
+        attributes = getattr(obj, "__dict__", None)
+        if attributes is not None:
+            stack.append(attributes)
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                value = getattr(obj, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+def _category_name(class_name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", class_name).lower()
+
+
+def _sorted_rows(rows: Iterable[MemoryRow]) -> list[MemoryRow]:
+    return sorted(rows, key=lambda row: (-row.bytes, row.key))
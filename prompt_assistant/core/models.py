@@ -4,6 +4,10 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import StrEnum
+from typing import Protocol
+
+from .entry_store import EntryStore
+from .profiling import Span
 
 
 class EntrySourceType(StrEnum):
@@ -35,9 +39,26 @@ class Entry:
     is_binary: bool = False
     size: int = 0
     token_count_cache: int | None = None
+    token_estimate_cache: int | None = None
+    # Tokeny treści w postaci z outputu i jej początek do pierwszej granicy tokenizacji (`render_tokens`).
+    render_token_cache: tuple[int, str] | None = field(default=None, repr=False)
+    # Nazwa dołączonego katalogu, z którego pochodzi wpis ("" dla pojedynczych plików).
+    root: str = ""
     last_loaded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+class SessionObserver(Protocol):
+    """Odbiorca zmian wpisów sesji (np. agregaty tokenów) powiadamiany przez `session_ops`."""
+
+    def entry_added(self, entry: Entry) -> None: ...
+
+    def entry_removed(self, entry: Entry) -> None: ...
+
+    def entry_changed(self, entry: Entry) -> None: ...
+
+    def session_cleared(self) -> None: ...
+
+
 @dataclass(slots=True)
 class Session:
     """Stan sesji jako źródło prawdy dla renderowania outputu."""
@@ -45,6 +66,9 @@ class Session:
     prompt_text: str = ""
     entries: list[Entry] = field(default_factory=list)
     output_format: OutputFormat = OutputFormat.XML
+    observers: list[SessionObserver] = field(default_factory=list, repr=False, compare=False)
+    # Kolumnowy indeks wpisów utrzymywany przez `session_ops` (sumy tokenów, maski, wyszukiwanie po ID).
+    store: EntryStore = field(default_factory=EntryStore, repr=False, compare=False)
 
 
 @dataclass(slots=True)
@@ -57,3 +81,4 @@ class BuildResult:
     excluded_entries: int
     warnings: list[str] = field(default_factory=list)
     errors: list[str] = field(default_factory=list)
+    spans: list[Span] = field(default_factory=list)
@@ -0,0 +1,171 @@
+"""Zarys plików Pythona (importy, sygnatury klas i funkcji, pierwsze linie docstringów) zamiast pełnej treści.
+
+Zarys jest budowany z `ast`; pliki w innych językach i pliki, których nie da
+się sparsować, trafiają do outputu w całości. Zarysy i ich liczby tokenów są
+zapamiętywane po skrócie treści, jak wyniki kompaktowania.
+"""
+from __future__ import annotations
+
+import ast
+import dataclasses
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Collection
+
+from prompt_assistant.utils import count_tokens
+
+from .compaction import CompactionLanguage, CompactionReport, FileCompaction, detect_language
+from .models import EntrySourceType, Session
+from .session_ops import add_entry
+from .token_service import count_entry_tokens
+
+OUTLINE_CACHE_SIZE = 20_000
+_INDENT = "    "
+
+
+def outline_python(text: str) -> str | None:
+    """Zwraca zarys modułu Pythona albo None, gdy treść nie jest poprawnym Pythonem.
+
+    Zostają: pierwsza linia docstringu modułu, importy najwyższego poziomu,
+    dekoratory i sygnatury klas oraz funkcji (także metod i klas
+    zagnieżdżonych), adnotacje pól klas bez wartości i pierwsze linie
+    docstringów. Ciała funkcji zastępuje docstring albo `...`, więc zarys
+    wciąż jest poprawnym Pythonem.
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    lines: list[str] = []
+    _docstring_line(tree, "", lines)
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(ast.unparse(node))
+        elif isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            _outline_definition(node, "", lines)
+    return "\n".join(lines)
+
+
+def _outline_definition(
+    node: ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef, indent: str, lines: list[str]
+) -> None:
+    lines.extend(f"{indent}@{ast.unparse(decorator)}" for decorator in node.decorator_list)
+    type_params = getattr(node, "type_params", None)
+    generic = f"[{', '.join(ast.unparse(param) for param in type_params)}]" if type_params else ""
+    inner = indent + _INDENT
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+        arguments = f"({', '.join(bases)})" if bases else ""
+        lines.append(f"{indent}class {node.name}{generic}{arguments}:")
+        before = len(lines)
+        _docstring_line(node, inner, lines)
+        for child in node.body:
+            if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                _outline_definition(child, inner, lines)
+            elif isinstance(child, ast.AnnAssign) and isinstance(child.target, ast.Name):
+                lines.append(f"{inner}{child.target.id}: {ast.unparse(child.annotation)}")
+        if len(lines) == before:
+            lines.append(f"{inner}...")
+        return
+
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns is not None else ""
+    lines.append(f"{indent}{prefix} {node.name}{generic}({ast.unparse(node.args)}){returns}:")
+    if not _docstring_line(node, inner, lines):
+        lines.append(f"{inner}...")
+
+
+def _docstring_line(node: ast.AST, indent: str, lines: list[str]) -> bool:
+    docstring = ast.get_docstring(node)
+    first = docstring.strip().split("\n", 1)[0].strip() if docstring else ""
+    if not first:
+        return False
+    first = first.replace("\\", "\\\\").replace('"""', '\\"\\"\\"')
+    if first.endswith('"'):
+        first = first[:-1] + '\\"'
+    lines.append(f'{indent}"""{first}"""')
+    return True
+
+
+@dataclass(slots=True)
+class _OutlinedText:
+    # None: plik nie jest poprawnym Pythonem i zostaje w całości.
+    text: str | None
+    tokens: int | None = None
+
+
+_cache: OrderedDict[bytes, _OutlinedText] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached_outline(text: str) -> _OutlinedText:
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    cached = _OutlinedText(outline_python(text))
+    with _cache_lock:
+        _cache[key] = cached
+        while len(_cache) > OUTLINE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return cached
+
+
+def outlined_content(text: str, path: str) -> str:
+    """Zwraca zarys pliku Pythona *path* (z cache po skrócie treści), a dla pozostałych treść bez zmian."""
+    if detect_language(path) != CompactionLanguage.PYTHON:
+        return text
+    outlined = _cached_outline(text).text
+    return text if outlined is None else outlined
+
+
+def outline_session(
+    session: Session, *, entry_ids: Collection[str] | None = None
+) -> tuple[Session, CompactionReport]:
+    """Zwraca kopię sesji z zarysami plików Pythona i raport oszczędności tokenów.
+
+    Z *entry_ids* zarys dostają tylko wskazane wpisy. Pliki w innych językach,
+    niepoprawny Python, drzewa katalogów, wpisy wykluczone i z błędem odczytu
+    są przenoszone bez zmian. Oryginalna sesja nie jest modyfikowana.
+    """
+    outlined = Session(prompt_text=session.prompt_text, output_format=session.output_format)
+    report = CompactionReport()
+    for entry in session.entries:
+        result = None
+        if (
+            entry.source_type != EntrySourceType.DIRECTORY_TREE
+            and entry.include_in_output
+            and entry.read_error is None
+            and (entry_ids is None or entry.entry_id in entry_ids)
+            and detect_language(entry.path) == CompactionLanguage.PYTHON
+        ):
+            result = _cached_outline(entry.content)
+        if result is None or result.text is None:
+            add_entry(outlined, entry)
+            continue
+        if result.tokens is None:
+            result.tokens = count_tokens(result.text) if result.text else 0
+        add_entry(
+            outlined,
+            dataclasses.replace(
+                entry,
+                content=result.text,
+                size=len(result.text.encode("utf-8")),
+                token_count_cache=result.tokens,
+                token_estimate_cache=None,
+                render_token_cache=None,
+            ),
+        )
+        report.files.append(
+            FileCompaction(
+                path=f"{entry.root}/{entry.path}" if entry.root else entry.path,
+                language=CompactionLanguage.PYTHON,
+                tokens_before=count_entry_tokens(entry),
+                tokens_after=result.tokens,
+            )
+        )
+    return outlined, report
@@ -0,0 +1,131 @@
+"""Strumieniowe listy ścieżek (np. `git ls-files -z`) i równoległy odczyt plików w ograniczonym oknie."""
+from __future__ import annotations
+
+import os
+from collections import deque
+from dataclasses import dataclass
+from enum import StrEnum
+from stat import S_ISREG
+from typing import BinaryIO, Iterable, Iterator
+
+from prompt_assistant.utils import is_binary
+
+from .content_cache import FileContentCache
+
+# concurrent.futures jest importowane leniwie, żeby nie wydłużać zimnego startu CLI.
+
+READ_CHUNK_BYTES = 64 * 1024
+DEFAULT_LOAD_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+# Plików w locie (odczytanych albo czytanych) na wątek; ogranicza pamięć niezależnie od długości listy.
+LOAD_WINDOW_PER_WORKER = 4
+
+
+class LoadStatus(StrEnum):
+    """Wynik odczytu pojedynczego pliku z listy."""
+
+    OK = "ok"
+    BINARY = "binary"
+    TOO_LARGE = "too_large"
+    ERROR = "error"
+
+
+@dataclass(slots=True)
+class LoadedFile:
+    """Plik z listy: ścieżka w postaci z wejścia, treść (dla `OK`) albo opis błędu."""
+
+    path: str
+    status: LoadStatus
+    content: str = ""
+    size: int = 0
+    token_count: int | None = None
+    error: str = ""
+
+
+def iter_path_list(stream: BinaryIO, *, null: bool = False) -> Iterator[str]:
+    """Zwraca ścieżki ze strumienia bajtów, rozdzielone znakiem NUL (*null*) albo końcem linii.
+
+    Strumień jest czytany kawałkami, więc lista nie musi mieścić się w pamięci.
+    Puste pozycje są pomijane; nazwy dekoduje `os.fsdecode` (jak argumenty
+    wywołania), a w trybie linii obcinany jest końcowy `\\r`.
+    """
+    separator = b"\0" if null else b"\n"
+    pending = b""
+    while chunk := stream.read(READ_CHUNK_BYTES):
+        parts = (pending + chunk).split(separator)
+        pending = parts.pop()
+        for part in parts:
+            path = _decode_path(part, null)
+            if path:
+                yield path
+    path = _decode_path(pending, null)
+    if path:
+        yield path
+
+
+def load_files(
+    paths: Iterable[str],
+    *,
+    cwd: str = "",
+    workers: int = DEFAULT_LOAD_WORKERS,
+    window: int | None = None,
+    max_file_bytes: int | None = None,
+    content_cache: FileContentCache | None = None,
+) -> Iterator[LoadedFile]:
+    """Czyta pliki z *paths* w puli wątków i zwraca je w kolejności wejścia.
+
+    W locie jest najwyżej *window* plików (domyślnie `LOAD_WINDOW_PER_WORKER`
+    na wątek): kolejna ścieżka jest pobierana z *paths* dopiero po oddaniu
+    najstarszego wyniku, więc pamięć nie rośnie z długością listy. Ścieżki
+    względne są rozwiązywane względem *cwd*. Binarki, pliki ponad
+    *max_file_bytes* i błędy odczytu są zwracane ze statusem zamiast wyjątku.
+    """
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    workers = max(1, workers)
+    window = max(workers, window or workers * LOAD_WINDOW_PER_WORKER)
+    pending: deque[Future[LoadedFile]] = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="promptglue-load") as pool:
+        try:
+            for path in paths:
+                pending.append(pool.submit(_load_file, path, cwd, max_file_bytes, content_cache))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Przerwana iteracja (np. błąd zapisu) nie czeka na odczyt reszty okna.
+            for future in pending:
+                future.cancel()
+
+
+def _load_file(
+    path: str,
+    cwd: str,
+    max_file_bytes: int | None,
+    content_cache: FileContentCache | None,
+) -> LoadedFile:
+    full_path = os.path.join(cwd, path)
+    try:
+        stat = os.stat(full_path)
+        if not S_ISREG(stat.st_mode):
+            return LoadedFile(path, LoadStatus.ERROR, error="nie jest zwykłym plikiem")
+        if max_file_bytes is not None and stat.st_size > max_file_bytes:
+            return LoadedFile(path, LoadStatus.TOO_LARGE, size=stat.st_size)
+        if content_cache is not None:
+            cached = content_cache.read(full_path, stat)
+            if cached.binary:
+                return LoadedFile(path, LoadStatus.BINARY, size=stat.st_size)
+            return LoadedFile(path, LoadStatus.OK, cached.content, stat.st_size, cached.token_count)
+        if is_binary(full_path):
+            return LoadedFile(path, LoadStatus.BINARY, size=stat.st_size)
+        with open(full_path, encoding="utf-8") as file_handle:
+            content = file_handle.read()
+    except (OSError, UnicodeDecodeError) as exc:
+        return LoadedFile(path, LoadStatus.ERROR, error=str(exc))
+    return LoadedFile(path, LoadStatus.OK, content, stat.st_size)
+
+
+def _decode_path(raw: bytes, null: bool) -> str:
+    if not null and raw.endswith(b"\r"):
+        raw = raw[:-1]
+    return os.fsdecode(raw) if raw else ""
@@ -0,0 +1,216 @@
+"""Drzewo prefiksowe ścieżek wpisów z agregatami poddrzew i wyborem po globach."""
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from prompt_assistant.utils import compile_gitwildmatch
+
+from .models import Entry, EntrySourceType, Session
+from .token_estimator import estimate_entry_tokens
+
+
+@dataclass(slots=True)
+class SubtreeStats:
+    """Agregaty poddrzewa: pliki, aktywne pliki, ich tokeny i liczba wpisów jeszcze estymowanych."""
+
+    files: int
+    active: int
+    tokens: int
+    pending: int
+
+    @property
+    def exact(self) -> bool:
+        return self.pending == 0
+
+
+class _Node:
+    __slots__ = ("children", "entries", "files", "active", "tokens", "pending")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        # Wpisy o dokładnie tej ścieżce (zwykle jeden); None w węzłach katalogów.
+        self.entries: dict[str, Entry] | None = None
+        self.files = 0
+        self.active = 0
+        self.tokens = 0
+        self.pending = 0
+
+
+class _Leaf:
+    __slots__ = ("entry", "parts", "nodes", "active", "tokens", "pending")
+
+    def __init__(self, entry: Entry, parts: tuple[str, ...], nodes: tuple[_Node, ...]) -> None:
+        self.entry = entry
+        self.parts = parts
+        self.nodes = nodes
+        self.active = 0
+        self.tokens = 0
+        self.pending = 0
+
+
+def entry_tree_path(entry: Entry) -> str:
+    """Ścieżka wpisu w drzewie: z nazwą dołączonego katalogu, tak jak na liście plików GUI."""
+    return f"{entry.root}/{entry.path}" if entry.root else entry.path
+
+
+def _split(path: str) -> tuple[str, ...]:
+    # Wspólne obiekty nazw dla powtarzających się katalogów (`src`, `tests`...) we wszystkich gałęziach.
+    return tuple(sys.intern(part) for part in path.replace("\\", "/").split("/") if part and part != ".")
+
+
+class PathTrie:
+    """Drzewo ścieżek plików sesji aktualizowane przez powiadomienia sesji.
+
+    Węzeł trzyma sumy swojego poddrzewa, więc zmiana wpisu kosztuje O(głębokość),
+    a statystyki katalogu są odczytywane bez przeglądania plików. Wpisy drzewa
+    katalogów (`DIRECTORY_TREE`) nie są plikami i są pomijane.
+    """
+
+    def __init__(self) -> None:
+        self._root = _Node()
+        self._leaves: dict[str, _Leaf] = {}
+
+    @classmethod
+    def for_session(cls, session: Session) -> PathTrie:
+        """Tworzy drzewo z bieżących wpisów i rejestruje je jako obserwatora sesji."""
+        trie = cls()
+        for entry in session.entries:
+            trie.entry_added(entry)
+        session.observers.append(trie)
+        return trie
+
+    # ------------------------------------------------------------- observer
+    def entry_added(self, entry: Entry) -> None:
+        if entry.source_type == EntrySourceType.DIRECTORY_TREE:
+            return
+        leaf = self._leaves.get(entry.entry_id)
+        if leaf is None or leaf.entry is not entry or leaf.parts != _split(entry_tree_path(entry)):
+            self._detach(entry.entry_id)
+            leaf = self._attach(entry)
+        else:
+            self._apply(leaf, -1)
+        if entry.include_in_output and entry.read_error is None:
+            estimate = estimate_entry_tokens(entry)
+            leaf.active, leaf.tokens, leaf.pending = 1, estimate.tokens, 0 if estimate.exact else 1
+        else:
+            leaf.active = leaf.tokens = leaf.pending = 0
+        self._apply(leaf, 1)
+
+    def entry_removed(self, entry: Entry) -> None:
+        self._detach(entry.entry_id)
+
+    def entry_changed(self, entry: Entry) -> None:
+        self.entry_added(entry)
+
+    def session_cleared(self) -> None:
+        self._root = _Node()
+        self._leaves.clear()
+
+    def refresh(self, entry_ids: Iterable[str]) -> int:
+        """Przelicza tokeny wpisów o podanych ID (np. po dokładnym policzeniu w tle); zwraca liczbę zmian."""
+        refreshed = 0
+        for entry_id in entry_ids:
+            leaf = self._leaves.get(entry_id)
+            if leaf is not None:
+                self.entry_added(leaf.entry)
+                refreshed += 1
+        return refreshed
+
+    # ---------------------------------------------------------------- query
+    def stats(self, prefix: str = "") -> SubtreeStats | None:
+        """Agregaty poddrzewa *prefix* ("" to całe drzewo); None, gdy ścieżki nie ma."""
+        node = self._find(prefix)
+        if node is None:
+            return None
+        return SubtreeStats(files=node.files, active=node.active, tokens=node.tokens, pending=node.pending)
+
+    def children(self, prefix: str = "") -> list[tuple[str, SubtreeStats]]:
+        """Bezpośrednie dzieci węzła *prefix* z agregatami, posortowane po nazwie."""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        return [
+            (name, SubtreeStats(files=child.files, active=child.active, tokens=child.tokens, pending=child.pending))
+            for name, child in sorted(node.children.items())
+        ]
+
+    def entries_under(self, prefix: str = "") -> list[Entry]:
+        """Wpisy w poddrzewie *prefix* (plik albo katalog) w O(rozmiar poddrzewa)."""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        return [entry for _path, entry in self._walk(node, "/".join(_split(prefix)))]
+
+    def select_glob(self, patterns: Iterable[str], prefix: str = "") -> list[Entry]:
+        """Wpisy z poddrzewa *prefix*, których ścieżka pasuje do wzorców gitwildmatch (jak `.gitignore`)."""
+        patterns = [pattern for pattern in patterns if pattern.strip()]
+        node = self._find(prefix)
+        if not patterns or node is None:
+            return []
+        spec = compile_gitwildmatch(patterns)
+        return [entry for path, entry in self._walk(node, "/".join(_split(prefix))) if spec.match_file(path)]
+
+    def __len__(self) -> int:
+        return len(self._leaves)
+
+    # -------------------------------------------------------------- internal
+    def _find(self, prefix: str) -> _Node | None:
+        node = self._root
+        for part in _split(prefix):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    @staticmethod
+    def _walk(node: _Node, path: str) -> Iterator[tuple[str, Entry]]:
+        stack = [(node, path)]
+        while stack:
+            current, current_path = stack.pop()
+            if current.entries:
+                for entry in current.entries.values():
+                    yield current_path, entry
+            for name, child in reversed(current.children.items()):
+                stack.append((child, f"{current_path}/{name}" if current_path else name))
+
+    def _attach(self, entry: Entry) -> _Leaf:
+        parts = _split(entry_tree_path(entry))
+        node = self._root
+        nodes = [node]
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Node()
+            node = child
+            nodes.append(node)
+        if node.entries is None:
+            node.entries = {}
+        node.entries[entry.entry_id] = entry
+        leaf = self._leaves[entry.entry_id] = _Leaf(entry, parts, tuple(nodes))
+        for path_node in leaf.nodes:
+            path_node.files += 1
+        return leaf
+
+    def _detach(self, entry_id: str) -> None:
+        leaf = self._leaves.pop(entry_id, None)
+        if leaf is None:
+            return
+        self._apply(leaf, -1)
+        for path_node in leaf.nodes:
+            path_node.files -= 1
+        del leaf.nodes[-1].entries[entry_id]
+        # Usuwa puste gałęzie od liścia w górę.
+        for depth in range(len(leaf.parts), 0, -1):
+            node = leaf.nodes[depth]
+            if node.files or node.children:
+                break
+            del leaf.nodes[depth - 1].children[leaf.parts[depth - 1]]
+
+    @staticmethod
+    def _apply(leaf: _Leaf, sign: int) -> None:
+        for node in leaf.nodes:
+            node.active += sign * leaf.active
+            node.tokens += sign * leaf.tokens
+            node.pending += sign * leaf.pending
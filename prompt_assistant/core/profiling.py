@@ -0,0 +1,173 @@
+"""Lekka instrumentacja faz pracy: spany czasowe z licznikami."""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class Span:
+    """Zmierzona faza pracy (czas w ns od startu profilera) z licznikami."""
+
+    name: str
+    start_ns: int
+    duration_ns: int = 0
+    calls: int = 1
+    counters: dict[str, int] = field(default_factory=dict)
+
+    def add(self, **counters: int) -> None:
+        """Zwiększa liczniki spanu (np. files/bytes/tokens)."""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+class _SpanContext:
+    __slots__ = ("_profiler", "_span", "_started")
+
+    def __init__(self, profiler: Profiler, span: Span) -> None:
+        self._profiler = profiler
+        self._span = span
+        self._started = 0
+
+    def __enter__(self) -> Span:
+        self._started = time.perf_counter_ns()
+        return self._span
+
+    def __exit__(self, *_exc: object) -> None:
+        self._span.duration_ns += time.perf_counter_ns() - self._started
+
+
+class _AllocationSpanContext(_SpanContext):
+    """Span mierzący dodatkowo szczyt i przyrost zaalokowanej pamięci (tracemalloc)."""
+
+    __slots__ = ("_base", "_started_tracing")
+
+    def __enter__(self) -> Span:
+        import tracemalloc
+
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+        return super().__enter__()
+
+    def __exit__(self, *exc: object) -> None:
+        import tracemalloc
+
+        super().__exit__(*exc)
+        current, peak = tracemalloc.get_traced_memory()
+        self._span.add(alloc_peak_bytes=peak - self._base, alloc_retained_bytes=current - self._base)
+        if self._started_tracing:
+            tracemalloc.stop()
+
+
+class _NullSpan:
+    """Wspólny no-op span używany gdy profilowanie jest wyłączone."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        return None
+
+    def add(self, **_counters: int) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """Zbiera spany faz; `span` mierzy pojedynczy odcinek, `accumulate` sumuje powtórzenia.
+
+    Z *trace_allocations* spany `span` (nie `accumulate`) dostają liczniki
+    `alloc_peak_bytes` i `alloc_retained_bytes` z tracemalloc: szczyt pamięci
+    ponad stan z początku fazy i to, co po niej zostało. Takie spany nie mogą
+    być zagnieżdżane, a śledzenie kilkukrotnie spowalnia mierzony kod.
+    """
+
+    enabled = True
+
+    def __init__(self, *, trace_allocations: bool = False) -> None:
+        self._origin_ns = time.perf_counter_ns()
+        self.spans: list[Span] = []
+        self._accumulated: dict[str, Span] = {}
+        self.trace_allocations = trace_allocations
+
+    def span(self, name: str, **counters: int) -> _SpanContext:
+        span = Span(name=name, start_ns=time.perf_counter_ns() - self._origin_ns, counters=dict(counters))
+        self.spans.append(span)
+        if self.trace_allocations:
+            return _AllocationSpanContext(self, span)
+        return _SpanContext(self, span)
+
+    def accumulate(self, name: str) -> _SpanContext:
+        span = self._accumulated.get(name)
+        if span is None:
+            span = Span(name=name, start_ns=time.perf_counter_ns() - self._origin_ns, calls=0)
+            self._accumulated[name] = span
+            self.spans.append(span)
+        span.calls += 1
+        return _SpanContext(self, span)
+
+
+class NullProfiler:
+    """Profiler wyłączony: każde wywołanie zwraca współdzielony no-op span."""
+
+    enabled = False
+    spans: tuple[Span, ...] = ()
+
+    def span(self, _name: str, **_counters: int) -> _NullSpan:
+        return _NULL_SPAN
+
+    def accumulate(self, _name: str) -> _NullSpan:
+        return _NULL_SPAN
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def spans_to_json(spans: list[Span]) -> list[dict]:
+    """Zwraca spany jako listę słowników (czasy w milisekundach)."""
+    return [
+        {
+            "name": span.name,
+            "start_ms": span.start_ns / 1_000_000,
+            "duration_ms": span.duration_ns / 1_000_000,
+            "calls": span.calls,
+            "counters": dict(span.counters),
+        }
+        for span in spans
+    ]
+
+
+def spans_to_chrome_trace(spans: list[Span]) -> dict:
+    """Zwraca spany w formacie Chrome trace-event (chrome://tracing, Perfetto)."""
+    events = [
+        {
+            "name": span.name,
+            "cat": "promptglue",
+            "ph": "X",
+            "ts": span.start_ns / 1_000,
+            "dur": span.duration_ns / 1_000,
+            "pid": 1,
+            "tid": 1,
+            "args": {"calls": span.calls, **span.counters},
+        }
+        for span in spans
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def format_spans(spans: list[Span]) -> list[str]:
+    """Zwraca czytelne linie z podsumowaniem spanów."""
+    lines: list[str] = []
+    for span in spans:
+        details = ", ".join(f"{key}={value}" for key, value in span.counters.items())
+        suffix = f" ({details})" if details else ""
+        calls = f" x{span.calls}" if span.calls > 1 else ""
+        lines.append(f"{span.name}: {span.duration_ns / 1_000_000:.1f} ms{calls}{suffix}")
+    return lines
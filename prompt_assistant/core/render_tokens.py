@@ -0,0 +1,167 @@
+"""Dokładna liczba tokenów wyrenderowanego outputu razem z opakowaniami formatów.
+
+Pretokenizacja cl100k zawsze rozdziela tekst tuż za "\\n", po którym stoi znak
+niebiały (żaden wzorzec nie przechodzi przez taki znak nowej linii), więc tekst
+sklejony na takiej granicy ma tyle tokenów, ile suma jego części. Nagłówki
+wszystkich formatów zaczynają się od znaku niebiałego, dlatego output
+`build_output` rozkłada się na prompt z separatorem, opakowania wpisów (liczone
+raz na ścieżkę i format) oraz treść wpisów (z cache tokenów wpisu). Miejsca, w
+których granica nie jest gwarantowana (treść zaczynająca się od białego znaku,
+brak "\\n" po ostatnim wpisie), są poprawiane na krótkich fragmentach.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from prompt_assistant.utils import count_tokens
+
+from .models import Entry, EntrySourceType, OutputFormat, Session
+from .token_service import count_entry_tokens, count_prompt_tokens
+
+WRAPPER_CACHE_SIZE = 65536
+
+# Separatory linii `str.splitlines` poza "\n": renderer zamienia je na "\n".
+_OTHER_LINE_BREAKS = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+@dataclass(slots=True)
+class RenderedTokenCount:
+    """Tokeny wyrenderowanego outputu w podziale na prompt, opakowania wpisów i treść."""
+
+    prompt: int = 0
+    wrappers: int = 0
+    content: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.prompt + self.wrappers + self.content
+
+
+def wrapper_lines(
+    output_format: OutputFormat, source_type: EntrySourceType, path: str
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Zwraca linie (nagłówek, stopka) otaczające treść wpisu w danym formacie."""
+    if output_format == OutputFormat.MARKDOWN:
+        return (f"### {path}", "```"), ("```",)
+    if output_format == OutputFormat.PLAIN:
+        return (f"FILE: {path}",), ()
+    if source_type == EntrySourceType.DIRECTORY_TREE:
+        return ("<directories>",), ("</directories>",)
+    return (f"<file path='{path}'>",), ("</file>",)
+
+
+@dataclass(frozen=True, slots=True)
+class _WrapperCost:
+    header: str
+    header_tokens: int
+    footer_tokens: int
+    # Ile tokenów dokłada "\n" za stopką; ostatni wpis outputu nie ma separatora.
+    footer_newline_tokens: int
+
+
+@lru_cache(maxsize=WRAPPER_CACHE_SIZE)
+def _wrapper_cost(output_format: OutputFormat, source_type: EntrySourceType, path: str) -> _WrapperCost:
+    header_lines, footer_lines = wrapper_lines(output_format, source_type, path)
+    header = "".join(f"{line}\n" for line in header_lines)
+    footer = "\n".join(footer_lines)
+    footer_tokens = count_tokens(footer + "\n") if footer else 0
+    return _WrapperCost(
+        header=header,
+        header_tokens=count_tokens(header),
+        footer_tokens=footer_tokens,
+        footer_newline_tokens=footer_tokens - count_tokens(footer) if footer else 0,
+    )
+
+
+@lru_cache(maxsize=WRAPPER_CACHE_SIZE)
+def _joint_tokens(header: str, head: str) -> int:
+    """Różnica między tokenami sklejenia nagłówka z początkiem treści a sumą ich osobnych liczb."""
+    return count_tokens(header + head) - count_tokens(header) - count_tokens(head)
+
+
+def _first_boundary(text: str) -> int:
+    """Pierwsza pozycja za "\\n", po której stoi znak niebiały (len(text), gdy brak)."""
+    start = 0
+    while (newline := text.find("\n", start, len(text) - 1)) >= 0:
+        if not text[newline + 1].isspace():
+            return newline + 1
+        start = newline + 1
+    return len(text)
+
+
+def _last_boundary(text: str) -> int:
+    """Ostatnia pozycja za "\\n", po której stoi znak niebiały (0, gdy brak)."""
+    end = len(text) - 1
+    while (newline := text.rfind("\n", 0, end)) >= 0:
+        if not text[newline + 1].isspace():
+            return newline + 1
+        end = newline
+    return 0
+
+
+def _body_text(content: str) -> str:
+    """Treść w postaci z outputu: linie po `splitlines`, każda zakończona "\\n"."""
+    lines = content.splitlines()
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _with_newline_tokens(text: str, tokens: int) -> int:
+    """Tokeny `text + "\\n"` z tokenów *text*, tokenizując tylko końcówkę za ostatnią granicą."""
+    tail = text[_last_boundary(text):]
+    if len(tail) == len(text):
+        return count_tokens(text + "\n")
+    return tokens - count_tokens(tail) + count_tokens(tail + "\n")
+
+
+def _body_cost(entry: Entry) -> tuple[int, str]:
+    """Zwraca (tokeny treści w postaci z outputu, początek treści do pierwszej granicy)."""
+    if entry.render_token_cache is None:
+        content = entry.content
+        if not content:
+            body_tokens, body = 0, ""
+        elif _OTHER_LINE_BREAKS.search(content):
+            body = _body_text(content)
+            body_tokens = count_tokens(body)
+        elif content.endswith("\n"):
+            body, body_tokens = content, count_entry_tokens(entry)
+        else:
+            body, body_tokens = content + "\n", _with_newline_tokens(content, count_entry_tokens(entry))
+        head = body[: _first_boundary(body)] if body and body[0].isspace() else ""
+        entry.render_token_cache = (body_tokens, head)
+    return entry.render_token_cache
+
+
+def _last_entry_newline_tokens(entry: Entry, cost: _WrapperCost) -> int:
+    """Ile tokenów dokłada "\\n" na końcu bloku wpisu (odejmowane dla ostatniego wpisu)."""
+    if cost.footer_tokens:
+        return cost.footer_newline_tokens
+    block = cost.header + _body_text(entry.content)
+    tail = block[_last_boundary(block):]
+    return count_tokens(tail) - count_tokens(tail[:-1])
+
+
+def count_rendered_tokens(session: Session) -> RenderedTokenCount:
+    """Liczy tokeny outputu `build_output` bez tokenizowania całego wyrenderowanego tekstu."""
+    result = RenderedTokenCount()
+    last: tuple[Entry, _WrapperCost] | None = None
+    for entry in session.entries:
+        if entry.read_error or not entry.include_in_output:
+            continue
+        cost = _wrapper_cost(session.output_format, entry.source_type, entry.path)
+        body_tokens, head = _body_cost(entry)
+        result.content += body_tokens
+        result.wrappers += cost.header_tokens + cost.footer_tokens
+        if head:
+            result.wrappers += _joint_tokens(cost.header, head)
+        last = (entry, cost)
+
+    prompt = session.prompt_text
+    if prompt:
+        prompt_tokens = count_prompt_tokens(prompt)
+        result.prompt = _with_newline_tokens(prompt, prompt_tokens) if last is not None else prompt_tokens
+    if last is not None:
+        # Każdy blok był liczony z "\n" łączącym go z następnym; po ostatnim separatora nie ma.
+        result.wrappers -= _last_entry_newline_tokens(*last)
+    return result
@@ -1,36 +1,25 @@
 """Renderer finalnego outputu promptu ze stanu sesji."""
 from __future__ import annotations
 
-from .models import BuildResult, Entry, EntrySourceType, OutputFormat, Session
-from .token_service import count_session_tokens
+from itertools import chain
+from typing import Iterable, TextIO
 
+from .models import BuildResult, Entry, OutputFormat, Session
+from .profiling import NULL_PROFILER, Profiler
+from .render_tokens import count_rendered_tokens, wrapper_lines
 
-def _render_xml_entry(entry: Entry, lines: list[str]) -> None:
-    if entry.source_type == EntrySourceType.DIRECTORY_TREE:
-        lines.append("<directories>")
-        lines.extend(entry.content.splitlines())
-        lines.append("</directories>")
-        return
 
-    lines.append(f"<file path='{entry.path}'>")
+def _render_entry(entry: Entry, output_format: OutputFormat, lines: list[str]) -> None:
+    header, footer = wrapper_lines(output_format, entry.source_type, entry.path)
+    lines.extend(header)
     lines.extend(entry.content.splitlines())
-    lines.append("</file>")
+    lines.extend(footer)
 
 
-def _render_plain_entry(entry: Entry, lines: list[str]) -> None:
-    lines.append(f"FILE: {entry.path}")
-    lines.extend(entry.content.splitlines())
-
-
-def _render_markdown_entry(entry: Entry, lines: list[str]) -> None:
-    lines.append(f"### {entry.path}")
-    lines.append("```")
-    lines.extend(entry.content.splitlines())
-    lines.append("```")
-
-
-def build_output(session: Session) -> BuildResult:
-    """Buduje finalny output ze stanu sesji."""
+def build_output(session: Session, *, profiler: Profiler | None = None) -> BuildResult:
+    """Buduje finalny output ze stanu sesji; opcjonalny profiler zbiera spany faz."""
+    prof = profiler or NULL_PROFILER
+    first_span = len(prof.spans)
     lines: list[str] = []
     if session.prompt_text:
         lines.append(session.prompt_text)
@@ -40,29 +29,72 @@ def build_output(session: Session) -> BuildResult:
     warnings: list[str] = []
     errors: list[str] = []
 
-    for entry in session.entries:
-        if entry.read_error:
-            errors.append(f"{entry.path}: {entry.read_error}")
-            excluded += 1
-            continue
-        if not entry.include_in_output:
-            excluded += 1
-            continue
+    with prof.span("render") as render_span:
+        for entry in session.entries:
+            if entry.read_error:
+                errors.append(f"{entry.path}: {entry.read_error}")
+                excluded += 1
+                continue
+            if not entry.include_in_output:
+                excluded += 1
+                continue
 
-        included += 1
-        if session.output_format == OutputFormat.MARKDOWN:
-            _render_markdown_entry(entry, lines)
-        elif session.output_format == OutputFormat.PLAIN:
-            _render_plain_entry(entry, lines)
-        else:
-            _render_xml_entry(entry, lines)
+            included += 1
+            _render_entry(entry, session.output_format, lines)
+        rendered_output = "\n".join(lines)
+        render_span.add(files=included, bytes=len(rendered_output))
+
+    with prof.span("tokenize") as tokenize_span:
+        # Liczone z cache tokenów wpisów i opakowań, bez tokenizowania `rendered_output`.
+        counted = count_rendered_tokens(session)
+        total = counted.total
+        tokenize_span.add(tokens=total, wrapper_tokens=counted.wrappers)
 
-    _prompt_tokens, _attachment_tokens, total = count_session_tokens(session)
     return BuildResult(
-        rendered_output="\n".join(lines),
+        rendered_output=rendered_output,
         total_tokens=total,
         included_entries=included,
         excluded_entries=excluded,
         warnings=warnings,
         errors=errors,
+        spans=list(prof.spans[first_span:]),
     )
+
+
+def write_output(
+    stream: TextIO,
+    session: Session,
+    extra_entries: Iterable[Entry] = (),
+    *,
+    profiler: Profiler | None = None,
+) -> int:
+    """Pisze do *stream* ten sam tekst co `build_output`, wpis po wpisie; zwraca liczbę wyrenderowanych wpisów.
+
+    Po wpisach sesji renderowane są *extra_entries* (np. pliki z `load_files`),
+    które nie trafiają do sesji, więc pamięć zależy od największego wpisu, a nie
+    od całego outputu. Liczby tokenów nie są liczone.
+    """
+    prof = profiler or NULL_PROFILER
+    included = 0
+    with prof.span("render_stream") as render_span:
+        started = bool(session.prompt_text)
+        if started:
+            stream.write(session.prompt_text)
+        written = len(session.prompt_text)
+        for entry in chain(session.entries, extra_entries):
+            if entry.read_error or not entry.include_in_output:
+                continue
+            included += 1
+            lines: list[str] = []
+            _render_entry(entry, session.output_format, lines)
+            if not lines:
+                continue
+            chunk = "\n".join(lines)
+            if started:
+                stream.write("\n")
+                written += 1
+            stream.write(chunk)
+            written += len(chunk)
+            started = True
+        render_span.add(files=included, bytes=written)
+    return included
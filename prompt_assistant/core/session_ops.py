@@ -1,10 +1,14 @@
 """Operacje na stanie sesji."""
 from __future__ import annotations
 
-from uuid import uuid4
+from itertools import count
 
+from .entry_store import session_store
 from .models import Entry, EntrySourceType, Session
 
+# Kolejne ID wpisów w obrębie procesu (tańsze niż uuid4 przy imporcie dużych katalogów).
+_entry_ids = count(1)
+
 
 def create_entry(
     path: str,
@@ -15,10 +19,11 @@ def create_entry(
     read_error: str | None = None,
     is_binary: bool = False,
     size: int = 0,
+    root: str = "",
 ) -> Entry:
     """Tworzy wpis sesji z unikalnym identyfikatorem."""
     return Entry(
-        entry_id=str(uuid4()),
+        entry_id=f"e{next(_entry_ids)}",
         path=path,
         source_type=source_type,
         content=content,
@@ -26,41 +31,77 @@ def create_entry(
         read_error=read_error,
         is_binary=is_binary,
         size=size,
+        root=root,
     )
 
 
 def add_entry(session: Session, entry: Entry) -> None:
     """Dodaje wpis do sesji."""
+    session_store(session).add(entry)
     session.entries.append(entry)
+    for observer in session.observers:
+        observer.entry_added(entry)
 
 
 def remove_entry(session: Session, entry_id: str) -> bool:
     """Usuwa wpis po identyfikatorze; zwraca True gdy usunięto."""
+    if get_entry(session, entry_id) is None:
+        return False
     for index, entry in enumerate(session.entries):
         if entry.entry_id == entry_id:
             del session.entries[index]
+            session.store.remove(entry_id)
+            for observer in session.observers:
+                observer.entry_removed(entry)
             return True
     return False
 
 
+def notify_entry_changed(session: Session, entry: Entry) -> None:
+    """Powiadamia obserwatorów sesji o zmianie treści, flag lub cache tokenów wpisu."""
+    session_store(session).update(entry)
+    for observer in session.observers:
+        observer.entry_changed(entry)
+
+
+def update_entry_content(session: Session, entry: Entry, content: str) -> bool:
+    """Podmienia treść wpisu, unieważnia cache tokenów i powiadamia sesję; zwraca False gdy treść się nie zmieniła."""
+    if entry.content == content:
+        return False
+    entry.content = content
+    entry.size = len(content.encode("utf-8"))
+    entry.token_count_cache = None
+    entry.token_estimate_cache = None
+    entry.render_token_cache = None
+    notify_entry_changed(session, entry)
+    return True
+
+
 def set_entry_inclusion(session: Session, entry_id: str, include: bool) -> bool:
     """Ustawia flagę include_in_output wpisu."""
     entry = get_entry(session, entry_id)
     if entry is None:
         return False
-    entry.include_in_output = include
+    if entry.include_in_output != include:
+        entry.include_in_output = include
+        notify_entry_changed(session, entry)
     return True
 
 
 def get_entry(session: Session, entry_id: str) -> Entry | None:
     """Zwraca wpis po ID albo None."""
-    for entry in session.entries:
-        if entry.entry_id == entry_id:
-            return entry
-    return None
+    store = session_store(session)
+    entry = store.get(entry_id)
+    if entry is None and store.sync(session.entries):
+        # Lista wpisów zmieniła się z pominięciem `session_ops` (np. podmiana `session.entries[i]`).
+        entry = store.get(entry_id)
+    return entry
 
 
 def clear_session(session: Session) -> None:
     """Czyści prompt i wszystkie wpisy sesji."""
     session.prompt_text = ""
     session.entries.clear()
+    session.store.clear()
+    for observer in session.observers:
+        observer.session_cleared()
@@ -0,0 +1,91 @@
+"""Cache skompilowanych wzorców `.gitignore` i wykluczeń między importami."""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from prompt_assistant.utils import compile_gitwildmatch, read_gitignore_patterns
+
+DEFAULT_MAX_SPECS = 16
+# Wyniki dopasowań na matcher; po przekroczeniu pamięć wyników jest czyszczona, żeby
+# długo żyjący proces (daemon) nie trzymał wpisu dla każdej ścieżki, jaką kiedykolwiek widział.
+DEFAULT_MAX_MATCH_RESULTS = 50_000
+
+
+class PathMatcher:
+    """Skompilowany PathSpec z pamięcią wyników dopasowania ścieżek względnych.
+
+    Klucz cache obejmuje wszystkie pliki wzorców i ich mtime, więc wynik dla
+    danej ścieżki nie może się zmienić, dopóki matcher jest w użyciu. Pamięć
+    wyników ma najwyżej *max_results* pozycji.
+    """
+
+    __slots__ = ("_spec", "_results", "_max_results", "pattern_count")
+
+    def __init__(self, patterns: list[str], max_results: int = DEFAULT_MAX_MATCH_RESULTS) -> None:
+        self._spec = compile_gitwildmatch(patterns)
+        self._results: dict[str, bool] = {}
+        self._max_results = max_results
+        self.pattern_count = len(patterns)
+
+    def match(self, rel: str) -> bool:
+        result = self._results.get(rel)
+        if result is None:
+            if len(self._results) >= self._max_results:
+                self._results.clear()
+            result = self._results[rel] = bool(self._spec.match_file(rel))
+        return result
+
+
+class SpecCache:
+    """LRU matcherów kluczowanych zbiorem `.gitignore` (ścieżka, mtime, rozmiar) lub listą wzorców."""
+
+    def __init__(self, max_specs: int = DEFAULT_MAX_SPECS) -> None:
+        self._max_specs = max_specs
+        self._matchers: OrderedDict[tuple, PathMatcher | None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def gitignore_matcher(self, root_dir: str, gitignore_paths: Iterable[str]) -> PathMatcher | None:
+        """Zwraca matcher dla plików `.gitignore` pod *root_dir*; None gdy brak wzorców."""
+        stamps: list[tuple[str, int, int]] = []
+        for path in sorted(gitignore_paths):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamps.append((path, stat.st_mtime_ns, stat.st_size))
+        key = ("gitignore", root_dir, tuple(stamps))
+        return self._get(key, lambda: read_gitignore_patterns(root_dir, [path for path, _m, _s in stamps]))
+
+    def custom_matcher(self, patterns: Iterable[str]) -> PathMatcher | None:
+        """Zwraca matcher dla wzorców wykluczeń użytkownika; None gdy lista jest pusta."""
+        patterns = tuple(patterns)
+        if not patterns:
+            return None
+        return self._get(("custom", patterns), lambda: list(patterns))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matchers.clear()
+
+    def _get(self, key: tuple, load_patterns) -> PathMatcher | None:
+        with self._lock:
+            if key in self._matchers:
+                self._matchers.move_to_end(key)
+                self.hits += 1
+                return self._matchers[key]
+        patterns = load_patterns()
+        matcher = PathMatcher(patterns) if patterns else None
+        with self._lock:
+            self.misses += 1
+            self._matchers[key] = matcher
+            while len(self._matchers) > self._max_specs:
+                self._matchers.popitem(last=False)
+        return matcher
+
+
+DEFAULT_SPEC_CACHE = SpecCache()
@@ -0,0 +1,96 @@
+"""Stronicowanie dużych tekstów na okna (podgląd bez ładowania całości do widgetu)."""
+from __future__ import annotations
+
+import mmap
+import os
+
+# Rozmiar okna w znakach (tekst) lub bajtach (plik przez mmap).
+WINDOW_SIZE = 256 * 1024
+# Pliki od tego rozmiaru są czytane przez mmap zamiast z treści trzymanej w pamięci.
+MMAP_THRESHOLD = 4 * 1024 * 1024
+# Jak daleko za nominalną granicą okna szukamy końca linii.
+_LINE_SEARCH = 4096
+
+
+class TextWindowReader:
+    """Dzieli tekst (`str` albo plik zmapowany przez mmap) na okna cięte po końcu linii.
+
+    Granica okna *k* to pierwszy znak po `\\n` znalezionym niedaleko
+    pozycji `k * window_size`, więc pobranie dowolnego okna nie wymaga
+    skanowania pliku od początku.
+    """
+
+    def __init__(self, data: str | bytes | mmap.mmap, window_size: int = WINDOW_SIZE) -> None:
+        self._data = data
+        self._newline = "\n" if isinstance(data, str) else b"\n"
+        self.window_size = max(1, window_size)
+        self.length = len(data)
+        self.memory_mapped = isinstance(data, mmap.mmap)
+
+    @classmethod
+    def from_file(cls, path: str, window_size: int = WINDOW_SIZE) -> TextWindowReader:
+        """Mapuje plik tylko do odczytu; pusty plik daje pusty czytnik."""
+        with open(path, "rb") as file_handle:
+            if os.fstat(file_handle.fileno()).st_size == 0:
+                return cls(b"", window_size)
+            return cls(mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ), window_size)
+
+    @property
+    def window_count(self) -> int:
+        return max(1, -(-self.length // self.window_size))
+
+    def window(self, index: int) -> str:
+        """Zwraca treść okna *index* (dla pliku zdekodowaną jako UTF-8)."""
+        index = min(max(index, 0), self.window_count - 1)
+        chunk = self._data[self._boundary(index) : self._boundary(index + 1)]
+        if isinstance(chunk, bytes):
+            return chunk.decode("utf-8", "replace")
+        return chunk
+
+    def close(self) -> None:
+        if self.memory_mapped:
+            self._data.close()
+
+    def __enter__(self) -> TextWindowReader:
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _boundary(self, index: int) -> int:
+        position = index * self.window_size
+        if position <= 0:
+            return 0
+        if position >= self.length:
+            return self.length
+        search_end = min(self.length, position + min(_LINE_SEARCH, self.window_size // 2))
+        newline = self._data.find(self._newline, position - 1, search_end)
+        if newline >= 0:
+            return newline + 1
+        if not isinstance(self._data, str):
+            # Bez końca linii w pobliżu tniemy na początku znaku UTF-8 (nie w bajcie kontynuacji).
+            while position > 0 and self._data[position] & 0xC0 == 0x80:
+                position -= 1
+        return position
+
+
+def open_text_windows(
+    content: str,
+    path: str | None = None,
+    expected_size: int | None = None,
+    loaded_at: float | None = None,
+) -> TextWindowReader:
+    """Zwraca czytnik okien: mmap dla dużego, niezmienionego pliku na dysku, inaczej treść z pamięci.
+
+    Plik uznajemy za niezmieniony, gdy ma rozmiar *expected_size* i nie był
+    modyfikowany po *loaded_at* (znacznik czasu wczytania wpisu); bez niego
+    zawsze używana jest *content*.
+    """
+    if path and expected_size is not None and loaded_at is not None and expected_size >= MMAP_THRESHOLD:
+        try:
+            stat = os.stat(path)
+            if stat.st_size == expected_size and stat.st_mtime <= loaded_at:
+                return TextWindowReader.from_file(path)
+        except (OSError, ValueError):
+            pass
+    return TextWindowReader(content)
@@ -0,0 +1,182 @@
+"""Szybki, skalibrowany estymator liczby tokenów (bez tiktoken).
+
+Model liniowy na licznikach klas bajtów UTF-8 dopasowany do cl100k_base
+skryptem `benchmarks/calibrate_estimator.py`. Liczenie klas to kilka przebiegów
+`bytes.translate`/`bytes.count` w C, więc estymata jest o rząd wielkości
+szybsza od dokładnej tokenizacji.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .entry_store import UNKNOWN_TOKENS, session_store
+from .models import Entry, Session
+from .token_service import cached_prompt_tokens
+
+# Współczynniki (tokeny na bajt klasy) z kalibracji na stdlib Pythona i dokumentacji repo.
+LETTER_WEIGHT = 0.1243
+DIGIT_WEIGHT = 0.8969
+SPACE_WEIGHT = 0.7270
+NEWLINE_WEIGHT = 0.5336
+PUNCT_WEIGHT = 0.6285
+NON_ASCII_WEIGHT = 0.3940
+INDENT_WEIGHT = -2.7417  # każdy ciąg 4 spacji (wcięcie) to zwykle jeden token
+
+# p90 błędu względnego na korpusie kalibracyjnym; małe teksty dostają zapas absolutny.
+ESTIMATE_RELATIVE_ERROR = 0.15
+ESTIMATE_ABSOLUTE_ERROR = 4
+# Przelicznik awaryjny, gdy znany jest tylko rozmiar w bajtach.
+BYTES_PER_TOKEN = 4.07
+
+# Teksty dłuższe niż próg są estymowane z równomiernie rozłożonych próbek.
+SAMPLE_THRESHOLD = 256 * 1024
+SAMPLE_COUNT = 16
+SAMPLE_LENGTH = 8 * 1024
+
+_CLASS_TABLE = bytearray(256)
+for _code, _members in enumerate(
+    (
+        bytes(range(65, 91)) + bytes(range(97, 123)),
+        b"0123456789",
+        b" \t",
+        b"\r\n",
+        bytes(c for c in range(33, 127) if not chr(c).isalnum()),
+    ),
+    start=1,
+):
+    for _byte in _members:
+        _CLASS_TABLE[_byte] = _code
+_CLASS_TABLE = bytes(_CLASS_TABLE)
+_CLASS_MARKERS = tuple(bytes([code]) for code in range(1, 6))
+
+
+@dataclass(slots=True, frozen=True)
+class TokenEstimate:
+    """Liczba tokenów z przedziałem błędu; `exact` gdy pochodzi z tiktoken."""
+
+    tokens: int
+    low: int
+    high: int
+    exact: bool = False
+
+    @classmethod
+    def from_exact(cls, tokens: int) -> TokenEstimate:
+        return cls(tokens=tokens, low=tokens, high=tokens, exact=True)
+
+    @classmethod
+    def from_estimate(cls, tokens: int) -> TokenEstimate:
+        margin = int(tokens * ESTIMATE_RELATIVE_ERROR) + ESTIMATE_ABSOLUTE_ERROR
+        return cls(tokens=tokens, low=max(0, tokens - margin), high=tokens + margin, exact=False)
+
+    def __add__(self, other: TokenEstimate) -> TokenEstimate:
+        return TokenEstimate(
+            tokens=self.tokens + other.tokens,
+            low=self.low + other.low,
+            high=self.high + other.high,
+            exact=self.exact and other.exact,
+        )
+
+
+@dataclass(slots=True)
+class SessionTokenEstimate:
+    """Estymata tokenów sesji oraz wpisy czekające na dokładne liczenie."""
+
+    prompt: TokenEstimate
+    attachments: TokenEstimate
+    pending_entries: list[Entry] = field(default_factory=list)
+    prompt_pending: bool = False
+
+    @property
+    def total(self) -> TokenEstimate:
+        return self.prompt + self.attachments
+
+    @property
+    def exact(self) -> bool:
+        return not self.pending_entries and not self.prompt_pending
+
+
+_WEIGHTS = (
+    LETTER_WEIGHT,
+    DIGIT_WEIGHT,
+    SPACE_WEIGHT,
+    NEWLINE_WEIGHT,
+    PUNCT_WEIGHT,
+    NON_ASCII_WEIGHT,
+    INDENT_WEIGHT,
+)
+
+
+def byte_class_features(data: bytes) -> tuple[int, ...]:
+    """Zwraca liczniki klas w kolejności wag: litery, cyfry, spacje, nowe linie, interpunkcja, non-ASCII, wcięcia."""
+    classes = data.translate(_CLASS_TABLE)
+    letters, digits, spaces, newlines, punct = (classes.count(marker) for marker in _CLASS_MARKERS)
+    non_ascii = len(data) - letters - digits - spaces - newlines - punct
+    return letters, digits, spaces, newlines, punct, non_ascii, data.count(b"    ")
+
+
+def _estimate_bytes(data: bytes) -> float:
+    return sum(count * weight for count, weight in zip(byte_class_features(data), _WEIGHTS))
+
+
+def estimate_tokens(text: str) -> int:
+    """Zwraca estymowaną liczbę tokenów *text* (cl100k_base)."""
+    if not text:
+        return 0
+    if len(text) <= SAMPLE_THRESHOLD:
+        return max(1, round(_estimate_bytes(text.encode("utf-8", "replace"))))
+
+    step = len(text) // SAMPLE_COUNT
+    sampled = 0
+    estimate = 0.0
+    for index in range(SAMPLE_COUNT):
+        chunk = text[index * step : index * step + SAMPLE_LENGTH]
+        sampled += len(chunk)
+        estimate += _estimate_bytes(chunk.encode("utf-8", "replace"))
+    return max(1, round(estimate * len(text) / sampled))
+
+
+def estimate_tokens_from_size(size_bytes: int) -> int:
+    """Zwraca zgrubną liczbę tokenów dla znanego wyłącznie rozmiaru w bajtach."""
+    return round(size_bytes / BYTES_PER_TOKEN)
+
+
+def estimate_entry_tokens(entry: Entry) -> TokenEstimate:
+    """Zwraca dokładną liczbę z cache albo (zapamiętaną) estymatę wpisu."""
+    if entry.token_count_cache is not None:
+        return TokenEstimate.from_exact(entry.token_count_cache)
+    if entry.token_estimate_cache is None:
+        entry.token_estimate_cache = estimate_tokens(entry.content)
+    return TokenEstimate.from_estimate(entry.token_estimate_cache)
+
+
+def estimate_session_tokens(session: Session) -> SessionTokenEstimate:
+    """Szacuje tokeny sesji bez blokowania na tiktoken; dokładne wartości z cache mają pierwszeństwo."""
+    prompt_exact = cached_prompt_tokens(session.prompt_text)
+    if prompt_exact is not None:
+        prompt = TokenEstimate.from_exact(prompt_exact)
+    else:
+        prompt = TokenEstimate.from_estimate(estimate_tokens(session.prompt_text))
+
+    store = session_store(session)
+    store.sync(session.entries)
+    pending: list[Entry] = []
+    for row in store.pending_rows():
+        entry = store.entry_at(row)
+        if store.tokens[row] == UNKNOWN_TOKENS:
+            if entry.token_estimate_cache is None:
+                entry.token_estimate_cache = estimate_tokens(entry.content)
+            store.set_tokens(row, entry.token_estimate_cache, exact=False)
+        pending.append(entry)
+    exact_tokens, estimated_tokens = store.active_tokens()
+
+    attachments = TokenEstimate.from_exact(exact_tokens)
+    if pending:
+        # Przedział liczony od sumy estymat: błędy poszczególnych plików są ograniczone tym samym p90.
+        attachments = attachments + TokenEstimate.from_estimate(estimated_tokens)
+
+    return SessionTokenEstimate(
+        prompt=prompt,
+        attachments=attachments,
+        pending_entries=pending,
+        prompt_pending=prompt_exact is None,
+    )
@@ -0,0 +1,200 @@
+"""Przyrostowe agregaty tokenów wg dołączonego katalogu, podkatalogu i rozszerzenia."""
+from __future__ import annotations
+
+import heapq
+import os
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Iterable
+
+from .models import Entry, EntrySourceType, Session
+from .token_estimator import TokenEstimate, estimate_entry_tokens
+
+SINGLE_FILES_ROOT = "(pliki)"
+TREE_EXTENSION = "(drzewo)"
+NO_EXTENSION = "(brak)"
+
+
+class RollupKind(StrEnum):
+    """Wymiar agregacji tokenów."""
+
+    ROOT = "root"
+    DIRECTORY = "directory"
+    EXTENSION = "extension"
+
+
+@dataclass(slots=True)
+class RollupRow:
+    """Suma tokenów aktywnych wpisów jednej grupy; `pending` to wpisy jeszcze estymowane."""
+
+    kind: RollupKind
+    key: str
+    tokens: int
+    files: int
+    pending: int
+
+    @property
+    def exact(self) -> bool:
+        return self.pending == 0
+
+
+@dataclass(slots=True)
+class _Contribution:
+    entry: Entry
+    keys: tuple[tuple[RollupKind, str], ...]
+    tokens: int
+    files: int
+    pending: int
+
+
+def _group_keys(entry: Entry) -> tuple[tuple[RollupKind, str], ...]:
+    root = entry.root or SINGLE_FILES_ROOT
+    keys: list[tuple[RollupKind, str]] = [(RollupKind.ROOT, root)]
+    if entry.source_type == EntrySourceType.DIRECTORY_TREE:
+        keys.append((RollupKind.EXTENSION, TREE_EXTENSION))
+        return tuple(keys)
+    if entry.source_type == EntrySourceType.DIRECTORY_FILE:
+        parts = entry.path.split("/")[:-1]
+        for depth in range(1, len(parts) + 1):
+            keys.append((RollupKind.DIRECTORY, f"{root}/{'/'.join(parts[:depth])}"))
+    extension = os.path.splitext(entry.path.rsplit("/", 1)[-1])[1].lower()
+    keys.append((RollupKind.EXTENSION, extension or NO_EXTENSION))
+    return tuple(keys)
+
+
+class TokenRollup:
+    """Sumy tokenów grup aktualizowane przyrostowo przez powiadomienia sesji.
+
+    Każdy wpis pamięta swój ostatni wkład, więc dodanie, usunięcie, przełączenie
+    lub dopisanie dokładnej liczby tokenów kosztuje O(głębokość ścieżki),
+    niezależnie od liczby wpisów w sesji.
+    """
+
+    def __init__(self) -> None:
+        self._contributions: dict[str, _Contribution] = {}
+        # (rodzaj, klucz) -> [tokeny, pliki, oczekujące]
+        self._groups: dict[tuple[RollupKind, str], list[int]] = {}
+
+    @classmethod
+    def for_session(cls, session: Session) -> TokenRollup:
+        """Tworzy agregat z bieżących wpisów i rejestruje go jako obserwatora sesji."""
+        rollup = cls()
+        for entry in session.entries:
+            rollup.entry_added(entry)
+        session.observers.append(rollup)
+        return rollup
+
+    # ------------------------------------------------------------- observer
+    def entry_added(self, entry: Entry) -> None:
+        self._withdraw(entry.entry_id)
+        if not entry.include_in_output or entry.read_error is not None:
+            self._contributions[entry.entry_id] = _Contribution(entry, (), 0, 0, 0)
+            return
+        estimate = estimate_entry_tokens(entry)
+        contribution = _Contribution(
+            entry=entry,
+            keys=_group_keys(entry),
+            tokens=estimate.tokens,
+            files=0 if entry.source_type == EntrySourceType.DIRECTORY_TREE else 1,
+            pending=0 if estimate.exact else 1,
+        )
+        self._contributions[entry.entry_id] = contribution
+        for key in contribution.keys:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = [0, 0, 0]
+            group[0] += contribution.tokens
+            group[1] += contribution.files
+            group[2] += contribution.pending
+
+    def entry_removed(self, entry: Entry) -> None:
+        self._withdraw(entry.entry_id)
+
+    def entry_changed(self, entry: Entry) -> None:
+        self.entry_added(entry)
+
+    def session_cleared(self) -> None:
+        self._contributions.clear()
+        self._groups.clear()
+
+    def refresh(self, entry_ids: Iterable[str]) -> int:
+        """Przelicza wkład wpisów o podanych ID (np. po dokładnym policzeniu w tle); zwraca liczbę zmian."""
+        refreshed = 0
+        for entry_id in entry_ids:
+            contribution = self._contributions.get(entry_id)
+            if contribution is not None:
+                self.entry_added(contribution.entry)
+                refreshed += 1
+        return refreshed
+
+    # ---------------------------------------------------------------- query
+    def rows(self, kind: RollupKind) -> list[RollupRow]:
+        """Zwraca grupy danego wymiaru posortowane malejąco po tokenach."""
+        rows = [
+            RollupRow(kind=group_kind, key=key, tokens=values[0], files=values[1], pending=values[2])
+            for (group_kind, key), values in self._groups.items()
+            if group_kind == kind
+        ]
+        rows.sort(key=lambda row: (-row.tokens, row.key))
+        return rows
+
+    def top_entries(self, limit: int) -> list[tuple[Entry, TokenEstimate]]:
+        """Zwraca *limit* aktywnych wpisów (bez drzew katalogów) o największej liczbie tokenów."""
+        top = heapq.nlargest(
+            limit,
+            (c for c in self._contributions.values() if c.files),
+            key=lambda contribution: contribution.tokens,
+        )
+        return [(c.entry, estimate_entry_tokens(c.entry)) for c in top]
+
+    def total(self) -> TokenEstimate:
+        """Suma tokenów aktywnych wpisów (bez promptu)."""
+        exact = 0
+        estimated = 0
+        for contribution in self._contributions.values():
+            if contribution.pending:
+                estimated += contribution.tokens
+            else:
+                exact += contribution.tokens
+        total = TokenEstimate.from_exact(exact)
+        if estimated:
+            total = total + TokenEstimate.from_estimate(estimated)
+        return total
+
+    def to_json(self, top_limit: int = 20) -> dict:
+        """Zwraca agregaty jako słownik gotowy do `json.dumps`."""
+        total = self.total()
+
+        def _rows(kind: RollupKind) -> list[dict]:
+            return [
+                {"key": row.key, "tokens": row.tokens, "files": row.files, "exact": row.exact}
+                for row in self.rows(kind)
+            ]
+
+        return {
+            "total": {"tokens": total.tokens, "exact": total.exact},
+            "roots": _rows(RollupKind.ROOT),
+            "directories": _rows(RollupKind.DIRECTORY),
+            "extensions": _rows(RollupKind.EXTENSION),
+            "top_files": [
+                {
+                    "path": f"{entry.root}/{entry.path}" if entry.root else entry.path,
+                    "tokens": estimate.tokens,
+                    "exact": estimate.exact,
+                }
+                for entry, estimate in self.top_entries(top_limit)
+            ],
+        }
+
+    # -------------------------------------------------------------- internal
+    def _withdraw(self, entry_id: str) -> None:
+        contribution = self._contributions.pop(entry_id, None)
+        if contribution is None:
+            return
+        for key in contribution.keys:
+            group = self._groups[key]
+            group[0] -= contribution.tokens
+            group[1] -= contribution.files
+            group[2] -= contribution.pending
+            if not group[0] and not group[1] and not group[2]:
+                del self._groups[key]
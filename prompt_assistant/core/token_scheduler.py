@@ -0,0 +1,181 @@
+"""Liczenie tokenów w tle z priorytetami (widoczne > włączone > wykluczone)."""
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Iterable
+
+from .models import Entry, Session
+from .token_service import cached_prompt_tokens, count_prompt_tokens, refresh_entry_token_cache
+
+PROMPT_JOB_KEY = "prompt"
+
+
+class TokenPriority(IntEnum):
+    """Priorytet zadania; mniejsza wartość jest obsługiwana wcześniej."""
+
+    PROMPT = 0
+    VISIBLE = 1
+    INCLUDED = 2
+    EXCLUDED = 3
+
+
+@dataclass(slots=True)
+class _Job:
+    key: str
+    priority: int
+    seq: int
+    func: Callable[..., object]
+    args: tuple
+
+
+class TokenCountScheduler:
+    """Pula wątków liczących tokeny wpisów i promptu w kolejności priorytetów.
+
+    Wyniki trafiają bezpośrednio do `Entry.token_count_cache` (oraz cache promptu),
+    więc konsumenci czytają częściowo uzupełnione sumy bez blokowania.
+    Ponowne zgłoszenie wpisu z wyższym priorytetem przesuwa go w kolejce.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self._max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._condition = threading.Condition()
+        self._heap: list[tuple[int, int, str]] = []
+        self._queued: dict[str, _Job] = {}
+        self._running: set[str] = set()
+        self._workers: list[threading.Thread] = []
+        self._seq = 0
+        self._completed: list[str] = []
+        self._stopped = False
+        self.failed = 0
+
+    # ---------------------------------------------------------------- submit
+    def schedule_entry(self, entry: Entry, priority: TokenPriority) -> bool:
+        """Zleca policzenie wpisu; zwraca False gdy cache jest już wypełniony lub wpis czeka z wyższym priorytetem."""
+        if entry.token_count_cache is not None:
+            return False
+        with self._condition:
+            if entry.entry_id in self._running:
+                return False
+            queued = self._queued.get(entry.entry_id)
+            if queued is not None and queued.priority <= priority:
+                return False
+            self._push(_Job(entry.entry_id, int(priority), 0, refresh_entry_token_cache, (entry,)))
+        return True
+
+    def schedule_prompt(self, text: str) -> None:
+        """Zleca policzenie promptu; nowszy tekst zastępuje oczekującą wersję."""
+        with self._condition:
+            self._push(_Job(PROMPT_JOB_KEY, int(TokenPriority.PROMPT), 0, count_prompt_tokens, (text,)))
+
+    def cancel(self, keys: Iterable[str]) -> None:
+        """Usuwa z kolejki zadania o podanych kluczach (ID wpisów)."""
+        with self._condition:
+            for key in keys:
+                self._queued.pop(key, None)
+
+    def cancel_all(self) -> None:
+        with self._condition:
+            self._queued.clear()
+            self._heap.clear()
+
+    # ----------------------------------------------------------------- state
+    def pending_count(self) -> int:
+        """Zwraca liczbę zadań oczekujących i wykonywanych."""
+        with self._condition:
+            return len(self._queued) + len(self._running)
+
+    def take_completed(self) -> list[str]:
+        """Zwraca klucze (ID wpisów lub `PROMPT_JOB_KEY`) zadań zakończonych od poprzedniego wywołania."""
+        with self._condition:
+            completed, self._completed = self._completed, []
+            return completed
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """Zatrzymuje wątki i czeka na dokończenie bieżących zadań; kolejka jest porzucana."""
+        with self._condition:
+            self._stopped = True
+            self._queued.clear()
+            self._heap.clear()
+            self._condition.notify_all()
+            workers = list(self._workers)
+        # Wątek przerwany w trakcie tokenizacji przy wyjściu interpretera kończy proces błędem.
+        for worker in workers:
+            worker.join(timeout)
+
+    # -------------------------------------------------------------- internal
+    def _push(self, job: _Job) -> None:
+        if self._stopped:
+            return
+        self._seq += 1
+        job.seq = self._seq
+        self._queued[job.key] = job
+        heapq.heappush(self._heap, (job.priority, job.seq, job.key))
+        if len(self._workers) < self._max_workers and len(self._workers) < len(self._queued) + len(self._running):
+            worker = threading.Thread(target=self._work, name=f"promptglue-tokens-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+        self._condition.notify()
+
+    def _next_job(self) -> _Job | None:
+        with self._condition:
+            while True:
+                while not self._heap and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return None
+                _priority, seq, key = heapq.heappop(self._heap)
+                job = self._queued.get(key)
+                if job is None or job.seq != seq:
+                    continue  # zadanie anulowane albo przesunięte na wyższy priorytet
+                del self._queued[key]
+                self._running.add(key)
+                return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            failed = False
+            try:
+                job.func(*job.args)
+            except Exception:
+                failed = True
+            with self._condition:
+                self._running.discard(job.key)
+                self._completed.append(job.key)
+                self.failed += int(failed)
+
+
+def schedule_session_tokens(
+    scheduler: TokenCountScheduler,
+    session: Session,
+    *,
+    visible_ids: Iterable[str] = (),
+    include_excluded: bool = True,
+) -> int:
+    """Zleca liczenie promptu i wszystkich wpisów bez cache; zwraca liczbę nowych zadań."""
+    scheduled = 0
+    if cached_prompt_tokens(session.prompt_text) is None:
+        scheduler.schedule_prompt(session.prompt_text)
+        scheduled += 1
+
+    visible = set(visible_ids)
+    for entry in session.entries:
+        if entry.token_count_cache is not None or entry.read_error is not None:
+            continue
+        if entry.entry_id in visible:
+            priority = TokenPriority.VISIBLE
+        elif entry.include_in_output:
+            priority = TokenPriority.INCLUDED
+        elif include_excluded:
+            priority = TokenPriority.EXCLUDED
+        else:
+            continue
+        if scheduler.schedule_entry(entry, priority):
+            scheduled += 1
+    return scheduled
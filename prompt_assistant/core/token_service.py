@@ -1,10 +1,96 @@
 """Liczenie tokenów dla sesji i wpisów."""
 from __future__ import annotations
 
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterator
+
 from prompt_assistant.utils import count_tokens
 
+from .entry_store import session_store
 from .models import Entry, Session
 
+# Akapity dłuższe niż tyle znaków są dzielone na linie, żeby edycja nie tokenizowała całego akapitu.
+PROMPT_BLOCK_MAX_CHARS = 4096
+# Liczba zapamiętanych bloków; musi przekraczać liczbę bloków długiego promptu, inaczej LRU nie trafia.
+PROMPT_BLOCK_CACHE_SIZE = 65536
+
+# Cięcia tylko za "\n", po którym stoi znak niebiały: pretokenizacja cl100k nigdy nie łączy
+# tekstu przez taką granicę, więc suma tokenów bloków jest równa tokenom całości (`render_tokens`).
+_PARAGRAPH_END = re.compile(r"\n\s*\n(?=\S)")
+_LINE_END = re.compile(r"\n(?=\S)")
+
+# Ostatnio policzony prompt: (tekst, liczba tokenów); nadpisywany przy każdej zmianie promptu.
+_prompt_cache: tuple[str, int] = ("", 0)
+# Tokeny bloków promptu (klucz: tekst bloku); prompt jest liczony także w wątkach `TokenCountScheduler`.
+_block_cache: OrderedDict[str, int] = OrderedDict()
+_block_lock = threading.Lock()
+
+
+def cached_prompt_tokens(text: str) -> int | None:
+    """Zwraca dokładną liczbę tokenów promptu, jeśli jest już policzona."""
+    if not text:
+        return 0
+    cached_text, cached_tokens = _prompt_cache
+    if text == cached_text:
+        return cached_tokens
+    return None
+
+
+def count_prompt_tokens(text: str) -> int:
+    """Liczy tokeny promptu i zapamiętuje wynik dla `cached_prompt_tokens`.
+
+    Prompt jest dzielony na akapity (długie na linie) na granicach, przez które
+    tokenizacja nie przechodzi, a tokeny bloków są brane z cache; po edycji
+    tokenizowane są tylko zmienione bloki, a wynik jest równy `count_tokens(text)`.
+    """
+    global _prompt_cache
+    cached = cached_prompt_tokens(text)
+    if cached is not None:
+        return cached
+    tokens = _count_prompt_blocks(text) if text else 0
+    _prompt_cache = (text, tokens)
+    return tokens
+
+
+def _prompt_blocks(text: str) -> Iterator[str]:
+    start = 0
+    for match in _PARAGRAPH_END.finditer(text):
+        yield from _paragraph_blocks(text[start : match.end()])
+        start = match.end()
+    yield from _paragraph_blocks(text[start:])
+
+
+def _paragraph_blocks(paragraph: str) -> Iterator[str]:
+    if len(paragraph) <= PROMPT_BLOCK_MAX_CHARS:
+        if paragraph:
+            yield paragraph
+        return
+    start = 0
+    for match in _LINE_END.finditer(paragraph):
+        yield paragraph[start : match.end()]
+        start = match.end()
+    yield paragraph[start:]
+
+
+def _count_prompt_blocks(text: str) -> int:
+    blocks = list(_prompt_blocks(text))
+    counts: list[int | None] = []
+    with _block_lock:
+        for block in blocks:
+            tokens = _block_cache.get(block)
+            if tokens is not None:
+                _block_cache.move_to_end(block)
+            counts.append(tokens)
+    missing = {block: count_tokens(block) for block, tokens in zip(blocks, counts) if tokens is None}
+    if missing:
+        with _block_lock:
+            _block_cache.update(missing)
+            while len(_block_cache) > PROMPT_BLOCK_CACHE_SIZE:
+                _block_cache.popitem(last=False)
+    return sum(missing[block] if tokens is None else tokens for block, tokens in zip(blocks, counts))
+
 
 def count_entry_tokens(entry: Entry) -> int:
     """Zwraca liczbę tokenów wpisu z prostym cache."""
@@ -13,13 +99,27 @@ def count_entry_tokens(entry: Entry) -> int:
     return entry.token_count_cache
 
 
+def refresh_entry_token_cache(entry: Entry) -> int:
+    """Liczy tokeny wpisu (także poza wątkiem GUI); nie nadpisuje cache, jeśli treść zmieniła się w trakcie."""
+    content = entry.content
+    tokens = count_tokens(content)
+    if entry.content is content:
+        entry.token_count_cache = tokens
+    return tokens
+
+
 def count_session_tokens(session: Session) -> tuple[int, int, int]:
-    """Zwraca tokeny: (prompt, attachments, suma)."""
-    prompt_tokens = count_tokens(session.prompt_text) if session.prompt_text else 0
+    """Zwraca tokeny: (prompt, attachments, suma) bez opakowań formatu (pełny output: `count_rendered_tokens`).
+
+    Wpisy podmienione lub zmienione bezpośrednio (bez `notify_entry_changed`)
+    są uwzględniane: kolumny sesji są przed sumowaniem uzgadniane z listą wpisów.
+    """
+    prompt_tokens = count_prompt_tokens(session.prompt_text)
 
-    attachment_tokens = 0
-    for entry in session.entries:
-        if entry.include_in_output and entry.read_error is None:
-            attachment_tokens += count_entry_tokens(entry)
+    store = session_store(session)
+    store.sync(session.entries)
+    for row in store.pending_rows():
+        store.set_tokens(row, count_entry_tokens(store.entry_at(row)), exact=True)
+    attachment_tokens, _estimated = store.active_tokens()
 
     return prompt_tokens, attachment_tokens, prompt_tokens + attachment_tokens
@@ -0,0 +1,200 @@
+"""Lokalny daemon renderowania na gnieździe Unix i cienki klient dla CLI.
+
+Daemon trzyma w pamięci encoder tiktoken, skompilowane wzorce `.gitignore`
+oraz treść i liczby tokenów plików (unieważniane po mtime i rozmiarze) i blobów
+z `--revision` (po SHA), więc kolejne wywołania CLI nie płacą kosztu zimnego startu.
+
+Protokół: klient wysyła jedną linię JSON `{"argv": [...], "cwd": "..."}` i
+zamyka zapis; daemon odpowiada jedną linią JSON
+`{"exit_code": int, "stdout": str, "stderr": str}`.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import asdict, dataclass
+
+from prompt_assistant.cli import build_parser, run
+from prompt_assistant.config import DAEMON_CONNECT_TIMEOUT, DAEMON_RESPONSE_TIMEOUT
+from prompt_assistant.core import BlobCache, FileContentCache
+from prompt_assistant.utils import get_encoder
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+class DaemonUnavailable(RuntimeError):
+    """Brak działającego daemona pod wskazanym gniazdem."""
+
+
+@dataclass(slots=True)
+class DaemonResponse:
+    """Wynik renderowania zwrócony klientowi."""
+
+    exit_code: int
+    stdout: str
+    stderr: str
+
+
+class RenderDaemon:
+    """Obsługuje żądania renderowania na współdzielonych, ciepłych cache.
+
+    Żądania są wykonywane po kolei (blokada), więc cache nie wymagają
+    synchronizacji na poziomie pojedynczych wpisów, a stdout/stderr parsera
+    argumentów można bezpiecznie przechwycić.
+    """
+
+    def __init__(self, content_cache: FileContentCache | None = None, blob_cache: BlobCache | None = None) -> None:
+        self.content_cache = content_cache or FileContentCache()
+        self.blob_cache = blob_cache or BlobCache()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def handle(self, request: dict) -> DaemonResponse:
+        argv = request.get("argv")
+        cwd = request.get("cwd")
+        if not isinstance(argv, list) or not isinstance(cwd, str) or not os.path.isabs(cwd):
+            return DaemonResponse(2, "", "Nieprawidłowe żądanie: wymagane 'argv' (lista) i bezwzględne 'cwd'\n")
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with self._lock:
+            self.requests += 1
+            try:
+                # argparse wypisuje pomoc i błędy składni bezpośrednio na sys.stdout/sys.stderr.
+                with redirect_stdout(stdout), redirect_stderr(stderr):
+                    args = build_parser().parse_args([str(arg) for arg in argv])
+                exit_code = run(
+                    args,
+                    stdout=stdout,
+                    stderr=stderr,
+                    cwd=cwd,
+                    content_cache=self.content_cache,
+                    blob_cache=self.blob_cache,
+                    # stdin klienta nie jest przesyłany: `--files-from -` daje tu pustą listę.
+                    stdin=io.BytesIO(),
+                )
+            except SystemExit as exc:
+                exit_code = _exit_code(exc, stderr)
+            except Exception as exc:
+                stderr.write(f"Błąd daemona: {exc}\n")
+                exit_code = 1
+        return DaemonResponse(exit_code, stdout.getvalue(), stderr.getvalue())
+
+
+def _exit_code(exc: SystemExit, stderr: io.StringIO) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    stderr.write(f"{exc.code}\n")
+    return 1
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = DaemonResponse(2, "", "Nieprawidłowe żądanie: oczekiwano JSON\n")
+        else:
+            response = self.server.render_daemon.handle(request if isinstance(request, dict) else {})
+        self.wfile.write(json.dumps(asdict(response), ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, render_daemon: RenderDaemon) -> None:
+        self.render_daemon = render_daemon
+        # Gniazdo tylko dla właściciela: daemon czyta pliki z uprawnieniami użytkownika.
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+
+
+def _require_unix_sockets() -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonUnavailable("gniazda Unix nie są dostępne na tej platformie")
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise SystemExit(f"{socket_path} istnieje i nie jest gniazdem")
+    try:
+        request_render(socket_path, ["--help"], "/", timeout=1.0)
+    except DaemonUnavailable:
+        os.unlink(socket_path)
+        return
+    raise SystemExit(f"Daemon już działa na {socket_path}")
+
+
+def create_server(socket_path: str, render_daemon: RenderDaemon | None = None) -> socketserver.BaseServer:
+    """Tworzy serwer daemona na *socket_path* (usuwa osierocone gniazdo po poprzednim procesie)."""
+    _require_unix_sockets()
+    _remove_stale_socket(socket_path)
+    return _UnixServer(socket_path, render_daemon or RenderDaemon())
+
+
+def serve(socket_path: str) -> None:
+    """Uruchamia daemon na pierwszym planie do SIGINT/SIGTERM; po zakończeniu usuwa gniazdo."""
+    get_encoder()
+    try:
+        server = create_server(socket_path)
+    except DaemonUnavailable as exc:
+        raise SystemExit(str(exc)) from exc
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def request_render(socket_path: str, argv: list[str], cwd: str, *, timeout: float | None = None) -> DaemonResponse:
+    """Wysyła żądanie renderowania do daemona.
+
+    `DaemonUnavailable`, gdy nikt nie nasłuchuje albo daemon nie odpowie w
+    *timeout* sekund (domyślnie `DAEMON_RESPONSE_TIMEOUT`; zawieszony proces
+    lub osierocone gniazdo).
+    """
+    _require_unix_sockets()
+    timeout = DAEMON_RESPONSE_TIMEOUT if timeout is None else timeout
+    payload = json.dumps({"argv": argv, "cwd": cwd}, ensure_ascii=False).encode("utf-8") + b"\n"
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(min(timeout, DAEMON_CONNECT_TIMEOUT))
+            client.connect(socket_path)
+            client.settimeout(timeout)
+            client.sendall(payload)
+            client.shutdown(socket.SHUT_WR)
+            chunks: list[bytes] = []
+            while chunk := client.recv(1 << 16):
+                chunks.append(chunk)
+    except TimeoutError as exc:
+        raise DaemonUnavailable(f"{socket_path}: brak odpowiedzi w {timeout:g} s") from exc
+    except OSError as exc:
+        raise DaemonUnavailable(f"{socket_path}: {exc.strerror or exc}") from exc
+    try:
+        response = json.loads(b"".join(chunks))
+    except ValueError as exc:
+        raise DaemonUnavailable(f"{socket_path}: nieprawidłowa odpowiedź daemona") from exc
+    return DaemonResponse(response["exit_code"], response["stdout"], response["stderr"])
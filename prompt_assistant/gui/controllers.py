@@ -2,10 +2,11 @@
 from __future__ import annotations
 
 import os
+import re
+from itertools import chain
 from typing import Dict, List
 
-import pathspec
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QItemSelection, QItemSelectionModel, Qt, QTimer
 from PyQt5.QtGui import QFont, QGuiApplication
 from PyQt5.QtWidgets import (
     QFileDialog,
@@ -17,32 +18,85 @@ from PyQt5.QtWidgets import (
     QLabel,
     QPushButton,
     QHBoxLayout,
+    QComboBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QInputDialog,
 )
 
-from prompt_assistant.config import MAX_DIR_SIZE, WARNING_TOKEN_LIMIT, CRITICAL_TOKEN_LIMIT
+from prompt_assistant.config import (
+    CRITICAL_TOKEN_LIMIT,
+    MAX_DIR_SIZE,
+    MAX_FILE_SIZE,
+    MAX_IMPORT_TOKENS,
+    PROFILE_IMPORTS,
+    TRACE_IMPORT_ALLOCATIONS,
+    TREE_COLLAPSE_FILES,
+    TREE_MAX_DEPTH,
+    TREE_MAX_TOKENS,
+    WARNING_TOKEN_LIMIT,
+)
 from prompt_assistant.core import (
+    ArchiveError,
+    CompactionLanguage,
+    DirectoryImport,
     EntrySourceType,
+    FileEnumeration,
     FileListRecord,
+    GitRevisionError,
+    ImportBudget,
+    JournalAction,
+    JournalRecord,
+    MemoryReport,
     OutputFormat,
+    Profiler,
+    RollupKind,
+    SessionTokenEstimate,
+    TokenCountScheduler,
+    TokenEstimate,
+    TokenPriority,
+    TreeBudget,
+    add_directory_import,
     add_entry,
     build_import_report,
+    build_memory_report,
     build_output,
     clear_session,
-    count_entry_tokens,
-    count_session_tokens,
+    compact_session,
     create_entry,
-    exclude_entries,
+    describe_enumeration,
+    detect_language,
+    estimate_tokens_from_size,
+    estimate_session_tokens,
+    format_bytes,
+    format_compaction_report,
     get_entry,
-    include_entries,
+    outline_session,
     matches_filters,
+    parse_exclude_patterns,
     remove_entry,
+    render_directory_tree,
+    scan_archive,
+    scan_directory,
+    scan_git_revision,
+    schedule_session_tokens,
     set_entry_inclusion,
+    update_entry_content,
 )
 from prompt_assistant.exporter import export_text_to_file
-from prompt_assistant.utils import render_tree_structure, is_binary, build_gitignore_spec
 from .ui import PromptAssistantWindow
 from .preview_dialog import FilePreviewDialog
 
+TOKEN_POLL_INTERVAL_MS = 100
+TREE_BUDGET = TreeBudget(max_depth=TREE_MAX_DEPTH, collapse_over=TREE_COLLAPSE_FILES, max_tokens=TREE_MAX_TOKENS)
+ARCHIVE_FILTER = "Archiwa (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tbz2 *.tar.xz *.txz);;Wszystkie pliki (*)"
+_JOURNAL_ACTION_LABELS = {
+    JournalAction.INCLUDE: "włączenie",
+    JournalAction.EXCLUDE: "wyłączenie",
+    JournalAction.REMOVE: "usunięcie",
+}
+
 
 def _sync_prompt_text(window: PromptAssistantWindow) -> None:
     window.session.prompt_text = window.text_edit.toPlainText()
@@ -65,6 +119,8 @@ def _refresh_item_visual(item: QListWidgetItem, file_obj: dict) -> None:
         item.setText(f"{display_name} [error: {error_text}]")
     elif status == "excluded":
         item.setText(f"{display_name} [excluded]")
+    elif file_obj.get("outline"):
+        item.setText(f"{display_name} [outline]")
     else:
         item.setText(display_name)
 
@@ -73,23 +129,47 @@ def _refresh_item_visual(item: QListWidgetItem, file_obj: dict) -> None:
     item.setFont(font)
 
 
+def _mark_trees_dirty(window: PromptAssistantWindow, file_objs: list[dict]) -> None:
+    """Oznacza drzewa katalogów, z których pochodzą *file_objs*, do ponownej synchronizacji."""
+    roots = {file_obj["root"] for file_obj in file_objs if file_obj.get("root")}
+    for directory in window.attached_dirs:
+        if directory["name"] in roots:
+            directory["tree_dirty"] = True
+
+
+def _file_tokens(window: PromptAssistantWindow, file_obj: dict) -> int:
+    # Estymata z rozmiaru, nie z cache tokenów: `<directories>` nie może zależeć od postępu liczenia w tle.
+    entry = get_entry(window.session, file_obj.get("entry_id", ""))
+    return estimate_tokens_from_size(entry.size) if entry is not None else 0
+
+
 def _sync_directory_tree_entries(window: PromptAssistantWindow) -> None:
-    """Synchronizuje include tree-entry katalogu na podstawie stanu jego plików."""
+    """Synchronizuje include tree-entry katalogu na podstawie stanu jego plików.
+
+    Przetwarzane są tylko katalogi oznaczone przez `_mark_trees_dirty` (zmiana statusu lub usunięcie pliku),
+    więc np. pisanie promptu nie renderuje drzew od nowa.
+    """
     dirs_to_remove: List[dict] = []
     for directory in window.attached_dirs:
+        if not directory.get("tree_dirty", True):
+            continue
+        directory["tree_dirty"] = False
         if not directory["files"]:
             remove_entry(window.session, directory["tree_entry_id"])
             dirs_to_remove.append(directory)
             continue
 
-        active_files_rel = [f["rel"] for f in directory["files"] if _get_file_status(f) == "active"]
-        has_active_files = bool(active_files_rel)
+        active_files = [f for f in directory["files"] if _get_file_status(f) == "active"]
+        has_active_files = bool(active_files)
 
         tree_entry = get_entry(window.session, directory["tree_entry_id"])
         if tree_entry is not None:
             # `<directories>` ma odzwierciedlać wyłącznie aktywne pliki.
-            tree_entry.content = render_tree_structure(active_files_rel) if active_files_rel else "."
-            tree_entry.token_count_cache = None
+            tree = render_directory_tree(
+                ((f["rel"], _file_tokens(window, f)) for f in active_files),
+                TREE_BUDGET,
+            ) if active_files else "."
+            update_entry_content(window.session, tree_entry, tree)
 
         set_entry_inclusion(window.session, directory["tree_entry_id"], has_active_files)
 
@@ -100,30 +180,176 @@ def _sync_directory_tree_entries(window: PromptAssistantWindow) -> None:
 def _build_current_output(window: PromptAssistantWindow):
     _sync_prompt_text(window)
     _sync_directory_tree_entries(window)
-    return build_output(window.session)
+    session = window.session
+    messages: list[str] = []
+    # Zarys to przekształcenie sesji przed renderem (przed kompaktowaniem, które usuwa docstringi):
+    # globalnie z checkboxa albo tylko dla plików oznaczonych „Outline selected”.
+    outline_ids = None if window.outline_checkbox.isChecked() else _outline_entry_ids(window)
+    if outline_ids is None or outline_ids:
+        session, report = outline_session(session, entry_ids=outline_ids)
+        messages.append(format_compaction_report(report, title="Zarys")[0])
+    if window.compact_checkbox.isChecked():
+        session, report = compact_session(session)
+        messages.append(format_compaction_report(report)[0])
+    if messages:
+        window.statusBar().showMessage(" | ".join(messages), 8000)
+    return build_output(session)
+
+
+def _outline_entry_ids(window: PromptAssistantWindow) -> set[str]:
+    """ID wpisów oznaczonych do zarysu akcją „Outline selected”."""
+    file_objs = chain(window.attached_files, *(directory["files"] for directory in window.attached_dirs))
+    return {file_obj["entry_id"] for file_obj in file_objs if file_obj.get("outline")}
 
 
 # --------------------------------------------------------------------------- UI
 
-def _update_token_label(window: PromptAssistantWindow) -> None:
-    """Przelicza tokeny promptu i załączników z pominięciem wykluczonych plików."""
-    _sync_prompt_text(window)
-    _sync_directory_tree_entries(window)
+def _format_token_estimate(estimate: TokenEstimate) -> str:
+    return str(estimate.tokens) if estimate.exact else f"~{estimate.tokens}"
+
 
-    prompt_tokens, attach_tokens, total = count_session_tokens(window.session)
-    window.prompt_tokens = prompt_tokens
-    window.attachments_tokens = attach_tokens
-    window.total_tokens = total
+def _render_token_label(window: PromptAssistantWindow) -> SessionTokenEstimate:
+    """Odświeża etykietę na podstawie estymaty; dokładne liczby z cache mają pierwszeństwo."""
+    estimate = estimate_session_tokens(window.session)
+    total = estimate.total
+    window.prompt_tokens = estimate.prompt.tokens
+    window.attachments_tokens = estimate.attachments.tokens
+    window.total_tokens = total.tokens
 
     window.token_label.setText(
-        f"Tokeny: prompt: {window.prompt_tokens} | pliki: {attach_tokens} | suma: {total}"
+        f"Tokeny: prompt: {_format_token_estimate(estimate.prompt)} | "
+        f"pliki: {_format_token_estimate(estimate.attachments)} | "
+        f"suma: {_format_token_estimate(total)}"
     )
-    if total > CRITICAL_TOKEN_LIMIT:
+    if estimate.exact:
+        window.token_label.setToolTip("")
+    else:
+        window.token_label.setToolTip(
+            f"Estymata: {total.low}–{total.high} tokenów; dokładne liczenie trwa w tle "
+            f"({len(estimate.pending_entries)} plików)"
+        )
+    if total.tokens > CRITICAL_TOKEN_LIMIT:
         window.token_label.setStyleSheet("color: red; font-weight: bold")
-    elif total > WARNING_TOKEN_LIMIT:
+    elif total.tokens > WARNING_TOKEN_LIMIT:
         window.token_label.setStyleSheet("color: orange; font-weight: bold")
     else:
         window.token_label.setStyleSheet("")
+    return estimate
+
+
+def _visible_entry_ids(window: PromptAssistantWindow) -> list[str]:
+    """Zwraca ID wpisów widocznych aktualnie w viewport listy plików."""
+    files_list = window.files_list
+    count = files_list.count()
+    if count == 0:
+        return []
+    viewport = files_list.viewport().rect()
+    first = files_list.indexAt(viewport.topLeft()).row()
+    last = files_list.indexAt(viewport.bottomLeft()).row()
+    first = max(first, 0)
+    last = count - 1 if last < 0 else last
+    visible: list[str] = []
+    for row in range(first, last + 1):
+        item = files_list.item(row)
+        if item.isHidden():
+            continue
+        role = item.data(Qt.UserRole)
+        if role and role[0] in ("file", "dir_file"):
+            visible.append(role[1]["entry_id"])
+    return visible
+
+
+def _token_scheduler(window: PromptAssistantWindow) -> TokenCountScheduler:
+    if window.token_scheduler is None:
+        window.token_scheduler = TokenCountScheduler()
+        window.token_poll_timer = QTimer(window)
+        window.token_poll_timer.setInterval(TOKEN_POLL_INTERVAL_MS)
+        window.token_poll_timer.timeout.connect(lambda: _poll_exact_token_counts(window))
+    return window.token_scheduler
+
+
+def _start_token_polling(window: PromptAssistantWindow) -> None:
+    if window.token_scheduler.pending_count() and not window.token_poll_timer.isActive():
+        window.token_poll_timer.start()
+
+
+def _schedule_exact_token_counts(window: PromptAssistantWindow, estimate: SessionTokenEstimate) -> None:
+    """Zleca dokładne liczenie tokenów (tiktoken) brakujących w bieżącej estymacie poza wątkiem GUI."""
+    if estimate.exact:
+        return
+    scheduler = _token_scheduler(window)
+    if estimate.prompt_pending:
+        scheduler.schedule_prompt(window.session.prompt_text)
+    for entry in estimate.pending_entries:
+        scheduler.schedule_entry(entry, TokenPriority.INCLUDED)
+    _prioritize_visible_entries(window)
+    _start_token_polling(window)
+
+
+def _schedule_all_token_counts(window: PromptAssistantWindow) -> None:
+    """Po imporcie zleca liczenie wszystkich wpisów: widoczne, włączone, a na końcu wykluczone."""
+    schedule_session_tokens(_token_scheduler(window), window.session, visible_ids=_visible_entry_ids(window))
+    _start_token_polling(window)
+
+
+def _prioritize_visible_entries(window: PromptAssistantWindow) -> None:
+    """Przesuwa na początek kolejki wpisy widoczne w liście (np. po przewinięciu)."""
+    if window.token_scheduler is None:
+        return
+    visible = set(_visible_entry_ids(window))
+    if not visible:
+        return
+    for entry in window.session.entries:
+        if entry.entry_id in visible:
+            window.token_scheduler.schedule_entry(entry, TokenPriority.VISIBLE)
+
+
+def _poll_exact_token_counts(window: PromptAssistantWindow) -> None:
+    """Podmienia estymaty na dokładne wartości w miarę kończenia zadań w tle."""
+    scheduler = window.token_scheduler
+    if scheduler is None:
+        return
+    completed = scheduler.take_completed()
+    if completed:
+        _remember_blob_tokens(window, completed)
+        window.token_rollup.refresh(completed)
+        window.path_trie.refresh(completed)
+        estimate = _render_token_label(window)
+        _schedule_exact_token_counts(window, estimate)
+    if not scheduler.pending_count():
+        window.token_poll_timer.stop()
+        _render_token_label(window)
+
+
+def _remember_blob_tokens(window: PromptAssistantWindow, entry_ids: list[str]) -> None:
+    """Zapisuje policzone tokeny plików z rewizji git w `BlobCache`, żeby kolejny import tych blobów ich nie liczył."""
+    for entry_id in entry_ids:
+        blob_sha = window.revision_blobs.pop(entry_id, None)
+        if blob_sha is None:
+            continue
+        entry = get_entry(window.session, entry_id)
+        if entry is not None and entry.token_count_cache is not None:
+            window.blob_cache.remember_tokens(blob_sha, entry.content, entry.token_count_cache)
+
+
+def shutdown_background_tasks(window: PromptAssistantWindow) -> None:
+    """Zatrzymuje liczenie tokenów w tle (np. przy zamykaniu aplikacji)."""
+    if window.token_poll_timer is not None:
+        window.token_poll_timer.stop()
+    if window.token_scheduler is not None:
+        window.token_scheduler.shutdown()
+        window.token_scheduler = None
+
+
+def _update_token_label(window: PromptAssistantWindow) -> None:
+    """Przelicza tokeny promptu i załączników z pominięciem wykluczonych plików.
+
+    Etykieta od razu pokazuje estymatę (`~`), a dokładne liczby są liczone w tle.
+    """
+    _sync_prompt_text(window)
+    _sync_directory_tree_entries(window)
+    estimate = _render_token_label(window)
+    _schedule_exact_token_counts(window, estimate)
 
 
 def _toggle_gitignore(window: PromptAssistantWindow, state: int) -> None:
@@ -169,11 +395,32 @@ def _iter_file_items(window: PromptAssistantWindow):
 
 # --------------------------------------------------------------------- filters
 
+def _content_matches(window: PromptAssistantWindow) -> set[str] | None:
+    """ID wpisów pasujących do pola „Szukaj w treści”; None, gdy pole jest puste lub wyrażenie błędne."""
+    query = window.content_filter_edit.text()
+    if not query:
+        return None
+    try:
+        matches = window.content_index.search(
+            query,
+            regex=window.content_regex_checkbox.isChecked(),
+            # Smart case: małe litery w zapytaniu dopasowują dowolną wielkość liter.
+            ignore_case=query == query.lower(),
+        )
+    except re.error as exc:
+        window.statusBar().showMessage(f"Nieprawidłowe wyrażenie: {exc}", 5000)
+        return None
+    files = sum(1 for entry in matches if entry.source_type != EntrySourceType.DIRECTORY_TREE)
+    window.statusBar().showMessage(f"Wyszukiwanie w treści: {files} plików", 5000)
+    return {entry.entry_id for entry in matches}
+
+
 def apply_list_filters(window: PromptAssistantWindow) -> None:
-    """Filtruje listę plików po nazwie, rozszerzeniu i statusie."""
+    """Filtruje listę plików po nazwie, rozszerzeniu, statusie i treści."""
     name_query = window.name_filter_edit.text()
     extension_query = window.ext_filter_edit.text()
     status_filter = window.status_filter_combo.currentData() or "all"
+    content_matches = _content_matches(window)
 
     for item, file_obj in _iter_file_items(window):
         extension = file_obj.get("extension", "")
@@ -188,6 +435,8 @@ def apply_list_filters(window: PromptAssistantWindow) -> None:
             extension_query=extension_query,
             status_filter=status_filter,
         )
+        if visible and content_matches is not None:
+            visible = file_obj["entry_id"] in content_matches
         item.setHidden(not visible)
 
 
@@ -217,6 +466,7 @@ def attach_files(window: PromptAssistantWindow) -> None:
                 "entry_id": entry.entry_id,
                 "extension": extension,
                 "read_error": None,
+                "abs_path": path,
             }
         except Exception as exc:
             error_text = str(exc)
@@ -241,6 +491,21 @@ def attach_files(window: PromptAssistantWindow) -> None:
 
     _update_token_label(window)
     apply_list_filters(window)
+    _schedule_all_token_counts(window)
+
+
+def _import_profiler() -> Profiler | None:
+    if not (PROFILE_IMPORTS or TRACE_IMPORT_ALLOCATIONS):
+        return None
+    return Profiler(trace_allocations=TRACE_IMPORT_ALLOCATIONS)
+
+
+def _import_budget() -> ImportBudget:
+    return ImportBudget(
+        max_file_bytes=MAX_FILE_SIZE,
+        max_total_bytes=MAX_DIR_SIZE,
+        max_tokens=MAX_IMPORT_TOKENS,
+    )
 
 
 def attach_directory(window: PromptAssistantWindow) -> None:
@@ -248,89 +513,109 @@ def attach_directory(window: PromptAssistantWindow) -> None:
     if not dir_path:
         return
 
-    total_size = 0
-    for root, dirs, files in os.walk(dir_path):
-        if ".git" in dirs:
-            dirs.remove(".git")
-        for filename in files:
-            try:
-                total_size += os.path.getsize(os.path.join(root, filename))
-            except OSError:
-                pass
-        if total_size > MAX_DIR_SIZE:
-            QMessageBox.warning(window, "Zbyt duży katalog", f"{os.path.basename(dir_path)} > 1 GB")
-            return
-
-    git_spec = build_gitignore_spec(dir_path) if window.ignore_gitignored else None
-    custom = [pattern.strip() for pattern in window.exclude_edit.text().split(",") if pattern.strip()]
-    custom_spec = pathspec.PathSpec.from_lines("gitwildmatch", custom) if custom else None
+    imported = scan_directory(
+        dir_path,
+        use_gitignore=window.ignore_gitignored,
+        exclude_patterns=parse_exclude_patterns(window.exclude_edit.text()),
+        profiler=_import_profiler(),
+        budget=_import_budget(),
+        enumeration=FileEnumeration(window.enumeration_combo.currentData()),
+    )
+    _attach_import(window, imported)
 
-    collected: List[Dict] = []
-    skipped = {"binary": 0, "git": 0, "custom": 0}
-    read_errors: List[str] = []
-    base = len(dir_path) + 1
-
-    for root, dirs, files in os.walk(dir_path):
-        if ".git" in dirs:
-            dirs.remove(".git")
-        for filename in files:
-            full = os.path.join(root, filename)
-            rel = full[base:].replace(os.sep, "/")
-
-            if git_spec and git_spec.match_file(rel):
-                skipped["git"] += 1
-                continue
-            if custom_spec and custom_spec.match_file(rel):
-                skipped["custom"] += 1
-                continue
-            if is_binary(full):
-                skipped["binary"] += 1
-                continue
-
-            try:
-                with open(full, encoding="utf-8") as file_handle:
-                    content = file_handle.read()
-                collected.append(
-                    {
-                        "rel": rel,
-                        "display_name": f"{os.path.basename(dir_path)}/{rel}",
-                        "content": content,
-                        "excluded": False,
-                        "extension": os.path.splitext(rel)[1].lower(),
-                        "read_error": None,
-                    }
-                )
-            except Exception as exc:
-                read_errors.append(f"{rel}: {exc}")
-
-    if not collected:
+
+def attach_archive(window: PromptAssistantWindow) -> None:
+    archive_path, _ = QFileDialog.getOpenFileName(window, "Wybierz archiwum...", "", ARCHIVE_FILTER)
+    if not archive_path:
+        return
+
+    try:
+        imported = scan_archive(
+            archive_path,
+            use_gitignore=window.ignore_gitignored,
+            exclude_patterns=parse_exclude_patterns(window.exclude_edit.text()),
+            profiler=_import_profiler(),
+            budget=_import_budget(),
+        )
+    except ArchiveError as exc:
+        QMessageBox.warning(window, "Błąd archiwum", str(exc))
+        return
+    _attach_import(window, imported)
+
+
+def attach_revision(window: PromptAssistantWindow) -> None:
+    dir_path = QFileDialog.getExistingDirectory(window, "Wybierz katalog repozytorium...", "")
+    if not dir_path:
+        return
+    revision, accepted = QInputDialog.getText(window, "Rewizja git", "Gałąź, tag lub SHA:", text="HEAD")
+    revision = revision.strip()
+    if not accepted or not revision:
+        return
+
+    try:
+        imported = scan_git_revision(
+            dir_path,
+            revision,
+            exclude_patterns=parse_exclude_patterns(window.exclude_edit.text()),
+            profiler=_import_profiler(),
+            budget=_import_budget(),
+            blob_cache=window.blob_cache,
+        )
+    except GitRevisionError as exc:
+        QMessageBox.warning(window, "Błąd rewizji git", str(exc))
+        return
+    _attach_import(window, imported)
+
+
+def _attach_import(window: PromptAssistantWindow, imported: DirectoryImport) -> None:
+    """Dodaje do sesji i listy plików wynik skanu katalogu, archiwum albo rewizji, pokazuje raport importu."""
+    # Pliki z archiwum i z rewizji git nie mają ścieżki na dysku.
+    on_disk = imported.enumeration not in (FileEnumeration.ARCHIVE, FileEnumeration.GIT_REVISION)
+    if not imported.files:
         report = build_import_report(
             added_count=0,
-            skipped_git=skipped["git"],
-            skipped_custom=skipped["custom"],
-            skipped_binary=skipped["binary"],
-            read_errors=read_errors,
+            skipped_git=imported.skipped_git,
+            skipped_custom=imported.skipped_custom,
+            skipped_binary=imported.skipped_binary,
+            read_errors=imported.read_errors,
+            spans=imported.spans,
+            skipped_size=imported.skipped_size,
+            budget_stop=imported.budget_stop,
+            source=describe_enumeration(imported),
         )
         QMessageBox.information(window, "Brak plików", report)
         return
 
-    tree = render_tree_structure([file_item["rel"] for file_item in collected])
-    name = os.path.basename(dir_path)
-
-    tree_entry = _create_file_entry(f"{name}/.tree", tree, EntrySourceType.DIRECTORY_TREE)
-    add_entry(window.session, tree_entry)
-
-    for file_item in collected:
-        entry = _create_file_entry(file_item["rel"], file_item["content"], EntrySourceType.DIRECTORY_FILE)
-        add_entry(window.session, entry)
-        file_item["entry_id"] = entry.entry_id
+    tree_entry, file_entries = add_directory_import(window.session, imported, tree_budget=TREE_BUDGET)
+    window.last_import_spans = imported.spans
+    window.revision_blobs.update(
+        (entry.entry_id, imported_file.blob_sha)
+        for imported_file, entry in zip(imported.files, file_entries)
+        if imported_file.blob_sha is not None and entry.token_count_cache is None
+    )
+    collected: List[Dict] = []
+    for imported_file, entry in zip(imported.files, file_entries):
+        collected.append(
+            {
+                "rel": imported_file.rel,
+                "display_name": f"{imported.name}/{imported_file.rel}",
+                "content": imported_file.content,
+                "excluded": False,
+                "extension": imported_file.extension,
+                "read_error": None,
+                "entry_id": entry.entry_id,
+                "abs_path": os.path.join(imported.root_path, imported_file.rel) if on_disk else None,
+                "root": imported.name,
+            }
+        )
 
     window.attached_dirs.append(
         {
-            "name": name,
+            "name": imported.name,
             "files": collected,
-            "tree": tree,
+            "tree": tree_entry.content,
             "tree_entry_id": tree_entry.entry_id,
+            "tree_dirty": False,
         }
     )
 
@@ -339,15 +624,20 @@ def attach_directory(window: PromptAssistantWindow) -> None:
 
     report = build_import_report(
         added_count=len(collected),
-        skipped_git=skipped["git"],
-        skipped_custom=skipped["custom"],
-        skipped_binary=skipped["binary"],
-        read_errors=read_errors,
+        skipped_git=imported.skipped_git,
+        skipped_custom=imported.skipped_custom,
+        skipped_binary=imported.skipped_binary,
+        read_errors=imported.read_errors,
+        spans=imported.spans,
+        skipped_size=imported.skipped_size,
+        budget_stop=imported.budget_stop,
+        source=describe_enumeration(imported),
     )
     QMessageBox.information(window, "Raport importu katalogu", report)
 
     _update_token_label(window)
     apply_list_filters(window)
+    _schedule_all_token_counts(window)
 
 
 def copy_text(window: PromptAssistantWindow) -> None:
@@ -449,10 +739,51 @@ def _selected_file_items(window: PromptAssistantWindow) -> list[tuple[QListWidge
     return selected
 
 
+def _select_rows(window: PromptAssistantWindow, rows: list[bool]) -> None:
+    """Zaznacza wiersze listy oznaczone True jedną zmianą zaznaczenia (ciągłe zakresy zamiast setSelected)."""
+    files_list = window.files_list
+    model = files_list.model()
+    selection = QItemSelection()
+    range_start: int | None = None
+    for row, selected in enumerate([*rows, False]):
+        if selected and range_start is None:
+            range_start = row
+        elif not selected and range_start is not None:
+            selection.select(model.index(range_start, 0), model.index(row - 1, 0))
+            range_start = None
+    files_list.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+
+
+def select_visible_items(window: PromptAssistantWindow) -> None:
+    """Zaznacza pliki widoczne po filtrach, żeby akcje masowe objęły np. wyniki wyszukiwania."""
+    files_list = window.files_list
+    _select_rows(window, [not files_list.item(row).isHidden() for row in range(files_list.count())])
+
+
+def select_path_items(window: PromptAssistantWindow) -> None:
+    """Zaznacza pliki poddrzewa (np. `repo/tests`) albo pasujące do globów (np. `**/*.md, docs/`)."""
+    query = window.path_select_edit.text().strip()
+    if not query:
+        return
+    if any(char in query for char in "*?[,!"):
+        entries = window.path_trie.select_glob(parse_exclude_patterns(query))
+    else:
+        entries = window.path_trie.entries_under(query)
+    entry_ids = {entry.entry_id for entry in entries}
+
+    files_list = window.files_list
+    rows: list[bool] = []
+    for row in range(files_list.count()):
+        role = files_list.item(row).data(Qt.UserRole)
+        rows.append(bool(role) and role[0] in ("file", "dir_file") and role[1]["entry_id"] in entry_ids)
+    _select_rows(window, rows)
+    window.statusBar().showMessage(f"Zaznaczono {len(entry_ids)} plików: {query}", 5000)
+
+
 def bulk_include_selected(window: PromptAssistantWindow) -> None:
     selected = _selected_file_items(window)
     entry_ids = [file_obj["entry_id"] for _item, file_obj in selected if not file_obj.get("read_error")]
-    include_entries(window.session, entry_ids)
+    window.change_journal.include(entry_ids)
 
     for item, file_obj in selected:
         if file_obj.get("read_error"):
@@ -460,15 +791,17 @@ def bulk_include_selected(window: PromptAssistantWindow) -> None:
         file_obj["excluded"] = False
         _refresh_item_visual(item, file_obj)
 
+    _mark_trees_dirty(window, [file_obj for _item, file_obj in selected])
     _sync_directory_tree_entries(window)
     _update_token_label(window)
     apply_list_filters(window)
+    _update_undo_buttons(window)
 
 
 def bulk_exclude_selected(window: PromptAssistantWindow) -> None:
     selected = _selected_file_items(window)
     entry_ids = [file_obj["entry_id"] for _item, file_obj in selected if not file_obj.get("read_error")]
-    exclude_entries(window.session, entry_ids)
+    window.change_journal.exclude(entry_ids)
 
     for item, file_obj in selected:
         if file_obj.get("read_error"):
@@ -476,28 +809,157 @@ def bulk_exclude_selected(window: PromptAssistantWindow) -> None:
         file_obj["excluded"] = True
         _refresh_item_visual(item, file_obj)
 
+    _mark_trees_dirty(window, [file_obj for _item, file_obj in selected])
     _sync_directory_tree_entries(window)
     _update_token_label(window)
     apply_list_filters(window)
+    _update_undo_buttons(window)
+
+
+def bulk_outline_selected(window: PromptAssistantWindow) -> None:
+    """Przełącza zarys dla zaznaczonych plików Pythona (gdy wszystkie już go mają, wyłącza)."""
+    selected = [
+        (item, file_obj)
+        for item, file_obj in _selected_file_items(window)
+        if detect_language(file_obj.get("rel") or file_obj.get("name") or "") == CompactionLanguage.PYTHON
+    ]
+    enable = not all(file_obj.get("outline") for _item, file_obj in selected)
+    for item, file_obj in selected:
+        file_obj["outline"] = enable
+        _refresh_item_visual(item, file_obj)
+    state = "włączony" if enable else "wyłączony"
+    window.statusBar().showMessage(f"Zarys {state} dla {len(selected)} plików Pythona", 5000)
 
 
 def bulk_remove_selected(window: PromptAssistantWindow) -> None:
     selected = _selected_file_items(window)
-    for item, file_obj in selected:
-        row = window.files_list.row(item)
-        window.files_list.takeItem(row)
-        remove_file_from_session(window, file_obj)
+    file_objs = [file_obj for _item, file_obj in selected]
+    removal = _removal_payload(window, file_objs)
+    # Drzewa katalogów, z których znikają wszystkie pliki, wracają razem z nimi przy cofnięciu.
+    entry_ids = [file_obj["entry_id"] for file_obj in file_objs]
+    entry_ids += [directory["tree_entry_id"] for directory in removal["dirs"]]
+    window.change_journal.remove(entry_ids, payload=removal)
+
+    # Jedno przejście od końca zamiast `row(item)` (liniowe wyszukiwanie) dla każdego elementu.
+    selected_items = {id(item) for item, _file_obj in selected}
+    files_list = window.files_list
+    for row in range(files_list.count() - 1, -1, -1):
+        if id(files_list.item(row)) in selected_items:
+            files_list.takeItem(row)
+    _forget_file_objs(window, file_objs)
 
+    _sync_directory_tree_entries(window)
     _update_token_label(window)
     apply_list_filters(window)
+    _update_undo_buttons(window)
+
+
+def _removal_payload(window: PromptAssistantWindow, file_objs: list[dict]) -> dict:
+    """Obiekty GUI usuwanych plików z ich katalogami (None dla pojedynczych plików) i katalogi, które znikną."""
+    doomed = {id(file_obj) for file_obj in file_objs}
+    owners: Dict[int, dict] = {}
+    emptied: List[dict] = []
+    for directory in window.attached_dirs:
+        removed_here = 0
+        for file_obj in directory["files"]:
+            if id(file_obj) in doomed:
+                owners[id(file_obj)] = directory
+                removed_here += 1
+        if removed_here and removed_here == len(directory["files"]):
+            emptied.append(directory)
+    return {
+        "files": [(file_obj, owners.get(id(file_obj))) for file_obj in file_objs],
+        "dirs": emptied,
+    }
+
+
+def _update_undo_buttons(window: PromptAssistantWindow) -> None:
+    window.undo_button.setEnabled(window.change_journal.can_undo)
+    window.redo_button.setEnabled(window.change_journal.can_redo)
+
+
+def _restore_file_objs(window: PromptAssistantWindow, removal: dict) -> None:
+    for directory in removal["dirs"]:
+        if not any(attached is directory for attached in window.attached_dirs):
+            window.attached_dirs.append(directory)
+    for file_obj, directory in removal["files"]:
+        if directory is None:
+            window.attached_files.append(file_obj)
+        else:
+            directory["files"].append(file_obj)
+            directory["tree_dirty"] = True
+
+
+def _rebuild_file_list(window: PromptAssistantWindow) -> None:
+    """Odtwarza listę plików w kolejności wpisów sesji (po przywróceniu usuniętych plików)."""
+    roles: Dict[str, tuple[bool, dict]] = {file_obj["entry_id"]: (False, file_obj) for file_obj in window.attached_files}
+    for directory in window.attached_dirs:
+        roles.update((file_obj["entry_id"], (True, file_obj)) for file_obj in directory["files"])
+    window.files_list.clear()
+    for entry in window.session.entries:
+        role = roles.get(entry.entry_id)
+        if role is not None:
+            _create_file_item(window, role[1], is_dir_file=role[0])
+
+
+def _apply_journal_record(window: PromptAssistantWindow, record: JournalRecord, *, undone: bool) -> None:
+    """Dostosowuje modele GUI do stanu sesji po cofnięciu lub ponowieniu operacji z dziennika."""
+    changed = set(record.entry_ids)
+    if record.action is JournalAction.REMOVE:
+        removal = record.payload or {"files": [], "dirs": []}
+        file_objs = [file_obj for file_obj, _directory in removal["files"]]
+        if undone:
+            _restore_file_objs(window, removal)
+        else:
+            _forget_file_objs(window, file_objs)
+        _rebuild_file_list(window)
+        if undone:
+            files_list = window.files_list
+            _select_rows(
+                window,
+                [files_list.item(row).data(Qt.UserRole)[1]["entry_id"] in changed for row in range(files_list.count())],
+            )
+    else:
+        file_objs = []
+        for item, file_obj in _iter_file_items(window):
+            if file_obj["entry_id"] in changed:
+                entry = get_entry(window.session, file_obj["entry_id"])
+                file_obj["excluded"] = entry is None or not entry.include_in_output
+                _refresh_item_visual(item, file_obj)
+                file_objs.append(file_obj)
+
+    _mark_trees_dirty(window, file_objs)
+    _sync_directory_tree_entries(window)
+    _update_token_label(window)
+    apply_list_filters(window)
+    _update_undo_buttons(window)
+    verb = "Cofnięto" if undone else "Ponowiono"
+    window.statusBar().showMessage(f"{verb} {_JOURNAL_ACTION_LABELS[record.action]} ({len(file_objs)} plików)", 5000)
+
+
+def undo_last_change(window: PromptAssistantWindow) -> None:
+    """Cofa ostatnią akcję masową (include/exclude/remove) bez ponownego czytania plików."""
+    record = window.change_journal.undo()
+    if record is not None:
+        _apply_journal_record(window, record, undone=True)
+
+
+def redo_last_change(window: PromptAssistantWindow) -> None:
+    record = window.change_journal.redo()
+    if record is not None:
+        _apply_journal_record(window, record, undone=False)
 
 
 def clear_all(window: PromptAssistantWindow) -> None:
+    if window.token_scheduler is not None:
+        window.token_scheduler.cancel_all()
     window.text_edit.clear()
     window.files_list.clear()
     window.attached_dirs.clear()
     window.attached_files.clear()
+    window.revision_blobs.clear()
     clear_session(window.session)
+    _update_undo_buttons(window)
     window.prompt_tokens = window.attachments_tokens = window.total_tokens = 0
     window.token_label.setText("Tokeny: prompt: 0 | pliki: 0 | suma: 0")
 
@@ -516,80 +978,193 @@ def preview_file(window: PromptAssistantWindow, item: QListWidgetItem) -> None:
     dialog.exec_()
 
 
-def remove_file_from_session(window: PromptAssistantWindow, file_obj: dict) -> None:
-    """Usuwa wskazany plik z modeli GUI i z sesji core."""
+def _forget_file_objs(window: PromptAssistantWindow, file_objs: list[dict]) -> None:
+    """Usuwa pliki z list GUI jednym przejściem (porównanie po tożsamości, nie po treści); sesję zmienia wołający."""
+    doomed = {id(file_obj) for file_obj in file_objs}
+    window.attached_files[:] = [file_obj for file_obj in window.attached_files if id(file_obj) not in doomed]
+    for directory in window.attached_dirs:
+        kept = [file_obj for file_obj in directory["files"] if id(file_obj) not in doomed]
+        if len(kept) != len(directory["files"]):
+            directory["files"] = kept
+            directory["tree_dirty"] = True
+
+
+def remove_file_from_session(window: PromptAssistantWindow, file_obj: dict, *, sync_tree: bool = True) -> None:
+    """Usuwa wskazany plik z modeli GUI i z sesji core.
+
+    Przy usuwaniu wielu plików drzewo katalogów lepiej zsynchronizować raz, na końcu (`sync_tree=False`).
+    """
     remove_entry(window.session, file_obj["entry_id"])
+    _forget_file_objs(window, [file_obj])
+    if sync_tree:
+        _sync_directory_tree_entries(window)
+
+
+class _TokenTableItem(QTableWidgetItem):
+    """Komórka sortowana po liczbie, a nie po tekście (np. "~1200")."""
+
+    def __init__(self, text: str, value: int) -> None:
+        super().__init__(text)
+        self.value = value
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other: QTableWidgetItem) -> bool:
+        if isinstance(other, _TokenTableItem):
+            return self.value < other.value
+        return super().__lt__(other)
 
-    if file_obj in window.attached_files:
-        window.attached_files.remove(file_obj)
+
+TOKEN_DISTRIBUTION_TOP_FILES = 500
+_DISTRIBUTION_VIEWS = (
+    ("Katalogi", RollupKind.ROOT),
+    ("Podkatalogi", RollupKind.DIRECTORY),
+    ("Rozszerzenia", RollupKind.EXTENSION),
+    ("Największe pliki", None),
+)
+
+
+def _fill_distribution_table(window: PromptAssistantWindow, table: QTableWidget, kind: RollupKind | None) -> None:
+    rollup = window.token_rollup
+    total = max(1, rollup.total().tokens)
+    rows: List[tuple[str, int, str, int]] = []
+    if kind is None:
+        for entry, estimate in rollup.top_entries(TOKEN_DISTRIBUTION_TOP_FILES):
+            name = f"{entry.root}/{entry.path}" if entry.root else entry.path
+            rows.append((name, estimate.tokens, _format_token_estimate(estimate), 1))
     else:
-        for directory in window.attached_dirs:
-            if file_obj in directory["files"]:
-                directory["files"].remove(file_obj)
-                break
+        for row in rollup.rows(kind):
+            text = str(row.tokens) if row.exact else f"~{row.tokens}"
+            rows.append((row.key, row.tokens, text, row.files))
 
-    _sync_directory_tree_entries(window)
+    table.setSortingEnabled(False)
+    table.setRowCount(len(rows))
+    for index, (name, tokens, text, files) in enumerate(rows):
+        table.setItem(index, 0, QTableWidgetItem(name))
+        table.setItem(index, 1, _TokenTableItem(text, tokens))
+        table.setItem(index, 2, _TokenTableItem(f"{100 * tokens / total:.1f}%", tokens))
+        table.setItem(index, 3, _TokenTableItem(str(files), files))
+    table.setSortingEnabled(True)
+    table.sortItems(1, Qt.DescendingOrder)
 
 
 def show_token_distribution(window: PromptAssistantWindow) -> None:
-    """Wyświetla modalne okno z rozkładem tokenów promptu i załączonych plików."""
+    """Wyświetla modalne okno z rozkładem tokenów wg katalogu, podkatalogu, rozszerzenia i pliku.
+
+    Dane pochodzą z przyrostowego `TokenRollup`, więc otwarcie nie przelicza sesji;
+    wpisy jeszcze niepoliczone w tle są pokazane jako estymaty (`~`).
+    """
     _sync_prompt_text(window)
+    _sync_directory_tree_entries(window)
+    prompt_estimate = estimate_session_tokens(window.session).prompt
 
-    prompt_tokens, _attach_tokens, _total = count_session_tokens(window.session)
+    dialog = QDialog(window)
+    dialog.setWindowTitle("Rozkład tokenów")
+    dialog.setMinimumWidth(600)
+    layout = QVBoxLayout(dialog)
 
-    file_counts: List[tuple[str, int]] = []
-    for file_obj in window.attached_files:
-        if _get_file_status(file_obj) != "active":
-            continue
-        entry = get_entry(window.session, file_obj["entry_id"])
-        if entry is None:
-            continue
-        file_counts.append((file_obj["name"], count_entry_tokens(entry)))
-    file_counts.sort(key=lambda item: item[1], reverse=True)
+    header = QHBoxLayout()
+    header.addWidget(QLabel(f"Prompt: {_format_token_estimate(prompt_estimate)} tokenów"))
+    header.addStretch(1)
+    view_combo = QComboBox()
+    for label, kind in _DISTRIBUTION_VIEWS:
+        view_combo.addItem(label, kind)
+    header.addWidget(view_combo)
+    layout.addLayout(header)
+
+    table = QTableWidget(0, 4)
+    table.setHorizontalHeaderLabels(["Grupa", "Tokeny", "Udział", "Pliki"])
+    table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    table.verticalHeader().setVisible(False)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    layout.addWidget(table)
+    view_combo.currentIndexChanged.connect(
+        lambda _index: _fill_distribution_table(window, table, view_combo.currentData())
+    )
+    _fill_distribution_table(window, table, view_combo.currentData())
 
-    dir_data: List[tuple[str, int, List[tuple[str, int]]]] = []
-    for directory in window.attached_dirs:
-        tree_entry = get_entry(window.session, directory["tree_entry_id"])
-        tree_tokens = count_entry_tokens(tree_entry) if tree_entry else 0
+    btn_layout = QHBoxLayout()
+    btn_layout.addStretch(1)
+    btn_close = QPushButton("Close")
+    btn_close.clicked.connect(dialog.accept)
+    btn_layout.addWidget(btn_close)
+    layout.addLayout(btn_layout)
+
+    dialog.exec_()
 
-        files: List[tuple[str, int]] = []
-        for file_obj in directory["files"]:
-            if _get_file_status(file_obj) != "active":
-                continue
-            entry = get_entry(window.session, file_obj["entry_id"])
-            if entry is None:
-                continue
-            files.append((file_obj["rel"], count_entry_tokens(entry)))
-        files.sort(key=lambda item: item[1], reverse=True)
-        dir_data.append((directory["name"], tree_tokens, files))
-
-    lines: List[str] = []
-    lines.append("Prompt")
-    lines.append(f"  prompt: {prompt_tokens} tokenów")
-    lines.append("")
-    if file_counts:
-        lines.append("Pliki pojedyncze")
-        for name, tokens in file_counts:
-            lines.append(f"  {name}: {tokens} tokenów")
-        lines.append("")
-    if dir_data:
-        lines.append("Katalogi")
-        for dir_name, tree_tokens, files in dir_data:
-            lines.append(f"{dir_name}")
-            lines.append(f"  tree: {tree_tokens} tokenów")
-            for rel, tokens in files:
-                lines.append(f"  {rel}: {tokens} tokenów")
-            lines.append("")
-    report = "\n".join(lines)
+
+MEMORY_REPORT_TOP_ENTRIES = 500
+_MEMORY_VIEWS = (
+    ("Kategorie", "categories"),
+    ("Katalogi", "roots"),
+    ("Podkatalogi", "directories"),
+    ("Największe wpisy", "top_entries"),
+    ("Szczyty alokacji importu", "allocations"),
+)
+
+
+def _fill_memory_table(table: QTableWidget, report: MemoryReport, view: str) -> None:
+    total = max(1, report.total_bytes)
+    if view == "allocations":
+        rows = [(phase.name, phase.peak_bytes, phase.retained_bytes) for phase in report.allocations]
+    else:
+        rows = [(row.key, row.bytes, row.count) for row in getattr(report, view)]
+
+    table.setSortingEnabled(False)
+    table.setRowCount(len(rows))
+    for index, (name, size, third) in enumerate(rows):
+        table.setItem(index, 0, QTableWidgetItem(name))
+        table.setItem(index, 1, _TokenTableItem(format_bytes(size), size))
+        table.setItem(index, 2, _TokenTableItem(f"{100 * size / total:.1f}%", size))
+        third_text = format_bytes(third) if view == "allocations" else str(third)
+        table.setItem(index, 3, _TokenTableItem(third_text, third))
+    table.setHorizontalHeaderLabels(
+        ["Faza", "Szczyt", "Udział", "Zostało"] if view == "allocations" else ["Grupa", "Rozmiar", "Udział", "Wpisy"]
+    )
+    table.setSortingEnabled(True)
+    table.sortItems(1, Qt.DescendingOrder)
+
+
+def show_memory_report(window: PromptAssistantWindow) -> None:
+    """Wyświetla modalne okno z pamięcią sesji wg kategorii, katalogu i największych wpisów.
+
+    Poza sesją i jej indeksami liczone są modele GUI (słowniki plików, teksty
+    listy) i cache blobów; szczyty alokacji ostatniego importu są dostępne przy
+    `PROMPTGLUE_TRACE_ALLOC=1`.
+    """
+    _sync_prompt_text(window)
+    files_list = window.files_list
+    report = build_memory_report(
+        window.session,
+        top=MEMORY_REPORT_TOP_ENTRIES,
+        extra={
+            "gui_files": (window.attached_files, window.attached_dirs),
+            "list_items": [files_list.item(row).text() for row in range(files_list.count())],
+            "blob_cache": window.blob_cache,
+        },
+        spans=window.last_import_spans,
+    )
 
     dialog = QDialog(window)
-    dialog.setWindowTitle("Rozkład tokenów")
+    dialog.setWindowTitle("Pamięć sesji")
     dialog.setMinimumWidth(600)
     layout = QVBoxLayout(dialog)
 
-    text = QPlainTextEdit(report)
-    text.setReadOnly(True)
-    layout.addWidget(text)
+    header = QHBoxLayout()
+    header.addWidget(QLabel(f"Razem: {format_bytes(report.total_bytes)}"))
+    header.addStretch(1)
+    view_combo = QComboBox()
+    for label, view in _MEMORY_VIEWS:
+        view_combo.addItem(label, view)
+    header.addWidget(view_combo)
+    layout.addLayout(header)
+
+    table = QTableWidget(0, 4)
+    table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    table.verticalHeader().setVisible(False)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    layout.addWidget(table)
+    view_combo.currentIndexChanged.connect(lambda _index: _fill_memory_table(table, report, view_combo.currentData()))
+    _fill_memory_table(table, report, view_combo.currentData())
 
     btn_layout = QHBoxLayout()
     btn_layout.addStretch(1)
@@ -4,9 +4,12 @@ from __future__ import annotations
 import sys
 from PyQt5.QtWidgets import QApplication
 
+from prompt_assistant.utils import prewarm_encoder
+
 from .controllers import (
     setup_ui,
     connect_signals,
+    shutdown_background_tasks,
     PromptAssistantWindow,
 )
 
@@ -21,7 +24,10 @@ def main() -> None:
     setup_ui(window)
     connect_signals(window)
     window.show()
-    sys.exit(app.exec_())
+    prewarm_encoder()
+    exit_code = app.exec_()
+    shutdown_background_tasks(window)
+    sys.exit(exit_code)
 
 # for entry-point compatibility
 if __name__ == "__main__":
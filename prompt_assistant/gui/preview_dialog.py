@@ -1,7 +1,7 @@
 '''File preview & management dialog.'''  
 from __future__ import annotations
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import (
     QDialog,
     QLabel,
@@ -13,10 +13,22 @@ from PyQt5.QtWidgets import (
     QListWidgetItem,
 )
 
-from prompt_assistant.utils import count_tokens
+from prompt_assistant.core import (
+    TokenPriority,
+    estimate_entry_tokens,
+    get_entry,
+    open_text_windows,
+    set_entry_inclusion,
+)
+
+TOKEN_POLL_INTERVAL_MS = 100
 
 class FilePreviewDialog(QDialog):
-    """QDialog pokazujący zawartość pliku z opcją wykluczenia lub usunięcia."""
+    """QDialog pokazujący zawartość pliku z opcją wykluczenia lub usunięcia.
+
+    Treść jest stronicowana oknami (duże pliki przez mmap), a liczba tokenów
+    pochodzi z cache wpisu albo jest liczona w tle – dialog otwiera się od razu.
+    """
 
     def __init__(
         self,
@@ -34,25 +46,45 @@ class FilePreviewDialog(QDialog):
         self.file_obj = file_obj
         self.is_dir_file = is_dir_file
 
+        self.entry = get_entry(window.session, file_obj["entry_id"])
+        content = file_obj.get("content", "")
+        if file_obj.get("read_error"):
+            content = f"Błąd odczytu:\n{file_obj['read_error']}"
+        self.reader = open_text_windows(
+            content,
+            path=None if file_obj.get("read_error") else file_obj.get("abs_path"),
+            expected_size=self.entry.size if self.entry is not None else None,
+            loaded_at=self.entry.last_loaded_at.timestamp() if self.entry is not None else None,
+        )
+        self.window_index = 0
+
         # ---- UI ----------------------------------------------------------------
         vbox = QVBoxLayout(self)
 
-        token_info = count_tokens(file_obj["content"]) if file_obj.get("content") else 0
-        header = QLabel(
-            f"{self.window.windowTitle().split('—')[0]} — "
-            f"{file_obj.get('name', file_obj.get('rel'))} "
-            f"— {token_info} tokenów"
-        )
-        header.setWordWrap(True)
-        vbox.addWidget(header)
+        self.header = QLabel()
+        self.header.setWordWrap(True)
+        vbox.addWidget(self.header)
 
-        viewer_content = file_obj.get("content", "")
-        if file_obj.get("read_error"):
-            viewer_content = f"Błąd odczytu:\n{file_obj['read_error']}"
-        self.viewer = QPlainTextEdit(viewer_content)
+        self.viewer = QPlainTextEdit()
         self.viewer.setReadOnly(True)
         vbox.addWidget(self.viewer, 1)
 
+        pager = QHBoxLayout()
+        self.prev_btn = QPushButton("◀ Poprzedni fragment")
+        self.prev_btn.clicked.connect(lambda: self._show_window(self.window_index - 1))
+        self.page_label = QLabel()
+        self.next_btn = QPushButton("Następny fragment ▶")
+        self.next_btn.clicked.connect(lambda: self._show_window(self.window_index + 1))
+        pager.addWidget(self.prev_btn)
+        pager.addStretch(1)
+        pager.addWidget(self.page_label)
+        pager.addStretch(1)
+        pager.addWidget(self.next_btn)
+        vbox.addLayout(pager)
+        if self.reader.window_count == 1:
+            for widget in (self.prev_btn, self.page_label, self.next_btn):
+                widget.hide()
+
         self.exclude_cb = QCheckBox("✅ Wyklucz ten plik z promptu")
         self.exclude_cb.setChecked(file_obj["excluded"])
         if file_obj.get("read_error"):
@@ -71,14 +103,64 @@ class FilePreviewDialog(QDialog):
         hbox.addWidget(self.close_btn)
         vbox.addLayout(hbox)
 
+        self.token_timer = QTimer(self)
+        self.token_timer.setInterval(TOKEN_POLL_INTERVAL_MS)
+        self.token_timer.timeout.connect(self._refresh_header)
+        self._show_window(0)
+        self._refresh_header()
+        self._schedule_token_count()
+
+    # ------------------------------------------------------------------ content
+    def _show_window(self, index: int) -> None:
+        """Pokazuje jedno okno treści i aktualizuje nawigację."""
+        count = self.reader.window_count
+        self.window_index = min(max(index, 0), count - 1)
+        self.viewer.setPlainText(self.reader.window(self.window_index))
+        self.page_label.setText(f"Fragment {self.window_index + 1}/{count}")
+        self.prev_btn.setEnabled(self.window_index > 0)
+        self.next_btn.setEnabled(self.window_index < count - 1)
+
+    def _token_text(self) -> str:
+        if self.entry is None or self.file_obj.get("read_error"):
+            return "0 tokenów"
+        estimate = estimate_entry_tokens(self.entry)
+        if estimate.exact:
+            return f"{estimate.tokens} tokenów"
+        return f"~{estimate.tokens} tokenów (liczenie…)"
+
+    def _refresh_header(self) -> None:
+        self.header.setText(
+            f"{self.window.windowTitle().split('—')[0]} — "
+            f"{self.file_obj.get('name', self.file_obj.get('rel'))} "
+            f"— {self._token_text()}"
+        )
+        if self.entry is None or self.entry.token_count_cache is not None:
+            self.token_timer.stop()
+
+    def _schedule_token_count(self) -> None:
+        """Zleca dokładne liczenie tokenów w tle, jeśli wpis nie ma jeszcze cache."""
+        if self.entry is None or self.entry.token_count_cache is not None or self.file_obj.get("read_error"):
+            return
+        # Late import to avoid circular import
+        from prompt_assistant.gui.controllers import _start_token_polling, _token_scheduler
+
+        _token_scheduler(self.window).schedule_entry(self.entry, TokenPriority.VISIBLE)
+        _start_token_polling(self.window)
+        self.token_timer.start()
+
+    def done(self, result: int) -> None:
+        self.token_timer.stop()
+        self.reader.close()
+        super().done(result)
+
     # --------------------------------------------------------------------- slots
     def _toggle_exclude(self, state: int) -> None:
         """Aktualizuje status excluded i formatowanie w liście."""
         if self.file_obj.get("read_error"):
             return
         # Late import to avoid circular import
-        from prompt_assistant.core import get_entry, set_entry_inclusion
         from prompt_assistant.gui.controllers import (
+            _mark_trees_dirty,
             _refresh_item_visual,
             _sync_directory_tree_entries,
             _update_token_label,
@@ -90,12 +172,9 @@ class FilePreviewDialog(QDialog):
         set_entry_inclusion(self.window.session, self.file_obj["entry_id"], include)
 
         # Przy plikach katalogowych tree-entry ma zależność od aktywności dzieci.
+        _mark_trees_dirty(self.window, [self.file_obj])
         _sync_directory_tree_entries(self.window)
 
-        entry = get_entry(self.window.session, self.file_obj["entry_id"])
-        if entry is not None:
-            entry.token_count_cache = count_tokens(entry.content)
-
         _refresh_item_visual(self.list_item, self.file_obj)
         _update_token_label(self.window)
         apply_list_filters(self.window)
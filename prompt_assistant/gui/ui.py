@@ -1,6 +1,8 @@
 """UI construction and signal binding for PromptAssistantWindow."""
 from __future__ import annotations
 
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -15,9 +17,10 @@ from PyQt5.QtWidgets import (
     QLabel,
     QHBoxLayout,
     QVBoxLayout,
+    QShortcut,
 )
 
-from prompt_assistant.core import Session
+from prompt_assistant.core import BlobCache, ChangeJournal, ContentIndex, PathTrie, Session, TokenRollup
 
 __all__ = ["PromptAssistantWindow", "build_ui", "bind_signals"]
 
@@ -35,6 +38,22 @@ class PromptAssistantWindow(QMainWindow):
         self.total_tokens = 0
         self.ignore_gitignored = True
         self.session = Session()
+        # Sumy tokenów wg katalogu/rozszerzenia aktualizowane przez powiadomienia sesji.
+        self.token_rollup = TokenRollup.for_session(self.session)
+        # Indeks treści wpisów dla pola „Szukaj w treści” (indeksowanie leniwe, przy pierwszym zapytaniu).
+        self.content_index = ContentIndex.for_session(self.session)
+        # Drzewo ścieżek wpisów: zaznaczanie poddrzew i globów dla akcji masowych.
+        self.path_trie = PathTrie.for_session(self.session)
+        # Cofanie/ponawianie akcji masowych; usunięte wpisy są trzymane w pamięci, bez ponownego importu.
+        self.change_journal = ChangeJournal.for_session(self.session)
+        # Treść i tokeny blobów z importów rewizji git (klucz: SHA) oraz SHA wpisów czekających na liczenie tokenów.
+        self.blob_cache = BlobCache()
+        self.revision_blobs = {}
+        # Spany ostatniego importu katalogu (ze szczytami alokacji przy PROMPTGLUE_TRACE_ALLOC) do raportu pamięci.
+        self.last_import_spans = []
+        # Dokładne liczenie tokenów w tle (patrz controllers._schedule_exact_token_counts)
+        self.token_scheduler = None
+        self.token_poll_timer = None
 
         build_ui(self)
 
@@ -74,6 +93,14 @@ def build_ui(window: PromptAssistantWindow) -> None:
     window.status_filter_combo.addItem("Błędy", "error")
     filter_bar.addWidget(window.status_filter_combo)
 
+    window.content_filter_edit = QLineEdit()
+    window.content_filter_edit.setPlaceholderText("Szukaj w treści")
+    window.content_filter_edit.setToolTip("Wielkość liter ma znaczenie tylko, gdy zapytanie zawiera wielkie litery")
+    filter_bar.addWidget(window.content_filter_edit)
+
+    window.content_regex_checkbox = QCheckBox("Regex")
+    filter_bar.addWidget(window.content_regex_checkbox)
+
     input_bar = QHBoxLayout()
     layout.addLayout(input_bar)
 
@@ -83,6 +110,14 @@ def build_ui(window: PromptAssistantWindow) -> None:
     window.attach_dir_button = QPushButton("Attach Directory")
     input_bar.addWidget(window.attach_dir_button)
 
+    window.attach_archive_button = QPushButton("Attach Archive")
+    window.attach_archive_button.setToolTip("Dołącz pliki z archiwum zip/tar bez rozpakowywania")
+    input_bar.addWidget(window.attach_archive_button)
+
+    window.attach_revision_button = QPushButton("Attach Revision")
+    window.attach_revision_button.setToolTip("Dołącz katalog w stanie z rewizji git (gałąź, tag, SHA) bez checkoutu")
+    input_bar.addWidget(window.attach_revision_button)
+
     window.exclude_edit = QLineEdit()
     window.exclude_edit.setPlaceholderText("Wykluczenia: *.md, README.txt…")
     input_bar.addWidget(window.exclude_edit, stretch=1)
@@ -91,6 +126,13 @@ def build_ui(window: PromptAssistantWindow) -> None:
     window.gitignore_checkbox.setChecked(True)
     input_bar.addWidget(window.gitignore_checkbox)
 
+    window.enumeration_combo = QComboBox()
+    window.enumeration_combo.addItem("Skan katalogu", "walk")
+    window.enumeration_combo.addItem("Indeks git", "git_index")
+    window.enumeration_combo.addItem("Indeks git + nieśledzone", "git_index_untracked")
+    window.enumeration_combo.setToolTip("Źródło listy plików przy dołączaniu katalogu")
+    input_bar.addWidget(window.enumeration_combo)
+
     output_bar = QHBoxLayout()
     layout.addLayout(output_bar)
 
@@ -109,6 +151,16 @@ def build_ui(window: PromptAssistantWindow) -> None:
     window.output_format_combo.addItem("Plain text", "plain")
     output_bar.addWidget(window.output_format_combo)
 
+    window.compact_checkbox = QCheckBox("Kompaktuj treść")
+    window.compact_checkbox.setToolTip("Usuwa komentarze, docstringi i puste linie z plików w finalnym outpucie")
+    output_bar.addWidget(window.compact_checkbox)
+
+    window.outline_checkbox = QCheckBox("Zarys Pythona")
+    window.outline_checkbox.setToolTip(
+        "Pliki .py jako importy, sygnatury klas i funkcji oraz pierwsze linie docstringów; pozostałe pliki w całości"
+    )
+    output_bar.addWidget(window.outline_checkbox)
+
     output_bar.addStretch(1)
 
     window.clear_button = QPushButton("Clear")
@@ -117,12 +169,32 @@ def build_ui(window: PromptAssistantWindow) -> None:
     bulk_bar = QHBoxLayout()
     layout.addLayout(bulk_bar)
 
+    window.select_visible_button = QPushButton("Select visible")
+    window.select_visible_button.setToolTip("Zaznacza pliki spełniające bieżące filtry (np. wyniki wyszukiwania)")
+    bulk_bar.addWidget(window.select_visible_button)
+
+    window.path_select_edit = QLineEdit()
+    window.path_select_edit.setPlaceholderText("Ścieżka lub glob: repo/tests, **/*.md…")
+    bulk_bar.addWidget(window.path_select_edit, stretch=1)
+    window.select_path_button = QPushButton("Select path")
+    bulk_bar.addWidget(window.select_path_button)
     window.bulk_include_button = QPushButton("Include selected")
     bulk_bar.addWidget(window.bulk_include_button)
     window.bulk_exclude_button = QPushButton("Exclude selected")
     bulk_bar.addWidget(window.bulk_exclude_button)
+    window.bulk_outline_button = QPushButton("Outline selected")
+    window.bulk_outline_button.setToolTip("Włącza lub wyłącza zarys Pythona tylko dla zaznaczonych plików .py")
+    bulk_bar.addWidget(window.bulk_outline_button)
     window.bulk_remove_button = QPushButton("Remove selected")
     bulk_bar.addWidget(window.bulk_remove_button)
+    window.undo_button = QPushButton("Undo")
+    window.undo_button.setToolTip("Cofa ostatnią akcję masową (Ctrl+Z na liście plików)")
+    window.undo_button.setEnabled(False)
+    bulk_bar.addWidget(window.undo_button)
+    window.redo_button = QPushButton("Redo")
+    window.redo_button.setToolTip("Ponawia cofniętą akcję masową (Ctrl+Shift+Z na liście plików)")
+    window.redo_button.setEnabled(False)
+    bulk_bar.addWidget(window.redo_button)
 
     # Status bar & token label
     status = QStatusBar()
@@ -134,23 +206,35 @@ def build_ui(window: PromptAssistantWindow) -> None:
     window.show_token_dist_button = QPushButton("Show Token Breakdown")
     status.addPermanentWidget(window.show_token_dist_button)
 
+    window.show_memory_button = QPushButton("Show Memory Report")
+    status.addPermanentWidget(window.show_memory_button)
+
 
 def bind_signals(window: PromptAssistantWindow) -> None:
     """Connects UI events to controller functions."""
     from .controllers import (
         _update_token_label,
+        _prioritize_visible_entries,
         _toggle_gitignore,
         attach_files,
         attach_directory,
+        attach_archive,
+        attach_revision,
         copy_text,
         bulk_exclude_selected,
         bulk_include_selected,
+        bulk_outline_selected,
         bulk_remove_selected,
+        redo_last_change,
+        undo_last_change,
+        select_path_items,
+        select_visible_items,
         export_text,
         clear_all,
         preview_file,
         preview_final_output,
         show_token_distribution,
+        show_memory_report,
         set_output_format,
         apply_list_filters,
     )
@@ -159,18 +243,35 @@ def bind_signals(window: PromptAssistantWindow) -> None:
     window.gitignore_checkbox.stateChanged.connect(lambda s: _toggle_gitignore(window, s))
     window.attach_button.clicked.connect(lambda: attach_files(window))
     window.attach_dir_button.clicked.connect(lambda: attach_directory(window))
+    window.attach_archive_button.clicked.connect(lambda: attach_archive(window))
+    window.attach_revision_button.clicked.connect(lambda: attach_revision(window))
     window.copy_button.clicked.connect(lambda: copy_text(window))
     window.preview_button.clicked.connect(lambda: preview_final_output(window))
     window.export_button.clicked.connect(lambda: export_text(window))
     window.bulk_include_button.clicked.connect(lambda: bulk_include_selected(window))
     window.bulk_exclude_button.clicked.connect(lambda: bulk_exclude_selected(window))
+    window.bulk_outline_button.clicked.connect(lambda: bulk_outline_selected(window))
     window.bulk_remove_button.clicked.connect(lambda: bulk_remove_selected(window))
+    window.undo_button.clicked.connect(lambda: undo_last_change(window))
+    window.redo_button.clicked.connect(lambda: redo_last_change(window))
+    # Skróty tylko na liście plików, żeby Ctrl+Z w polu promptu dalej cofał edycję tekstu.
+    for keys, handler in ((QKeySequence.Undo, undo_last_change), (QKeySequence.Redo, redo_last_change)):
+        shortcut = QShortcut(QKeySequence(keys), window.files_list)
+        shortcut.setContext(Qt.WidgetWithChildrenShortcut)
+        shortcut.activated.connect(lambda handler=handler: handler(window))
+    window.select_visible_button.clicked.connect(lambda: select_visible_items(window))
+    window.select_path_button.clicked.connect(lambda: select_path_items(window))
+    window.path_select_edit.returnPressed.connect(lambda: select_path_items(window))
     window.clear_button.clicked.connect(lambda: clear_all(window))
     window.files_list.itemDoubleClicked.connect(lambda item: preview_file(window, item))
+    window.files_list.verticalScrollBar().valueChanged.connect(lambda _value: _prioritize_visible_entries(window))
     window.show_token_dist_button.clicked.connect(lambda: show_token_distribution(window))
+    window.show_memory_button.clicked.connect(lambda: show_memory_report(window))
     window.output_format_combo.currentIndexChanged.connect(
         lambda idx: set_output_format(window, idx)
     )
     window.name_filter_edit.textChanged.connect(lambda: apply_list_filters(window))
     window.ext_filter_edit.textChanged.connect(lambda: apply_list_filters(window))
     window.status_filter_combo.currentIndexChanged.connect(lambda _idx: apply_list_filters(window))
+    window.content_filter_edit.textChanged.connect(lambda: apply_list_filters(window))
+    window.content_regex_checkbox.stateChanged.connect(lambda _state: apply_list_filters(window))
@@ -3,23 +3,45 @@ from __future__ import annotations
 
 import os
 import re
-from typing import Dict, List
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Mapping
 
-import pathspec
-import tiktoken
+# tiktoken and pathspec are imported lazily so that importing the package
+# (CLI, GUI start-up) does not pay for loading BPE ranks or the pattern engine.
 
 __all__ = [
     "count_tokens",
+    "get_encoder",
+    "prewarm_encoder",
+    "compile_gitwildmatch",
     "sanitize_tag",
     "is_binary",
     "render_tree_structure",
     "build_gitignore_spec",
+    "read_gitignore_patterns",
+    "gitignore_lines_to_patterns",
 ]
 
+@lru_cache(maxsize=None)
+def get_encoder():
+    """Return the shared cl100k_base encoder, importing tiktoken on first use."""
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+def prewarm_encoder() -> threading.Thread:
+    """Load the encoder on a daemon thread so the first count_tokens call does not block."""
+    thread = threading.Thread(target=get_encoder, name="promptglue-encoder-prewarm", daemon=True)
+    thread.start()
+    return thread
+
 def count_tokens(text: str) -> int:
-    """Return the number of tokens for *text* using tiktoken's cl100k_base encoding."""
-    encoder = tiktoken.get_encoding("cl100k_base")
-    return len(encoder.encode(text))
+    """Return the number of tokens for *text* using tiktoken's cl100k_base encoding.
+
+    Special-token markers (e.g. ``<|endoftext|>``) in attached files are counted as plain text.
+    """
+    return len(get_encoder().encode(text, disallowed_special=()))
 
 def sanitize_tag(name: str) -> str:
     """Return *name* where every non-alphanumeric character is replaced with “_”."""
@@ -34,52 +56,188 @@ def is_binary(path: str) -> bool:
     except UnicodeDecodeError:
         return True
 
-def render_tree_structure(rel_paths: List[str]) -> str:
-    """Return an ASCII tree representation for *rel_paths* (list of paths relative to root)."""
-    root: Dict[str, Dict | None] = {}
-    for p in rel_paths:
-        parts = p.split("/")
-        cur = root
-        for idx, part in enumerate(parts):
-            if idx == len(parts) - 1:
-                cur[part] = None
-            else:
-                cur = cur.setdefault(part, {})
-
-    lines: List[str] = ["."]
-
-    def walk(subtree: Dict[str, Dict | None], prefix: str = "") -> None:
-        dirs = sorted(k for k, v in subtree.items() if isinstance(v, dict))
-        files = sorted(k for k, v in subtree.items() if v is None)
-        for i, name in enumerate([*dirs, *files]):
-            is_last = i == (len(dirs) + len(files) - 1)
-            connector = "└── " if is_last else "├── "
-            lines.append(f"{prefix}{connector}{name}")
-            if isinstance(subtree[name], dict):
-                extension = "    " if is_last else "│   "
-                walk(subtree[name], prefix + extension)
-
-    walk(root)
-    return "\n".join(lines)
+def render_tree_structure(
+    rel_paths: List[str],
+    *,
+    max_depth: int | None = None,
+    collapse_over: int | None = None,
+    max_tokens: int | None = None,
+    file_tokens: Mapping[str, int] | None = None,
+) -> str:
+    """Return an ASCII tree representation for *rel_paths* (list of paths relative to root).
+
+    Directories below *max_depth* levels, or holding more than *collapse_over* files, are shown as one
+    summary line ("… 4,812 files, 1.2M tokens"; token totals are given when *file_tokens* maps paths to
+    counts). With *max_tokens* the deepest rendering that fits the cap is used; if not even the top level
+    fits, the listing is cut short with a summary of the omitted files.
+    """
+    root, height = _build_tree(rel_paths, file_tokens)
+    show_tokens = file_tokens is not None
+    if not root.file_count:
+        return "."
+    if max_tokens is None or max_depth == 0:
+        return "\n".join([".", *(line for line, _files, _tokens in _tree_lines(root, max_depth, collapse_over, show_tokens))])
+
+    budget = max_tokens - _line_tokens(".")
+    best: List[str] | None = None
+    for depth in range(1, height + 1 if max_depth is None else min(max_depth, height) + 1):
+        lines = _lines_within(_tree_lines(root, depth, collapse_over, show_tokens), budget)
+        if lines is None:
+            break
+        best = lines
+    if best is None:
+        best = _truncated_lines(root, collapse_over, show_tokens, budget)
+    return "\n".join([".", *best])
+
+class _TreeNode:
+    """Directory of a rendered tree with the file count and tokens of its whole subtree."""
+
+    __slots__ = ("dirs", "files", "file_count", "tokens")
+
+    def __init__(self) -> None:
+        self.dirs: Dict[str, _TreeNode] = {}
+        self.files: Dict[str, int] = {}
+        self.file_count = 0
+        self.tokens = 0
+
+def _build_tree(rel_paths: Iterable[str], file_tokens: Mapping[str, int] | None) -> tuple[_TreeNode, int]:
+    root = _TreeNode()
+    height = 0
+    for path in rel_paths:
+        parts = path.split("/")
+        node = root
+        for part in parts[:-1]:
+            child = node.dirs.get(part)
+            if child is None:
+                child = node.dirs[part] = _TreeNode()
+            node = child
+        node.files[parts[-1]] = file_tokens.get(path, 0) if file_tokens else 0
+        height = max(height, len(parts))
+    # Breadth-first order lists every directory before its subdirectories, so walking it
+    # backwards sums subtrees bottom-up without recursion.
+    order = [root]
+    for node in order:
+        order.extend(node.dirs.values())
+    for node in reversed(order):
+        node.file_count = len(node.files) + sum(child.file_count for child in node.dirs.values())
+        node.tokens = sum(node.files.values()) + sum(child.tokens for child in node.dirs.values())
+    return root, height
+
+def _tree_lines(
+    root: _TreeNode, max_depth: int | None, collapse_over: int | None, show_tokens: bool
+) -> Iterator[tuple[str, int, int]]:
+    """Yield the lines below "." with the number of files and tokens each line stands for."""
+    if max_depth == 0:
+        yield f"└── {_tree_summary(root.file_count, root.tokens, show_tokens)}", root.file_count, root.tokens
+        return
+    # Explicit stack of (children, next index, line prefix, depth) instead of recursion.
+    stack = [(_tree_children(root), 0, "", 1)]
+    while stack:
+        children, index, prefix, depth = stack.pop()
+        if index == len(children):
+            continue
+        stack.append((children, index + 1, prefix, depth))
+        name, node, tokens = children[index]
+        is_last = index == len(children) - 1
+        yield f"{prefix}{'└── ' if is_last else '├── '}{name}", 0 if node else 1, 0 if node else tokens
+        if node is None:
+            continue
+        inner = prefix + ("    " if is_last else "│   ")
+        if (max_depth is not None and depth >= max_depth) or (collapse_over is not None and node.file_count > collapse_over):
+            yield f"{inner}└── {_tree_summary(node.file_count, node.tokens, show_tokens)}", node.file_count, node.tokens
+        else:
+            stack.append((_tree_children(node), 0, inner, depth + 1))
+
+def _tree_children(node: _TreeNode) -> List[tuple[str, _TreeNode | None, int]]:
+    children: List[tuple[str, _TreeNode | None, int]] = [(name, node.dirs[name], 0) for name in sorted(node.dirs)]
+    children.extend((name, None, node.files[name]) for name in sorted(node.files))
+    return children
+
+def _tree_summary(files: int, tokens: int, show_tokens: bool) -> str:
+    summary = f"… {files:,} {'file' if files == 1 else 'files'}"
+    return f"{summary}, {_format_token_total(tokens)} tokens" if show_tokens else summary
+
+def _format_token_total(tokens: int) -> str:
+    if tokens >= 1_000_000:
+        return f"{tokens / 1_000_000:.1f}M"
+    if tokens >= 1_000:
+        return f"{tokens / 1_000:.1f}k"
+    return str(tokens)
+
+@lru_cache(maxsize=65536)
+def _line_tokens(line: str) -> int:
+    # cl100k always splits right after a newline, so the tokens of a tree block are at most
+    # the sum of its lines counted together with their newline.
+    return count_tokens(line + "\n")
+
+def _lines_within(lines: Iterable[tuple[str, int, int]], budget: int) -> List[str] | None:
+    """Return all *lines* if they fit in *budget* tokens, None as soon as they do not."""
+    taken: List[str] = []
+    for line, _files, _tokens in lines:
+        budget -= _line_tokens(line)
+        if budget < 0:
+            return None
+        taken.append(line)
+    return taken
+
+def _truncated_lines(root: _TreeNode, collapse_over: int | None, show_tokens: bool, budget: int) -> List[str]:
+    """Top-level lines that fit in *budget*, followed by a summary of the files left out."""
+    budget -= _line_tokens(f"└── {_tree_summary(root.file_count, root.tokens, show_tokens)}")
+    taken: List[str] = []
+    pending: List[str] = []
+    files_left, tokens_left = root.file_count, root.tokens
+    for line, files, tokens in _tree_lines(root, 1, collapse_over, show_tokens):
+        pending.append(line)
+        if not files:
+            # A directory line is kept together with the summary line that follows it.
+            continue
+        budget -= sum(_line_tokens(pending_line) for pending_line in pending)
+        if budget < 0:
+            break
+        taken.extend(pending)
+        pending.clear()
+        files_left -= files
+        tokens_left -= tokens
+    taken.append(f"└── {_tree_summary(files_left, tokens_left, show_tokens)}")
+    return taken
 
 def build_gitignore_spec(root_dir: str):
     """Return a PathSpec built from all .gitignore files under *root_dir* (or None)."""
-    patterns: List[str] = []
+    gitignore_paths: List[str] = []
     for current_root, _dirs, files in os.walk(root_dir):
         if ".gitignore" in files:
-            gi_path = os.path.join(current_root, ".gitignore")
-            try:
-                with open(gi_path, encoding="utf-8") as f:
-                    for raw in f:
-                        line = raw.strip()
-                        if not line or line.startswith("#"):
-                            continue
-                        rel_base = os.path.relpath(current_root, root_dir).replace(os.sep, "/")
-                        if rel_base != ".":
-                            line = f"{rel_base}/{line}"
-                        patterns.append(line)
-            except OSError:
-                pass
+            gitignore_paths.append(os.path.join(current_root, ".gitignore"))
+    patterns = read_gitignore_patterns(root_dir, gitignore_paths)
     if patterns:
-        return pathspec.PathSpec.from_lines("gitwildmatch", patterns)
-    return None
\ No newline at end of file
+        return compile_gitwildmatch(patterns)
+    return None
+
+def read_gitignore_patterns(root_dir: str, gitignore_paths: Iterable[str]) -> List[str]:
+    """Return patterns of the given .gitignore files, prefixed with their directory relative to *root_dir*."""
+    patterns: List[str] = []
+    for gi_path in gitignore_paths:
+        rel_base = os.path.relpath(os.path.dirname(gi_path), root_dir).replace(os.sep, "/")
+        try:
+            with open(gi_path, encoding="utf-8") as f:
+                patterns.extend(gitignore_lines_to_patterns(f, rel_base))
+        except OSError:
+            pass
+    return patterns
+
+def gitignore_lines_to_patterns(lines: Iterable[str], rel_base: str = ".") -> List[str]:
+    """Return the patterns of .gitignore *lines* from directory *rel_base* ("." for the root), prefixed with it."""
+    patterns: List[str] = []
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if rel_base != ".":
+            line = f"{rel_base}/{line}"
+        patterns.append(line)
+    return patterns
+
+def compile_gitwildmatch(patterns: Iterable[str]):
+    """Return a PathSpec for gitwildmatch *patterns* (imports pathspec on first use)."""
+    import pathspec
+
+    return pathspec.PathSpec.from_lines("gitwildmatch", patterns)
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""Testy importu archiwów zip/tar bez rozpakowywania."""
+from __future__ import annotations
+
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from prompt_assistant.cli import build_parser, run
+from prompt_assistant.core import (
+    ArchiveError,
+    FileEnumeration,
+    ImportBudget,
+    Session,
+    add_directory_import,
+    describe_enumeration,
+    is_archive_path,
+    scan_archive,
+    scan_directory,
+)
+
+FILES = {
+    "projekt-1.2/.gitignore": b"*.log\nbuild/\n",
+    "projekt-1.2/README.md": b"# Projekt\r\n",
+    "projekt-1.2/src/app.py": b"print('hej')\n",
+    "projekt-1.2/src/.gitignore": b"local.py\n",
+    "projekt-1.2/src/local.py": b"SECRET = 1\n",
+    "projekt-1.2/src/logo.png": b"\x89PNG\r\n\x1a\n\x00\xff\xfe",
+    "projekt-1.2/debug.log": b"log\n",
+    "projekt-1.2/build/out.txt": b"out\n",
+    "projekt-1.2/.git/config": b"[core]\n",
+    "projekt-1.2/docs/big.txt": b"x" * 5000,
+}
+
+
+def _write_zip(path: str, files: dict[str, bytes]) -> None:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+
+
+def _write_tar(path: str, files: dict[str, bytes], mode: str = "w:gz") -> None:
+    with tarfile.open(path, mode) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+class ArchiveImportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.zip_path = os.path.join(self.root, "projekt.zip")
+        self.tar_path = os.path.join(self.root, "projekt.tar.gz")
+        _write_zip(self.zip_path, FILES)
+        _write_tar(self.tar_path, FILES)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_zip_and_tar_match_import_of_extracted_directory(self) -> None:
+        extracted = os.path.join(self.root, "extracted")
+        with zipfile.ZipFile(self.zip_path) as archive:
+            archive.extractall(extracted)
+        on_disk = scan_directory(os.path.join(extracted, "projekt-1.2"))
+        expected = sorted((item.rel, item.content) for item in on_disk.files)
+        self.assertIn(("README.md", "# Projekt\n"), expected)
+
+        for path in (self.zip_path, self.tar_path):
+            with self.subTest(path=os.path.basename(path)):
+                imported = scan_archive(path)
+                self.assertEqual(sorted((item.rel, item.content) for item in imported.files), expected)
+                self.assertEqual(imported.name, "projekt-1.2")
+                self.assertEqual(imported.enumeration, FileEnumeration.ARCHIVE)
+                self.assertEqual(
+                    (imported.skipped_git, imported.skipped_binary, imported.total_bytes),
+                    (on_disk.skipped_git, on_disk.skipped_binary, on_disk.total_bytes),
+                )
+                self.assertEqual(describe_enumeration(imported), f"archiwum {os.path.basename(path)}")
+
+        self.assertEqual(len(scan_archive(self.tar_path, use_gitignore=False).files), len(expected) + 3)
+
+    def test_excludes_and_budget_use_header_sizes(self) -> None:
+        imported = scan_archive(self.zip_path, exclude_patterns=["*.md"])
+        self.assertEqual(imported.skipped_custom, 1)
+        self.assertNotIn("README.md", [item.rel for item in imported.files])
+
+        limited = scan_archive(self.tar_path, budget=ImportBudget(max_file_bytes=1000))
+        self.assertEqual(limited.skipped_size, ["docs/big.txt (5000 B)"])
+
+        stopped = scan_archive(self.tar_path, budget=ImportBudget(max_total_bytes=30))
+        self.assertIsNotNone(stopped.budget_stop)
+        self.assertLessEqual(stopped.total_bytes, 30)
+
+    def test_binary_members_do_not_consume_total_budget(self) -> None:
+        files = {"p/logo.png": os.urandom(20_000) + b"\0", "p/a.py": b"print('a')\n"}
+        for name, write in (("assets.zip", _write_zip), ("assets.tar", _write_tar)):
+            path = os.path.join(self.root, name)
+            write(path, files)
+            with self.subTest(archive=name):
+                imported = scan_archive(path, budget=ImportBudget(max_tokens=1000))
+                self.assertEqual([item.rel for item in imported.files], ["a.py"])
+                self.assertEqual(imported.skipped_binary, 1)
+                self.assertIsNone(imported.budget_stop)
+
+    def test_archive_without_common_root_is_named_after_file(self) -> None:
+        path = os.path.join(self.root, "flat.tar")
+        _write_tar(path, {"a.py": b"a = 1\n", "pkg/b.py": b"b = 2\n", "../evil.py": b"x\n"}, mode="w")
+        imported = scan_archive(path)
+        self.assertEqual(imported.name, "flat")
+        self.assertEqual(sorted(item.rel for item in imported.files), ["a.py", "pkg/b.py"])
+
+        session = Session()
+        tree_entry, file_entries = add_directory_import(session, imported)
+        self.assertEqual(tree_entry.path, "flat/.tree")
+        self.assertEqual([entry.root for entry in file_entries], ["flat", "flat"])
+
+    def test_cli_renders_archive_like_directory(self) -> None:
+        stdout = io.StringIO()
+        run(build_parser().parse_args(["projekt.tar.gz", "--format", "plain"]), stdout=stdout, cwd=self.root)
+        rendered = stdout.getvalue()
+        self.assertIn("FILE: projekt-1.2/.tree", rendered)
+        self.assertIn("FILE: src/app.py", rendered)
+        self.assertIn("print('hej')", rendered)
+        self.assertNotIn("SECRET", rendered)
+        with self.assertRaises(SystemExit):
+            run(build_parser().parse_args(["broken.zip"]), stdout=io.StringIO(), cwd=self._broken_zip())
+
+    def _broken_zip(self) -> str:
+        with open(os.path.join(self.root, "broken.zip"), "wb") as file_handle:
+            file_handle.write(b"to nie jest archiwum")
+        return self.root
+
+    def test_invalid_archive_raises(self) -> None:
+        path = os.path.join(self._broken_zip(), "broken.zip")
+        self.assertTrue(is_archive_path(path))
+        self.assertFalse(is_archive_path(self.root))
+        with self.assertRaises(ArchiveError):
+            scan_archive(path)
+        truncated = os.path.join(self.root, "truncated.tar")
+        _write_tar(truncated, {"a.txt": b"a\n", "b.txt": b"b" * 20000, "c.txt": b"c\n"}, mode="w")
+        with open(truncated, "r+b") as file_handle:
+            file_handle.truncate(5000)
+        with self.assertRaises(ArchiveError):
+            scan_archive(truncated)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Testy generatora syntetycznych repo i runnera benchmarków."""
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from benchmarks.core_bench import compare_reports, run_benchmarks
+from benchmarks.synthetic_repo import SyntheticRepoConfig, generate_files, write_repo
+
+
+class SyntheticRepoTests(unittest.TestCase):
+    def test_generator_is_deterministic(self) -> None:
+        config = SyntheticRepoConfig(file_count=200, seed=7)
+        first = generate_files(config)
+        second = generate_files(config)
+        self.assertEqual([(f.rel, f.data) for f in first], [(f.rel, f.data) for f in second])
+
+        other = generate_files(SyntheticRepoConfig(file_count=200, seed=8))
+        self.assertNotEqual([f.rel for f in first], [f.rel for f in other])
+
+    def test_generator_respects_ratios(self) -> None:
+        config = SyntheticRepoConfig(file_count=500, binary_ratio=0.2, gitignore_density=0.0)
+        files = generate_files(config)
+        binaries = [f for f in files if f.is_binary]
+        self.assertEqual(len([f for f in files if not f.is_gitignore]), 500)
+        self.assertFalse(any(f.is_gitignore for f in files))
+        self.assertTrue(50 < len(binaries) < 150)
+
+    def test_write_repo_creates_files(self) -> None:
+        with tempfile.TemporaryDirectory() as root_dir:
+            files = write_repo(root_dir, SyntheticRepoConfig(file_count=20))
+            for item in files:
+                self.assertTrue(os.path.isfile(os.path.join(root_dir, *item.rel.split("/"))))
+
+
+class CoreBenchTests(unittest.TestCase):
+    def test_run_benchmarks_reports_all_paths(self) -> None:
+        report = run_benchmarks([30], repeat=1)
+        results = report["results"]["30"]
+        for key in (
+            "scan_directory",
+            "is_binary",
+            "count_tokens",
+            "build_output_xml",
+            "build_output_markdown",
+            "build_output_plain",
+            "render_tree_structure",
+            "matches_filters",
+            "bulk_exclude",
+            "bulk_include",
+            "bulk_remove",
+        ):
+            self.assertIn(key, results)
+            self.assertGreaterEqual(results[key]["median_s"], 0.0)
+
+    def test_compare_reports_marks_regressions(self) -> None:
+        baseline = {"results": {"10": {"scan_directory": {"median_s": 1.0}}}}
+        current = {"results": {"10": {"scan_directory": {"median_s": 2.0}}}}
+        lines = compare_reports(baseline, current)
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith("!"))
+
+
+@unittest.skipUnless(importlib.util.find_spec("PyQt5"), "wymaga PyQt5")
+class GuiBenchTests(unittest.TestCase):
+    def test_latency_stats_use_nearest_rank(self) -> None:
+        from benchmarks.gui_bench import latency_stats
+
+        stats = latency_stats([0.001 * value for value in range(1, 101)])
+        self.assertAlmostEqual(stats["p50_ms"], 50.0)
+        self.assertAlmostEqual(stats["p99_ms"], 99.0)
+        self.assertAlmostEqual(stats["max_ms"], 100.0)
+        self.assertEqual(stats["samples"], 100)
+
+    def test_run_gui_benchmarks_reports_handlers(self) -> None:
+        from benchmarks.gui_bench import run_gui_benchmarks
+
+        report = run_gui_benchmarks([30], repeat=1)
+        results = report["results"]["30"]
+        for key in (
+            "attach_directory",
+            "populate_list",
+            "update_token_label",
+            "keystroke_name_filter",
+            "keystroke_extension_filter",
+            "keystroke_prompt",
+            "bulk_exclude",
+            "bulk_include",
+            "bulk_remove",
+        ):
+            self.assertIn(key, results)
+            self.assertGreaterEqual(results[key]["p90_ms"], results[key]["p50_ms"])
+        self.assertEqual(results["keystroke_name_filter"]["samples"], 2 * len("session"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Testy dziennika cofania i ponawiania operacji masowych."""
+from __future__ import annotations
+
+import unittest
+
+from prompt_assistant.core import (
+    ChangeJournal,
+    EntrySourceType,
+    JournalAction,
+    PathTrie,
+    RollupKind,
+    Session,
+    TokenRollup,
+    add_entry,
+    clear_session,
+    count_session_tokens,
+    create_entry,
+    remove_entry,
+    session_store,
+)
+from prompt_assistant.utils import count_tokens
+
+
+class ChangeJournalTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = Session()
+        self.rollup = TokenRollup.for_session(self.session)
+        self.trie = PathTrie.for_session(self.session)
+        self.journal = ChangeJournal.for_session(self.session, limit=3)
+        self.entries = []
+        for number in range(6):
+            content = f"print({number})\n" * (number + 1)
+            entry = create_entry(f"src/m{number}.py", EntrySourceType.DIRECTORY_FILE, content, root="repo")
+            entry.token_count_cache = count_tokens(content)
+            add_entry(self.session, entry)
+            self.entries.append(entry)
+
+    def _ids(self, *numbers: int) -> list[str]:
+        return [self.entries[number].entry_id for number in numbers]
+
+    def test_inclusion_changes_record_only_changed_ids(self) -> None:
+        self.assertEqual(self.journal.exclude(self._ids(1, 2)), 2)
+        self.assertEqual(self.journal.exclude(self._ids(2, 3), payload="gui"), 1)
+        record = self.journal.undo()
+        self.assertEqual((record.action, record.entry_ids, record.payload), (JournalAction.EXCLUDE, (self.entries[3].entry_id,), "gui"))
+        self.assertTrue(self.entries[3].include_in_output)
+        self.assertFalse(self.entries[2].include_in_output)
+
+        self.journal.redo()
+        self.assertFalse(self.entries[3].include_in_output)
+        self.assertFalse(self.journal.can_redo)
+        self.assertEqual(self.journal.include(self._ids(0)), 0)
+        self.assertEqual(self.journal.undo().entry_ids, (self.entries[3].entry_id,))
+
+    def test_undo_remove_restores_entries_in_place(self) -> None:
+        totals = count_session_tokens(self.session)
+        before = list(self.session.entries)
+        self.assertEqual(self.journal.remove(self._ids(0, 2, 5) + ["missing"]), 3)
+        self.assertEqual(self.session.entries, self._entries(1, 3, 4))
+        self.assertIsNone(self.trie.stats("repo/src/m2.py"))
+
+        record = self.journal.undo()
+        self.assertEqual(record.anchors, (None, self.entries[1].entry_id, self.entries[4].entry_id))
+        self.assertEqual(self.session.entries, before)
+        self.assertIs(session_store(self.session).get(self.entries[2].entry_id), self.entries[2])
+        self.assertEqual(count_session_tokens(self.session), totals)
+        self.assertEqual(self.trie.stats("repo").files, 6)
+        self.assertEqual(sum(row.tokens for row in self.rollup.rows(RollupKind.ROOT)), totals[1])
+
+        self.journal.redo()
+        self.assertEqual(self.session.entries, self._entries(1, 3, 4))
+        self.journal.undo()
+        self.assertEqual(self.session.entries, before)
+
+    def test_undo_skips_entries_changed_outside_journal(self) -> None:
+        self.journal.remove(self._ids(2, 4))
+        remove_entry(self.session, self.entries[0].entry_id)
+        self.journal.undo()
+        self.assertEqual(self.session.entries, self._entries(1, 2, 3, 4, 5))
+
+        # Bez poprzednika wpis wraca na koniec listy.
+        self.journal.remove(self._ids(2))
+        remove_entry(self.session, self.entries[1].entry_id)
+        self.journal.undo()
+        self.assertEqual(self.session.entries, self._entries(3, 4, 5, 2))
+
+        self.journal.exclude(self._ids(2))
+        remove_entry(self.session, self.entries[2].entry_id)
+        self.assertIsNotNone(self.journal.undo())
+        self.assertNotIn(self.entries[2], self.session.entries)
+
+    def test_history_is_bounded_and_cleared_with_session(self) -> None:
+        for number in range(5):
+            self.journal.exclude(self._ids(number))
+        undone = 0
+        while self.journal.undo() is not None:
+            undone += 1
+        self.assertEqual(undone, 3)
+        self.assertEqual([entry.include_in_output for entry in self.session.entries], [False, False, True, True, True, True])
+
+        clear_session(self.session)
+        self.assertFalse(self.journal.can_undo or self.journal.can_redo)
+        self.assertIsNone(self.journal.redo())
+
+    def _entries(self, *numbers: int) -> list:
+        return [self.entries[number] for number in numbers]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""Testy kompaktowania treści plików przed renderowaniem."""
+from __future__ import annotations
+
+import ast
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+
+from prompt_assistant import cli
+from prompt_assistant.core import (
+    CompactionLanguage,
+    EntrySourceType,
+    Session,
+    add_entry,
+    compact_session,
+    compact_text,
+    create_entry,
+    detect_language,
+    format_compaction_report,
+)
+from prompt_assistant.core import compaction
+
+PYTHON_SOURCE = '''"""Moduł z opisem."""
+# licencja
+import os  # komentarz
+
+
+class Config:
+    """Opis klasy."""
+
+    def path(self):
+        """Tylko docstring."""
+
+    def url(self):
+        return "http://example.com/#anchor"  # adres
+
+    SQL = """
+    SELECT 1  # to nie komentarz
+
+    FROM t
+    """
+'''
+
+
+class CompactTextTests(unittest.TestCase):
+    def test_python_drops_comments_docstrings_and_blank_lines(self) -> None:
+        compacted = compact_text(PYTHON_SOURCE, CompactionLanguage.PYTHON)
+        ast.parse(compacted)
+        self.assertNotIn("licencja", compacted)
+        self.assertNotIn("Opis klasy", compacted)
+        self.assertNotIn("# adres", compacted)
+        self.assertIn("    def path(self):\n        ...", compacted)
+        self.assertIn('"http://example.com/#anchor"', compacted)
+        # Treść wieloliniowego napisu (z pustą linią) zostaje bez zmian.
+        self.assertIn("SELECT 1  # to nie komentarz\n\n    FROM t", compacted)
+
+    def test_invalid_python_only_collapses_blank_lines(self) -> None:
+        self.assertEqual(compact_text("def (:\n\n\n  x  \n", CompactionLanguage.PYTHON), "def (:\n\n  x")
+
+    def test_c_like_keeps_comment_markers_inside_strings(self) -> None:
+        source = '/* licencja */\nconst url = "http://x/*y*/"; // komentarz\n\n\nlet a = 1;\n'
+        compacted = compact_text(source, CompactionLanguage.C_LIKE)
+        self.assertEqual(compacted, 'const url = "http://x/*y*/";\n\nlet a = 1;')
+
+    def test_css_keeps_urls_and_scss_drops_line_comments(self) -> None:
+        source = "/* baner */\nbody { background: url(http://example.com/bg.png); color: red; }\n"
+        self.assertEqual(
+            compact_text(source, CompactionLanguage.CSS, path="a.css"),
+            "body { background: url(http://example.com/bg.png); color: red; }",
+        )
+        scss = '// mixin\n.a { background: url(//cdn/x.png); } // ogon\n$s: "a//b";\n'
+        self.assertEqual(
+            compact_text(scss, CompactionLanguage.CSS, path="a.scss"),
+            '.a { background: url(//cdn/x.png); }\n$s: "a//b";',
+        )
+        # Ta sama treść jako zwykły CSS nie może trafić w wynik z cache dla SCSS.
+        self.assertNotIn("// ogon", compaction.compacted_content(scss, "b.scss"))
+        self.assertEqual(compaction.compacted_content(scss, "b.css"), scss.rstrip("\n"))
+
+    def test_hash_comments_keep_yaml_block_scalars_and_heredocs(self) -> None:
+        yaml = "# opis\nrun: |\n  # keep me\n\n\n  echo hi\n# koniec\nname: ci\n"
+        self.assertEqual(
+            compact_text(yaml, CompactionLanguage.HASH_COMMENTS, path="ci.yml"),
+            "run: |\n  # keep me\n\n\n  echo hi\nname: ci",
+        )
+        shell = "# opis\ncat <<'EOF' > conf\n# keep me\n\n\nEOF\n# drop\necho $((1 << 2))\n"
+        self.assertEqual(
+            compact_text(shell, CompactionLanguage.HASH_COMMENTS, path="run.sh"),
+            "cat <<'EOF' > conf\n# keep me\n\n\nEOF\necho $((1 << 2))",
+        )
+
+    def test_js_regex_literals_are_not_comments(self) -> None:
+        source = "const re = /\\/\\//g; const x = 1; // koniec\nif (/[/*]/.test(s)) return /a\\/\\/b/i;\nconst y = a / b; // c / d\n"
+        self.assertEqual(
+            compact_text(source, CompactionLanguage.C_LIKE, path="src/app.ts"),
+            "const re = /\\/\\//g; const x = 1;\nif (/[/*]/.test(s)) return /a\\/\\/b/i;\nconst y = a / b;",
+        )
+
+    def test_hash_comments_keep_toml_multiline_strings_and_shebang(self) -> None:
+        toml = '# opis\nkey = """  \n# inside\n\n\n"""\nlit = \'\'\'\n# też\'\'\'\n# drop\nname = "x"\n'
+        self.assertEqual(
+            compact_text(toml, CompactionLanguage.HASH_COMMENTS, path="pyproject.toml"),
+            'key = """  \n# inside\n\n\n"""\nlit = \'\'\'\n# też\'\'\'\nname = "x"',
+        )
+        script = "#!/usr/bin/env bash\n# opis\necho hi\n"
+        self.assertEqual(compact_text(script, CompactionLanguage.HASH_COMMENTS, path="run.sh"), "#!/usr/bin/env bash\necho hi")
+
+    def test_json_is_minified(self) -> None:
+        self.assertEqual(compact_text('{\n  "a": [1, 2],\n  "b": "ż"\n}\n', CompactionLanguage.JSON), '{"a":[1,2],"b":"ż"}')
+
+    def test_language_detection(self) -> None:
+        self.assertEqual(detect_language("src/app.py"), CompactionLanguage.PYTHON)
+        self.assertEqual(detect_language("web/App.TSX"), CompactionLanguage.C_LIKE)
+        self.assertEqual(detect_language("Makefile"), CompactionLanguage.HASH_COMMENTS)
+        self.assertEqual(detect_language("styles/site.SCSS"), CompactionLanguage.CSS)
+        self.assertEqual(detect_language("notes.txt"), CompactionLanguage.TEXT)
+
+
+class CompactSessionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        compaction._cache.clear()
+        self.session = Session(prompt_text="Zadanie")
+        self.source = create_entry("pkg/config.py", EntrySourceType.DIRECTORY_FILE, PYTHON_SOURCE, root="repo")
+        self.tree = create_entry("repo/.tree", EntrySourceType.DIRECTORY_TREE, ".\n└── pkg")
+        add_entry(self.session, self.source)
+        add_entry(self.session, self.tree)
+
+    def test_session_copy_reports_savings_and_leaves_original(self) -> None:
+        compacted, report = compact_session(self.session)
+
+        self.assertEqual(self.source.content, PYTHON_SOURCE)
+        self.assertIs(compacted.entries[1], self.tree)
+        self.assertEqual(compacted.prompt_text, "Zadanie")
+        self.assertEqual([item.path for item in report.files], ["repo/pkg/config.py"])
+        self.assertGreater(report.saved, 0)
+        self.assertEqual(compacted.entries[0].token_count_cache, report.tokens_after)
+        lines = format_compaction_report(report)
+        self.assertTrue(lines[0].startswith("Kompaktowanie: "))
+        self.assertIn("repo/pkg/config.py", lines[1])
+
+    def test_repeated_compaction_reuses_cache(self) -> None:
+        compact_session(self.session)
+        with patch.object(compaction, "compact_text", side_effect=AssertionError("cache miss")):
+            _compacted, report = compact_session(self.session)
+        self.assertEqual(len(report.files), 1)
+
+
+class CliCompactTests(unittest.TestCase):
+    def test_cli_compact_writes_report_to_stderr(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "config.py")
+            with open(source, "w", encoding="utf-8") as file_handle:
+                file_handle.write(PYTHON_SOURCE)
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with patch.object(sys, "argv", ["promptglue", "--compact", source]):
+                with redirect_stdout(stdout), redirect_stderr(stderr):
+                    cli.main()
+
+        self.assertNotIn("licencja", stdout.getvalue())
+        self.assertIn("class Config:", stdout.getvalue())
+        self.assertIn("Kompaktowanie:", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Testy indeksu pełnotekstowego treści wpisów."""
+from __future__ import annotations
+
+import re
+import unittest
+from unittest.mock import patch
+
+from prompt_assistant.core import (
+    ContentIndex,
+    EntrySourceType,
+    Session,
+    add_entry,
+    clear_session,
+    create_entry,
+    remove_entry,
+    update_entry_content,
+)
+from prompt_assistant.core import content_index
+
+CONTENTS = [
+    "def load_config(path):\n    return parse(path)\n",
+    "class SessionStore:\n    pass\n",
+    "value = load_config('app.toml')\n",
+    "zażółć gęślą jaźń -> łączenie\n",
+    "x->y; a.b(c)\n",
+    "",
+]
+
+
+class ContentIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = Session()
+        self.index = ContentIndex.for_session(self.session)
+        for number, content in enumerate(CONTENTS):
+            add_entry(self.session, create_entry(f"f{number}.py", EntrySourceType.FILE, content))
+
+    def assertMatchesScan(self, query: str, *, regex: bool = False, ignore_case: bool = False) -> None:
+        pattern = re.compile(query if regex else re.escape(query), re.IGNORECASE if ignore_case else 0)
+        expected = [entry for entry in self.session.entries if pattern.search(entry.content)]
+        self.assertEqual(self.index.search(query, regex=regex, ignore_case=ignore_case), expected, query)
+
+    def test_substrings_match_linear_scan(self) -> None:
+        for query in ("load_config", "ad_conf", "config(", "g(path", "(path):\n    return",
+                      "->", "a.b(c", "gęślą ja", "Store", "nothing here"):
+            self.assertMatchesScan(query)
+        self.assertMatchesScan("SESSIONstore", ignore_case=True)
+        self.assertMatchesScan("ŁĄCZENIE", ignore_case=True)
+        self.assertEqual(self.index.search(""), [])
+
+    def test_regex_queries_use_required_literals(self) -> None:
+        for query in (r"load_config\('\w+", r"def (load)_config", r"Session|łączenie", r"\d", r"(?i)CLASS\s+\w+"):
+            self.assertMatchesScan(query, regex=True)
+        self.index.search(r"load_config\(", regex=True)
+        self.assertEqual(self.index.last_candidates, 2)
+        with self.assertRaises(re.error):
+            self.index.search("load_config(", regex=True)
+
+    def test_index_follows_session_changes(self) -> None:
+        self.assertEqual(len(self.index.search("load_config")), 2)
+        entry = self.session.entries[0]
+        self.assertTrue(update_entry_content(self.session, entry, "def read_settings():\n    pass\n"))
+        self.assertEqual(self.index.search("load_config"), [self.session.entries[2]])
+        self.assertEqual(self.index.search("read_settings"), [entry])
+
+        remove_entry(self.session, self.session.entries[2].entry_id)
+        self.assertEqual(self.index.search("load_config"), [])
+        clear_session(self.session)
+        self.assertEqual(self.index.search("def"), [])
+        self.assertEqual(len(self.index), 0)
+
+    def test_removed_rows_are_compacted(self) -> None:
+        self.index.search("pass")
+        with patch.object(content_index, "MIN_STALE_ROWS_FOR_REBUILD", 0):
+            for entry in list(self.session.entries[:4]):
+                remove_entry(self.session, entry.entry_id)
+            self.assertEqual(self.index.search("->"), [self.session.entries[0]])
+        # "->" nie zawiera słów, więc sprawdzane są wszystkie wiersze: po przebudowie tylko aktualne.
+        self.assertEqual(self.index.last_candidates, 2)
+        self.assertEqual(len(self.index), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
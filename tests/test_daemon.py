@@ -0,0 +1,152 @@
+"""Testy daemona renderowania i cache treści plików."""
+from __future__ import annotations
+
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+
+from prompt_assistant.cli import build_parser, run
+from prompt_assistant.core import FileContentCache
+
+
+def _write(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as file_handle:
+        file_handle.write(text)
+
+
+def _local_render(argv: list[str], cwd: str) -> str:
+    stdout = io.StringIO()
+    run(build_parser().parse_args(argv), stdout=stdout, stderr=io.StringIO(), cwd=cwd)
+    return stdout.getvalue()
+
+
+class FileContentCacheTests(unittest.TestCase):
+    def test_entries_are_invalidated_by_size_and_mtime(self) -> None:
+        cache = FileContentCache()
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "a.py")
+            _write(path, "a = 1\n")
+            first = cache.read(path)
+            self.assertIs(cache.read(path), first)
+            cache.remember_tokens(path, first.content, 4)
+            self.assertEqual(cache.read(path).token_count, 4)
+
+            _write(path, "a = 1\nb = 2\n")
+            second = cache.read(path)
+            self.assertEqual(second.content, "a = 1\nb = 2\n")
+            self.assertIsNone(second.token_count)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_least_recently_used_files_are_evicted(self) -> None:
+        cache = FileContentCache(max_bytes=10)
+        with tempfile.TemporaryDirectory() as root:
+            for name in ("a", "b", "c"):
+                _write(os.path.join(root, name), "12345\n")
+                cache.read(os.path.join(root, name))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.cached_bytes, 6)
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "wymaga gniazd Unix")
+class RenderDaemonTests(unittest.TestCase):
+    def setUp(self) -> None:
+        from prompt_assistant.daemon import RenderDaemon
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        os.makedirs(os.path.join(self.root, "repo", "pkg"))
+        _write(os.path.join(self.root, "repo", "pkg", "a.py"), "print('a')\n")
+        _write(os.path.join(self.root, "notes.md"), "# Notatki\n")
+        self.daemon = RenderDaemon()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_render_matches_local_cli_and_reuses_cache(self) -> None:
+        argv = ["--prompt", "Przejrzyj", "--format", "markdown", "repo", "notes.md"]
+        first = self.daemon.handle({"argv": argv, "cwd": self.root})
+        self.assertEqual(first.exit_code, 0, first.stderr)
+        self.assertEqual(first.stdout, _local_render(argv, self.root))
+
+        second = self.daemon.handle({"argv": argv, "cwd": self.root})
+        self.assertEqual(second.stdout, first.stdout)
+        self.assertEqual(self.daemon.content_cache.hits, 2)
+        cached = self.daemon.content_cache.read(os.path.join(self.root, "repo", "pkg", "a.py"))
+        self.assertIsNotNone(cached.token_count)
+
+    def test_changed_file_is_read_again(self) -> None:
+        argv = ["repo"]
+        self.daemon.handle({"argv": argv, "cwd": self.root})
+        _write(os.path.join(self.root, "repo", "pkg", "a.py"), "print('zmieniony plik')\n")
+        response = self.daemon.handle({"argv": argv, "cwd": self.root})
+        self.assertIn("zmieniony plik", response.stdout)
+
+    def test_errors_are_returned_as_exit_codes(self) -> None:
+        missing = self.daemon.handle({"argv": ["missing.py"], "cwd": self.root})
+        self.assertEqual(missing.exit_code, 1)
+        self.assertIn("Nie znaleziono pliku: missing.py", missing.stderr)
+
+        usage = self.daemon.handle({"argv": ["--format", "yaml"], "cwd": self.root})
+        self.assertEqual(usage.exit_code, 2)
+        self.assertIn("invalid choice", usage.stderr)
+
+        self.assertEqual(self.daemon.handle({"argv": "repo", "cwd": "rel"}).exit_code, 2)
+
+    def test_client_talks_to_server_over_socket(self) -> None:
+        from prompt_assistant.daemon import DaemonUnavailable, create_server, request_render
+
+        socket_path = os.path.join(self.root, "daemon.sock")
+        with self.assertRaises(DaemonUnavailable):
+            request_render(socket_path, ["repo"], self.root)
+
+        server = create_server(socket_path, self.daemon)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            response = request_render(socket_path, ["--output", "out.md", "repo"], self.root, timeout=10)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertEqual(response.exit_code, 0, response.stderr)
+        with open(os.path.join(self.root, "out.md"), encoding="utf-8") as file_handle:
+            self.assertIn("<file path='pkg/a.py'>", file_handle.read())
+
+        # Gniazdo po zatrzymanym serwerze jest usuwane przy następnym starcie.
+        create_server(socket_path, self.daemon).server_close()
+
+    def test_hung_daemon_times_out_and_cli_renders_locally(self) -> None:
+        from prompt_assistant import cli, daemon
+
+        socket_path = os.path.join(self.root, "hung.sock")
+        # Gniazdo przyjmuje połączenia, ale nikt nie odpowiada (zawieszony daemon).
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as hung:
+            hung.bind(socket_path)
+            hung.listen()
+            started = time.monotonic()
+            with self.assertRaises(daemon.DaemonUnavailable):
+                daemon.request_render(socket_path, ["repo"], self.root, timeout=0.2)
+            self.assertLess(time.monotonic() - started, 5)
+
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            argv = ["prompt_assistant", "--daemon", socket_path, os.path.join(self.root, "notes.md")]
+            with (
+                patch.object(daemon, "DAEMON_RESPONSE_TIMEOUT", 0.2),
+                patch("sys.argv", argv),
+                redirect_stdout(stdout),
+                redirect_stderr(stderr),
+            ):
+                cli.main()
+        self.assertIn("Daemon niedostępny", stderr.getvalue())
+        self.assertIn("# Notatki", stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
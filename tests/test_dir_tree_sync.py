@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 import unittest
+from unittest.mock import patch
 
-from prompt_assistant.core import EntrySourceType, Session, add_entry, create_entry, get_entry
+from prompt_assistant.core import EntrySourceType, Session, TreeBudget, add_entry, create_entry, get_entry
+from prompt_assistant.gui import controllers
 from prompt_assistant.gui.controllers import _sync_directory_tree_entries
 
 
@@ -71,6 +73,30 @@ class DirectoryTreeSyncTests(unittest.TestCase):
         self.assertEqual(updated_tree.content, ".")
         self.assertFalse(updated_tree.include_in_output)
 
+    def test_collapsed_summary_does_not_depend_on_background_counts(self) -> None:
+        window = _DummyWindow()
+        tree_entry = create_entry("repo/.tree", EntrySourceType.DIRECTORY_TREE, ".")
+        add_entry(window.session, tree_entry)
+        files = []
+        for index in range(3):
+            content = f"value = {index}\n" * 40
+            entry = create_entry(f"pkg/m{index}.py", EntrySourceType.DIRECTORY_FILE, content, size=len(content))
+            add_entry(window.session, entry)
+            files.append({"rel": entry.path, "excluded": False, "entry_id": entry.entry_id})
+        window.attached_dirs.append({"name": "repo", "tree": ".", "tree_entry_id": tree_entry.entry_id, "files": files})
+
+        with patch.object(controllers, "TREE_BUDGET", TreeBudget(collapse_over=2)):
+            _sync_directory_tree_entries(window)
+            before = get_entry(window.session, tree_entry.entry_id).content
+            # Dokładne liczby dochodzą z wątków w tle; drzewo nie może się od nich zmienić.
+            for file_obj in files:
+                get_entry(window.session, file_obj["entry_id"]).token_count_cache = 7
+            window.attached_dirs[0]["tree_dirty"] = True
+            _sync_directory_tree_entries(window)
+
+        self.assertIn("3 files", before)
+        self.assertEqual(get_entry(window.session, tree_entry.entry_id).content, before)
+
 
 if __name__ == "__main__":
     unittest.main()
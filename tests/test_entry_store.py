@@ -0,0 +1,127 @@
+"""Testy kolumnowego indeksu wpisów sesji."""
+from __future__ import annotations
+
+import unittest
+
+from prompt_assistant.core import (
+    EntrySourceType,
+    Session,
+    add_entry,
+    clear_session,
+    count_session_tokens,
+    create_entry,
+    estimate_session_tokens,
+    exclude_entries,
+    get_entry,
+    mask_and,
+    mask_not,
+    mask_or,
+    remove_entry,
+    session_store,
+    update_entry_content,
+)
+from prompt_assistant.utils import count_tokens
+
+
+def _loop_total(session: Session) -> int:
+    return sum(
+        count_tokens(entry.content)
+        for entry in session.entries
+        if entry.include_in_output and entry.read_error is None
+    )
+
+
+class EntryStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = Session(prompt_text="Zadanie")
+        self.entries = [
+            create_entry(f"src/m{index}.py", EntrySourceType.DIRECTORY_FILE, f"value = {index}\n" * (index + 1))
+            for index in range(6)
+        ]
+        self.broken = create_entry("bad.bin", EntrySourceType.FILE, "", read_error="binary", include_in_output=False)
+        for entry in (*self.entries, self.broken):
+            add_entry(self.session, entry)
+        self.store = session_store(self.session)
+
+    def test_totals_follow_session_operations(self) -> None:
+        self.assertEqual(count_session_tokens(self.session)[1], _loop_total(self.session))
+        self.assertEqual(self.store.counts(), (6, 1))
+
+        exclude_entries(self.session, [self.entries[0].entry_id, self.entries[1].entry_id])
+        remove_entry(self.session, self.entries[2].entry_id)
+        self.assertEqual(count_session_tokens(self.session)[1], _loop_total(self.session))
+        self.assertEqual(self.store.counts(), (3, 3))
+
+        clear_session(self.session)
+        self.assertEqual(count_session_tokens(self.session), (0, 0, 0))
+        self.assertEqual(len(self.store), 0)
+
+    def test_content_change_is_applied_on_notify(self) -> None:
+        count_session_tokens(self.session)
+        entry = self.entries[3]
+        self.assertTrue(update_entry_content(self.session, entry, "x = 1\n" * 50))
+        self.assertFalse(estimate_session_tokens(self.session).exact)
+        self.assertEqual(count_session_tokens(self.session)[1], _loop_total(self.session))
+
+    def test_direct_flag_changes_are_picked_up_by_exact_count(self) -> None:
+        count_session_tokens(self.session)
+        self.entries[0].include_in_output = False
+        self.entries[1].read_error = "zniknął"
+        self.broken.include_in_output = True
+        self.broken.read_error = None
+        self.assertEqual(self.store.sync(self.session.entries), 3)
+        self.assertEqual(self.store.sync(self.session.entries), 0)
+        self.entries[2].include_in_output = False
+        self.assertEqual(count_session_tokens(self.session)[1], _loop_total(self.session))
+
+    def test_direct_content_change_with_cleared_cache_is_recounted(self) -> None:
+        count_session_tokens(self.session)
+        entry = self.entries[3]
+        entry.content = "def handler(value):\n    return value + 1\n" * 10
+        entry.token_count_cache = None
+        self.assertEqual(count_session_tokens(self.session)[1], _loop_total(self.session))
+
+    def test_entries_swapped_in_place_are_found(self) -> None:
+        count_session_tokens(self.session)
+        other = create_entry("other.py", EntrySourceType.FILE, "w = 4\n" * 20)
+        replaced = self.session.entries[2]
+        self.session.entries[2] = other
+        self.assertIs(get_entry(self.session, other.entry_id), other)
+        self.assertIsNone(get_entry(self.session, replaced.entry_id))
+        self.assertEqual(count_session_tokens(self.session)[1], _loop_total(self.session))
+
+    def test_counts_made_outside_the_session_are_picked_up(self) -> None:
+        estimate = estimate_session_tokens(self.session)
+        self.assertEqual(len(estimate.pending_entries), 6)
+        for entry in self.entries:
+            entry.token_count_cache = count_tokens(entry.content)
+        estimate = estimate_session_tokens(self.session)
+        self.assertEqual(estimate.pending_entries, [])
+        self.assertEqual(estimate.attachments.tokens, _loop_total(self.session))
+
+    def test_masks_select_entries_by_status(self) -> None:
+        exclude_entries(self.session, [self.entries[0].entry_id])
+        self.assertEqual(self.store.select(self.store.error_mask()), [self.broken])
+        self.assertEqual(self.store.select(self.store.excluded_mask()), [self.entries[0], self.broken])
+        active = self.store.active_mask()
+        self.assertEqual(mask_or(active, self.store.excluded_mask()).count(1), 7)
+        self.assertEqual(mask_and(active, mask_not(active)).count(1), 0)
+
+    def test_rows_are_reused_and_lookup_is_by_id(self) -> None:
+        row = self.store.row_of(self.entries[4].entry_id)
+        remove_entry(self.session, self.entries[4].entry_id)
+        self.assertIsNone(get_entry(self.session, self.entries[4].entry_id))
+        extra = create_entry("extra.py", EntrySourceType.FILE, "y = 2\n")
+        add_entry(self.session, extra)
+        self.assertEqual(self.store.row_of(extra.entry_id), row)
+        self.assertIs(get_entry(self.session, extra.entry_id), extra)
+
+    def test_entries_added_directly_trigger_rebuild(self) -> None:
+        direct = create_entry("direct.py", EntrySourceType.FILE, "z = 3\n")
+        self.session.entries.append(direct)
+        self.assertEqual(count_session_tokens(self.session)[1], _loop_total(self.session))
+        self.assertIs(get_entry(Session(entries=[direct]), direct.entry_id), direct)
+
+
+if __name__ == "__main__":
+    unittest.main()
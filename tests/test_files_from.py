@@ -0,0 +1,143 @@
+"""Testy listy plików z `--files-from`: strumień ścieżek, równoległy odczyt i renderer strumieniowy."""
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import unittest
+
+from prompt_assistant.cli import build_parser, run
+from prompt_assistant.core import (
+    EntrySourceType,
+    LoadStatus,
+    OutputFormat,
+    Session,
+    add_entry,
+    build_output,
+    create_entry,
+    iter_path_list,
+    load_files,
+    set_entry_inclusion,
+    write_output,
+)
+
+
+class _TrickleStream:
+    """Strumień oddający po kilka bajtów, żeby separatory wypadały na granicach odczytów."""
+
+    def __init__(self, data: bytes, step: int = 3) -> None:
+        self._data = data
+        self._step = step
+
+    def read(self, _size: int) -> bytes:
+        chunk, self._data = self._data[: self._step], self._data[self._step :]
+        return chunk
+
+
+class FilesFromTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.paths = []
+        for number in range(40):
+            path = f"src/m{number:02d}.py"
+            self._write(path, f"VALUE = {number}\n".encode())
+            self.paths.append(path)
+        self._write("assets/logo.png", b"\x89PNG\r\n\x1a\n\x00\xff\xfe")
+        self._write("big.txt", b"x" * 5000)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write(self, rel: str, data: bytes) -> None:
+        full = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as file_handle:
+            file_handle.write(data)
+
+    def test_iter_path_list_splits_across_reads(self) -> None:
+        data = b"a.py\0dir/b c.py\0\0caf\xc3\xa9.py\0"
+        self.assertEqual(list(iter_path_list(_TrickleStream(data), null=True)), ["a.py", "dir/b c.py", "café.py"])
+        lines = b"a.py\r\n\nb.py\nlast.py"
+        self.assertEqual(list(iter_path_list(_TrickleStream(lines))), ["a.py", "b.py", "last.py"])
+        self.assertEqual(list(iter_path_list(io.BytesIO(b""), null=True)), [])
+
+    def test_load_files_keeps_order_and_bounds_in_flight_window(self) -> None:
+        consumed = []
+
+        def paths():
+            for path in self.paths:
+                consumed.append(path)
+                yield path
+
+        loaded = load_files(paths(), cwd=self.root, workers=2, window=5)
+        first = next(loaded)
+        self.assertEqual((first.path, first.content), ("src/m00.py", "VALUE = 0\n"))
+        self.assertLessEqual(len(consumed), 5)
+        self.assertEqual([item.path for item in loaded], self.paths[1:])
+        self.assertEqual(len(consumed), len(self.paths))
+
+        statuses = {
+            item.path: item.status
+            for item in load_files(["assets/logo.png", "big.txt", "missing.py", "src"], cwd=self.root, max_file_bytes=1000)
+        }
+        self.assertEqual(
+            statuses,
+            {
+                "assets/logo.png": LoadStatus.BINARY,
+                "big.txt": LoadStatus.TOO_LARGE,
+                "missing.py": LoadStatus.ERROR,
+                "src": LoadStatus.ERROR,
+            },
+        )
+
+    def test_write_output_matches_build_output(self) -> None:
+        for output_format in OutputFormat:
+            with self.subTest(output_format=output_format):
+                session = Session(prompt_text="Prompt", output_format=output_format)
+                for path, content in (("a.py", "a = 1\n"), ("empty.txt", ""), ("b.py", "b = 2")):
+                    add_entry(session, create_entry(path, EntrySourceType.FILE, content))
+                set_entry_inclusion(session, session.entries[1].entry_id, False)
+                extra = [create_entry("c.py", EntrySourceType.FILE, "c = 3\n")]
+
+                expected_session = Session(prompt_text="Prompt", output_format=output_format)
+                for entry in session.entries + extra:
+                    add_entry(expected_session, entry)
+                stream = io.StringIO()
+                self.assertEqual(write_output(stream, session, iter(extra)), 3)
+                self.assertEqual(stream.getvalue(), build_output(expected_session).rendered_output)
+
+    def test_cli_stdin_list_matches_positional_files(self) -> None:
+        positional = io.StringIO()
+        run(build_parser().parse_args(["--prompt", "P", *self.paths]), stdout=positional, cwd=self.root)
+
+        streamed = io.StringIO()
+        stderr = io.StringIO()
+        listing = "\0".join(self.paths + ["assets/logo.png", "missing.py"]).encode()
+        args = build_parser().parse_args(["--files-from", "-", "--null", "--prompt", "P"])
+        self.assertEqual(run(args, stdout=streamed, stderr=stderr, cwd=self.root, stdin=io.BytesIO(listing)), 0)
+        self.assertEqual(streamed.getvalue(), positional.getvalue())
+        self.assertIn("Pominięto (błąd odczytu): missing.py", stderr.getvalue())
+        self.assertIn("Pominięto pliki binarne z listy: 1", stderr.getvalue())
+
+    def test_cli_list_file_with_output_and_limits(self) -> None:
+        self._write("files.txt", "big.txt\nsrc/m01.py\n".encode())
+        stderr = io.StringIO()
+        args = build_parser().parse_args(
+            ["--files-from", "files.txt", "--max-file-size", "1000", "--format", "plain", "--output", "out.txt"]
+        )
+        run(args, stdout=io.StringIO(), stderr=stderr, cwd=self.root)
+        with open(os.path.join(self.root, "out.txt"), encoding="utf-8") as file_handle:
+            rendered = file_handle.read()
+        self.assertIn("VALUE = 1", rendered)
+        self.assertNotIn("xxxx", rendered)
+        self.assertIn("Pominięto (limit rozmiaru): big.txt (5000 B)", stderr.getvalue())
+
+        with self.assertRaises(SystemExit):
+            run(build_parser().parse_args(["--files-from", "brak.txt"]), stdout=io.StringIO(), cwd=self.root)
+        with self.assertRaises(SystemExit):
+            run(build_parser().parse_args(["--files-from", "files.txt", "--stats", "json"]), cwd=self.root)
+
+
+if __name__ == "__main__":
+    unittest.main()
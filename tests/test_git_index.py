@@ -0,0 +1,136 @@
+"""Testy odczytu .git/index i importu katalogu na podstawie indeksu."""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from prompt_assistant.core import (
+    FileEnumeration,
+    GitIndexError,
+    describe_enumeration,
+    read_git_index,
+    scan_directory,
+)
+from prompt_assistant.core.git_index import parse_git_index
+
+
+def _write(root: str, rel: str, data: bytes) -> None:
+    full = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as file_handle:
+        file_handle.write(data)
+
+
+def _git(root: str, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.email=dev@example.com", "-c", "user.name=dev", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+@unittest.skipUnless(shutil.which("git"), "wymaga git")
+class GitIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "repo")
+        os.makedirs(self.root)
+        _git(self.root, "init", "-q")
+        _write(self.root, ".gitignore", b"build/\n*.log\n")
+        _write(self.root, "src/app.py", b"print('app')\n")
+        _write(self.root, "src/pkg/deep/module_with_a_long_name.py", b"x = 1\n")
+        _write(self.root, "src/pkg/deep/module_with_a_longer_name.py", b"y = 2\n")
+        _write(self.root, "docs/readme.md", b"# Docs\n")
+        _git(self.root, "add", "-A")
+        _git(self.root, "commit", "-q", "-m", "init")
+        _write(self.root, "build/out/generated.py", b"ignored = True\n")
+        _write(self.root, "debug.log", b"log\n")
+        _write(self.root, "src/new_feature.py", b"new = 1\n")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_all_index_versions_match_ls_files(self) -> None:
+        expected = _git(self.root, "ls-files", "-z").split("\0")[:-1]
+        for version in ("2", "3", "4"):
+            _git(self.root, "update-index", "--index-version", version)
+            entries = read_git_index(os.path.join(self.root, ".git"))
+            self.assertEqual([entry.path for entry in entries], expected, version)
+        sizes = {entry.path: entry.size for entry in entries}
+        self.assertEqual(sizes["src/app.py"], len(b"print('app')\n"))
+
+    def test_skip_worktree_entries_are_omitted(self) -> None:
+        _git(self.root, "update-index", "--skip-worktree", "docs/readme.md")
+        paths = [entry.path for entry in read_git_index(os.path.join(self.root, ".git"))]
+        self.assertNotIn("docs/readme.md", paths)
+
+    def test_index_import_lists_tracked_files_only(self) -> None:
+        result = scan_directory(self.root, enumeration=FileEnumeration.GIT_INDEX)
+        rels = sorted(imported.rel for imported in result.files)
+        self.assertEqual(
+            rels,
+            [
+                ".gitignore",
+                "docs/readme.md",
+                "src/app.py",
+                "src/pkg/deep/module_with_a_long_name.py",
+                "src/pkg/deep/module_with_a_longer_name.py",
+            ],
+        )
+        self.assertEqual(result.enumeration, FileEnumeration.GIT_INDEX)
+        self.assertIn("5 śledzonych", describe_enumeration(result))
+        self.assertNotIn("walk", {span.name for span in result.spans})
+
+    def test_untracked_mode_adds_files_that_are_not_ignored(self) -> None:
+        result = scan_directory(self.root, enumeration=FileEnumeration.GIT_INDEX_UNTRACKED)
+        rels = {imported.rel for imported in result.files}
+        self.assertIn("src/new_feature.py", rels)
+        self.assertNotIn("debug.log", rels)
+        self.assertNotIn("build/out/generated.py", rels)
+        self.assertEqual(result.untracked_count, 1)
+
+    def test_subdirectory_import_uses_repository_index(self) -> None:
+        result = scan_directory(os.path.join(self.root, "src"), enumeration=FileEnumeration.GIT_INDEX)
+        self.assertEqual(
+            sorted(imported.rel for imported in result.files),
+            ["app.py", "pkg/deep/module_with_a_long_name.py", "pkg/deep/module_with_a_longer_name.py"],
+        )
+
+    def test_deleted_tracked_file_is_reported(self) -> None:
+        os.remove(os.path.join(self.root, "docs", "readme.md"))
+        result = scan_directory(self.root, enumeration=FileEnumeration.GIT_INDEX)
+        self.assertEqual(len(result.read_errors), 1)
+        self.assertTrue(result.read_errors[0].startswith("docs/readme.md:"))
+
+
+    def test_truncated_index_falls_back_to_walk(self) -> None:
+        index_path = os.path.join(self.root, ".git", "index")
+        with open(index_path, "rb") as file_handle:
+            data = file_handle.read()
+        for length in (40, 80, len(data) // 2):
+            with self.subTest(length=length), self.assertRaises(GitIndexError):
+                parse_git_index(data[:length])
+
+        with open(index_path, "wb") as file_handle:
+            file_handle.write(data[:40])
+        result = scan_directory(self.root, enumeration=FileEnumeration.GIT_INDEX)
+        self.assertEqual(result.enumeration, FileEnumeration.WALK)
+        self.assertIn("src/app.py", [imported.rel for imported in result.files])
+
+
+class GitIndexFallbackTests(unittest.TestCase):
+    def test_directory_outside_repository_falls_back_to_walk(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            _write(tmp, "a.py", b"a = 1\n")
+            result = scan_directory(tmp, enumeration=FileEnumeration.GIT_INDEX)
+        self.assertEqual(result.enumeration, FileEnumeration.WALK)
+        self.assertEqual([imported.rel for imported in result.files], ["a.py"])
+
+    def test_invalid_index_is_rejected(self) -> None:
+        with self.assertRaises(GitIndexError):
+            parse_git_index(b"NOPE" + bytes(8))
@@ -0,0 +1,147 @@
+"""Testy importu katalogu z rewizji git przez `git ls-tree` i `git cat-file --batch`."""
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from prompt_assistant.cli import build_parser, run
+from prompt_assistant.core import (
+    BlobCache,
+    FileEnumeration,
+    GitCatFile,
+    GitRevisionError,
+    ImportBudget,
+    describe_enumeration,
+    scan_git_revision,
+)
+
+
+def _write(root: str, rel: str, data: bytes) -> None:
+    full = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as file_handle:
+        file_handle.write(data)
+
+
+def _git(root: str, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.email=dev@example.com", "-c", "user.name=dev", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+@unittest.skipUnless(shutil.which("git"), "wymaga git")
+class GitRevisionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "repo")
+        os.makedirs(self.root)
+        _git(self.root, "init", "-q")
+        _write(self.root, "README.md", b"# Repo\r\n")
+        _write(self.root, "src/app.py", b"VERSION = 1\n")
+        _write(self.root, "src/util.py", b"def helper():\n    return 42\n")
+        _write(self.root, "assets/logo.png", b"\x89PNG\r\n\x1a\n\x00\xff\xfe")
+        _write(self.root, "docs/big.txt", b"x" * 5000)
+        os.symlink("src/app.py", os.path.join(self.root, "link.py"))
+        _git(self.root, "add", "-A")
+        _git(self.root, "commit", "-q", "-m", "v1")
+        _git(self.root, "tag", "v1")
+        _write(self.root, "src/app.py", b"VERSION = 2\n")
+        _write(self.root, "src/new.py", b"NEW = True\n")
+        _git(self.root, "add", "-A")
+        _git(self.root, "commit", "-q", "-m", "v2")
+        # Zmiana w kopii roboczej nie może trafić do importu rewizji.
+        _write(self.root, "src/util.py", b"def helper():\n    return 0\n")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_imports_tree_of_revision_not_working_copy(self) -> None:
+        imported = scan_git_revision(self.root, "v1")
+        contents = {item.rel: item.content for item in imported.files}
+        self.assertEqual(sorted(contents), ["README.md", "docs/big.txt", "src/app.py", "src/util.py"])
+        self.assertEqual(contents["src/app.py"], "VERSION = 1\n")
+        self.assertEqual(contents["src/util.py"], "def helper():\n    return 42\n")
+        self.assertEqual(contents["README.md"], "# Repo\n")
+        self.assertEqual(imported.skipped_binary, 1)
+        self.assertEqual(imported.name, "repo@v1")
+        self.assertEqual(imported.enumeration, FileEnumeration.GIT_REVISION)
+        commit = _git(self.root, "rev-parse", "v1").strip()
+        self.assertEqual(imported.revision, commit)
+        self.assertEqual(describe_enumeration(imported), f"rewizja git {commit[:12]}")
+
+        subdir = scan_git_revision(os.path.join(self.root, "src"), "HEAD")
+        self.assertEqual(sorted(item.rel for item in subdir.files), ["app.py", "new.py", "util.py"])
+
+    def test_blob_cache_skips_unchanged_blobs_across_revisions(self) -> None:
+        cache = BlobCache()
+        with GitCatFile(self.root) as cat_file:
+            first = scan_git_revision(self.root, "v1", blob_cache=cache, cat_file=cat_file)
+            util = next(item for item in first.files if item.rel == "src/util.py")
+            cache.remember_tokens(util.blob_sha, util.content, 7)
+            misses = cache.misses
+            second = scan_git_revision(self.root, "HEAD", blob_cache=cache, cat_file=cat_file)
+        # Nowe bloby w v2 to tylko src/app.py i src/new.py.
+        self.assertEqual(cache.misses - misses, 2)
+        util_again = next(item for item in second.files if item.rel == "src/util.py")
+        self.assertIs(util_again.content, util.content)
+        self.assertEqual(util_again.token_count, 7)
+
+    def test_excludes_and_budget_use_blob_sizes(self) -> None:
+        imported = scan_git_revision(
+            self.root,
+            "HEAD",
+            exclude_patterns=["*.md"],
+            budget=ImportBudget(max_file_bytes=1000),
+        )
+        self.assertEqual(imported.skipped_custom, 1)
+        self.assertEqual(imported.skipped_size, ["docs/big.txt (5000 B)"])
+
+        stopped = scan_git_revision(self.root, "HEAD", budget=ImportBudget(max_total_bytes=20))
+        self.assertIsNotNone(stopped.budget_stop)
+        self.assertLessEqual(stopped.total_bytes, 20)
+
+    def test_binary_blobs_do_not_consume_total_budget(self) -> None:
+        _write(self.root, "assets/photo.jpg", os.urandom(20_000) + b"\0")
+        _git(self.root, "add", "assets/photo.jpg")
+        _git(self.root, "commit", "-q", "-m", "v3")
+
+        imported = scan_git_revision(self.root, "HEAD", budget=ImportBudget(max_total_bytes=10_000))
+        self.assertIsNone(imported.budget_stop)
+        self.assertEqual(imported.skipped_binary, 2)
+        self.assertIn("src/new.py", [item.rel for item in imported.files])
+
+    def test_errors(self) -> None:
+        for revision in ("nie-ma-takiej", "--output=x", ""):
+            with self.subTest(revision=revision), self.assertRaises(GitRevisionError):
+                scan_git_revision(self.root, revision)
+        with self.assertRaises(GitRevisionError):
+            scan_git_revision(self._tmp.name, "HEAD")
+        with GitCatFile(self.root) as cat_file, self.assertRaises(GitRevisionError):
+            list(cat_file.read_blobs(["0" * 40]))
+
+    def test_cli_revision_flag(self) -> None:
+        stdout = io.StringIO()
+        run(build_parser().parse_args(["--revision", "v1", "--format", "plain", "."]), stdout=stdout, cwd=self.root)
+        rendered = stdout.getvalue()
+        self.assertIn("FILE: repo@v1/.tree", rendered)
+        self.assertIn("VERSION = 1", rendered)
+        self.assertNotIn("return 0", rendered)
+
+        cache = BlobCache()
+        args = build_parser().parse_args(["--revision", "HEAD", "."])
+        run(args, stdout=io.StringIO(), cwd=self.root, blob_cache=cache)
+        src_blobs = [line.split()[2] for line in _git(self.root, "ls-tree", "-r", "HEAD", "src").splitlines()]
+        self.assertEqual(len(src_blobs), 3)
+        self.assertTrue(all(cache.get(sha).token_count for sha in src_blobs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Testy limitów importu katalogu egzekwowanych w trakcie skanu."""
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from prompt_assistant.core import FileContentCache, ImportBudget, build_import_report, scan_directory
+
+
+def _write(root: str, rel: str, data: bytes) -> None:
+    full = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as file_handle:
+        file_handle.write(data)
+
+
+class ImportBudgetTests(unittest.TestCase):
+    def test_files_over_per_file_cap_are_skipped_and_reported(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            _write(tmp, "small.py", b"print(1)\n")
+            _write(tmp, "fixtures/huge.json", b"x" * 5000)
+
+            result = scan_directory(tmp, budget=ImportBudget(max_file_bytes=1000))
+
+        self.assertEqual([f.rel for f in result.files], ["small.py"])
+        self.assertEqual(result.skipped_size, ["fixtures/huge.json (5000 B)"])
+        self.assertIsNone(result.budget_stop)
+
+        report = build_import_report(
+            added_count=len(result.files),
+            skipped_git=0,
+            skipped_custom=0,
+            skipped_binary=0,
+            read_errors=[],
+            skipped_size=result.skipped_size,
+        )
+        self.assertIn("Pominięto za duże: 1", report)
+        self.assertIn("fixtures/huge.json (5000 B)", report)
+
+    def test_total_byte_cap_stops_scan_early(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for index in range(10):
+                _write(tmp, f"pkg{index}/mod.py", b"a" * 100)
+
+            result = scan_directory(tmp, budget=ImportBudget(max_total_bytes=350))
+
+        self.assertEqual(len(result.files), 3)
+        self.assertEqual(result.total_bytes, 300)
+        self.assertIn("350 B", result.budget_stop or "")
+
+    def test_projected_token_cap_stops_scan(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for index in range(5):
+                _write(tmp, f"doc{index}.txt", b"word " * 200)
+
+            result = scan_directory(tmp, budget=ImportBudget(max_tokens=600))
+
+        self.assertEqual(len(result.files), 2)
+        self.assertLessEqual(result.projected_tokens, 600)
+        self.assertIn("tokenów", result.budget_stop or "")
+
+        report = build_import_report(
+            added_count=len(result.files),
+            skipped_git=0,
+            skipped_custom=0,
+            skipped_binary=0,
+            read_errors=[],
+            budget_stop=result.budget_stop,
+        )
+        self.assertIn("Import przerwany:", report)
+
+    def test_binary_files_do_not_consume_total_budget(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            _write(tmp, "assets/logo.png", os.urandom(20_000) + b"\0")
+            _write(tmp, "a.py", b"print('a')\n")
+
+            for content_cache in (None, FileContentCache()):
+                with self.subTest(content_cache=content_cache):
+                    result = scan_directory(tmp, budget=ImportBudget(max_tokens=1000), content_cache=content_cache)
+                    self.assertEqual([f.rel for f in result.files], ["a.py"])
+                    self.assertEqual(result.skipped_binary, 1)
+                    self.assertIsNone(result.budget_stop)
+
+    def test_no_budget_reads_everything(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            _write(tmp, "big.txt", b"x" * 50_000)
+            result = scan_directory(tmp)
+        self.assertEqual(len(result.files), 1)
+        self.assertEqual(result.skipped_size, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""Testy leniwych importów przy zimnym starcie."""
+from __future__ import annotations
+
+import unittest
+
+from benchmarks.import_time import measure_import
+from prompt_assistant.utils import get_encoder, prewarm_encoder
+
+
+class ImportBudgetTests(unittest.TestCase):
+    def test_cli_import_skips_heavy_dependencies(self) -> None:
+        _elapsed, loaded = measure_import("prompt_assistant.cli")
+        self.assertEqual(loaded, [])
+
+    def test_gui_import_defers_tokenizer_and_pathspec(self) -> None:
+        _elapsed, loaded = measure_import("prompt_assistant.gui.main_window")
+        self.assertEqual(loaded, [])
+
+    def test_lazy_core_exports_resolve_on_access(self) -> None:
+        from prompt_assistant import core
+        from prompt_assistant.core import compaction
+
+        self.assertIs(core.compact_session, compaction.compact_session)
+        self.assertIn("load_files", dir(core))
+        self.assertTrue(all(hasattr(core, name) for name in core.__all__))
+        with self.assertRaises(AttributeError):
+            core.missing_name
+
+
+class EncoderTests(unittest.TestCase):
+    def test_prewarm_shares_cached_encoder(self) -> None:
+        prewarm_encoder().join(30)
+        self.assertIs(get_encoder(), get_encoder())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Testy raportu pamięci sesji i szczytów alokacji faz (tracemalloc)."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from prompt_assistant.cli import build_parser, run
+from prompt_assistant.core import (
+    ChangeJournal,
+    EntrySourceType,
+    MemoryCategory,
+    Profiler,
+    Session,
+    TokenRollup,
+    add_entry,
+    build_memory_report,
+    create_entry,
+    format_bytes,
+    format_memory_report,
+)
+
+
+class MemoryReportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = Session(prompt_text="Opisz zmiany")
+        self.rollup = TokenRollup.for_session(self.session)
+        self.journal = ChangeJournal.for_session(self.session)
+        self.entries = []
+        for number, path in enumerate(("src/a.py", "src/b.py", "docs/c.md")):
+            content = f"x{number}" * (1000 * (number + 1))
+            entry = create_entry(path, EntrySourceType.DIRECTORY_FILE, content, root="repo")
+            add_entry(self.session, entry)
+            self.entries.append(entry)
+        add_entry(self.session, create_entry("repo/.tree", EntrySourceType.DIRECTORY_TREE, "repo/\n  src/\n", root="repo"))
+
+    def _rows(self, rows) -> dict[str, int]:
+        return {row.key: row.bytes for row in rows}
+
+    def test_categories_sum_to_total_and_cover_observers(self) -> None:
+        report = build_memory_report(self.session)
+        categories = self._rows(report.categories)
+        self.assertEqual(sum(categories.values()), report.total_bytes)
+        for key in (MemoryCategory.PROMPT, MemoryCategory.CONTENT, MemoryCategory.TREE, MemoryCategory.ENTRIES):
+            self.assertGreater(categories[key], 0)
+        self.assertIn("token_rollup", categories)
+        self.assertIn("change_journal", categories)
+        self.assertGreater(categories[MemoryCategory.CONTENT], 12000)
+        self.assertEqual(report.categories, sorted(report.categories, key=lambda row: -row.bytes))
+
+        self.assertEqual([row.key for row in report.roots], ["repo"])
+        directories = {row.key: row.count for row in report.directories}
+        self.assertEqual(directories["repo/src"], 2)
+        self.assertEqual(report.top_entries[0].key, "repo/docs/c.md")
+
+    def test_shared_content_is_counted_once(self) -> None:
+        before = build_memory_report(self.session).total_bytes
+        copy = create_entry("src/copy.py", EntrySourceType.DIRECTORY_FILE, self.entries[2].content, root="repo")
+        add_entry(self.session, copy)
+        after = build_memory_report(self.session)
+        self.assertLess(after.total_bytes - before, len(copy.content))
+        copy_row = next(row for row in after.top_entries if row.key == "repo/src/copy.py")
+        self.assertLess(copy_row.bytes, len(copy.content))
+
+    def test_removed_entries_are_charged_to_journal_and_extra_is_measured(self) -> None:
+        before = self._rows(build_memory_report(self.session).categories)
+        self.journal.remove([self.entries[2].entry_id])
+        after = self._rows(build_memory_report(self.session, extra={"gui": ["a" * 5000]}).categories)
+        self.assertGreater(after["change_journal"] - before["change_journal"], 6000)
+        self.assertLess(after[MemoryCategory.CONTENT], before[MemoryCategory.CONTENT])
+        self.assertGreater(after["gui"], 5000)
+
+    def test_allocation_phases_from_profiler_and_json(self) -> None:
+        profiler = Profiler(trace_allocations=True)
+        with profiler.span("build"):
+            kept = ["y" * 100_000]
+            del kept
+        with profiler.accumulate("read"):
+            pass
+        report = build_memory_report(self.session, top=2, spans=profiler.spans)
+        self.assertEqual([phase.name for phase in report.allocations], ["build"])
+        self.assertGreaterEqual(report.allocations[0].peak_bytes, 100_000)
+        self.assertLess(report.allocations[0].retained_bytes, 100_000)
+
+        payload = json.loads(json.dumps(report.to_json()))
+        self.assertEqual(len(payload["top_entries"]), 2)
+        self.assertEqual(payload["allocations"][0]["phase"], "build")
+        lines = format_memory_report(report)
+        self.assertTrue(lines[0].startswith("Pamięć sesji:"))
+        self.assertIn("Szczyty alokacji (tracemalloc):", lines)
+        self.assertEqual((format_bytes(512), format_bytes(3 * 1024 * 1024)), ("512 B", "3.0 MB"))
+
+    def test_cli_memory_report(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "proj", "src"))
+            with open(os.path.join(root, "proj", "src", "app.py"), "w", encoding="utf-8") as file_handle:
+                file_handle.write("print('hej')\n" * 50)
+            stderr = io.StringIO()
+            args = build_parser().parse_args(["--memory-report", "json", "--trace-alloc", "proj"])
+            run(args, stdout=io.StringIO(), stderr=stderr, cwd=root)
+        payload = json.loads(stderr.getvalue())
+        self.assertEqual(payload["roots"][0]["key"], "proj")
+        self.assertIn("proj/src/app.py", [row["path"] for row in payload["top_entries"]])
+        self.assertIn("scan", [phase["phase"] for phase in payload["allocations"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
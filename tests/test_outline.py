@@ -0,0 +1,169 @@
+"""Testy zarysu plików Pythona (`--outline`) i cache zarysów."""
+from __future__ import annotations
+
+import ast
+import io
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from prompt_assistant.cli import build_parser, run
+from prompt_assistant.core import (
+    EntrySourceType,
+    OutputFormat,
+    Session,
+    add_entry,
+    build_output,
+    create_entry,
+    outline_python,
+    outline_session,
+    outlined_content,
+)
+from prompt_assistant.core import outline
+from prompt_assistant.gui.controllers import _outline_entry_ids
+from prompt_assistant.utils import count_tokens
+
+SOURCE = '''"""Moduł przykładowy.
+
+Dłuższy opis, który nie trafia do zarysu.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+LIMIT = 10
+
+
+@dataclass(slots=True)
+class Point:
+    """Punkt na płaszczyźnie."""
+
+    x: int = 0
+    y: int = 0
+
+    def norm(self, *, exact: bool = False) -> float:
+        """Długość wektora.
+
+        Szczegóły.
+        """
+        return (self.x**2 + self.y**2) ** 0.5
+
+    class Meta:
+        pass
+
+
+async def fetch(url: str, timeout: float = 1.0) -> bytes:
+    data = await os.read(url)
+    return data
+
+
+def helper[T](value: T) -> T:
+    """Zwraca \\"value\\" bez zmian"""
+    return value
+'''
+
+
+class OutlineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        outline._cache.clear()
+
+    def test_outline_keeps_signatures_and_stays_valid_python(self) -> None:
+        text = outline_python(SOURCE)
+        self.assertEqual(
+            text.splitlines(),
+            [
+                '"""Moduł przykładowy."""',
+                "from __future__ import annotations",
+                "import os",
+                "from dataclasses import dataclass",
+                "@dataclass(slots=True)",
+                "class Point:",
+                '    """Punkt na płaszczyźnie."""',
+                "    x: int",
+                "    y: int",
+                "    def norm(self, *, exact: bool=False) -> float:",
+                '        """Długość wektora."""',
+                "    class Meta:",
+                "        ...",
+                "async def fetch(url: str, timeout: float=1.0) -> bytes:",
+                "    ...",
+                "def helper[T](value: T) -> T:",
+                '    """Zwraca "value" bez zmian"""',
+            ],
+        )
+        ast.parse(text)
+        self.assertIsNone(outline_python("def broken(:\n"))
+
+    def test_outlined_content_falls_back_and_uses_cache(self) -> None:
+        self.assertEqual(outlined_content(SOURCE, "notes.md"), SOURCE)
+        self.assertEqual(outlined_content("def broken(:\n", "bad.py"), "def broken(:\n")
+        first = outlined_content(SOURCE, "pkg/mod.py")
+        self.assertIn("class Point:", first)
+        with patch.object(outline, "outline_python", side_effect=AssertionError("cache miss")):
+            self.assertEqual(outlined_content(SOURCE, "other/copy.py"), first)
+
+    def test_outline_session_reports_savings_and_respects_entry_ids(self) -> None:
+        session = Session(prompt_text="Prompt")
+        for path, content in (("a.py", SOURCE), ("b.py", SOURCE + "\n"), ("c.md", "# Tytuł\n"), ("d.py", "x = (\n")):
+            add_entry(session, create_entry(path, EntrySourceType.FILE, content))
+
+        outlined, report = outline_session(session)
+        self.assertEqual([item.path for item in report.files], ["a.py", "b.py"])
+        self.assertGreater(report.saved, 0)
+        self.assertEqual([entry.content for entry in session.entries][0], SOURCE)
+        contents = {entry.path: entry.content for entry in outlined.entries}
+        self.assertEqual(contents["a.py"], outline_python(SOURCE))
+        self.assertEqual(contents["c.md"], "# Tytuł\n")
+        self.assertEqual(contents["d.py"], "x = (\n")
+
+        partial, report = outline_session(session, entry_ids={session.entries[1].entry_id})
+        self.assertEqual([item.path for item in report.files], ["b.py"])
+        self.assertEqual(partial.entries[0].content, SOURCE)
+
+    def test_outline_renders_in_every_output_format(self) -> None:
+        # Zarys jest przekształceniem sesji przed `build_output`, więc działa z każdym profilem wyjścia.
+        for output_format in OutputFormat:
+            with self.subTest(output_format=output_format):
+                session = Session(prompt_text="Prompt", output_format=output_format)
+                selected = create_entry("a.py", EntrySourceType.FILE, SOURCE)
+                for entry in (selected, create_entry("b.py", EntrySourceType.FILE, SOURCE)):
+                    add_entry(session, entry)
+
+                outlined, _report = outline_session(session, entry_ids={selected.entry_id})
+                result = build_output(outlined)
+                self.assertEqual(result.rendered_output.count("return (self.x"), 1)
+                self.assertIn("def norm(self, *, exact: bool=False) -> float:", result.rendered_output)
+                self.assertEqual(result.total_tokens, count_tokens(result.rendered_output))
+                self.assertEqual(build_output(session).rendered_output.count("return (self.x"), 2)
+
+    def test_gui_outlines_only_marked_files(self) -> None:
+        window = SimpleNamespace(
+            attached_files=[{"entry_id": "e1", "outline": True}, {"entry_id": "e2"}],
+            attached_dirs=[{"files": [{"entry_id": "e3", "outline": True}, {"entry_id": "e4", "outline": False}]}],
+        )
+        self.assertEqual(_outline_entry_ids(window), {"e1", "e3"})
+
+    def test_cli_outline_with_compact(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "mod.py"), "w", encoding="utf-8") as file_handle:
+                file_handle.write(SOURCE)
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            args = build_parser().parse_args(["--outline", "--compact", "--format", "plain", "mod.py"])
+            run(args, stdout=stdout, stderr=stderr, cwd=root)
+
+            listed = io.StringIO()
+            args = build_parser().parse_args(["--outline", "--files-from", "-", "--format", "plain"])
+            run(args, stdout=listed, stderr=io.StringIO(), cwd=root, stdin=io.BytesIO(b"mod.py\n"))
+        self.assertIn("def norm(self, *, exact: bool=False) -> float:", stdout.getvalue())
+        self.assertNotIn("return (self.x", stdout.getvalue())
+        self.assertTrue(stderr.getvalue().startswith("Zarys"))
+        self.assertIn("Kompaktowanie", stderr.getvalue())
+        self.assertIn("def norm(self, *, exact: bool=False) -> float:", listed.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
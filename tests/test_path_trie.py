@@ -0,0 +1,96 @@
+"""Testy drzewa ścieżek wpisów i operacji na poddrzewach."""
+from __future__ import annotations
+
+import unittest
+
+from prompt_assistant.core import (
+    EntrySourceType,
+    PathTrie,
+    Session,
+    add_entry,
+    clear_session,
+    count_session_tokens,
+    create_entry,
+    exclude_subtree,
+    include_subtree,
+    remove_subtree,
+    update_entry_content,
+)
+from prompt_assistant.utils import count_tokens
+
+FILES = {
+    "src/app.py": "print('app')\n",
+    "src/util/io.py": "def read():\n    pass\n",
+    "tests/test_app.py": "assert True\n",
+    "tests/unit/test_io.py": "assert read()\n",
+    "docs/index.md": "# Docs\n",
+}
+
+
+class PathTrieTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = Session()
+        self.trie = PathTrie.for_session(self.session)
+        add_entry(self.session, create_entry("repo/.tree", EntrySourceType.DIRECTORY_TREE, "repo/\n", root="repo"))
+        self.entries = {}
+        for path, content in FILES.items():
+            entry = create_entry(path, EntrySourceType.DIRECTORY_FILE, content, root="repo")
+            entry.token_count_cache = count_tokens(content)
+            add_entry(self.session, entry)
+            self.entries[path] = entry
+        notes = create_entry("notes.md", EntrySourceType.FILE, "# Notatki\n")
+        notes.token_count_cache = count_tokens(notes.content)
+        add_entry(self.session, notes)
+
+    def _paths(self, entries) -> list[str]:
+        return sorted(entry.path for entry in entries)
+
+    def test_aggregates_cover_subtrees(self) -> None:
+        self.assertEqual(len(self.trie), 6)
+        tests = self.trie.stats("repo/tests")
+        self.assertEqual((tests.files, tests.active), (2, 2))
+        expected = count_tokens(FILES["tests/test_app.py"]) + count_tokens(FILES["tests/unit/test_io.py"])
+        self.assertEqual(tests.tokens, expected)
+        self.assertTrue(tests.exact)
+        self.assertEqual(self.trie.stats().files, 6)
+        self.assertIsNone(self.trie.stats("repo/missing"))
+        self.assertEqual([name for name, _stats in self.trie.children("repo")], ["docs", "src", "tests"])
+
+    def test_subtree_operations_update_session_and_aggregates(self) -> None:
+        self.assertEqual(exclude_subtree(self.session, self.trie, "repo/tests/"), 2)
+        self.assertEqual(self.trie.stats("repo/tests").active, 0)
+        self.assertEqual(self.trie.stats("repo").active, 3)
+        self.assertEqual(self.trie.stats().tokens, count_session_tokens(self.session)[1] - count_tokens("repo/\n"))
+
+        include_subtree(self.session, self.trie, "repo/tests/unit")
+        excluded = [entry.path for entry in self.session.entries if not entry.include_in_output]
+        self.assertEqual(excluded, ["tests/test_app.py"])
+
+        self.assertEqual(remove_subtree(self.session, self.trie, "repo/src"), 2)
+        self.assertIsNone(self.trie.stats("repo/src"))
+        self.assertEqual(self.trie.stats("repo").files, 3)
+        self.assertNotIn(self.entries["src/app.py"], self.session.entries)
+
+    def test_glob_selection_uses_gitwildmatch(self) -> None:
+        self.assertEqual(self._paths(self.trie.select_glob(["*.md"])), ["docs/index.md", "notes.md"])
+        self.assertEqual(self._paths(self.trie.select_glob(["tests/", "!**/unit/**"])), ["tests/test_app.py"])
+        in_unit = self.trie.select_glob(["test_*.py"], prefix="repo/tests/unit")
+        self.assertEqual(self._paths(in_unit), ["tests/unit/test_io.py"])
+        self.assertEqual(self.trie.select_glob([" "]), [])
+
+    def test_content_changes_and_clear_are_tracked(self) -> None:
+        entry = self.entries["docs/index.md"]
+        update_entry_content(self.session, entry, "# Docs\n" * 20)
+        docs = self.trie.stats("repo/docs")
+        self.assertFalse(docs.exact)
+        entry.token_count_cache = count_tokens(entry.content)
+        self.assertEqual(self.trie.refresh([entry.entry_id, "missing"]), 1)
+        self.assertEqual(self.trie.stats("repo/docs").tokens, entry.token_count_cache)
+
+        clear_session(self.session)
+        self.assertEqual(len(self.trie), 0)
+        self.assertEqual(self.trie.entries_under(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
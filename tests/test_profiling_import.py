@@ -0,0 +1,138 @@
+"""Testy instrumentacji faz i importu katalogu w core."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from prompt_assistant import cli
+from prompt_assistant.core import (
+    NULL_PROFILER,
+    EntrySourceType,
+    Profiler,
+    Session,
+    add_directory_import,
+    add_entry,
+    build_import_report,
+    build_output,
+    create_entry,
+    scan_directory,
+    spans_to_chrome_trace,
+    spans_to_json,
+)
+
+
+def _write(root: str, rel: str, data: bytes) -> None:
+    full = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as file_handle:
+        file_handle.write(data)
+
+
+class ProfilerTests(unittest.TestCase):
+    def test_spans_and_accumulated_counters(self) -> None:
+        profiler = Profiler()
+        with profiler.span("scan") as span:
+            span.add(files=2)
+        for _ in range(3):
+            with profiler.accumulate("read") as read_span:
+                read_span.add(files=1, bytes=10)
+
+        names = [span.name for span in profiler.spans]
+        self.assertEqual(names, ["scan", "read"])
+        read = profiler.spans[1]
+        self.assertEqual(read.calls, 3)
+        self.assertEqual(read.counters, {"files": 3, "bytes": 30})
+
+        trace = spans_to_chrome_trace(profiler.spans)
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+        self.assertEqual(trace["traceEvents"][1]["args"]["bytes"], 30)
+        self.assertEqual(spans_to_json(profiler.spans)[0]["counters"], {"files": 2})
+
+    def test_null_profiler_records_nothing(self) -> None:
+        with NULL_PROFILER.span("scan") as span:
+            span.add(files=1)
+        with NULL_PROFILER.accumulate("read"):
+            pass
+        self.assertEqual(len(NULL_PROFILER.spans), 0)
+
+    def test_build_output_attaches_spans_only_when_profiling(self) -> None:
+        session = Session(prompt_text="Instrukcja")
+        add_entry(session, create_entry("a.py", EntrySourceType.FILE, "print('a')"))
+
+        self.assertEqual(build_output(session).spans, [])
+
+        result = build_output(session, profiler=Profiler())
+        names = [span.name for span in result.spans]
+        self.assertEqual(names, ["render", "tokenize"])
+        self.assertEqual(result.spans[1].counters["tokens"], result.total_tokens)
+
+
+class DirectoryImportTests(unittest.TestCase):
+    def test_scan_directory_skips_and_reports_phases(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            _write(root, ".gitignore", b"*.log\n")
+            _write(root, "src/main.py", b"print('main')\n")
+            _write(root, "src/debug.log", b"log\n")
+            _write(root, "docs/readme.md", b"# Readme\n")
+            _write(root, "img.png", b"\x89PNG\xff\xfe\x00")
+
+            profiler = Profiler()
+            imported = scan_directory(root, exclude_patterns=["*.md"], profiler=profiler)
+
+            rels = sorted(imported_file.rel for imported_file in imported.files)
+            self.assertEqual(rels, [".gitignore", "src/main.py"])
+            self.assertEqual(imported.skipped_git, 1)
+            self.assertEqual(imported.skipped_custom, 1)
+            self.assertEqual(imported.skipped_binary, 1)
+
+            span_names = {span.name for span in imported.spans}
+            self.assertTrue({"gitignore_spec", "scan", "gitignore_match", "binary_check", "read"} <= span_names)
+
+            report = build_import_report(
+                added_count=len(imported.files),
+                skipped_git=imported.skipped_git,
+                skipped_custom=imported.skipped_custom,
+                skipped_binary=imported.skipped_binary,
+                read_errors=imported.read_errors,
+                spans=imported.spans,
+            )
+            self.assertIn("Profil importu:", report)
+
+            session = Session()
+            tree_entry, file_entries = add_directory_import(session, imported)
+            self.assertEqual(tree_entry.source_type, EntrySourceType.DIRECTORY_TREE)
+            self.assertIn("main.py", tree_entry.content)
+            self.assertEqual(len(session.entries), 1 + len(file_entries))
+
+    def test_cli_writes_chrome_trace_profile(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            _write(root, "repo/a.py", b"print('a')\n")
+            profile_path = os.path.join(root, "profile.json")
+            output_path = os.path.join(root, "out.md")
+            argv = [
+                "promptglue",
+                "--profile",
+                profile_path,
+                "--profile-format",
+                "chrome",
+                "--output",
+                output_path,
+                os.path.join(root, "repo"),
+            ]
+            with patch.object(sys, "argv", argv):
+                cli.main()
+
+            with open(profile_path, encoding="utf-8") as file_handle:
+                trace = json.load(file_handle)
+            names = {event["name"] for event in trace["traceEvents"]}
+            self.assertTrue({"scan", "read", "render", "tokenize", "write"} <= names)
+            with open(output_path, encoding="utf-8") as file_handle:
+                self.assertIn("<file path='a.py'>", file_handle.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Testy przyrostowego liczenia tokenów promptu po akapitach."""
+from __future__ import annotations
+
+import random
+import unittest
+from unittest.mock import patch
+
+from prompt_assistant.core import count_prompt_tokens, token_service
+from prompt_assistant.utils import count_tokens
+
+PIECES = (
+    "słowo",
+    "  wcięcie",
+    "\n",
+    "\n\n",
+    "\r\n",
+    "\t",
+    "x.",
+    "1234567",
+    "'s",
+    "  \n",
+    "😀",
+    "def f():\n    return 1\n",
+    "\n \n",
+    "<tag>",
+    "\x0c",
+    "\n\n\nA",
+    "#",
+)
+
+
+def _paragraphs(count: int, words: int = 40) -> str:
+    return "\n".join(" ".join(f"akapit{index}_{word}" for word in range(words)) + "\n" for index in range(count))
+
+
+class PromptTokenTests(unittest.TestCase):
+    def setUp(self) -> None:
+        token_service._block_cache.clear()
+        token_service._prompt_cache = ("", 0)
+
+    def test_block_sum_matches_full_tokenization(self) -> None:
+        generator = random.Random(7)
+        for _ in range(300):
+            text = "".join(generator.choice(PIECES) for _ in range(generator.randint(1, 300)))
+            with self.subTest(text=text[:60]):
+                self.assertEqual(count_prompt_tokens(text), count_tokens(text))
+        self.assertEqual(count_prompt_tokens(""), 0)
+
+    def test_edit_retokenizes_only_changed_paragraph(self) -> None:
+        prompt = _paragraphs(200)
+        self.assertEqual(count_prompt_tokens(prompt), count_tokens(prompt))
+
+        middle = prompt.index("akapit100_5")
+        edited = prompt[:middle] + "nowe " + prompt[middle:]
+        with patch.object(token_service, "count_tokens", wraps=count_tokens) as counted:
+            self.assertEqual(count_prompt_tokens(edited), count_tokens(edited))
+        self.assertEqual(counted.call_count, 1)
+        self.assertIn("nowe akapit100_5", counted.call_args.args[0])
+        self.assertLess(len(counted.call_args.args[0]), 600)
+
+    def test_long_paragraph_is_split_into_lines(self) -> None:
+        lines = [f"linia {number} " + "tekst " * 20 for number in range(300)]
+        prompt = "\n".join(lines)
+        self.assertGreater(len(prompt), token_service.PROMPT_BLOCK_MAX_CHARS)
+        self.assertEqual(count_prompt_tokens(prompt), count_tokens(prompt))
+
+        edited = prompt.replace("linia 150 ", "linia 150 zmieniona ")
+        with patch.object(token_service, "count_tokens", wraps=count_tokens) as counted:
+            self.assertEqual(count_prompt_tokens(edited), count_tokens(edited))
+        self.assertEqual([call.args[0] for call in counted.call_args_list], [lines[150].replace("150 ", "150 zmieniona ") + "\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Testy dokładnego liczenia tokenów wyrenderowanego outputu."""
+from __future__ import annotations
+
+import unittest
+
+from prompt_assistant.core import (
+    EntrySourceType,
+    OutputFormat,
+    Session,
+    add_entry,
+    build_output,
+    count_rendered_tokens,
+    count_session_tokens,
+    create_entry,
+    exclude_entries,
+    update_entry_content,
+)
+from prompt_assistant.utils import count_tokens
+
+CONTENTS = {
+    "src/app.py": "def main():\n    return 1\n",
+    "src/no_newline.py": "value = 1",
+    "src/indented.py": "    indented = True\n\nx = 1\n",
+    "src/windows.txt": "a = 1\r\nb = 2\r\n",
+    "src/blank_first.md": "\n\n# Tytuł\n",
+    "src/only_spaces.txt": "   \n\t",
+    "src/empty.txt": "",
+}
+
+
+def _session(output_format: OutputFormat, prompt: str = "Przejrzyj kod") -> Session:
+    session = Session(prompt_text=prompt, output_format=output_format)
+    add_entry(session, create_entry("repo", EntrySourceType.DIRECTORY_TREE, "repo/\n  src/\n"))
+    for path, content in CONTENTS.items():
+        add_entry(session, create_entry(path, EntrySourceType.DIRECTORY_FILE, content))
+    return session
+
+
+class RenderedTokenTests(unittest.TestCase):
+    def assertMatchesPayload(self, session: Session) -> None:
+        result = build_output(session)
+        self.assertEqual(result.total_tokens, count_tokens(result.rendered_output))
+
+    def test_totals_match_rendered_output_in_every_format(self) -> None:
+        for output_format in OutputFormat:
+            for prompt in ("", "Przejrzyj kod", "  prompt z wcięciem\n\n"):
+                with self.subTest(output_format=output_format, prompt=prompt):
+                    self.assertMatchesPayload(_session(output_format, prompt))
+
+    def test_each_entry_can_be_last_in_output(self) -> None:
+        for output_format in OutputFormat:
+            for path, content in CONTENTS.items():
+                with self.subTest(output_format=output_format, path=path):
+                    session = Session(prompt_text="Zadanie", output_format=output_format)
+                    add_entry(session, create_entry(path, EntrySourceType.FILE, content))
+                    self.assertMatchesPayload(session)
+
+    def test_wrappers_are_counted_separately_from_content(self) -> None:
+        session = _session(OutputFormat.XML)
+        counted = count_rendered_tokens(session)
+        self.assertGreater(counted.wrappers, 0)
+        # `count_session_tokens` liczy tylko prompt i treść wpisów, bez opakowań formatu.
+        self.assertGreater(counted.total, count_session_tokens(session)[2])
+        self.assertEqual(counted.total, build_output(session).total_tokens)
+
+    def test_changes_and_exclusions_are_reflected(self) -> None:
+        session = _session(OutputFormat.MARKDOWN)
+        self.assertMatchesPayload(session)
+        entry = session.entries[1]
+        self.assertTrue(update_entry_content(session, entry, "  zmieniona treść bez końca linii"))
+        exclude_entries(session, [session.entries[2].entry_id])
+        self.assertMatchesPayload(session)
+
+        session.prompt_text = ""
+        exclude_entries(session, [entry.entry_id for entry in session.entries])
+        self.assertEqual(build_output(session).total_tokens, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
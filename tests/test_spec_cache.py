@@ -0,0 +1,86 @@
+"""Testy cache skompilowanych wzorców .gitignore i wykluczeń."""
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from prompt_assistant.core import SpecCache, scan_directory
+from prompt_assistant.core import spec_cache as spec_cache_module
+from prompt_assistant.core.spec_cache import PathMatcher
+
+
+def _write(root: str, rel: str, data: bytes) -> None:
+    full = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as file_handle:
+        file_handle.write(data)
+
+
+class SpecCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        _write(self.root, ".gitignore", b"*.log\n")
+        _write(self.root, "pkg/.gitignore", b"build/\n")
+        _write(self.root, "app.py", b"print(1)\n")
+        _write(self.root, "debug.log", b"x\n")
+        _write(self.root, "pkg/build/out.py", b"x = 1\n")
+        _write(self.root, "pkg/mod.py", b"x = 2\n")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_repeated_imports_reuse_compiled_specs(self) -> None:
+        cache = SpecCache()
+        with patch.object(spec_cache_module, "compile_gitwildmatch", wraps=spec_cache_module.compile_gitwildmatch) as compile_spy:
+            first = scan_directory(self.root, exclude_patterns=["*.md"], spec_cache=cache)
+            scan_directory(self.root, use_gitignore=False, exclude_patterns=["*.md"], spec_cache=cache)
+            second = scan_directory(self.root, exclude_patterns=["*.md"], spec_cache=cache)
+
+        self.assertEqual(compile_spy.call_count, 2)  # .gitignore + wzorce użytkownika
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(first.skipped_git, 2)
+        self.assertEqual(sorted(f.rel for f in first.files), sorted(f.rel for f in second.files))
+
+    def test_changed_gitignore_invalidates_matcher(self) -> None:
+        cache = SpecCache()
+        before = scan_directory(self.root, spec_cache=cache)
+        self.assertIn("pkg/mod.py", [f.rel for f in before.files])
+
+        gitignore = os.path.join(self.root, "pkg", ".gitignore")
+        _write(self.root, "pkg/.gitignore", b"build/\nmod.py\n")
+        stat = os.stat(gitignore)
+        os.utime(gitignore, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        after = scan_directory(self.root, spec_cache=cache)
+        self.assertNotIn("pkg/mod.py", [f.rel for f in after.files])
+        self.assertEqual(cache.misses, 2)
+
+    def test_custom_patterns_are_keyed_by_content(self) -> None:
+        cache = SpecCache()
+        self.assertIsNone(cache.custom_matcher([]))
+        first = cache.custom_matcher(["*.py"])
+        self.assertIs(cache.custom_matcher(["*.py"]), first)
+        self.assertIsNot(cache.custom_matcher(["*.py", "*.md"]), first)
+        self.assertTrue(first.match("a/b.py"))
+        self.assertFalse(first.match("a/b.txt"))
+
+    def test_cache_is_bounded(self) -> None:
+        cache = SpecCache(max_specs=2)
+        first = cache.custom_matcher(["a"])
+        cache.custom_matcher(["b"])
+        cache.custom_matcher(["c"])
+        self.assertIsNot(cache.custom_matcher(["a"]), first)
+
+    def test_match_results_are_bounded(self) -> None:
+        matcher = PathMatcher(["*.log"], max_results=3)
+        for index in range(10):
+            self.assertTrue(matcher.match(f"dir/file{index}.log"))
+            self.assertLessEqual(len(matcher._results), 3)
+        self.assertFalse(matcher.match("dir/file.py"))
+
+
+if __name__ == "__main__":
+    unittest.main()
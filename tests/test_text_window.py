@@ -0,0 +1,78 @@
+"""Testy stronicowania treści dla podglądu dużych plików."""
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from prompt_assistant.core import TextWindowReader, open_text_windows
+from prompt_assistant.core import text_window
+
+
+class TextWindowReaderTests(unittest.TestCase):
+    def test_windows_cover_text_and_end_on_line_boundaries(self) -> None:
+        text = "".join(f"linia {index}\n" for index in range(200))
+        reader = TextWindowReader(text, window_size=100)
+
+        windows = [reader.window(index) for index in range(reader.window_count)]
+        self.assertEqual("".join(windows), text)
+        self.assertGreater(len(windows), 10)
+        self.assertTrue(all(window.endswith("\n") for window in windows))
+
+    def test_index_is_clamped(self) -> None:
+        reader = TextWindowReader("abc\ndef\n", window_size=4)
+        self.assertEqual(reader.window(-5), reader.window(0))
+        self.assertEqual(reader.window(99), reader.window(reader.window_count - 1))
+        self.assertEqual(TextWindowReader("").window(0), "")
+
+    def test_memory_mapped_file_does_not_split_utf8(self) -> None:
+        text = "zażółć gęślą jaźń " * 40  # bez końców linii
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "big.txt")
+            with open(path, "w", encoding="utf-8") as file_handle:
+                file_handle.write(text)
+
+            with TextWindowReader.from_file(path, window_size=64) as reader:
+                self.assertTrue(reader.memory_mapped)
+                windows = [reader.window(index) for index in range(reader.window_count)]
+
+        self.assertEqual("".join(windows), text)
+        self.assertFalse(any("�" in window for window in windows))
+
+    def test_open_text_windows_uses_mmap_only_for_unchanged_large_files(self) -> None:
+        content = "x = 1\n" * 100
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mod.py")
+            with open(path, "w", encoding="utf-8") as file_handle:
+                file_handle.write(content)
+            size = len(content.encode("utf-8"))
+
+            loaded_at = os.stat(path).st_mtime + 1
+
+            original = text_window.MMAP_THRESHOLD
+            text_window.MMAP_THRESHOLD = 10
+            try:
+                with open_text_windows(content, path=path, expected_size=size, loaded_at=loaded_at) as reader:
+                    self.assertTrue(reader.memory_mapped)
+                with open_text_windows(content, path=path, expected_size=size + 1, loaded_at=loaded_at) as reader:
+                    self.assertFalse(reader.memory_mapped)
+                with open_text_windows(content, path=path, expected_size=size) as reader:
+                    self.assertFalse(reader.memory_mapped)
+
+                # Edycja na dysku z zachowaniem rozmiaru: podgląd pokazuje treść wpisu, nie pliku.
+                with open(path, "w", encoding="utf-8") as file_handle:
+                    file_handle.write(content.replace("1", "2"))
+                os.utime(path, (loaded_at + 5, loaded_at + 5))
+                with open_text_windows(content, path=path, expected_size=size, loaded_at=loaded_at) as reader:
+                    self.assertFalse(reader.memory_mapped)
+                    self.assertEqual(reader.window(0), content)
+            finally:
+                text_window.MMAP_THRESHOLD = original
+
+            with open_text_windows(content, path=path, expected_size=size, loaded_at=loaded_at) as reader:
+                self.assertFalse(reader.memory_mapped)
+                self.assertEqual(reader.window(0), content)
+
+
+if __name__ == "__main__":
+    unittest.main()
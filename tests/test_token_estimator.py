@@ -0,0 +1,76 @@
+"""Testy estymatora tokenów i leniwego uzupełniania dokładnych wartości."""
+from __future__ import annotations
+
+import inspect
+import unittest
+
+from prompt_assistant.core import (
+    EntrySourceType,
+    Session,
+    TokenEstimate,
+    add_entry,
+    count_session_tokens,
+    create_entry,
+    estimate_session_tokens,
+    estimate_tokens,
+    refresh_entry_token_cache,
+    update_entry_content,
+)
+from prompt_assistant.core import renderer
+from prompt_assistant.utils import count_tokens
+
+
+class TokenEstimatorTests(unittest.TestCase):
+    def test_estimate_is_close_to_exact_count_for_source_code(self) -> None:
+        source = inspect.getsource(renderer)
+        exact = count_tokens(source)
+        estimate = TokenEstimate.from_estimate(estimate_tokens(source))
+        self.assertLessEqual(estimate.low, exact)
+        self.assertGreaterEqual(estimate.high, exact)
+
+    def test_long_text_is_estimated_from_samples(self) -> None:
+        text = "def handler(value):\n    return value + 1\n" * 20_000
+        exact = count_tokens(text)
+        self.assertLess(abs(estimate_tokens(text) - exact) / exact, 0.25)
+
+    def test_session_estimate_converges_to_exact_counts(self) -> None:
+        session = Session(prompt_text="Przeanalizuj kod")
+        first = create_entry("a.py", EntrySourceType.FILE, "print('a')\n")
+        second = create_entry("b.py", EntrySourceType.FILE, "print('b')\n", include_in_output=False)
+        add_entry(session, first)
+        add_entry(session, second)
+
+        estimate = estimate_session_tokens(session)
+        self.assertFalse(estimate.exact)
+        self.assertEqual(estimate.pending_entries, [first])
+
+        refresh_entry_token_cache(first)
+        _prompt, attachments, total = count_session_tokens(session)
+        estimate = estimate_session_tokens(session)
+        self.assertTrue(estimate.exact)
+        self.assertEqual(estimate.attachments.tokens, attachments)
+        self.assertEqual(estimate.total.tokens, total)
+
+    def test_content_change_invalidates_caches(self) -> None:
+        entry = create_entry("repo/.tree", EntrySourceType.DIRECTORY_TREE, ".")
+        refresh_entry_token_cache(entry)
+        self.assertIsNotNone(entry.token_count_cache)
+
+        self.assertFalse(update_entry_content(Session(), entry, "."))
+        self.assertIsNotNone(entry.token_count_cache)
+
+        self.assertTrue(update_entry_content(Session(), entry, ".\n└── a.py"))
+        self.assertIsNone(entry.token_count_cache)
+        self.assertIsNone(entry.token_estimate_cache)
+
+    def test_special_token_markers_in_files_are_counted_as_text(self) -> None:
+        session = Session()
+        entry = create_entry("tokenizer.py", EntrySourceType.FILE, 'EOT = "<|endoftext|>"\n')
+        add_entry(session, entry)
+        _prompt, attachments, _total = count_session_tokens(session)
+        self.assertGreater(attachments, 3)
+        self.assertEqual(attachments, count_tokens('EOT = "<|endoftext|>"\n'))
+
+
+if __name__ == "__main__":
+    unittest.main()
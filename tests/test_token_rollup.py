@@ -0,0 +1,113 @@
+"""Testy przyrostowych agregatów tokenów i wyjścia CLI --stats."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from prompt_assistant import cli
+from prompt_assistant.core import (
+    EntrySourceType,
+    RollupKind,
+    Session,
+    TokenRollup,
+    add_entry,
+    clear_session,
+    create_entry,
+    exclude_entries,
+    include_entries,
+    refresh_entry_token_cache,
+    remove_entry,
+)
+
+
+def _rows(rollup: TokenRollup, kind: RollupKind) -> dict[str, tuple[int, int]]:
+    return {row.key: (row.tokens, row.files) for row in rollup.rows(kind)}
+
+
+class TokenRollupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = Session()
+        self.rollup = TokenRollup.for_session(self.session)
+        self.tree = create_entry("repo/.tree", EntrySourceType.DIRECTORY_TREE, ".\n└── src", root="repo")
+        self.app = create_entry("src/app.py", EntrySourceType.DIRECTORY_FILE, "print('app')\n" * 10, root="repo")
+        self.util = create_entry("src/lib/util.py", EntrySourceType.DIRECTORY_FILE, "x = 1\n", root="repo")
+        self.doc = create_entry("README", EntrySourceType.DIRECTORY_FILE, "Opis projektu\n", root="repo")
+        self.single = create_entry("notes.md", EntrySourceType.FILE, "# Notatki\n")
+        for entry in (self.tree, self.app, self.util, self.doc, self.single):
+            add_entry(self.session, entry)
+
+    def _assert_matches_rebuild(self) -> None:
+        rebuilt = TokenRollup.for_session(Session(entries=list(self.session.entries)))
+        for kind in RollupKind:
+            self.assertEqual(_rows(self.rollup, kind), _rows(rebuilt, kind), kind)
+
+    def test_groups_by_root_directory_and_extension(self) -> None:
+        directories = _rows(self.rollup, RollupKind.DIRECTORY)
+        self.assertEqual(set(directories), {"repo/src", "repo/src/lib"})
+        self.assertEqual(directories["repo/src"][1], 2)
+        self.assertEqual(directories["repo/src/lib"][1], 1)
+
+        roots = _rows(self.rollup, RollupKind.ROOT)
+        self.assertEqual(roots["repo"][1], 3)
+        self.assertEqual(roots["(pliki)"][1], 1)
+
+        extensions = _rows(self.rollup, RollupKind.EXTENSION)
+        self.assertEqual(set(extensions), {".py", ".md", "(brak)", "(drzewo)"})
+        self.assertEqual(extensions[".py"][1], 2)
+
+    def test_toggle_remove_and_clear_update_incrementally(self) -> None:
+        exclude_entries(self.session, [self.app.entry_id])
+        self.assertEqual(_rows(self.rollup, RollupKind.DIRECTORY)["repo/src"][1], 1)
+        self._assert_matches_rebuild()
+
+        include_entries(self.session, [self.app.entry_id])
+        remove_entry(self.session, self.util.entry_id)
+        self.assertNotIn("repo/src/lib", _rows(self.rollup, RollupKind.DIRECTORY))
+        self._assert_matches_rebuild()
+
+        clear_session(self.session)
+        self.assertEqual(self.rollup.rows(RollupKind.ROOT), [])
+        self.assertEqual(self.rollup.total().tokens, 0)
+
+    def test_refresh_replaces_estimates_with_exact_counts(self) -> None:
+        self.assertFalse(self.rollup.total().exact)
+        for entry in self.session.entries:
+            refresh_entry_token_cache(entry)
+        self.assertEqual(self.rollup.refresh([entry.entry_id for entry in self.session.entries] + ["prompt"]), 5)
+
+        total = self.rollup.total()
+        self.assertTrue(total.exact)
+        self.assertEqual(total.tokens, sum(entry.token_count_cache for entry in self.session.entries))
+        self.assertTrue(all(row.exact for row in self.rollup.rows(RollupKind.DIRECTORY)))
+
+    def test_top_entries_skip_directory_trees(self) -> None:
+        top = self.rollup.top_entries(2)
+        self.assertEqual(top[0][0], self.app)
+        self.assertNotIn(self.tree, [entry for entry, _estimate in self.rollup.top_entries(10)])
+
+
+class CliStatsTests(unittest.TestCase):
+    def test_cli_prints_stats_json(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "repo", "pkg"))
+            with open(os.path.join(root, "repo", "pkg", "a.py"), "w", encoding="utf-8") as file_handle:
+                file_handle.write("print('a')\n")
+            argv = ["promptglue", "--stats", "json", "--output", os.path.join(root, "out.md"), os.path.join(root, "repo")]
+            stdout = io.StringIO()
+            with patch.object(sys, "argv", argv), redirect_stdout(stdout):
+                cli.main()
+
+        stats = json.loads(stdout.getvalue())
+        self.assertTrue(stats["total"]["exact"])
+        self.assertEqual(stats["directories"][0]["key"], "repo/pkg")
+        self.assertEqual(stats["top_files"][0]["path"], "repo/pkg/a.py")
+
+
+if __name__ == "__main__":
+    unittest.main()
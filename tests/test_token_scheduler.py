@@ -0,0 +1,111 @@
+"""Testy priorytetowego liczenia tokenów w tle."""
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from prompt_assistant.core import (
+    EntrySourceType,
+    Session,
+    TokenCountScheduler,
+    TokenPriority,
+    add_entry,
+    count_session_tokens,
+    create_entry,
+    estimate_session_tokens,
+    schedule_session_tokens,
+)
+from prompt_assistant.core import token_scheduler
+
+
+def _wait_idle(scheduler: TokenCountScheduler, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while scheduler.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+class TokenSchedulerTests(unittest.TestCase):
+    def test_fills_token_cache_for_all_entries(self) -> None:
+        session = Session(prompt_text="Instrukcja")
+        entries = [create_entry(f"f{i}.py", EntrySourceType.FILE, f"print({i})\n") for i in range(20)]
+        entries[0].include_in_output = False
+        for entry in entries:
+            add_entry(session, entry)
+
+        scheduler = TokenCountScheduler(max_workers=3)
+        try:
+            scheduled = schedule_session_tokens(scheduler, session)
+            self.assertEqual(scheduled, 21)
+            _wait_idle(scheduler)
+        finally:
+            scheduler.shutdown()
+
+        self.assertTrue(all(entry.token_count_cache is not None for entry in entries))
+        self.assertTrue(estimate_session_tokens(session).exact)
+        self.assertEqual(estimate_session_tokens(session).total.tokens, count_session_tokens(session)[2])
+
+    def test_visible_then_included_then_excluded_order(self) -> None:
+        session = Session()
+        blocker = create_entry("blocker.py", EntrySourceType.FILE, "x")
+        excluded = create_entry("excluded.py", EntrySourceType.FILE, "x", include_in_output=False)
+        included = create_entry("included.py", EntrySourceType.FILE, "x")
+        visible = create_entry("visible.py", EntrySourceType.FILE, "x", include_in_output=False)
+        for entry in (excluded, included, visible):
+            add_entry(session, entry)
+
+        release = threading.Event()
+        order: list[str] = []
+
+        def fake_refresh(entry):
+            if entry is blocker:
+                release.wait(5)
+            order.append(entry.path)
+            entry.token_count_cache = 1
+            return 1
+
+        scheduler = TokenCountScheduler(max_workers=1)
+        try:
+            with patch.object(token_scheduler, "refresh_entry_token_cache", fake_refresh):
+                scheduler.schedule_entry(blocker, TokenPriority.VISIBLE)
+                time.sleep(0.05)
+                session.prompt_text = ""
+                schedule_session_tokens(scheduler, session, visible_ids=[visible.entry_id])
+                release.set()
+                _wait_idle(scheduler)
+        finally:
+            scheduler.shutdown()
+
+        self.assertEqual(order, ["blocker.py", "visible.py", "included.py", "excluded.py"])
+
+    def test_reprioritized_entry_is_counted_once(self) -> None:
+        entry = create_entry("a.py", EntrySourceType.FILE, "x")
+        calls: list[str] = []
+        release = threading.Event()
+        blocker = create_entry("blocker.py", EntrySourceType.FILE, "x")
+
+        def fake_refresh(target):
+            if target is blocker:
+                release.wait(5)
+            calls.append(target.path)
+            return 1
+
+        scheduler = TokenCountScheduler(max_workers=1)
+        try:
+            with patch.object(token_scheduler, "refresh_entry_token_cache", fake_refresh):
+                scheduler.schedule_entry(blocker, TokenPriority.VISIBLE)
+                time.sleep(0.05)
+                self.assertTrue(scheduler.schedule_entry(entry, TokenPriority.EXCLUDED))
+                self.assertTrue(scheduler.schedule_entry(entry, TokenPriority.VISIBLE))
+                self.assertFalse(scheduler.schedule_entry(entry, TokenPriority.INCLUDED))
+                release.set()
+                _wait_idle(scheduler)
+        finally:
+            scheduler.shutdown()
+
+        self.assertEqual(calls, ["blocker.py", "a.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
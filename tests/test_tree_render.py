@@ -0,0 +1,77 @@
+"""Testy renderowania drzewa katalogu z limitami głębokości, zwijania i tokenów."""
+from __future__ import annotations
+
+import unittest
+
+from prompt_assistant.core import TreeBudget, render_directory_tree
+from prompt_assistant.utils import count_tokens, render_tree_structure
+
+PATHS = [
+    "README.md",
+    "src/app.py",
+    "src/core/models.py",
+    "src/core/ops.py",
+    "vendor/lib/a.js",
+    "vendor/lib/b.js",
+    "vendor/lib/c.js",
+]
+
+
+class TreeRenderTests(unittest.TestCase):
+    def test_default_rendering_lists_every_file(self) -> None:
+        self.assertEqual(
+            render_tree_structure(PATHS),
+            "\n".join(
+                [
+                    ".",
+                    "├── src",
+                    "│   ├── core",
+                    "│   │   ├── models.py",
+                    "│   │   └── ops.py",
+                    "│   └── app.py",
+                    "├── vendor",
+                    "│   └── lib",
+                    "│       ├── a.js",
+                    "│       ├── b.js",
+                    "│       └── c.js",
+                    "└── README.md",
+                ]
+            ),
+        )
+        self.assertEqual(render_tree_structure([]), ".")
+        deep = "/".join(f"d{level}" for level in range(2000)) + "/leaf.txt"
+        self.assertTrue(render_tree_structure([deep]).endswith("└── leaf.txt"))
+
+    def test_depth_and_collapse_use_summary_lines(self) -> None:
+        tokens = {path: 1000 * (number + 1) for number, path in enumerate(PATHS)}
+        tree = render_tree_structure(PATHS, max_depth=1, file_tokens=tokens)
+        self.assertIn("├── src\n│   └── … 3 files, 9.0k tokens", tree)
+        self.assertIn("├── vendor\n│   └── … 3 files, 18.0k tokens", tree)
+
+        collapsed = render_tree_structure(PATHS, collapse_over=2)
+        self.assertIn("│   └── … 3 files\n├── vendor\n│   └── … 3 files\n└── README.md", collapsed)
+        self.assertEqual(render_tree_structure(PATHS, max_depth=0), ".\n└── … 7 files")
+
+    def test_token_cap_picks_deepest_tree_that_fits(self) -> None:
+        full = render_tree_structure(PATHS)
+        self.assertEqual(render_tree_structure(PATHS, max_tokens=count_tokens(full) + 10), full)
+
+        paths = [f"pkg{number % 30}/mod{number % 11}/file{number}.py" for number in range(3000)]
+        for cap in (40, 400, 1500):
+            tree = render_tree_structure(paths, max_tokens=cap, file_tokens={path: 50 for path in paths})
+            self.assertLessEqual(count_tokens(tree), cap)
+            self.assertIn("files", tree.splitlines()[-1])
+        # Nawet pierwszy poziom się nie mieści: pary katalog + podsumowanie, potem reszta plików.
+        truncated = render_tree_structure(paths, max_tokens=40).splitlines()
+        shown_dirs = (len(truncated) - 2) // 2
+        self.assertEqual(truncated[-1], f"└── … {3000 - 100 * shown_dirs:,} files")
+
+    def test_directory_budget(self) -> None:
+        files = [(path, 100) for path in PATHS]
+        self.assertEqual(render_directory_tree(files), render_tree_structure(PATHS))
+        tree = render_directory_tree(files, TreeBudget(collapse_over=2))
+        self.assertIn("├── vendor\n│   └── … 3 files, 300 tokens", tree)
+
+
+if __name__ == "__main__":
+    unittest.main()